@@ -0,0 +1,84 @@
+"""
+Token-bucket admission control for the ingest path
+Bucket arithmetic shared by the DynamoDB buckets in db.py, plus an
+in-process stand-in (ADMISSION_BACKEND=local) for tests and local runs
+
+Each ingest takes one token from the user's bucket, then one from the
+global bucket. Checking the user first keeps one heavy user from draining
+the global budget, so under overload every user keeps their share.
+"""
+
+import os
+import math
+import time
+import threading
+from typing import Dict, Tuple
+
+# Configuration
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true'
+ADMISSION_BACKEND = os.getenv('ADMISSION_BACKEND', 'dynamodb')  # 'dynamodb' or 'local'
+USER_INGEST_RATE = float(os.getenv('USER_INGEST_RATE_PER_MINUTE', '10')) / 60
+USER_INGEST_BURST = float(os.getenv('USER_INGEST_BURST', '20'))
+GLOBAL_INGEST_RATE = float(os.getenv('GLOBAL_INGEST_RATE_PER_MINUTE', '120')) / 60
+GLOBAL_INGEST_BURST = float(os.getenv('GLOBAL_INGEST_BURST', '40'))
+
+
+def refill(tokens: float, updated_at_ms: int, now_ms: int, rate: float, capacity: float) -> float:
+    """
+    Tokens in a bucket after refilling at `rate` per second since its last update
+    """
+    elapsed = max(now_ms - updated_at_ms, 0) / 1000
+    return min(capacity, tokens + elapsed * rate)
+
+
+def retry_after(tokens: float, rate: float) -> int:
+    """
+    Whole seconds until the bucket holds one token again
+    """
+    return max(1, math.ceil((1 - tokens) / rate))
+
+
+def full_after(tokens: float, rate: float, capacity: float) -> int:
+    """
+    Whole seconds until the bucket is full again (an absent bucket is full,
+    so stored buckets can expire after this)
+    """
+    return max(1, math.ceil((capacity - tokens) / rate))
+
+
+class LocalTokenBuckets:
+    """
+    In-process token buckets with the same semantics as the DynamoDB ones
+    Only limits the current container; use for tests and local runs
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: Dict[str, str], rate: float, capacity: float) -> Tuple[bool, int]:
+        """
+        Take one token
+
+        Returns:
+            (admitted, retry_after seconds; 0 when admitted)
+        """
+        now_ms = int(time.time() * 1000)
+        name = (key['PK'], key['SK'])
+        with self._lock:
+            tokens, updated_at = self._buckets.get(name, (capacity, now_ms))
+            tokens = refill(tokens, updated_at, now_ms, rate, capacity)
+            if tokens < 1:
+                return False, retry_after(tokens, rate)
+            self._buckets[name] = (tokens - 1, now_ms)
+            return True, 0
+
+    def refund(self, key: Dict[str, str]) -> None:
+        """
+        Return a token taken for a request that was refused further on
+        """
+        name = (key['PK'], key['SK'])
+        with self._lock:
+            if name in self._buckets:
+                tokens, updated_at = self._buckets[name]
+                self._buckets[name] = (tokens + 1, updated_at)
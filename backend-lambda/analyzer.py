@@ -4,13 +4,18 @@ Job content analysis using Amazon Bedrock or Anthropic API
 
 import os
 import json
+import asyncio
 import logging
+import weakref
+import hashlib
+import functools
 import boto3
 from botocore.exceptions import ClientError
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Generator
 import anthropic
+from metrics import emit_metric
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +26,23 @@ DEFAULT_MODEL_ID = 'claude-haiku-4-5-20251001'  # Claude Haiku 4.5 (October 2025
 DEFAULT_BEDROCK_MODEL_ID = 'us.anthropic.claude-haiku-4-5-20251001-v1:0'  # Bedrock Haiku 4.5
 DEFAULT_AWS_REGION = 'us-east-2'
 
+# Tiered model routing: short, clean postings start on the fast tier and
+# escalate to stronger tiers only when the output fails validation
+MODEL_ROUTING = os.getenv('MODEL_ROUTING', 'tiered')  # 'tiered' or 'off'
+FAST_MAX_TOKENS = int(os.getenv('FAST_MAX_TOKENS', '800'))
+# The fast tier runs a cheaper model than the default (standard) one. It
+# is opt-in: with no fast model set, routing starts on the standard tier
+# (the default model is already the cheapest current one)
+FAST_MODEL_ID = os.getenv('FAST_MODEL_ID', '')
+FAST_BEDROCK_MODEL_ID = os.getenv('FAST_BEDROCK_MODEL_ID', '')
+STRONG_MODEL_ID = os.getenv('STRONG_MODEL_ID', 'claude-sonnet-4-5-20250929')
+STRONG_BEDROCK_MODEL_ID = os.getenv('STRONG_BEDROCK_MODEL_ID', 'us.anthropic.claude-sonnet-4-5-20250929-v1:0')
+ROUTING_SHORT_CONTENT_CHARS = int(os.getenv('ROUTING_SHORT_CONTENT_CHARS', '12000'))
+ROUTING_MIN_CLEAN_RATIO = float(os.getenv('ROUTING_MIN_CLEAN_RATIO', '0.85'))
+MODEL_TIERS = ['fast', 'standard', 'strong']
+REQUIRED_FIELDS = ['title', 'company', 'location']
+NOTES_MAX_TOKENS = int(os.getenv('NOTES_MAX_TOKENS', '300'))
+
 # Initialize clients based on provider
 aws_region = os.getenv('AWS_DEFAULT_REGION', DEFAULT_AWS_REGION)
 bedrock_client = None
@@ -38,106 +60,356 @@ else:  # Default to Anthropic
         logger.error("ANTHROPIC_API_KEY not found in environment")
         raise ValueError("ANTHROPIC_API_KEY is required when LLM_PROVIDER is 'anthropic'")
 
+# Async Anthropic clients, one per event loop (connections cannot cross loops)
+async_anthropic_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, anthropic.AsyncAnthropic]' = weakref.WeakKeyDictionary()
+# Rendered format instructions per parser (static for the container's life)
+format_instructions_cache: Dict[int, str] = {}
 
-class JobAnalysis(BaseModel):
-    """Pydantic model for structured job analysis output - matches DynamoDB schema"""
+
+class JobFields(BaseModel):
+    """Pydantic model for the structured job fields (everything except the notes summary)"""
     # Required fields
     title: str = Field(description="Job title")
     company: str = Field(description="Company name")
     location: str = Field(description="Job location (city, state, country, or 'Remote')")
 
     # Optional fields matching DynamoDB schema
-    salary_range: Optional[str] = Field(description="Compensation range in format '$XXX,XXX - $XXX,XXX' (e.g., '$120,000 - $180,000', '$50,000 - $70,000'). Always use commas for thousands separator and include currency symbol. Use 'per year' or annual amounts only.", default=None)
+    salary_range: Optional[str] = Field(description="Compensation exactly as stated in the posting, including currency and pay period (e.g., '$120,000 - $180,000', '$45 - $60 per hour', '€70k per year')", default=None)
     employment_type: Optional[str] = Field(description="Employment type: Full-time, Part-time, Internship, Contract, Freelance", default=None)
     source: Optional[str] = Field(description="Job board or source (e.g., LinkedIn, Indeed, Greenhouse, Company Website)", default=None)
     tags: Optional[List[str]] = Field(description="List of relevant skills, technologies, or keywords (e.g., ['Python', 'AWS', 'React'])", default_factory=list)
+
+
+class JobAnalysis(JobFields):
+    """Pydantic model for structured job analysis output - matches DynamoDB schema"""
     notes: Optional[str] = Field(description="Brief summary or key highlights about the job (2-3 sentences). Include any notable benefits, requirements, or unique aspects.", default=None)
 
 
 # Initialize output parser after class definition
 parser = PydanticOutputParser(pydantic_object=JobAnalysis)
+fields_parser = PydanticOutputParser(pydantic_object=JobFields)
 
 
-def analyze_with_bedrock(scraped_content: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+def analysis_steps(
+    scraped_content: Optional[Dict[str, Any]],
+    include_notes: bool = True
+) -> Generator[Tuple[str, Optional[str], Optional[int]], Optional[str], Optional[Dict[str, Any]]]:
     """
-    Analyze scraped content using Amazon Bedrock or Anthropic API
+    Routing and escalation of one analysis, independent of the transport
+    Yields (prompt, model_id, max_tokens) for each LLM call and is sent the
+    response text (None on failure); returns the analysis, as
+    analyze_with_bedrock() does. Drivers only make the call
+
+    Args:
+        scraped_content: extract_job_content() output
+        include_notes: Whether to extract the notes summary too
     """
-    try:
-        logger.info(f"Analyzing content with {LLM_PROVIDER.upper()}...")
+    if not scraped_content or not scraped_content.get("content"):
+        logger.warning("No content to analyze")
+        return None
 
-        if not scraped_content:
-            logger.warning("No content to analyze")
-            return None
+    # Create analysis prompt with format instructions
+    content_text = scraped_content["content"]
+    active_parser = parser if include_notes else fields_parser
+    prompt = create_analysis_prompt(content_text, active_parser, include_notes)
 
-        # Prepare content for analysis
-        content_text = scraped_content.get("content", "")
-        if not content_text:
-            logger.warning("No content text to analyze")
+    if MODEL_ROUTING != 'tiered':
+        analysis_text = yield prompt, None, None
+        if not analysis_text:
+            logger.error("No analysis text returned from LLM")
             return None
+        return parse_analysis_text(analysis_text, active_parser)
+
+    # Start on the cheapest suitable tier, escalate on invalid output
+    tiers = active_tiers()
+    start_tier = choose_model_tier(content_text)
+    got_response = False
+    partial_data = None
+    for tier in tiers[tiers.index(start_tier):]:
+        model_id, max_tokens = get_tier_config(tier)
+        emit_metric('AnalysisTierCalls', dimensions={'Tier': tier})
+
+        analysis_text = yield prompt, model_id, max_tokens
+        if not analysis_text:
+            continue
+        got_response = True
 
-        # Create analysis prompt with format instructions
-        prompt = create_analysis_prompt(content_text, parser)
+        analyzed_data = try_parse_analysis(analysis_text, active_parser)
+        if analyzed_data and is_valid_analysis(analyzed_data):
+            emit_metric('AnalysisTierResolved', dimensions={'Tier': tier})
+            return analyzed_data
 
-        # Call appropriate LLM provider
-        if LLM_PROVIDER == 'bedrock':
-            analysis_text = call_bedrock(prompt)
-        else:  # anthropic
-            analysis_text = call_anthropic(prompt)
+        partial_data = analyzed_data or partial_data
+        logger.warning(f"Invalid analysis from {tier} tier ({model_id}), escalating")
+        emit_metric('AnalysisTierEscalations', dimensions={'Tier': tier})
 
-        if not analysis_text:
-            logger.error("No analysis text returned from LLM")
-            return None
+    if not got_response:
+        logger.error("No analysis text returned from LLM")
+        return None
+
+    # Keep whatever the strongest tier could extract over a blank fallback
+    emit_metric('AnalysisFallbacks')
+    return partial_data or create_fallback_response()
 
-        # Use LangChain output parser
+
+def analyze_with_bedrock(
+    scraped_content: Optional[Dict[str, Any]],
+    include_notes: bool = True,
+    usage: Optional[List[Dict[str, Any]]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Analyze scraped content using Amazon Bedrock or Anthropic API
+    With include_notes=False only the structured fields are extracted
+    and the notes summary is left to generate_notes()
+    Token usage of every LLM call is appended to `usage` if given
+    """
+    try:
+        logger.info(f"Analyzing content with {LLM_PROVIDER.upper()}...")
+        steps = analysis_steps(scraped_content, include_notes)
         try:
-            analyzed_data = parser.parse(analysis_text)
-            logger.info(f"Successfully analyzed content with {LLM_PROVIDER.upper()}")
-            return analyzed_data.dict()
-        except Exception as e:
-            logger.error(f"Error parsing with LangChain parser: {str(e)}", exc_info=True)
-            return create_fallback_response()
+            prompt, model_id, max_tokens = next(steps)
+            while True:
+                prompt, model_id, max_tokens = steps.send(call_llm(prompt, model_id, max_tokens, usage))
+        except StopIteration as done:
+            return done.value
 
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}", exc_info=True)
         return None
 
 
-def call_anthropic(prompt: str) -> Optional[str]:
+def parse_analysis_text(analysis_text: str, active_parser: PydanticOutputParser = parser) -> Dict[str, Any]:
     """
-    Call Anthropic API directly
+    Parse raw LLM output into a JobAnalysis dict
+    Falls back to create_fallback_response() when parsing fails
+    """
+    analyzed_data = try_parse_analysis(analysis_text, active_parser)
+    return analyzed_data if analyzed_data is not None else create_fallback_response()
+
+
+def try_parse_analysis(analysis_text: str, active_parser: PydanticOutputParser = parser) -> Optional[Dict[str, Any]]:
     """
+    Parse raw LLM output into a JobAnalysis dict
+    Returns None if parsing fails
+    """
+    # Use LangChain output parser
     try:
-        model_id = os.getenv('ANTHROPIC_MODEL_ID', DEFAULT_MODEL_ID)
-        logger.info(f"Using Anthropic model: {model_id}")
+        analyzed_data = active_parser.parse(analysis_text)
+        logger.info(f"Successfully analyzed content with {LLM_PROVIDER.upper()}")
+        return analyzed_data.dict()
+    except Exception as e:
+        logger.error(f"Error parsing with LangChain parser: {str(e)}", exc_info=True)
+        return None
 
-        message = anthropic_client.messages.create(
-            model=model_id,
-            max_tokens=MAX_TOKENS,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
 
-        return message.content[0].text
+def is_valid_analysis(analyzed_data: Dict[str, Any]) -> bool:
+    """
+    Check that all required fields came back non-empty and not 'Unknown'
+    """
+    for field in REQUIRED_FIELDS:
+        value = (analyzed_data.get(field) or '').strip()
+        if not value or value.lower() == 'unknown':
+            return False
+    return True
+
+
+def choose_model_tier(content_text: str) -> str:
+    """
+    Pick the starting model tier for a posting
+    Short postings that are mostly plain text go to the fast tier, if one
+    is configured
+    """
+    if 'fast' not in active_tiers() or len(content_text) > ROUTING_SHORT_CONTENT_CHARS:
+        return 'standard'
+
+    # Markup-heavy content (e.g. HTML fallback) is harder to extract from
+    clean_chars = sum(1 for c in content_text if c.isalnum() or c.isspace() or c in ".,:;-$()/'%&+")
+    if clean_chars / max(len(content_text), 1) < ROUTING_MIN_CLEAN_RATIO:
+        return 'standard'
+
+    return 'fast'
+
+
+def reset_clients() -> None:
+    """
+    Recreate the provider clients so no pooled connection survives, e.g.
+    after a snapshot restore when connections opened before the snapshot
+    are dead. Bedrock's botocore pool is cleared and reopens on next use
+    """
+    global anthropic_client
+    if bedrock_client:
+        bedrock_client.close()
+    if anthropic_client:
+        anthropic_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+    async_anthropic_clients.clear()
+
+
+def open_connections() -> None:
+    """
+    Open a pooled connection to the Anthropic API ahead of the first request
+    bedrock-runtime has no free call, so only its service model is loaded
+    """
+    if bedrock_client:
+        for operation in ('InvokeModel', 'InvokeModelWithResponseStream'):
+            bedrock_client.meta.service_model.operation_model(operation)
+    if anthropic_client:
+        anthropic_client.with_options(max_retries=0, timeout=5).models.list(limit=1)
+
+
+def get_format_instructions(active_parser: PydanticOutputParser) -> str:
+    """
+    Format instructions for a parser, rendered once per container
+    """
+    key = id(active_parser)
+    if key not in format_instructions_cache:
+        format_instructions_cache[key] = active_parser.get_format_instructions()
+    return format_instructions_cache[key]
+
+
+def get_tier_config(tier: str) -> tuple:
+    """
+    Return (model_id, max_tokens) for a tier on the configured provider
+    """
+    if LLM_PROVIDER == 'bedrock':
+        fast_model = FAST_BEDROCK_MODEL_ID
+        default_model = os.getenv('BEDROCK_MODEL_ID', DEFAULT_BEDROCK_MODEL_ID)
+        strong_model = STRONG_BEDROCK_MODEL_ID
+    else:
+        fast_model = FAST_MODEL_ID
+        default_model = os.getenv('ANTHROPIC_MODEL_ID', DEFAULT_MODEL_ID)
+        strong_model = STRONG_MODEL_ID
+
+    if tier == 'fast':
+        return fast_model, FAST_MAX_TOKENS
+    if tier == 'strong':
+        return strong_model, MAX_TOKENS
+    return default_model, MAX_TOKENS
+
+
+def active_tiers() -> List[str]:
+    """
+    Tiers an analysis may run on, in escalation order. The fast tier only
+    takes part when a fast model is configured for the provider
+    """
+    if MODEL_ROUTING != 'tiered':
+        return ['standard']
+    return [tier for tier in MODEL_TIERS if tier != 'fast' or get_tier_config('fast')[0]]
+
+
+@functools.lru_cache(maxsize=1)
+def analysis_version() -> str:
+    """
+    Fingerprint of everything that shapes an extraction: the model of each
+    tier, the prompt templates and the output schemas. Stored on analyzed
+    jobs so backfill.py can find items extracted by an older setup
+    """
+    return version_fingerprint(LLM_PROVIDER, [get_tier_config(tier)[0] for tier in active_tiers()])
+
+
+def version_fingerprint(provider: str, model_ids: List[str]) -> str:
+    """
+    analysis_version of a provider and model sequence with the current
+    prompts; batch runs (one model, maybe another provider) stamp this
+    """
+    parts = [provider] + list(model_ids) + [
+        create_analysis_prompt('', parser, include_notes=True),
+        create_analysis_prompt('', fields_parser, include_notes=False)
+    ]
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:12]
+
+
+def call_llm(
+    prompt: str,
+    model_id: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    usage: Optional[List[Dict[str, Any]]] = None
+) -> Optional[str]:
+    """
+    Call the configured LLM provider
+    """
+    if LLM_PROVIDER == 'bedrock':
+        return call_bedrock(prompt, model_id, max_tokens, usage)
+    return call_anthropic(prompt, model_id, max_tokens, usage)
+
+
+def make_usage_record(model_id: str, usage_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize provider usage counts into a single record
+    """
+    return {
+        'model_id': model_id,
+        'input_tokens': int(usage_data.get('input_tokens') or 0),
+        'output_tokens': int(usage_data.get('output_tokens') or 0),
+        'cache_read_tokens': int(usage_data.get('cache_read_input_tokens') or 0),
+        'cache_write_tokens': int(usage_data.get('cache_creation_input_tokens') or 0)
+    }
+
+
+def anthropic_request(prompt: str, model_id: Optional[str], max_tokens: Optional[int]) -> Dict[str, Any]:
+    """
+    messages.create() arguments for a single-prompt call (sync or async client)
+    """
+    return {
+        "model": model_id or os.getenv('ANTHROPIC_MODEL_ID', DEFAULT_MODEL_ID),
+        "max_tokens": max_tokens or MAX_TOKENS,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    }
+
+
+def anthropic_text(message: Any, model_id: str, usage: Optional[List[Dict[str, Any]]]) -> str:
+    """
+    Response text of an Anthropic message, recording its token usage
+    """
+    if usage is not None and message.usage:
+        usage.append(make_usage_record(model_id, {
+            'input_tokens': message.usage.input_tokens,
+            'output_tokens': message.usage.output_tokens,
+            'cache_read_input_tokens': getattr(message.usage, 'cache_read_input_tokens', None),
+            'cache_creation_input_tokens': getattr(message.usage, 'cache_creation_input_tokens', None)
+        }))
+    return message.content[0].text
+
+
+def call_anthropic(
+    prompt: str,
+    model_id: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    usage: Optional[List[Dict[str, Any]]] = None
+) -> Optional[str]:
+    """
+    Call Anthropic API directly
+    """
+    try:
+        request = anthropic_request(prompt, model_id, max_tokens)
+        logger.info(f"Using Anthropic model: {request['model']}")
+        message = anthropic_client.messages.create(**request)
+        return anthropic_text(message, request['model'], usage)
     except Exception as e:
         logger.error(f"Anthropic API error: {str(e)}", exc_info=True)
         return None
 
 
-def call_bedrock(prompt: str) -> Optional[str]:
+def call_bedrock(
+    prompt: str,
+    model_id: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    usage: Optional[List[Dict[str, Any]]] = None
+) -> Optional[str]:
     """
     Call Amazon Bedrock
     """
     try:
-        model_id = os.getenv('BEDROCK_MODEL_ID', DEFAULT_BEDROCK_MODEL_ID)
+        model_id = model_id or os.getenv('BEDROCK_MODEL_ID', DEFAULT_BEDROCK_MODEL_ID)
         logger.info(f"Using Bedrock model: {model_id}")
 
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": MAX_TOKENS,
+            "max_tokens": max_tokens or MAX_TOKENS,
             "messages": [
                 {
                     "role": "user",
@@ -153,45 +425,144 @@ def call_bedrock(prompt: str) -> Optional[str]:
         )
 
         response_body = json.loads(response['body'].read())
+        if usage is not None and response_body.get('usage'):
+            usage.append(make_usage_record(model_id, response_body['usage']))
+
         return response_body['content'][0]['text']
     except ClientError as e:
         logger.error(f"Bedrock API error: {str(e)}", exc_info=True)
         return None
 
 
-def create_analysis_prompt(content: str, parser: PydanticOutputParser) -> str:
+def get_async_anthropic_client() -> anthropic.AsyncAnthropic:
     """
-    Create a prompt for job content analysis with LangChain format instructions
+    Async Anthropic client for the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = async_anthropic_clients.get(loop)
+    if client is None:
+        client = anthropic.AsyncAnthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+        async_anthropic_clients[loop] = client
+    return client
+
+
+async def call_llm_async(
+    prompt: str,
+    model_id: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    usage: Optional[List[Dict[str, Any]]] = None
+) -> Optional[str]:
     """
-    format_instructions = parser.get_format_instructions()
+    Call the configured LLM provider without blocking the event loop
+    Bedrock has no async client in boto3, so it runs in a worker thread
+    """
+    if LLM_PROVIDER == 'bedrock':
+        return await asyncio.to_thread(call_bedrock, prompt, model_id, max_tokens, usage)
+    return await call_anthropic_async(prompt, model_id, max_tokens, usage)
 
-    prompt = f"""
-    Analyze the following job posting content and extract structured information.
 
-    {format_instructions}
+async def call_anthropic_async(
+    prompt: str,
+    model_id: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    usage: Optional[List[Dict[str, Any]]] = None
+) -> Optional[str]:
+    """
+    Call Anthropic API with the async client
+    """
+    try:
+        request = anthropic_request(prompt, model_id, max_tokens)
+        logger.info(f"Using Anthropic model (async): {request['model']}")
+        message = await get_async_anthropic_client().messages.create(**request)
+        return anthropic_text(message, request['model'], usage)
+    except Exception as e:
+        logger.error(f"Anthropic API error: {str(e)}", exc_info=True)
+        return None
 
-    IMPORTANT FORMATTING RULES:
-    - salary_range: MUST be in format "$XXX,XXX - $XXX,XXX" with commas as thousands separators
-      Examples: "$120,000 - $180,000", "$50,000 - $70,000", "$200,000 - $250,000"
-      If hourly rate is given, convert to annual (multiply by 2080 hours)
-      If monthly is given, multiply by 12
-      If only one number is given, create a reasonable range (±20%)
 
+async def analyze_with_bedrock_async(
+    scraped_content: Optional[Dict[str, Any]],
+    include_notes: bool = True,
+    usage: Optional[List[Dict[str, Any]]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Async version of analyze_with_bedrock() (same analysis_steps())
+    """
+    try:
+        steps = analysis_steps(scraped_content, include_notes)
+        try:
+            prompt, model_id, max_tokens = next(steps)
+            while True:
+                prompt, model_id, max_tokens = steps.send(await call_llm_async(prompt, model_id, max_tokens, usage))
+        except StopIteration as done:
+            return done.value
+
+    except Exception as e:
+        logger.error(f"Analysis error: {str(e)}", exc_info=True)
+        return None
+
+
+def create_analysis_prompt(content: str, parser: PydanticOutputParser, include_notes: bool = True) -> str:
+    """
+    Create a prompt for job content analysis with LangChain format instructions
+    """
+    format_instructions = get_format_instructions(parser)
+
+    notes_rules = """
     - notes: Provide a brief 2-3 sentence summary highlighting key aspects of the job.
       Include notable benefits, key requirements, or unique selling points.
       Keep it concise and informative.
+""" if include_notes else ""
+    notes_closing = "Provide helpful notes that give a quick overview of the opportunity." if include_notes else ""
+
+    prompt = f"""
+    Analyze the following job posting content and extract structured information.
+
+    {format_instructions}
 
+    IMPORTANT FORMATTING RULES:
+    - salary_range: Copy the compensation as stated, keeping the currency and pay period
+      (e.g. "per hour", "per month"). Do not convert or estimate amounts; omit it if no pay is given.
+{notes_rules}
     Job posting content:
     {content}
 
     Please analyze this content and return the structured information in the specified format.
-    Ensure salary_range follows the exact format with commas and dollar signs.
-    Provide helpful notes that give a quick overview of the opportunity.
+    {notes_closing}
+    """
+
+    return prompt
+
+
+def create_notes_prompt(content: str) -> str:
+    """
+    Create a prompt for the standalone notes summary
+    """
+    prompt = f"""
+    Summarize the following job posting in 2-3 sentences.
+    Highlight notable benefits, key requirements, or unique selling points.
+    Keep it concise and informative. Return only the summary text.
+
+    Job posting content:
+    {content}
     """
 
     return prompt
 
 
+def generate_notes(content_text: str, usage: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+    """
+    Generate the 2-3 sentence notes summary for a posting
+    Used for deferred notes generation after a fields-only ingest
+    """
+    if not content_text:
+        logger.warning("No content text to summarize")
+        return None
+
+    notes = call_llm(create_notes_prompt(content_text), max_tokens=NOTES_MAX_TOKENS, usage=usage)
+    return notes.strip() if notes else None
+
+
 def create_fallback_response() -> Dict[str, Any]:
     """
     Create a fallback response when parsing fails
@@ -0,0 +1,235 @@
+"""
+Content-addressed archive of scraped posting text
+After extraction, the reduced posting (content, title, description) is
+compressed and stored once under its sha256, in S3 or a local directory
+(same key layout, stands in for S3 in tests and local runs). Jobs keep
+the hash as content_hash, so identical postings share one object across
+users, and re-analysis or notes generation reads the text back instead
+of scraping a posting that may be gone
+
+Objects are zstd-compressed when the zstandard package is installed,
+gzip otherwise; reads detect the codec from the object's magic bytes.
+Objects never change, so reads are cached in memory.
+
+Usage:
+    python archive.py get CONTENT_HASH
+"""
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import argparse
+import functools
+from typing import Dict, Any, List, Optional
+from metrics import emit_metric
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'true').lower() == 'true'
+ARCHIVE_SINK = os.getenv('ARCHIVE_SINK', 'local')  # 'local' or 's3'
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', '/tmp/archive')
+ARCHIVE_S3_BUCKET = os.getenv('ARCHIVE_S3_BUCKET', '')
+ARCHIVE_S3_PREFIX = os.getenv('ARCHIVE_S3_PREFIX', 'archive/')
+ARCHIVE_CODEC = os.getenv('ARCHIVE_CODEC', 'zstd' if zstandard else 'gzip')  # 'zstd' or 'gzip'
+ARCHIVE_COMPRESS_LEVEL = int(os.getenv('ARCHIVE_COMPRESS_LEVEL', '6'))
+ARCHIVE_CACHE_SIZE = int(os.getenv('ARCHIVE_CACHE_SIZE', '64'))
+
+# Fields of extract_job_content() output that describe the posting itself;
+# url and scraped_at vary per scrape and would defeat deduplication
+ARCHIVE_FIELDS = ['content', 'title', 'description']
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def archive_document(job_content: Dict[str, Any]) -> bytes:
+    """
+    Canonical serialized form of a posting; its sha256 is the content hash
+    """
+    document = {field: job_content.get(field) or '' for field in ARCHIVE_FIELDS}
+    return json.dumps(document, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def archive_key(digest: str) -> str:
+    # Two-character fan-out keeps local directories small
+    return f"{digest[:2]}/{digest}"
+
+
+def compress(data: bytes) -> bytes:
+    if ARCHIVE_CODEC == 'zstd' and zstandard:
+        return zstandard.ZstdCompressor(level=ARCHIVE_COMPRESS_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=ARCHIVE_COMPRESS_LEVEL, mtime=0)
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Decompress an archived object, whichever codec wrote it
+
+    Raises:
+        ValueError: If the codec is unknown or zstandard is not installed
+    """
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        if not zstandard:
+            raise ValueError("Archived object is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError("Unknown archive codec")
+
+
+class LocalArchiveSink:
+    """
+    Store archived postings under a local directory (S3 key layout)
+    """
+
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.directory, key))
+
+    def write(self, key: str, data: bytes) -> str:
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so readers never see a partial object
+        with open(f"{path}.part", 'wb') as f:
+            f.write(data)
+        os.replace(f"{path}.part", path)
+        return path
+
+    def read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.directory, key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class S3ArchiveSink:
+    """
+    Store archived postings in S3 (needs s3:PutObject and s3:GetObject)
+    """
+
+    def __init__(self, bucket: str = ARCHIVE_S3_BUCKET, prefix: str = ARCHIVE_S3_PREFIX):
+        import boto3
+        self.client = boto3.client('s3')
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=f"{self.prefix}{key}")
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def write(self, key: str, data: bytes) -> str:
+        self.client.put_object(Bucket=self.bucket, Key=f"{self.prefix}{key}", Body=data)
+        return f"s3://{self.bucket}/{self.prefix}{key}"
+
+    def read(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}")['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+
+@functools.lru_cache(maxsize=1)
+def get_sink() -> Any:
+    # One client per container; S3ArchiveSink holds its connection pool
+    return S3ArchiveSink() if ARCHIVE_SINK == 's3' else LocalArchiveSink()
+
+
+def archive_posting(job_content: Dict[str, Any]) -> Optional[str]:
+    """
+    Store a posting in the archive unless an identical one is already there
+    Failures are logged and never fail the caller
+
+    Args:
+        job_content: extract_job_content() output
+
+    Returns:
+        The content hash to record on the job, or None if not archived
+    """
+    if not ARCHIVE_ENABLED or not job_content or not job_content.get('content'):
+        return None
+    try:
+        document = archive_document(job_content)
+        digest = hashlib.sha256(document).hexdigest()
+        sink = get_sink()
+        key = archive_key(digest)
+        if sink.exists(key):
+            emit_metric('ArchivedPostings', dimensions={'Outcome': 'deduplicated'})
+            return digest
+
+        data = compress(document)
+        sink.write(key, data)
+        emit_metric('ArchivedPostings', dimensions={'Outcome': 'stored'})
+        emit_metric('ArchivedBytes', len(data), 'Bytes')
+        logger.info(f"Archived posting {digest} ({len(document)} -> {len(data)} bytes)")
+        return digest
+    except Exception as e:
+        logger.error(f"Failed to archive posting: {str(e)}", exc_info=True)
+        return None
+
+
+@functools.lru_cache(maxsize=ARCHIVE_CACHE_SIZE)
+def _load(digest: str) -> Dict[str, Any]:
+    # Misses raise rather than return None, so they are not cached
+    data = get_sink().read(archive_key(digest))
+    if data is None:
+        raise KeyError(digest)
+    return json.loads(decompress(data))
+
+
+def get_archived_posting(digest: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Read a posting back from the archive
+
+    Args:
+        digest: A job's content_hash
+
+    Returns:
+        Dict with content, title and description (the shape analysis
+        expects), or None if the hash is unset, missing or unreadable
+    """
+    if not digest:
+        return None
+    try:
+        return dict(_load(digest))
+    except KeyError:
+        logger.warning(f"Archived posting {digest} not found")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to read archived posting {digest}: {str(e)}", exc_info=True)
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description='JobTrackr posting archive')
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+    get_parser = subparsers.add_parser('get', help='Print an archived posting')
+    get_parser.add_argument('content_hash')
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    document = get_archived_posting(args.content_hash)
+    if document is None:
+        print(f"No archived posting {args.content_hash}", file=sys.stderr)
+        return 1
+    print(json.dumps(document, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+ASGI adapter for running the JobTrackr API as a long-lived service
+Translates HTTP requests into the API Gateway (REST) event shape that
+router.py and handlers.py expect, calls lambda_function.lambda_handler in
+a worker thread, and turns the Lambda response back into HTTP
+
+Cognito claims normally come from the API Gateway authorizer. Outside
+API Gateway, ASGI_AUTH=stub takes the user id from the X-User-Id header
+(or ASGI_STUB_USER_ID); it trusts the caller, so only use it behind an
+authenticating proxy or for local runs and benchmarks.
+
+Usage:
+    python asgi.py [--host 0.0.0.0] [--port 8000] [--workers 4]
+    uvicorn asgi:app --workers 4
+"""
+
+import os
+import sys
+import json
+import uuid
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import parse_qsl
+from lambda_function import lambda_handler
+from utils import create_error_response
+import warmup
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ASGI_AUTH = os.getenv('ASGI_AUTH', 'none')  # 'stub' or 'none' (every request is unauthorized)
+ASGI_STUB_USER_ID = os.getenv('ASGI_STUB_USER_ID', 'local-user')
+ASGI_WORKERS = int(os.getenv('ASGI_WORKERS', '1'))
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', '32'))
+ASGI_MAX_BODY_BYTES = int(os.getenv('ASGI_MAX_BODY_BYTES', str(1024 * 1024)))
+
+# Handlers block on provider and DynamoDB calls; each request gets a thread
+executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix='handler')
+
+
+class ServiceContext:
+    """
+    Stand-in for the Lambda context object
+    No function name, so INGEST_MODE=async enriches inline
+    """
+
+    function_name = None
+
+    def __init__(self):
+        self.aws_request_id = uuid.uuid4().hex
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 30000
+
+
+def build_event(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """
+    Build an API Gateway REST event from an ASGI HTTP scope and body
+
+    Args:
+        scope: ASGI HTTP connection scope
+        body: Full request body
+
+    Returns:
+        Event with httpMethod, path, headers, queryStringParameters, body
+        and requestContext (with stub Cognito claims if enabled)
+    """
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope.get('headers', [])}
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+
+    authorizer: Dict[str, Any] = {}
+    if ASGI_AUTH == 'stub':
+        user_id = headers.get('x-user-id') or ASGI_STUB_USER_ID
+        authorizer['claims'] = {'sub': user_id}
+
+    return {
+        'httpMethod': scope['method'],
+        'path': scope['path'],
+        'headers': headers,
+        'queryStringParameters': query or None,
+        'body': body.decode('utf-8') if body else None,
+        'isBase64Encoded': False,
+        'requestContext': {
+            'authorizer': authorizer,
+            'requestId': uuid.uuid4().hex,
+            'stage': 'service'
+        }
+    }
+
+
+def to_http(response: Dict[str, Any]) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """
+    Convert a Lambda proxy response into (status, headers, body)
+    """
+    body = response.get('body') or ''
+    payload = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+    headers = [(k.lower().encode('latin-1'), str(v).encode('latin-1')) for k, v in (response.get('headers') or {}).items()]
+    headers.append((b'content-length', str(len(payload)).encode('latin-1')))
+    return int(response.get('statusCode', 200)), headers, payload
+
+
+async def read_body(receive: Any) -> Optional[bytes]:
+    """
+    Read the full request body; None if it exceeds ASGI_MAX_BODY_BYTES
+    """
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > ASGI_MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+async def lifespan(receive: Any, send: Any) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            logger.info(f"JobTrackr service starting (auth={ASGI_AUTH}, threads={ASGI_THREADS})")
+            if not warmup.primed:
+                await asyncio.get_running_loop().run_in_executor(executor, warmup.prime)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope: Dict[str, Any], receive: Any, send: Any) -> None:
+    """
+    ASGI application
+    """
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    body = await read_body(receive)
+    if body is None:
+        response = create_error_response(413, "Request body too large", "BODY_TOO_LARGE")
+    else:
+        event = build_event(scope, body)
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(executor, lambda_handler, event, ServiceContext())
+
+    status, headers, payload = to_http(response)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description='Run the JobTrackr API as an ASGI service')
+    arg_parser.add_argument('--host', default=os.getenv('ASGI_HOST', '127.0.0.1'))
+    arg_parser.add_argument('--port', type=int, default=int(os.getenv('ASGI_PORT', '8000')))
+    arg_parser.add_argument('--workers', type=int, default=ASGI_WORKERS)
+    args = arg_parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is required to run the service: pip install uvicorn", file=sys.stderr)
+        return 1
+
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run('asgi:app', host=args.host, port=args.port, workers=args.workers, lifespan='on')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,420 @@
+"""
+Resumable, parallel re-analysis of stored jobs after a prompt, schema or
+model change
+Every analyzed job carries the analysis_version it was extracted with
+(analyzer.analysis_version). A run walks the whole table with a parallel
+Scan (one lease per segment, --workers segments at a time), re-analyzes
+stale jobs with at most --concurrency LLM calls in flight, and writes back
+only the fields that changed
+
+- Checkpoints: each segment records its LastEvaluatedKey and counters
+  after every page, so a crashed or stopped run resumes where it left off
+- No double processing: a segment is leased to one worker at a time (a
+  heartbeat renews the lease while a page runs, and the page stops if a
+  renewal fails), the scan skips jobs already at the current version, and
+  each write is conditional on the version and enrichment status read by
+  the scan
+- Usage: every re-analysis adds its tokens and cost to the per-user and
+  per-domain daily roll-ups, like an ingest
+
+Content comes from the posting archive (or a stored notes source);
+--rescrape scrapes postings that have neither.
+
+With --batch each Scan page is analyzed as one batch job through the
+Message Batches API or Bedrock batch inference (batch_analyzer), at batch
+pricing, instead of one on-demand call per job. Batch results come from
+the batch backend's single model, so jobs are stamped with that
+configuration's version (batch_analysis_version), and a batch that times
+out or loses its lease is cancelled.
+
+Usage:
+    python backfill.py run [--run-id ID] [--segments 16] [--workers 4] [--concurrency 8] [--rescrape] [--dry-run] [--batch]
+    python backfill.py status [--run-id ID]
+"""
+
+import os
+import sys
+import json
+import uuid
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator
+from analyzer import analysis_version, is_valid_analysis
+from archive import archive_posting, get_archived_posting
+from db import (
+    scan_job_page, claim_backfill_segment, renew_backfill_lease, save_backfill_checkpoint, get_backfill_checkpoints,
+    update_job_enrichment, get_notes_source, single_flight, record_llm_usage, BACKFILL_LEASE_SECONDS
+)
+from processor import analyze_job_content, build_analysis_fields, scrape_job, get_url_domain
+from batch_analyzer import analyze_in_batch, get_batch_backend, batch_analysis_version
+from usage import summarize_usage
+from utils import canonicalize_url
+from metrics import emit_metric
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BACKFILL_SEGMENTS = int(os.getenv('BACKFILL_SEGMENTS', '16'))
+BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', '4'))
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', '8'))
+# Items evaluated per Scan page; a checkpoint is written after each page
+BACKFILL_PAGE_SIZE = int(os.getenv('BACKFILL_PAGE_SIZE', '100'))
+# With --batch each page becomes one batch job, so pages are larger
+BACKFILL_BATCH_PAGE_SIZE = int(os.getenv('BACKFILL_BATCH_PAGE_SIZE', '1000'))
+# A page can outlast the lease (a batch job may take hours), so it is
+# renewed in the background this often while the page runs
+BACKFILL_HEARTBEAT_SECONDS = int(os.getenv('BACKFILL_HEARTBEAT_SECONDS', str(BACKFILL_LEASE_SECONDS // 4)))
+
+# Fields a re-analysis may change; notes and status belong to the user
+BACKFILL_FIELDS = ['company', 'title', 'location', 'salary_range', 'employment_type', 'source', 'tags']
+OUTCOMES = ['updated', 'unchanged', 'no_content', 'failed', 'conflict', 'skipped']
+# Jobs still being enriched are left to the ingest pipeline
+IN_FLIGHT_STATUSES = ['captured', 'scraped', 'failed']
+
+
+def load_content(job: Dict[str, Any], rescrape: bool) -> Optional[Dict[str, Any]]:
+    """
+    Posting content to re-analyze: the archived posting, the stored notes
+    source, else a fresh scrape
+    """
+    archived = get_archived_posting(job.get('content_hash'))
+    if archived:
+        return archived
+    text = get_notes_source(job['user_id'], job['job_id'])
+    if text:
+        return {'content': text, 'title': job.get('title')}
+    if rescrape and job.get('job_url'):
+        url = job['job_url']
+        return single_flight('scrape', canonicalize_url(url), lambda: scrape_job(url))
+    return None
+
+
+def reanalyze_job(job: Dict[str, Any], version: str, rescrape: bool, dry_run: bool, cost: Dict[str, Any]) -> str:
+    """
+    Re-run analysis for one job and write back the changed fields
+
+    Returns:
+        Outcome, one of OUTCOMES
+    """
+    if job.get('enrichment_status') in IN_FLIGHT_STATUSES:
+        return 'skipped'
+    try:
+        job_content = load_content(job, rescrape)
+        if not job_content:
+            return 'no_content'
+
+        usage_records: List[Dict[str, Any]] = []
+        analyzed_data = analyze_job_content(job_content, include_notes=False, usage=usage_records)
+        usage_summary = record_usage(job, usage_records, cost)
+        if not analyzed_data:
+            return 'failed'
+        return apply_analysis(job, version, job_content, analyzed_data, dry_run, usage_summary)
+    except Exception as e:
+        logger.error(f"Backfill failed for job {job.get('job_id')}: {str(e)}", exc_info=True)
+        return 'failed'
+
+
+def record_usage(job: Dict[str, Any], usage_records: List[Dict[str, Any]], cost: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Add one re-analysis to the daily usage roll-ups and the run's cost
+    Tokens are billed even when the analysis is unusable or a dry run
+
+    Returns:
+        The usage summary, or None if no call was made
+    """
+    usage_summary = summarize_usage(usage_records)
+    if usage_summary:
+        record_llm_usage(job['user_id'], get_url_domain(job.get('job_url', '')), usage_summary)
+        with cost['lock']:
+            cost['cost_micros'] += usage_summary.get('cost_micros', 0)
+    return usage_summary
+
+
+def apply_analysis(
+    job: Dict[str, Any],
+    version: str,
+    job_content: Dict[str, Any],
+    analyzed_data: Dict[str, Any],
+    dry_run: bool,
+    usage_summary: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Write the fields of a new analysis that differ from the stored job,
+    with the version and llm_usage of the analysis now behind them
+
+    Returns:
+        Outcome, one of OUTCOMES
+    """
+    try:
+        fields = build_analysis_fields(analyzed_data, defer_notes=False, usage_summary=usage_summary)
+        changes = {field: fields[field] for field in BACKFILL_FIELDS if field in fields and fields[field] != job.get(field)}
+        if dry_run:
+            return 'updated' if changes else 'unchanged'
+
+        # Archive text found elsewhere so the next pass reads it directly
+        digest = archive_posting(job_content) if not job.get('content_hash') else None
+        archive_fields = {'content_hash': digest} if digest else {}
+        usage_fields = {'llm_usage': fields['llm_usage']} if 'llm_usage' in fields else {}
+
+        # The version is written even when nothing changed, so later runs skip the job
+        written = update_job_enrichment(
+            job['user_id'], job['job_id'], job['applied_ts'], job.get('enrichment_status') or 'analyzed',
+            {**changes, **archive_fields, **usage_fields, 'analysis_version': version},
+            conditions={
+                'analysis_version': job.get('analysis_version'),
+                'enrichment_status': job.get('enrichment_status')
+            }
+        )
+        if not written:
+            return 'conflict'
+        return 'updated' if changes else 'unchanged'
+    except Exception as e:
+        logger.error(f"Backfill failed for job {job.get('job_id')}: {str(e)}", exc_info=True)
+        return 'failed'
+
+
+def reanalyze_page_in_batch(
+    jobs: List[Dict[str, Any]],
+    version: str,
+    pool: ThreadPoolExecutor,
+    options: Dict[str, Any],
+    stop: Optional[threading.Event] = None
+) -> List[str]:
+    """
+    Re-analyze one Scan page through the batch API (batch_analyzer):
+    contents are loaded in parallel, analyzed as one batch, and written
+    back like on-demand results
+
+    Args:
+        stop: Set when the segment's lease is lost; the batch is then
+            cancelled and nothing is written
+
+    Returns:
+        Outcomes, one of OUTCOMES per job (empty if stopped)
+    """
+    def load(job: Dict[str, Any]) -> Any:
+        if job.get('enrichment_status') in IN_FLIGHT_STATUSES:
+            return 'skipped'
+        try:
+            return load_content(job, options['rescrape']) or 'no_content'
+        except Exception as e:
+            logger.error(f"Backfill failed to load job {job.get('job_id')}: {str(e)}", exc_info=True)
+            return 'failed'
+
+    loaded = list(pool.map(load, jobs))
+    # Job ids can be URLs; batch custom ids only allow [A-Za-z0-9_-]
+    contents = {f"job-{index}": content for index, content in enumerate(loaded) if isinstance(content, dict)}
+    usage: Dict[str, List[Dict[str, Any]]] = {}
+    analyses = analyze_in_batch(
+        contents, options.get('backend'), include_notes=False, usage=usage, should_stop=stop.is_set if stop else None
+    ) if contents else {}
+    if stop and stop.is_set():
+        return []
+
+    def apply(index: int) -> str:
+        if isinstance(loaded[index], str):
+            return loaded[index]
+        usage_summary = record_usage(jobs[index], usage.get(f"job-{index}", []), options['cost'])
+        analyzed_data = analyses.get(f"job-{index}")
+        # Unparseable output comes back as the blank fallback; never write it
+        if not analyzed_data or not is_valid_analysis(analyzed_data):
+            return 'failed'
+        return apply_analysis(jobs[index], version, loaded[index], analyzed_data, options['dry_run'], usage_summary)
+
+    return list(pool.map(apply, range(len(jobs))))
+
+
+@contextmanager
+def lease_heartbeat(run_id: str, segment: int, owner: str) -> Iterator[threading.Event]:
+    """
+    Renew a segment's lease every BACKFILL_HEARTBEAT_SECONDS in a
+    background thread; the yielded event is set once a renewal fails
+    """
+    lost = threading.Event()
+    finished = threading.Event()
+
+    def renew() -> None:
+        while not finished.wait(BACKFILL_HEARTBEAT_SECONDS):
+            if not renew_backfill_lease(run_id, segment, owner):
+                logger.warning(f"Lost the lease on segment {segment}, stopping its page")
+                lost.set()
+                return
+
+    thread = threading.Thread(target=renew, name=f'lease-{segment}', daemon=True)
+    thread.start()
+    try:
+        yield lost
+    finally:
+        finished.set()
+        thread.join()
+
+
+def run_segment(
+    run_id: str,
+    segment: int,
+    total_segments: int,
+    owner: str,
+    version: str,
+    pool: ThreadPoolExecutor,
+    options: Dict[str, Any]
+) -> Dict[str, int]:
+    """
+    Process one Scan segment from its checkpoint to the end
+
+    Returns:
+        Counters processed by this call (empty if the segment was leased
+        elsewhere or already done)
+    """
+    checkpoint = claim_backfill_segment(run_id, segment, owner)
+    if checkpoint is None:
+        logger.info(f"Segment {segment} is leased by another worker")
+        return {}
+    if checkpoint.get('done'):
+        return {}
+
+    counters = {outcome: int(checkpoint.get(outcome, 0)) for outcome in OUTCOMES}
+    processed = {outcome: 0 for outcome in OUTCOMES}
+    last_key = json.loads(checkpoint['last_key']) if checkpoint.get('last_key') else None
+
+    with lease_heartbeat(run_id, segment, owner) as lost:
+        while True:
+            page = scan_job_page(segment, total_segments, last_key, version, options['page_size'])
+            if options['batch']:
+                outcomes = reanalyze_page_in_batch(page['items'], version, pool, options, lost)
+            else:
+                # Jobs not yet started when the lease is lost are left to the new owner
+                outcomes = pool.map(
+                    lambda job: None if lost.is_set() else reanalyze_job(
+                        job, version, options['rescrape'], options['dry_run'], options['cost']
+                    ),
+                    page['items']
+                )
+            for outcome in outcomes:
+                if outcome:
+                    counters[outcome] += 1
+                    processed[outcome] += 1
+
+            last_key = page['last_key']
+            if lost.is_set() or not save_backfill_checkpoint(run_id, segment, owner, last_key, counters):
+                logger.warning(f"Lost the lease on segment {segment}, stopping it")
+                break
+            if last_key is None:
+                logger.info(f"Segment {segment} done: {counters}")
+                break
+    return processed
+
+
+def run_version(backend: Any = None) -> str:
+    """
+    Version a run stamps on the jobs it re-analyzes: that of the batch
+    backend for --batch runs, else the on-demand analysis_version
+    """
+    return batch_analysis_version(backend) if backend else analysis_version()
+
+
+def run_backfill(
+    run_id: str,
+    total_segments: int = BACKFILL_SEGMENTS,
+    workers: int = BACKFILL_WORKERS,
+    concurrency: int = BACKFILL_CONCURRENCY,
+    rescrape: bool = False,
+    dry_run: bool = False,
+    batch: bool = False
+) -> Dict[str, Any]:
+    """
+    Run (or resume) a backfill across all segments
+
+    Args:
+        run_id: Identifies the run's checkpoints; reuse it to resume
+        total_segments: Scan segments (fixed for the life of a run)
+        workers: Segments scanned in parallel
+        concurrency: Analyses in flight across all segments
+        rescrape: Scrape postings with no archived or stored text
+        dry_run: Analyze and count changes without writing
+        batch: Analyze each page through the batch API (BATCH_BACKEND)
+            instead of on-demand calls
+
+    Returns:
+        Counters processed by this invocation and the LLM cost of its
+        analyses (batch usage at batch pricing)
+    """
+    backend = get_batch_backend() if batch else None
+    version = run_version(backend)
+    owner = uuid.uuid4().hex
+    options = {
+        'rescrape': rescrape,
+        'dry_run': dry_run,
+        'batch': batch,
+        'backend': backend,
+        'page_size': BACKFILL_BATCH_PAGE_SIZE if batch else BACKFILL_PAGE_SIZE,
+        'cost': {'cost_micros': 0, 'lock': threading.Lock()}
+    }
+    totals = {outcome: 0 for outcome in OUTCOMES}
+    logger.info(f"Backfill {run_id}: analysis_version {version}, {total_segments} segments, "
+                f"{workers} workers, {concurrency} concurrent analyses")
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='analysis') as pool:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='segment') as segments:
+            results = segments.map(
+                lambda segment: run_segment(run_id, segment, total_segments, owner, version, pool, options),
+                range(total_segments)
+            )
+            for processed in results:
+                for outcome, count in processed.items():
+                    totals[outcome] += count
+
+    for outcome, count in totals.items():
+        if count:
+            emit_metric('BackfillJobs', count, dimensions={'Outcome': outcome})
+    return {'run_id': run_id, 'analysis_version': version, **totals, 'cost_usd': options['cost']['cost_micros'] / 1e6}
+
+
+def backfill_status(run_id: str) -> Dict[str, Any]:
+    """
+    Progress of a run from its checkpoints
+    """
+    checkpoints = get_backfill_checkpoints(run_id)
+    return {
+        'run_id': run_id,
+        'segments_started': len(checkpoints),
+        'segments_done': sum(1 for checkpoint in checkpoints if checkpoint.get('done')),
+        **{outcome: sum(int(checkpoint.get(outcome, 0)) for checkpoint in checkpoints) for outcome in OUTCOMES}
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description='Re-analyze stored jobs after a prompt, schema or model change')
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help='Start or resume a backfill run')
+    run_parser.add_argument('--run-id', help='Checkpoint namespace (default: the version the run stamps)')
+    run_parser.add_argument('--segments', type=int, default=BACKFILL_SEGMENTS, help='Scan TotalSegments; keep it fixed when resuming')
+    run_parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS, help='Segments scanned in parallel')
+    run_parser.add_argument('--concurrency', type=int, default=BACKFILL_CONCURRENCY, help='Analyses in flight')
+    run_parser.add_argument('--rescrape', action='store_true', help='Scrape postings with no archived or stored text')
+    run_parser.add_argument('--dry-run', action='store_true', help='Count changes without writing')
+    run_parser.add_argument('--batch', action='store_true', help='Analyze through the batch API, one batch per page')
+    status_parser = subparsers.add_parser('status', help='Show the progress of a run')
+    status_parser.add_argument('--run-id', help='Run to inspect (default: the version the run stamps)')
+    status_parser.add_argument('--batch', action='store_true', help='Inspect the default run of --batch')
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    run_id = args.run_id or run_version(get_batch_backend() if args.batch else None)
+    if args.command == 'status':
+        result = backfill_status(run_id)
+    else:
+        if args.dry_run and not args.run_id:
+            # Dry runs write checkpoints too; keep them apart from the real run
+            run_id = f"{run_id}-dry-run"
+        result = run_backfill(
+            run_id, args.segments, args.workers, args.concurrency, args.rescrape, args.dry_run, args.batch
+        )
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
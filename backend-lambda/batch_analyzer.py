@@ -0,0 +1,460 @@
+"""
+Batch job content analysis for bulk imports and re-analysis runs
+Uses the Anthropic Message Batches API or Bedrock batch inference
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+from typing import Dict, Any, Optional, Callable, List, Tuple
+import boto3
+from analyzer import (
+    LLM_PROVIDER,
+    MAX_TOKENS,
+    DEFAULT_MODEL_ID,
+    DEFAULT_BEDROCK_MODEL_ID,
+    anthropic_client,
+    parser,
+    fields_parser,
+    create_analysis_prompt,
+    parse_analysis_text,
+    anthropic_text,
+    make_usage_record,
+    version_fingerprint,
+)
+
+logger = logging.getLogger(__name__)
+
+# Configuration constants
+BATCH_BACKEND = os.getenv('BATCH_BACKEND', LLM_PROVIDER)  # 'anthropic', 'bedrock' or 'local'
+BATCH_POLL_INTERVAL = int(os.getenv('BATCH_POLL_INTERVAL', '30'))  # seconds
+BATCH_TIMEOUT = int(os.getenv('BATCH_TIMEOUT', str(24 * 60 * 60)))  # seconds
+BEDROCK_BATCH_BUCKET = os.getenv('BEDROCK_BATCH_BUCKET', '')
+BEDROCK_BATCH_ROLE_ARN = os.getenv('BEDROCK_BATCH_ROLE_ARN', '')
+# Bedrock batch inference quotas: jobs need at least this many records
+# (smaller jobs are padded) and accept at most this many (larger ones are split)
+BEDROCK_BATCH_MIN_RECORDS = int(os.getenv('BEDROCK_BATCH_MIN_RECORDS', '100'))
+BEDROCK_BATCH_MAX_RECORDS = int(os.getenv('BEDROCK_BATCH_MAX_RECORDS', '50000'))
+ANTHROPIC_BATCH_MAX_REQUESTS = 100000
+# Payload limits per batch: 256 MB for Anthropic, 1 GB per Bedrock input
+# file. Prompt bytes are counted with a per-request allowance for the
+# request envelope, and a margin is kept below each limit
+ANTHROPIC_BATCH_MAX_BYTES = 240 * 1024 * 1024
+BEDROCK_BATCH_MAX_BYTES = 960 * 1024 * 1024
+BATCH_REQUEST_OVERHEAD_BYTES = 512
+# recordId prefix of padding records; their results are dropped
+PAD_RECORD_PREFIX = 'pad-'
+
+
+# (analysis text, usage record) per custom_id; both None for failed requests
+BatchResult = Tuple[Optional[str], Optional[Dict[str, Any]]]
+
+
+class AnthropicBatchBackend:
+    """Submit prompts through the Anthropic Message Batches API"""
+
+    name = 'anthropic'
+    max_records = ANTHROPIC_BATCH_MAX_REQUESTS
+    max_bytes = ANTHROPIC_BATCH_MAX_BYTES
+
+    def __init__(self, client: Any = None, model_id: Optional[str] = None):
+        self.client = client or anthropic_client
+        self.model_id = model_id or os.getenv('ANTHROPIC_MODEL_ID', DEFAULT_MODEL_ID)
+
+    def submit(self, prompts: Dict[str, str]) -> str:
+        requests = [
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": self.model_id,
+                    "max_tokens": MAX_TOKENS,
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            }
+            for custom_id, prompt in prompts.items()
+        ]
+        batch = self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def is_done(self, batch_id: str) -> bool:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return batch.processing_status == 'ended'
+
+    def cancel(self, batch_id: str) -> None:
+        self.client.messages.batches.cancel(batch_id)
+
+    def results(self, batch_id: str) -> Dict[str, BatchResult]:
+        texts = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == 'succeeded':
+                usage: List[Dict[str, Any]] = []
+                text = anthropic_text(entry.result.message, self.model_id, usage)
+                texts[entry.custom_id] = (text, {**usage[0], 'batch': True} if usage else None)
+            else:
+                logger.warning(f"Batch request {entry.custom_id} finished with {entry.result.type}")
+                texts[entry.custom_id] = (None, None)
+        return texts
+
+
+class BedrockBatchBackend:
+    """
+    Submit prompts as a Bedrock batch inference (model invocation) job
+    Input and output are staged as JSONL in BEDROCK_BATCH_BUCKET. Jobs
+    below BEDROCK_BATCH_MIN_RECORDS are padded with one-token records
+    """
+
+    name = 'bedrock'
+    max_records = BEDROCK_BATCH_MAX_RECORDS
+    max_bytes = BEDROCK_BATCH_MAX_BYTES
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        role_arn: Optional[str] = None,
+        model_id: Optional[str] = None,
+        region: Optional[str] = None
+    ):
+        region = region or os.getenv('AWS_DEFAULT_REGION', 'us-east-2')
+        self.bucket = bucket or BEDROCK_BATCH_BUCKET
+        self.role_arn = role_arn or BEDROCK_BATCH_ROLE_ARN
+        self.model_id = model_id or os.getenv('BEDROCK_MODEL_ID', DEFAULT_BEDROCK_MODEL_ID)
+        self.bedrock = boto3.client('bedrock', region_name=region)
+        self.s3 = boto3.client('s3', region_name=region)
+
+        if not self.bucket or not self.role_arn:
+            raise ValueError("BEDROCK_BATCH_BUCKET and BEDROCK_BATCH_ROLE_ARN are required for Bedrock batch inference")
+
+    def submit(self, prompts: Dict[str, str]) -> str:
+        if len(prompts) > self.max_records:
+            raise ValueError(f"Bedrock batch jobs take at most {self.max_records} records, got {len(prompts)}")
+        run_id = uuid.uuid4().hex[:12]
+        input_key = f"batch/{run_id}/input.jsonl"
+
+        records = [(custom_id, prompt, MAX_TOKENS) for custom_id, prompt in prompts.items()]
+        records += [
+            (f"{PAD_RECORD_PREFIX}{n:05d}", '.', 1)
+            for n in range(BEDROCK_BATCH_MIN_RECORDS - len(records))
+        ]
+        lines = []
+        for record_id, prompt, max_tokens in records:
+            lines.append(json.dumps({
+                "recordId": record_id,
+                "modelInput": {
+                    "anthropic_version": "bedrock-2023-05-31",
+                    "max_tokens": max_tokens,
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            }))
+        self.s3.put_object(Bucket=self.bucket, Key=input_key, Body='\n'.join(lines).encode('utf-8'))
+
+        response = self.bedrock.create_model_invocation_job(
+            jobName=f"jobtrackr-analysis-{run_id}",
+            roleArn=self.role_arn,
+            modelId=self.model_id,
+            inputDataConfig={'s3InputDataConfig': {'s3Uri': f"s3://{self.bucket}/{input_key}"}},
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': f"s3://{self.bucket}/batch/{run_id}/output/"}}
+        )
+        return response['jobArn']
+
+    def is_done(self, batch_id: str) -> bool:
+        status = self.bedrock.get_model_invocation_job(jobIdentifier=batch_id)['status']
+        if status in ('Failed', 'Stopped', 'Expired'):
+            raise RuntimeError(f"Bedrock batch job {batch_id} ended with status {status}")
+        return status in ('Completed', 'PartiallyCompleted')
+
+    def cancel(self, batch_id: str) -> None:
+        self.bedrock.stop_model_invocation_job(jobIdentifier=batch_id)
+
+    def results(self, batch_id: str) -> Dict[str, BatchResult]:
+        job = self.bedrock.get_model_invocation_job(jobIdentifier=batch_id)
+        output_uri = job['outputDataConfig']['s3OutputDataConfig']['s3Uri']
+        input_uri = job['inputDataConfig']['s3InputDataConfig']['s3Uri']
+
+        # Output lands at {output_uri}{job_id}/{input_file_name}.out
+        output_prefix = output_uri.replace(f"s3://{self.bucket}/", '', 1)
+        job_suffix = batch_id.split('/')[-1]
+        input_name = input_uri.split('/')[-1]
+        output_key = f"{output_prefix}{job_suffix}/{input_name}.out"
+
+        body = self.s3.get_object(Bucket=self.bucket, Key=output_key)['Body']
+        texts = {}
+        for line in body.iter_lines():
+            if not line:
+                continue
+            record = json.loads(line)
+            if record['recordId'].startswith(PAD_RECORD_PREFIX):
+                continue
+            model_output = record.get('modelOutput')
+            if model_output:
+                usage = make_usage_record(self.model_id, model_output.get('usage') or {})
+                texts[record['recordId']] = (model_output['content'][0]['text'], {**usage, 'batch': True})
+            else:
+                logger.warning(f"Batch record {record.get('recordId')} failed: {record.get('error')}")
+                texts[record['recordId']] = (None, None)
+        return texts
+
+
+class LocalBatchBackend:
+    """
+    In-process stand-in for the batch APIs, used for tests and local runs
+    Completes every batch immediately using the supplied responder; usage,
+    if given, is reported as the token counts of every answered request
+    """
+
+    name = 'local'
+    model_id = 'local'
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str], Optional[str]]] = None,
+        max_records: int = BEDROCK_BATCH_MAX_RECORDS,
+        max_bytes: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
+    ):
+        self.responder = responder or (lambda prompt: None)
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.usage = usage
+        self.batches: Dict[str, Dict[str, str]] = {}
+        self.cancelled: List[str] = []
+
+    def submit(self, prompts: Dict[str, str]) -> str:
+        if len(prompts) > self.max_records:
+            raise ValueError(f"Batch takes at most {self.max_records} records, got {len(prompts)}")
+        batch_id = f"local-{uuid.uuid4().hex[:12]}"
+        self.batches[batch_id] = dict(prompts)
+        return batch_id
+
+    def is_done(self, batch_id: str) -> bool:
+        return batch_id in self.batches
+
+    def cancel(self, batch_id: str) -> None:
+        self.cancelled.append(batch_id)
+        self.batches.pop(batch_id, None)
+
+    def results(self, batch_id: str) -> Dict[str, BatchResult]:
+        results = {}
+        for custom_id, prompt in self.batches[batch_id].items():
+            text = self.responder(prompt)
+            usage = make_usage_record(self.model_id, self.usage) if text and self.usage else None
+            results[custom_id] = (text, {**usage, 'batch': True} if usage else None)
+        return results
+
+
+def batch_analysis_version(backend: Any) -> str:
+    """
+    analysis_version of results from a batch backend: its provider and
+    single model, whatever LLM_PROVIDER and tiered routing are set to
+    """
+    return version_fingerprint(backend.name, [backend.model_id])
+
+
+def get_batch_backend(name: Optional[str] = None) -> Any:
+    """
+    Return the batch backend for the given name (defaults to BATCH_BACKEND)
+    """
+    name = name or BATCH_BACKEND
+    if name == 'bedrock':
+        return BedrockBatchBackend()
+    if name == 'local':
+        return LocalBatchBackend()
+    return AnthropicBatchBackend()
+
+
+def build_analysis_prompts(contents: Dict[str, Dict[str, Any]], include_notes: bool = True) -> Dict[str, str]:
+    """
+    Build the analysis prompt for every entry that has content text
+    """
+    active_parser = parser if include_notes else fields_parser
+    prompts = {}
+    for custom_id, scraped_content in contents.items():
+        content_text = (scraped_content or {}).get("content", "")
+        if not content_text:
+            logger.warning(f"No content text to analyze for {custom_id}, skipping")
+            continue
+        prompts[custom_id] = create_analysis_prompt(content_text, active_parser, include_notes)
+    return prompts
+
+
+def submit_analysis_batch(
+    contents: Dict[str, Dict[str, Any]],
+    backend: Any = None,
+    include_notes: bool = True
+) -> Optional[str]:
+    """
+    Submit scraped job contents for batch analysis
+
+    Args:
+        contents: Mapping of custom_id (e.g. job_id) to extract_job_content() output
+        backend: Batch backend (defaults to get_batch_backend())
+        include_notes: Ask for the notes summary as well as the fields
+
+    Returns:
+        Batch identifier, or None if nothing could be submitted
+    """
+    return submit_prompts(build_analysis_prompts(contents, include_notes), backend)
+
+
+def submit_prompts(prompts: Dict[str, str], backend: Any = None) -> Optional[str]:
+    """
+    Submit ready-made prompts as one batch
+
+    Returns:
+        Batch identifier, or None if nothing could be submitted
+    """
+    backend = backend or get_batch_backend()
+    if not prompts:
+        logger.warning("No prompts to submit in batch")
+        return None
+
+    try:
+        batch_id = backend.submit(prompts)
+        logger.info(f"Submitted {len(prompts)} prompts to {backend.name} batch: {batch_id}")
+        return batch_id
+    except Exception as e:
+        logger.error(f"Failed to submit analysis batch: {str(e)}", exc_info=True)
+        return None
+
+
+def wait_for_batch(
+    batch_id: str,
+    backend: Any = None,
+    poll_interval: int = BATCH_POLL_INTERVAL,
+    timeout: int = BATCH_TIMEOUT,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> bool:
+    """
+    Poll a batch until it completes, the timeout elapses or should_stop()
+    returns True. A batch given up on is cancelled, so it is not left
+    running (and billed) for results nobody will collect
+
+    Returns:
+        True if the batch completed, False on timeout, stop or failure
+    """
+    backend = backend or get_batch_backend()
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            if backend.is_done(batch_id):
+                logger.info(f"Batch {batch_id} completed")
+                return True
+        except Exception as e:
+            logger.error(f"Batch {batch_id} failed: {str(e)}", exc_info=True)
+            return False
+
+        if should_stop and should_stop():
+            logger.warning(f"Stopped waiting for batch {batch_id}")
+            cancel_batch(batch_id, backend)
+            return False
+        if time.monotonic() >= deadline:
+            logger.error(f"Timed out waiting for batch {batch_id}")
+            cancel_batch(batch_id, backend)
+            return False
+        time.sleep(poll_interval)
+
+
+def cancel_batch(batch_id: str, backend: Any) -> None:
+    """
+    Cancel a batch that will not be collected; failures are only logged
+    """
+    try:
+        backend.cancel(batch_id)
+        logger.info(f"Cancelled batch {batch_id}")
+    except Exception as e:
+        logger.error(f"Failed to cancel batch {batch_id}: {str(e)}", exc_info=True)
+
+
+def collect_batch_results(
+    batch_id: str,
+    backend: Any = None,
+    include_notes: bool = True,
+    usage: Optional[Dict[str, List[Dict[str, Any]]]] = None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Fetch and parse results of a completed batch
+
+    Args:
+        usage: Optional mapping that receives the usage records of each
+            answered custom_id, including requests whose text failed to parse
+
+    Returns:
+        Mapping of custom_id to analyzed data (None for failed requests)
+    """
+    backend = backend or get_batch_backend()
+    active_parser = parser if include_notes else fields_parser
+    analyses = {}
+    for custom_id, (analysis_text, usage_record) in backend.results(batch_id).items():
+        analyses[custom_id] = parse_analysis_text(analysis_text, active_parser) if analysis_text else None
+        if usage is not None and usage_record:
+            usage.setdefault(custom_id, []).append(usage_record)
+    return analyses
+
+
+def chunk_prompts(
+    prompts: Dict[str, str],
+    max_records: int,
+    max_bytes: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """
+    Split prompts into batches of at most max_records entries and, if
+    max_bytes is set, at most max_bytes of prompt text plus request overhead
+    """
+    chunks: List[Dict[str, str]] = []
+    chunk: Dict[str, str] = {}
+    chunk_bytes = 0
+    for custom_id, prompt in prompts.items():
+        size = len(prompt.encode('utf-8')) + BATCH_REQUEST_OVERHEAD_BYTES
+        if chunk and (len(chunk) >= max_records or (max_bytes and chunk_bytes + size > max_bytes)):
+            chunks.append(chunk)
+            chunk, chunk_bytes = {}, 0
+        chunk[custom_id] = prompt
+        chunk_bytes += size
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def analyze_in_batch(
+    contents: Dict[str, Dict[str, Any]],
+    backend: Any = None,
+    poll_interval: int = BATCH_POLL_INTERVAL,
+    timeout: int = BATCH_TIMEOUT,
+    include_notes: bool = True,
+    usage: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Submit, wait for and collect a batch analysis in one call
+    Contents beyond the backend's per-batch record or byte limit go into
+    further batches, all submitted before waiting. Intended for offline
+    bulk runs, not the interactive Lambda path
+
+    Args:
+        contents: Mapping of custom_id (e.g. job_id) to extract_job_content() output
+        include_notes: Ask for the notes summary as well as the fields
+        usage: Optional mapping that receives usage records per custom_id
+        should_stop: Polled while waiting; once it returns True the
+            remaining batches are cancelled
+
+    Returns:
+        Mapping of custom_id to analyzed data (None for failed requests);
+        entries of batches that failed or timed out are missing
+    """
+    backend = backend or get_batch_backend()
+    prompts = build_analysis_prompts(contents, include_notes)
+    batch_ids = [
+        batch_id for batch_id in (
+            submit_prompts(chunk, backend)
+            for chunk in chunk_prompts(prompts, backend.max_records, getattr(backend, 'max_bytes', None))
+        ) if batch_id
+    ]
+
+    analyses: Dict[str, Optional[Dict[str, Any]]] = {}
+    for batch_id in batch_ids:
+        if wait_for_batch(batch_id, backend, poll_interval, timeout, should_stop):
+            analyses.update(collect_batch_results(batch_id, backend, include_notes, usage))
+    return analyses
+
@@ -0,0 +1,103 @@
+"""
+Microbenchmark: boto3 resource-layer (de)serialization vs dynamo.py
+Builds synthetic 1 MB Query pages of job items in wire format and times
+both paths; no AWS access needed
+
+Usage:
+    python bench_dynamo.py [--page-bytes 1048576] [--repeat 5]
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import Dict, Any, List, Callable, Optional
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from dynamo import serialize_item, deserialize_item
+
+
+def make_job(i: int) -> Dict[str, Any]:
+    """
+    A job item shaped like create_job_item() output after enrichment
+    """
+    ts = f'2025-10-{i % 28 + 1:02d}T15:41:37.{i:06d}+00:00'
+    job_id = f'{i:012x}'
+    return {
+        'PK': 'USER#us-east-1:12345678-aaaa-bbbb-cccc-1234567890ab',
+        'SK': f'JOB#{ts}#{job_id}',
+        'GSI1PK': 'USER#us-east-1:12345678-aaaa-bbbb-cccc-1234567890ab',
+        'GSI1SK': f'COMPANY#Example Corp {i % 50}#{ts}#{job_id}',
+        'GSI2PK': 'USER#us-east-1:12345678-aaaa-bbbb-cccc-1234567890ab#STATUS#Applied',
+        'GSI2SK': f'{ts}#{job_id}',
+        'type': 'JOB',
+        'user_id': 'us-east-1:12345678-aaaa-bbbb-cccc-1234567890ab',
+        'job_id': job_id,
+        'applied_ts': ts,
+        'last_updated_ts': ts,
+        'company': f'Example Corp {i % 50}',
+        'title': 'Senior Software Engineer, Platform',
+        'location': 'San Francisco, CA (Hybrid)',
+        'status': 'Applied',
+        'job_url': f'https://www.linkedin.com/jobs/view/{4000000000 + i}',
+        'salary_range': '$150,000 - $200,000',
+        'employment_type': 'Full-time',
+        'source': 'LinkedIn',
+        'tags': ['python', 'aws', 'distributed systems', 'kubernetes', 'postgres'],
+        'notes': 'Platform team building internal developer tooling. ' * 6,
+        'enrichment_status': 'analyzed',
+        'llm_usage': {
+            'input_tokens': 3120, 'output_tokens': 412, 'cache_read_tokens': 0, 'cache_write_tokens': 0,
+            'calls': 1, 'cost_micros': 5180, 'model_ids': ['claude-haiku-4-5-20251001']
+        }
+    }
+
+
+def make_page(page_bytes: int) -> List[Dict[str, Any]]:
+    """
+    Wire-format items adding up to roughly page_bytes of JSON (Query caps pages at 1 MB)
+    """
+    serializer = TypeSerializer()
+    items, size = [], 0
+    while size < page_bytes:
+        item = {k: serializer.serialize(v) for k, v in make_job(len(items)).items()}
+        size += len(json.dumps(item))
+        items.append(item)
+    return items
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description='DynamoDB (de)serialization microbenchmark')
+    arg_parser.add_argument('--page-bytes', type=int, default=1024 * 1024)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    page = make_page(args.page_bytes)
+    python_items = [deserialize_item(item) for item in page]
+    serializer = TypeSerializer()
+    deserializer = TypeDeserializer()
+
+    cases = [
+        ('deserialize  boto3 TypeDeserializer', lambda: [{k: deserializer.deserialize(v) for k, v in item.items()} for item in page]),
+        ('deserialize  dynamo.deserialize_item', lambda: [deserialize_item(item) for item in page]),
+        ('serialize    boto3 TypeSerializer', lambda: [{k: serializer.serialize(v) for k, v in item.items()} for item in python_items]),
+        ('serialize    dynamo.serialize_item', lambda: [serialize_item(item) for item in python_items]),
+    ]
+
+    print(f"{len(page)} items per page (~{args.page_bytes // 1024} KB), best of {args.repeat}\n")
+    for name, fn in cases:
+        seconds = best_of(args.repeat, fn)
+        print(f"{name:<40} {seconds * 1000:>8.2f} ms/page {len(page) / seconds:>12,.0f} items/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
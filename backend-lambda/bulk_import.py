@@ -0,0 +1,322 @@
+"""
+Bulk import of job applications from CSV / spreadsheet exports
+Rows already carry company, title, status and date, so they are mapped
+straight onto create_job_item and written in 25-item batches instead of
+going through scrape + LLM one by one; imports run at DynamoDB write
+throughput. Rows with only a URL can be queued for enrichment (async
+invocations, subject to ingest admission control)
+
+Rows stream in chunks of IMPORT_CHUNK_ROWS, so only one chunk of items
+is held at a time. URLs are deduplicated against the user's existing jobs
+and within the file, and each batch's keys are read before it is written,
+so re-running an import (start_row) never overwrites or double-counts a
+stored job.
+
+Usage:
+    python bulk_import.py USER_ID applications.csv [--enrich]
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from urllib.parse import urlparse
+from db import (
+    create_job_item, get_user_job_urls, put_imported_jobs, finish_job_import, update_job_enrichment, admit_ingest
+)
+from funnel import FUNNEL_STAGES, TERMINAL_STAGES, stage_counters
+from processor import INGEST_MODE, dispatch_enrichment
+from utils import canonicalize_url, validate_url_input
+from metrics import emit_metric
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+IMPORT_CHUNK_ROWS = int(os.getenv('IMPORT_CHUNK_ROWS', '500'))
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '20000'))
+# Stop this long before the invocation deadline; the rest can be resubmitted with start_row
+IMPORT_DEADLINE_MARGIN_MS = int(os.getenv('IMPORT_DEADLINE_MARGIN_MS', '5000'))
+MAX_REPORTED_ERRORS = 20
+MAX_FIELD_CHARS = 4000
+
+# Header names (lowercase, punctuation collapsed) accepted for each job field
+COLUMN_ALIASES = {
+    'job_url': ['url', 'link', 'job url', 'job link', 'posting', 'posting url', 'job url link'],
+    'company': ['company', 'employer', 'organization', 'company name'],
+    'title': ['title', 'position', 'role', 'job title', 'job'],
+    'status': ['status', 'stage', 'application status'],
+    'applied_ts': ['date', 'applied', 'date applied', 'applied on', 'applied date', 'applied at', 'applied ts'],
+    'location': ['location', 'city', 'place'],
+    'salary_range': ['salary', 'salary range', 'compensation', 'pay'],
+    'employment_type': ['employment type', 'job type', 'type'],
+    'source': ['source', 'board', 'job board', 'site'],
+    'notes': ['notes', 'note', 'comments'],
+    'tags': ['tags', 'labels'],
+}
+# Spreadsheet wording for each status; anything else counts as Applied
+STATUS_ALIASES = {
+    'Captured': ['captured', 'saved', 'wishlist', 'bookmarked', 'interested', 'to apply'],
+    'Applied': ['applied', 'submitted', 'pending', 'waiting'],
+    'Interview': ['interview', 'interviewing', 'phone screen', 'screening', 'onsite', 'technical'],
+    'Offer': ['offer', 'offered', 'accepted'],
+    'Rejected': ['rejected', 'declined', 'no', 'ghosted', 'closed', 'withdrawn'],
+}
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%d.%m.%Y', '%b %d, %Y', '%B %d, %Y', '%d %b %Y', '%Y/%m/%d']
+
+_alias_lookup = {alias: field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+_status_lookup = {alias: status for status, aliases in STATUS_ALIASES.items() for alias in aliases}
+
+
+def normalize_header(name: str) -> str:
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name.lower()).split())
+
+
+def map_columns(header: List[str]) -> Dict[int, str]:
+    """
+    Map CSV column positions to job fields by header name
+    The first column matching a field wins; unknown columns are ignored
+    """
+    columns: Dict[int, str] = {}
+    for index, name in enumerate(header):
+        field = _alias_lookup.get(normalize_header(name))
+        if field and field not in columns.values():
+            columns[index] = field
+    return columns
+
+
+def parse_date(text: str) -> Optional[str]:
+    """
+    Parse a spreadsheet date into an ISO UTC timestamp; None if unrecognized
+    """
+    text = text.strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def normalize_status(text: str) -> str:
+    """
+    Map spreadsheet status wording onto a JobTrackr status
+    """
+    key = normalize_header(text)
+    if key.title() in FUNNEL_STAGES + TERMINAL_STAGES:
+        return key.title()
+    return _status_lookup.get(key, 'Applied')
+
+
+def parse_row(row: List[str], columns: Dict[int, str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Turn one CSV row into job fields
+
+    Returns:
+        (fields, None) or (None, error message) for an unusable row
+    """
+    fields: Dict[str, Any] = {}
+    for index, field in columns.items():
+        value = re.sub(r'[\x00-\x08\x0b-\x1f\x7f]', '', row[index]).strip()[:MAX_FIELD_CHARS] if index < len(row) else ''
+        if value:
+            fields[field] = value
+
+    if not fields:
+        return None, None  # blank line
+    url = fields.get('job_url')
+    if not url and not (fields.get('company') and fields.get('title')):
+        return None, "needs a URL, or both company and title"
+    if url:
+        # URL-only rows are scraped later, so they get the ingest checks
+        if not (fields.get('company') or fields.get('title')):
+            validation = validate_url_input(url)
+            if not validation['valid']:
+                return None, f"{validation['error']}: {url[:200]}"
+        elif urlparse(url).scheme not in ('http', 'https') or not urlparse(url).netloc:
+            return None, f"invalid URL: {url[:200]}"
+
+    if 'applied_ts' in fields:
+        applied_ts = parse_date(fields['applied_ts'])
+        if not applied_ts:
+            return None, f"unrecognized date: {fields['applied_ts'][:50]}"
+        fields['applied_ts'] = applied_ts
+    fields['status'] = normalize_status(fields.get('status', ''))
+    if 'tags' in fields:
+        fields['tags'] = [tag.strip() for tag in re.split(r'[;,|]', fields['tags']) if tag.strip()]
+    return fields, None
+
+
+def import_jobs(
+    user_id: str,
+    lines: Iterable[str],
+    enrich: bool = False,
+    start_row: int = 0,
+    context: Any = None
+) -> Dict[str, Any]:
+    """
+    Import CSV rows (header first) as jobs for a user
+
+    Args:
+        user_id: User identifier
+        lines: CSV text lines, e.g. a file opened with newline='' (quoted
+            fields may span lines)
+        enrich: Queue enrichment for rows that only have a URL
+        start_row: Skip this many data rows (resume a partial import)
+        context: Lambda context; the import stops before its deadline
+
+    Returns:
+        Summary: imported, duplicates, invalid, queued and not_enriched
+        counts, the column mapping, row errors, and next_row when the
+        import stopped early
+
+    Raises:
+        ValueError: If the header has no recognizable columns
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None) or []
+    columns = map_columns(header)
+    if not any(field in columns.values() for field in ('job_url', 'company', 'title')):
+        raise ValueError("No URL, company or title column found in the header")
+
+    remaining_ms = getattr(context, 'get_remaining_time_in_millis', None)
+    can_queue = enrich and INGEST_MODE == 'async'
+    seen_urls = {canonicalize_url(url) for url in get_user_job_urls(user_id)}
+    seen_keys = set()
+    funnel_counters: Dict[str, int] = {}
+    summary: Dict[str, Any] = {
+        'imported': 0, 'duplicates': 0, 'invalid': 0, 'queued': 0, 'not_enriched': 0,
+        'columns': {header[index]: field for index, field in columns.items()},
+        'errors': []
+    }
+
+    row_number = 0
+    chunk: List[Dict[str, Any]] = []
+    queue: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        written, existing = put_imported_jobs(chunk)
+        summary['imported'] += len(written)
+        # Jobs already stored (an overlapping start_row) count as duplicates
+        summary['duplicates'] += existing
+        failed = len(chunk) - len(written) - existing
+        if failed:
+            summary['errors'].append(f"{failed} rows failed to write")
+        for item in written:
+            for name, value in stage_counters({}, item['status'], item['applied_ts']).items():
+                funnel_counters[name] = funnel_counters.get(name, 0) + value
+        stored = {item['SK'] for item in written}
+        summary['not_enriched'] -= sum(1 for item in chunk
+                                       if item['SK'] not in stored and item.get('enrichment_error') == 'not_enriched')
+        for item in queue:
+            if item['SK'] not in stored:
+                summary['queued'] -= 1
+                continue
+            if not dispatch_enrichment(user_id, item['job_id'], item['applied_ts'], item['job_url'], context):
+                update_job_enrichment(user_id, item['job_id'], item['applied_ts'], 'failed',
+                                      {'enrichment_error': 'not_queued'})
+                summary['queued'] -= 1
+                summary['not_enriched'] += 1
+        chunk.clear()
+        queue.clear()
+
+    for row in reader:
+        row_number += 1
+        if row_number <= start_row:
+            continue
+        if row_number > IMPORT_MAX_ROWS:
+            summary['errors'].append(f"stopped at the {IMPORT_MAX_ROWS} row limit")
+            break
+
+        fields, error = parse_row(row, columns)
+        if error:
+            summary['invalid'] += 1
+            if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                summary['errors'].append(f"row {row_number}: {error}")
+        if not fields:
+            continue
+
+        url = fields.get('job_url', '')
+        if url:
+            canonical = canonicalize_url(url)
+            if canonical in seen_urls:
+                summary['duplicates'] += 1
+                continue
+            seen_urls.add(canonical)
+
+        url_only = bool(url) and not (fields.get('company') or fields.get('title'))
+        enrichment_status = None
+        if url_only:
+            if can_queue and admit_ingest(user_id)[0]:
+                enrichment_status = 'captured'
+            else:
+                # Left retryable through POST /api/jobs/{id}/enrich
+                enrichment_status = 'failed'
+                summary['not_enriched'] += 1
+
+        item = create_job_item(
+            user_id=user_id,
+            job_url=url,
+            analyzed_data=fields,
+            notes=fields.get('notes'),
+            status=fields['status'],
+            enrichment_status=enrichment_status,
+            applied_ts=fields.get('applied_ts')
+        )
+        if item['SK'] in seen_keys:
+            summary['duplicates'] += 1
+            continue
+        seen_keys.add(item['SK'])
+        if enrichment_status == 'failed':
+            item['enrichment_error'] = 'not_enriched'
+        elif enrichment_status == 'captured':
+            queue.append(item)
+            summary['queued'] += 1
+
+        chunk.append(item)
+
+        if len(chunk) >= IMPORT_CHUNK_ROWS:
+            flush()
+            if remaining_ms and remaining_ms() < IMPORT_DEADLINE_MARGIN_MS:
+                summary['next_row'] = row_number
+                break
+
+    if chunk:
+        flush()
+    if summary['imported']:
+        finish_job_import(user_id, funnel_counters)
+
+    emit_metric('ImportedJobs', summary['imported'])
+    emit_metric('ImportDuplicates', summary['duplicates'])
+    logger.info(f"Imported {summary['imported']} jobs for user {user_id}: {json.dumps({k: v for k, v in summary.items() if k != 'errors'})}")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description='Import job applications from a CSV file')
+    arg_parser.add_argument('user_id')
+    arg_parser.add_argument('path', help='CSV file with a header row')
+    arg_parser.add_argument('--enrich', action='store_true', help='Queue enrichment for URL-only rows')
+    arg_parser.add_argument('--start-row', type=int, default=0, help='Skip this many data rows')
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.path, newline='', encoding='utf-8-sig') as f:
+        summary = import_jobs(args.user_id, f, enrich=args.enrich, start_row=args.start_row)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Warm-container read cache for JobTrackr
+Pure in-memory structure; freshness is decided in db.py against the
+per-user version stamp that every job write bumps. Shared by the request
+threads of a container, so every operation holds a lock, and values are
+copied in and out so callers cannot mutate a cached result
+"""
+
+import os
+import copy
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Configuration
+READ_CACHE_ENABLED = os.getenv('READ_CACHE_ENABLED', 'true').lower() == 'true'
+READ_CACHE_MAX_ENTRIES = int(os.getenv('READ_CACHE_MAX_ENTRIES', '256'))
+READ_CACHE_MAX_BYTES = int(os.getenv('READ_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+# Results loaded within this window after a write are not cached, since
+# eventually consistent queries (and GSIs) may not reflect the write yet
+READ_CACHE_SETTLE_MS = int(os.getenv('READ_CACHE_SETTLE_MS', '1000'))
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate memory footprint of a cached result (serialized length)
+    """
+    return len(json.dumps(value, default=str))
+
+
+class ReadCache:
+    """Size-bounded LRU of per-user query results, tagged with the user's version"""
+
+    def __init__(self, max_entries: int = READ_CACHE_MAX_ENTRIES, max_bytes: int = READ_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # (user_id, key) -> (version, size, value)
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[int, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, key: Any, version: int) -> Optional[Any]:
+        """
+        Return a copy of the cached value if it was stored at this version
+        """
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((user_id, key))
+            self.hits += 1
+            value = entry[2]
+        return copy.deepcopy(value)
+
+    def put(self, user_id: str, key: Any, version: int, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._discard((user_id, key))
+            self._entries[(user_id, key)] = (version, size, value)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == user_id]:
+                self._discard(entry_key)
+
+    def _discard(self, entry_key: Tuple[str, Any]) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
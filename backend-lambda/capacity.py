@@ -0,0 +1,283 @@
+"""
+DynamoDB consumed-capacity accounting and per-route I/O budgets
+FastTable reports every call here: consumed read/write units, items and
+approximate bytes read and written.
+lambda_function.dispatch opens a scope per request, so the totals are
+attributed to the route and user, emitted as one EMF line when the
+request ends, and checked against ROUTE_IO_BUDGETS
+
+Budgets are per request. Exceeding one logs a warning and emits
+IOBudgetExceeded; tests can assert them directly:
+
+    with capacity_scope('get_jobs') as meter:
+        handle_get_jobs(event, None)
+    assert_within_budget(meter)
+"""
+
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Iterator
+from metrics import emit_metric, emit_metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CAPACITY_ACCOUNTING = os.getenv('CAPACITY_ACCOUNTING', 'true').lower() == 'true'
+
+# Per-request ceilings: DynamoDB calls, consumed read/write units.
+# Reads are eventually consistent (0.5 RCU per 4 KB) unless noted; one
+# query page is at most 1 MB, so an unpaginated page costs <= 128 RCU
+ROUTE_IO_BUDGETS: Dict[str, Dict[str, float]] = {
+    'get_jobs': {'calls': 4, 'read_units': 40, 'write_units': 0},
+    'search_jobs': {'calls': 6, 'read_units': 60, 'write_units': 0},
+    'get_job': {'calls': 4, 'read_units': 8, 'write_units': 10},
+    # Every job page plus the version stamp: sized for a 2,500-job history
+    # (~1 KB items, three query pages)
+    'get_stats': {'calls': 5, 'read_units': 330, 'write_units': 0},
+    'get_usage': {'calls': 1, 'read_units': 10, 'write_units': 0},
+    'get_funnel': {'calls': 2, 'read_units': 8, 'write_units': 0},
+    'update_job': {'calls': 12, 'read_units': 20, 'write_units': 40},
+    'delete_job': {'calls': 12, 'read_units': 20, 'write_units': 40},
+    'job_ingest': {'calls': 40, 'read_units': 80, 'write_units': 100},
+    'retry_enrichment': {'calls': 40, 'read_units': 80, 'write_units': 100},
+}
+ROUTE_IO_BUDGETS.update(json.loads(os.getenv('IO_BUDGETS', '{}')))
+
+READ_OPERATIONS = frozenset(['GetItem', 'Query', 'Scan', 'BatchGetItem'])
+
+current_meter: ContextVar[Optional['CapacityMeter']] = ContextVar('capacity_meter', default=None)
+
+
+def attribute_size(av: Dict[str, Any]) -> int:
+    """
+    Approximate stored size in bytes of one AttributeValue, following
+    DynamoDB's item size rules
+    """
+    (kind, value), = av.items()
+    if kind == 'S':
+        return len(value.encode('utf-8'))
+    if kind == 'N':
+        return (len(value.lstrip('-').replace('.', '')) + 1) // 2 + 1
+    if kind == 'B':
+        return len(value)
+    if kind in ('BOOL', 'NULL'):
+        return 1
+    if kind == 'M':
+        return 3 + sum(len(k.encode('utf-8')) + attribute_size(v) + 1 for k, v in value.items())
+    if kind == 'L':
+        return 3 + sum(attribute_size(v) + 1 for v in value)
+    if kind == 'SS':
+        return sum(len(v.encode('utf-8')) for v in value)
+    if kind == 'NS':
+        return sum(attribute_size({'N': v}) for v in value)
+    return sum(len(v) for v in value)
+
+
+def item_size(item: Dict[str, Any]) -> int:
+    """
+    Approximate stored size in bytes of a DynamoDB item (wire format)
+    """
+    return sum(len(name.encode('utf-8')) + attribute_size(av) for name, av in item.items())
+
+
+def consumed_units(consumed: Any) -> float:
+    """
+    Total CapacityUnits of a ConsumedCapacity entry or list of entries
+    """
+    if not consumed:
+        return 0.0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return float(sum(entry.get('CapacityUnits', 0) for entry in consumed))
+
+
+class CapacityMeter:
+    """
+    Totals for one request; safe to share with worker threads
+    """
+
+    def __init__(self, route: str, user_id: Optional[str] = None):
+        self.route = route
+        self.user_id = user_id
+        self.calls = 0
+        self.read_units = 0.0
+        self.write_units = 0.0
+        self.items_read = 0
+        self.bytes_read = 0
+        self.items_written = 0
+        self.bytes_written = 0
+        self.operations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        operation: str,
+        consumed: Any,
+        items_read: int = 0,
+        bytes_read: int = 0,
+        items_written: int = 0,
+        bytes_written: int = 0
+    ) -> None:
+        """
+        Add one DynamoDB call
+
+        Args:
+            operation: API operation name (GetItem, Query, ...)
+            consumed: The response's ConsumedCapacity (entry or list)
+            items_read: Items returned
+            bytes_read: Approximate size of the items returned
+            items_written: Items put, updated or deleted
+            bytes_written: Approximate size of the items put
+        """
+        units = consumed_units(consumed)
+        with self._lock:
+            self.calls += 1
+            self.operations[operation] = self.operations.get(operation, 0) + 1
+            if operation in READ_OPERATIONS:
+                self.read_units += units
+            else:
+                self.write_units += units
+            self.items_read += items_read
+            self.bytes_read += bytes_read
+            self.items_written += items_written
+            self.bytes_written += bytes_written
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'route': self.route,
+            'calls': self.calls,
+            'read_units': round(self.read_units, 1),
+            'write_units': round(self.write_units, 1),
+            'items_read': self.items_read,
+            'bytes_read': self.bytes_read,
+            'items_written': self.items_written,
+            'bytes_written': self.bytes_written,
+            'operations': dict(self.operations)
+        }
+
+
+def capacity_enabled() -> bool:
+    """
+    Whether the current call should ask DynamoDB for consumed capacity
+    """
+    return CAPACITY_ACCOUNTING and current_meter.get() is not None
+
+
+def record_call(operation: str, request: Dict[str, Any], response: Dict[str, Any]) -> None:
+    """
+    Record a low-level client call (wire-format request and response)
+    against the current request's meter, if any
+    """
+    meter = current_meter.get()
+    if meter is None:
+        return
+
+    items_read, bytes_read = 0, 0
+    if 'Item' in response:
+        items_read, bytes_read = 1, item_size(response['Item'])
+    elif 'Items' in response:
+        items_read = len(response['Items'])
+        bytes_read = sum(item_size(item) for item in response['Items'])
+    elif 'Responses' in response:
+        for items in response['Responses'].values():
+            items_read += len(items)
+            bytes_read += sum(item_size(item) for item in items)
+
+    items_written, bytes_written = 0, 0
+    if operation == 'PutItem':
+        items_written, bytes_written = 1, item_size(request['Item'])
+    elif operation in ('UpdateItem', 'DeleteItem'):
+        items_written = 1
+    elif operation == 'BatchWriteItem':
+        for requests in request['RequestItems'].values():
+            items_written += len(requests)
+            bytes_written += sum(item_size(r['PutRequest']['Item']) for r in requests if 'PutRequest' in r)
+    elif operation == 'TransactWriteItems':
+        items_written = len(request['TransactItems'])
+        bytes_written = sum(item_size(t['Put']['Item']) for t in request['TransactItems'] if 'Put' in t)
+
+    meter.record(operation, response.get('ConsumedCapacity'), items_read, bytes_read, items_written, bytes_written)
+
+
+def check_budget(meter: CapacityMeter, budgets: Optional[Dict[str, Dict[str, float]]] = None) -> List[str]:
+    """
+    Compare a request's totals with its route budget
+
+    Args:
+        meter: Finished request meter
+        budgets: Budgets by route (defaults to ROUTE_IO_BUDGETS)
+
+    Returns:
+        Human-readable violations; empty when within budget or unbudgeted
+    """
+    budget = (budgets if budgets is not None else ROUTE_IO_BUDGETS).get(meter.route)
+    if not budget:
+        return []
+    totals = meter.to_dict()
+    return [
+        f"{meter.route}: {name} {totals[name]} > {limit}"
+        for name, limit in budget.items()
+        if name in totals and totals[name] > limit
+    ]
+
+
+def assert_within_budget(meter: CapacityMeter, budgets: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    """
+    Raise AssertionError listing every budget the request exceeded
+    """
+    violations = check_budget(meter, budgets)
+    if violations:
+        raise AssertionError('; '.join(violations))
+
+
+def publish(meter: CapacityMeter) -> None:
+    """
+    Emit the request's totals (Route dimension, user id as a property)
+    and flag budget violations
+    """
+    if not meter.calls:
+        return
+    dimensions = {'Route': meter.route}
+    emit_metrics({
+        'DynamoCalls': (meter.calls, 'Count'),
+        'DynamoReadUnits': (meter.read_units, 'Count'),
+        'DynamoWriteUnits': (meter.write_units, 'Count'),
+        'DynamoItemsRead': (meter.items_read, 'Count'),
+        'DynamoBytesRead': (meter.bytes_read, 'Bytes'),
+        'DynamoItemsWritten': (meter.items_written, 'Count'),
+        'DynamoBytesWritten': (meter.bytes_written, 'Bytes')
+    }, dimensions, {'UserId': meter.user_id, 'Operations': meter.operations})
+
+    violations = check_budget(meter)
+    if violations:
+        logger.warning(f"I/O budget exceeded: {'; '.join(violations)}")
+        emit_metric('IOBudgetExceeded', dimensions=dimensions)
+
+
+@contextmanager
+def capacity_scope(route: str, user_id: Optional[str] = None) -> Iterator[CapacityMeter]:
+    """
+    Meter every DynamoDB call made in this context (and in threads or
+    tasks started from it) and publish the totals on exit
+
+    Args:
+        route: Route name the calls are attributed to
+        user_id: Caller, logged with the totals
+
+    Yields:
+        The request's CapacityMeter
+    """
+    meter = CapacityMeter(route, user_id)
+    token = current_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        current_meter.reset(token)
+        try:
+            publish(meter)
+        except Exception as e:
+            logger.warning(f"Failed to publish capacity metrics: {str(e)}")
@@ -4,24 +4,102 @@ Handles all database operations for UsersJobs table
 """
 
 import os
+import time
+import json
 import logging
+import gzip
 import hashlib
-from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+import uuid
+import random
+import contextvars
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Callable, Iterator
 import boto3
 from botocore.exceptions import ClientError
+from dynamo import FastTable, BATCH_WRITE_SIZE, client_config
+from search_index import (
+    SEARCH_FIELDS, SearchIndex, SearchIndexCache,
+    build_document, make_doc_ref, parse_doc_ref, chunk_for, encode_chunk, decode_chunk
+)
+from pagination import (
+    PAGE_COUNT_PREFIX, page_month, page_shard, page_counts, group_positions, locate_page, position_in_month
+)
+from cache import READ_CACHE_ENABLED, READ_CACHE_SETTLE_MS, ReadCache
+from metrics import emit_metric
+from salary import salary_fields, salary_distribution
+from funnel import stage_counters, replay_events, summarize_funnel
+from admission import (
+    ADMISSION_ENABLED, ADMISSION_BACKEND, USER_INGEST_RATE, USER_INGEST_BURST, GLOBAL_INGEST_RATE, GLOBAL_INGEST_BURST,
+    LocalTokenBuckets, refill, retry_after, full_after
+)
 
 logger = logging.getLogger(__name__)
 
 # Configuration
 TABLE_NAME = os.getenv('DYNAMODB_TABLE_NAME', 'UsersJobs')
 AWS_REGION = os.getenv('AWS_DEFAULT_REGION', 'us-east-2')
-
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
-table = dynamodb.Table(TABLE_NAME)
+NOTES_SOURCE_TTL_DAYS = int(os.getenv('NOTES_SOURCE_TTL_DAYS', '7'))
+NOTES_SOURCE_MAX_CHARS = int(os.getenv('NOTES_SOURCE_MAX_CHARS', '100000'))
+IDEMPOTENCY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_TTL_HOURS', '24'))
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', '60'))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', '20'))
+IDEMPOTENCY_POLL_SECONDS = 0.5
+FLIGHT_LEASE_SECONDS = int(os.getenv('FLIGHT_LEASE_SECONDS', '45'))
+FLIGHT_WAIT_SECONDS = float(os.getenv('FLIGHT_WAIT_SECONDS', '15'))
+FLIGHT_RESULT_TTL_SECONDS = int(os.getenv('FLIGHT_RESULT_TTL_SECONDS', '600'))
+FLIGHT_POLL_SECONDS = 0.25
+# Results larger than this (compressed) are not shared; DynamoDB items cap at 400 KB
+FLIGHT_MAX_RESULT_BYTES = 350 * 1024
+BUCKET_MAX_ATTEMPTS = 5
+IMPORT_WRITE_THREADS = int(os.getenv('IMPORT_WRITE_THREADS', '8'))
+BACKFILL_LEASE_SECONDS = int(os.getenv('BACKFILL_LEASE_SECONDS', '600'))
+# Attributes the backfill scan reads: keys, the fields it compares, the
+# version and status its conditional writes check, and the archive key
+BACKFILL_SCAN_FIELDS = [
+    'PK', 'SK', 'user_id', 'job_id', 'applied_ts', 'job_url', 'title', 'company', 'location',
+    'salary_range', 'employment_type', 'source', 'tags', 'enrichment_status', 'analysis_version', 'content_hash'
+]
+
+# Fields each update path may write
+USER_UPDATABLE_FIELDS = ['status', 'notes', 'resume_url', 'notes_status']
+ENRICHMENT_FIELDS = [
+    'company', 'title', 'location', 'salary_range', 'employment_type', 'source',
+    'tags', 'notes', 'notes_status', 'status', 'GSI1SK', 'enrichment_status', 'enrichment_error', 'llm_usage',
+    'salary_min', 'salary_max', 'currency', 'analysis_version', 'content_hash'
+]
+# Internal key attributes never returned to clients
+INTERNAL_KEYS = ['PK', 'SK', 'GSI1PK', 'GSI1SK', 'GSI2PK', 'GSI2SK']
+PUBLIC_JOB_FIELDS = [
+    'job_id', 'user_id', 'type', 'applied_ts', 'last_updated_ts', 'company', 'title', 'location',
+    'status', 'job_url', 'salary_range', 'salary_min', 'salary_max', 'currency', 'employment_type', 'source',
+    'tags', 'notes', 'notes_status', 'resume_url', 'enrichment_status', 'enrichment_error', 'llm_usage',
+    'stage_ts'
+]
+# Named projections for list views ('all' means no projection)
+JOB_PROJECTIONS = {
+    'summary': [
+        'job_id', 'applied_ts', 'last_updated_ts', 'company', 'title', 'location', 'status',
+        'job_url', 'salary_range', 'salary_min', 'salary_max', 'currency', 'employment_type', 'source',
+        'resume_url', 'enrichment_status', 'notes_status'
+    ],
+    'all': None
+}
+# Projection of the stats query
+STATS_FIELDS = ['job_id', 'status', 'company', 'position', 'applied_ts', 'created_at', 'salary_min', 'salary_max', 'currency']
+USAGE_COUNTERS = ['input_tokens', 'output_tokens', 'cache_read_tokens', 'cache_write_tokens', 'calls', 'cost_micros']
+
+# Initialize DynamoDB client (low-level client; see dynamo.py)
+client = boto3.client('dynamodb', region_name=AWS_REGION, config=client_config())
+table = FastTable(client, TABLE_NAME)
 logger.info(f"DynamoDB table '{TABLE_NAME}' initialized in region {AWS_REGION}")
 
+# Warm-container caches of per-user search indexes and query results
+search_cache = SearchIndexCache()
+read_cache = ReadCache()
+# Stand-in for the DynamoDB token buckets (ADMISSION_BACKEND=local)
+local_buckets = LocalTokenBuckets()
+
 
 def generate_job_id(url: str, timestamp: str) -> str:
     """
@@ -31,13 +109,149 @@ def generate_job_id(url: str, timestamp: str) -> str:
     return hashlib.sha256(content.encode()).hexdigest()[:12]
 
 
+def resolve_job_fields(spec: Optional[str], default: str = 'summary') -> Optional[List[str]]:
+    """
+    Resolve a `fields` parameter into a list of attributes to project
+
+    Args:
+        spec: Projection name ('summary', 'all') or comma-separated field names
+        default: Projection used when spec is empty
+
+    Returns:
+        List of fields, or None for full items
+
+    Raises:
+        ValueError: If a field name is unknown
+    """
+    spec = (spec or default).strip()
+    if spec in JOB_PROJECTIONS:
+        return JOB_PROJECTIONS[spec]
+
+    fields = [f.strip() for f in spec.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in PUBLIC_JOB_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown) or spec}")
+
+    # Keys needed to address the job are always included
+    for required in ('job_id', 'applied_ts'):
+        if required not in fields:
+            fields.append(required)
+    return fields
+
+
+def build_projection(fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Build ProjectionExpression params for a field list (placeholders avoid reserved words)
+    """
+    if not fields:
+        return {}
+    names = {f'#f{i}': field for i, field in enumerate(fields)}
+    return {
+        'ProjectionExpression': ', '.join(names.keys()),
+        'ExpressionAttributeNames': names
+    }
+
+
+def strip_internal_keys(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Remove PK/SK/GSI keys from an item before returning it to clients
+    """
+    return {k: v for k, v in item.items() if k not in INTERNAL_KEYS}
+
+
+def get_user_version(user_id: str) -> Dict[str, Any]:
+    """
+    Read the user's version stamp (strongly consistent)
+
+    Returns:
+        Dict with 'version' and 'updated_at' (epoch ms), zeros if never
+        written, and 'pages', the job count per month of applied_ts
+    """
+    item = table.get_item(
+        Key={'PK': f'USER#{user_id}', 'SK': 'VERSION'},
+        ConsistentRead=True
+    ).get('Item') or {}
+    return {
+        'version': int(item.get('version', 0)),
+        'updated_at': int(item.get('updated_at', 0)),
+        'pages': page_counts(item)
+    }
+
+
+def version_bump(user_id: str, pages: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    UpdateItem parameters that advance the user's version stamp
+
+    Args:
+        user_id: User identifier
+        pages: Job count changes by month, for the page index
+    """
+    names = {f'#p{i}': f'{PAGE_COUNT_PREFIX}{month}' for i, month in enumerate(pages or {})}
+    values = {f':p{i}': delta for i, delta in enumerate((pages or {}).values())}
+    params = {
+        'Key': {'PK': f'USER#{user_id}', 'SK': 'VERSION'},
+        'UpdateExpression': 'ADD ' + ', '.join(['version :one'] + [f'#p{i} :p{i}' for i in range(len(names))]) + ' SET updated_at = :now',
+        'ExpressionAttributeValues': {':one': 1, ':now': int(time.time() * 1000), **values}
+    }
+    if names:
+        params['ExpressionAttributeNames'] = names
+    return params
+
+
+def bump_user_version(user_id: str) -> None:
+    """
+    Invalidate cached reads for a user in every container
+    Called after each job write, once the write has succeeded
+    """
+    read_cache.invalidate(user_id)
+    try:
+        table.update_item(**version_bump(user_id))
+    except ClientError as e:
+        logger.error(f"Failed to bump version for user {user_id}: {str(e)}", exc_info=True)
+
+
+def cached_read(user_id: str, name: str, params: Any, loader: Any, stamp: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Return a per-user query result from the warm-container cache if the
+    user's version stamp is unchanged, otherwise load and cache it
+
+    Args:
+        user_id: User identifier
+        name: Query name (metric dimension)
+        params: JSON-serializable query parameters (part of the cache key)
+        loader: Zero-argument callable that runs the query; exceptions
+            propagate and nothing is cached
+        stamp: The user's version stamp, if the caller has just read it
+
+    Returns:
+        Query result
+    """
+    if not READ_CACHE_ENABLED:
+        return loader()
+
+    key = f"{name}:{json.dumps(params, sort_keys=True, default=str)}"
+    stamp = stamp or get_user_version(user_id)
+    value = read_cache.get(user_id, key, stamp['version'])
+    emit_metric('ReadCacheHit' if value is not None else 'ReadCacheMiss', dimensions={'Query': name})
+    if value is not None:
+        return value
+
+    value = loader()
+    if int(time.time() * 1000) - stamp['updated_at'] >= READ_CACHE_SETTLE_MS:
+        read_cache.put(user_id, key, stamp['version'], value)
+    return value
+
+
 def create_job_item(
     user_id: str,
     job_url: str,
     analyzed_data: Dict[str, Any],
     resume_url: Optional[str] = None,
     notes: Optional[str] = None,
-    status: str = "Captured"
+    status: str = "Captured",
+    notes_status: Optional[str] = None,
+    enrichment_status: Optional[str] = None,
+    applied_ts: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Create a job item for DynamoDB with proper schema
@@ -49,12 +263,17 @@ def create_job_item(
         resume_url: S3 URL of uploaded resume (optional)
         notes: User notes (optional)
         status: Job status (default: Captured)
+        notes_status: 'pending' when the notes summary is generated later
+        enrichment_status: Progressive ingest stage ('captured', 'scraped', 'analyzed', 'failed')
+        applied_ts: ISO timestamp the job was applied to (default: now; set by imports)
 
     Returns:
         Complete DynamoDB item
     """
-    now = datetime.now(timezone.utc).isoformat()
-    job_id = generate_job_id(job_url, now)
+    last_updated = datetime.now(timezone.utc).isoformat()
+    now = applied_ts or last_updated
+    # Imported rows may have no URL; company and title identify them instead
+    job_id = generate_job_id(job_url or f"{analyzed_data.get('company')}#{analyzed_data.get('title')}", now)
 
     # Build the item
     item = {
@@ -69,7 +288,7 @@ def create_job_item(
 
         # Timestamps
         'applied_ts': now,
-        'last_updated_ts': now,
+        'last_updated_ts': last_updated,
 
         # Required fields from analyzer
         'company': analyzed_data.get('company', 'Unknown'),
@@ -82,12 +301,21 @@ def create_job_item(
 
         # GSI1 key for company filtering
         'GSI1PK': f'USER#{user_id}',
-        'GSI1SK': f'COMPANY#{analyzed_data.get("company", "Unknown")}#{now}#{job_id}'
+        'GSI1SK': f'COMPANY#{analyzed_data.get("company", "Unknown")}#{now}#{job_id}',
+
+        # GSI2 key for status filtering
+        'GSI2PK': f'USER#{user_id}#STATUS#{status}',
+        'GSI2SK': f'{now}#{job_id}',
+
+        # When each status was first reached (funnel analytics)
+        'stage_ts': {status: now}
     }
 
     # Optional fields from analyzer
     if analyzed_data.get('salary_range'):
         item['salary_range'] = analyzed_data['salary_range']
+        # Annualized numeric bounds for filtering and analytics
+        item.update(salary_fields(analyzed_data['salary_range']))
 
     if analyzed_data.get('employment_type'):
         item['employment_type'] = analyzed_data['employment_type']
@@ -104,6 +332,12 @@ def create_job_item(
     elif notes:
         item['notes'] = notes
 
+    if notes_status:
+        item['notes_status'] = notes_status
+
+    if enrichment_status:
+        item['enrichment_status'] = enrichment_status
+
     # Optional user-provided fields
     if resume_url:
         item['resume_url'] = resume_url
@@ -113,19 +347,42 @@ def create_job_item(
 
 def put_job(item: Dict[str, Any]) -> bool:
     """
-    Insert a job into DynamoDB
+    Insert a new job into DynamoDB
+    The item, its tag pointers, its first status event, the FUNNEL
+    counters, its page index entry and the user's version stamp (with the
+    month's job count) are written in one TransactWriteItems. Placeholders awaiting enrichment get their search
+    document from the enrichment step that fills them in (or fails them)
 
     Args:
         item: Complete DynamoDB item
 
     Returns:
-        True if successful, False otherwise
+        True if successful, False otherwise (including an existing job
+        with the same key)
     """
+    user_id, job_id, applied_ts = item['user_id'], item['job_id'], item['applied_ts']
+    actions: List[Dict[str, Any]] = [{'Put': {'Item': item, 'ConditionExpression': 'attribute_not_exists(PK)'}}]
+    for tag in sorted({normalize_tag(t) for t in item.get('tags') or [] if normalize_tag(t)}):
+        actions.append({'Put': {'Item': tag_pointer(user_id, tag, applied_ts, job_id)}})
+    actions.append({'Put': {'Item': status_event(user_id, job_id, applied_ts, None, item['status'], applied_ts)}})
+    counters = stage_counters({}, item['status'], applied_ts)
+    if counters:
+        actions.append({'Update': funnel_increment(user_id, counters)})
+    position = make_doc_ref(applied_ts, job_id)
+    actions.append({'Update': page_shard_update(user_id, position, add=True)})
+    actions.append({'Update': version_bump(user_id, {page_month(position): 1})})
+
     try:
-        table.put_item(Item=item)
-        logger.info(f"Successfully inserted job: {item['job_id']} for user: {item['user_id']}")
+        table.transact_write(actions)
+        read_cache.invalidate(user_id)
+        if not item.get('enrichment_status'):
+            update_search_document(user_id, job_id, applied_ts, item)
+        logger.info(f"Successfully inserted job: {job_id} for user: {user_id}")
         return True
     except ClientError as e:
+        if transaction_conflict(e, 0):
+            logger.warning(f"Job {job_id} already exists for user {user_id}")
+            return False
         logger.error(f"Failed to insert job into DynamoDB: {str(e)}", exc_info=True)
         return False
     except Exception as e:
@@ -133,6 +390,108 @@ def put_job(item: Dict[str, Any]) -> bool:
         return False
 
 
+def get_user_job_urls(user_id: str) -> List[str]:
+    """
+    Get the URL of every job a user has (keys and job_url only), for
+    deduplicating imports
+
+    Raises:
+        ClientError: If a page cannot be read
+    """
+    return [job['job_url'] for job in iter_user_jobs(user_id, ['job_url']) if job.get('job_url')]
+
+
+def put_imported_jobs(items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Write imported job items with their tag pointers and status events in
+    25-item BatchWriteItem calls, IMPORT_WRITE_THREADS chunks in parallel.
+    Each chunk's keys are batch-read first and jobs already stored are
+    skipped, so an overlapping re-run (start_row) neither overwrites nor
+    double-counts a job. A job goes out in one call with its derived items;
+    the jobs of a call that failed are deleted again, so they count as
+    failed and a re-run retries them
+    Per-user indexes are refreshed once per import by finish_job_import
+
+    Args:
+        items: Job items from create_job_item
+
+    Returns:
+        (items written, number of jobs that already existed)
+    """
+    def derived_items(item: Dict[str, Any]) -> List[Dict[str, Any]]:
+        user_id, job_id, applied_ts = item['user_id'], item['job_id'], item['applied_ts']
+        derived = [tag_pointer(user_id, tag, applied_ts, job_id)
+                   for tag in {normalize_tag(t) for t in item.get('tags') or [] if normalize_tag(t)}]
+        derived.append(status_event(user_id, job_id, applied_ts, None, item['status'], applied_ts))
+        return derived
+
+    def write(chunk: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        try:
+            keys = [{'PK': item['PK'], 'SK': item['SK']} for item in chunk]
+            stored = {item['SK'] for item in table.batch_get(keys, ConsistentRead=True, ProjectionExpression='SK')}
+        except ClientError as e:
+            logger.error(f"Failed to check {len(chunk)} imported jobs: {str(e)}", exc_info=True)
+            return [], 0
+        new_items = [item for item in chunk if item['SK'] not in stored]
+
+        # Whole jobs per call, so a failed call leaves no job half indexed
+        groups: List[List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]] = []
+        for item in new_items:
+            derived = [item] + derived_items(item)
+            if not groups or sum(len(d) for _, d in groups[-1]) + len(derived) > BATCH_WRITE_SIZE:
+                groups.append([])
+            groups[-1].append((item, derived))
+
+        written: List[Dict[str, Any]] = []
+        try:
+            for group in groups:
+                with table.batch_writer() as batch:
+                    for _, derived in group:
+                        for derived_item in derived:
+                            batch.put_item(Item=derived_item)
+                written.extend(item for item, _ in group)
+        except ClientError as e:
+            failed = new_items[len(written):]
+            logger.error(f"Failed to write {len(failed)} imported jobs: {str(e)}", exc_info=True)
+            for item in failed:
+                try:
+                    table.delete_item(Key={'PK': item['PK'], 'SK': item['SK']})
+                except ClientError as delete_error:
+                    logger.error(f"Failed to remove partly written job {item['job_id']}: {str(delete_error)}")
+        return written, len(chunk) - len(new_items)
+
+    # Each thread runs in a copy of this context so capacity is still metered
+    chunks = [items[i:i + BATCH_WRITE_SIZE] for i in range(0, len(items), BATCH_WRITE_SIZE)]
+    with ThreadPoolExecutor(max_workers=IMPORT_WRITE_THREADS) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, write, chunk) for chunk in chunks]
+        written, existing = [], 0
+        for future in futures:
+            chunk_written, chunk_existing = future.result()
+            written.extend(chunk_written)
+            existing += chunk_existing
+        return written, existing
+
+
+def finish_job_import(user_id: str, funnel_counters: Dict[str, int]) -> None:
+    """
+    Bring a user's derived data up to date after put_imported_jobs:
+    add the imported stages to the FUNNEL aggregate, rebuild the search
+    and page indexes once, and invalidate cached reads
+
+    Args:
+        user_id: User identifier
+        funnel_counters: Summed stage_counters of the imported jobs
+    """
+    try:
+        if funnel_counters:
+            table.update_item(**funnel_increment(user_id, funnel_counters))
+    except ClientError as e:
+        logger.error(f"Failed to update funnel after import: {str(e)}", exc_info=True)
+    rebuild_search_index(user_id)
+    rebuild_page_index(user_id)
+    bump_user_version(user_id)
+
+
 def get_job(user_id: str, job_id: str, applied_ts: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve a specific job by user_id and full SK
@@ -158,14 +517,23 @@ def get_job(user_id: str, job_id: str, applied_ts: str) -> Optional[Dict[str, An
         return None
 
 
-def get_user_jobs(user_id: str, limit: int = 10, last_key: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def get_user_jobs(
+    user_id: str,
+    limit: int = 10,
+    last_key: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None,
+    stamp: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """
     Get jobs for a user with pagination (sorted by applied_ts descending)
+    Served from the warm-container read cache until the user's next write
 
     Args:
         user_id: User identifier
         limit: Maximum number of jobs to return (default: 10)
         last_key: Pagination token (LastEvaluatedKey from previous response)
+        fields: Attributes to project (default: full items)
+        stamp: The user's version stamp, if already read
 
     Returns:
         Dict with 'items' and optional 'last_key' for pagination
@@ -178,29 +546,86 @@ def get_user_jobs(user_id: str, limit: int = 10, last_key: Optional[Dict[str, An
                 ':sk_prefix': 'JOB#'
             },
             'ScanIndexForward': False,  # Descending order (newest first)
-            'Limit': limit
+            'Limit': limit,
+            **build_projection(fields)
         }
 
         # Add pagination token if provided
         if last_key:
             query_params['ExclusiveStartKey'] = last_key
 
-        response = table.query(**query_params)
+        def load() -> Dict[str, Any]:
+            response = table.query(**query_params)
 
-        result = {
-            'items': response.get('Items', [])
-        }
+            result = {
+                'items': response.get('Items', [])
+            }
 
-        # Include pagination token if there are more results
-        if 'LastEvaluatedKey' in response:
-            result['last_key'] = response['LastEvaluatedKey']
+            # Include pagination token if there are more results
+            if 'LastEvaluatedKey' in response:
+                result['last_key'] = response['LastEvaluatedKey']
 
-        return result
+            return result
+
+        return cached_read(user_id, 'jobs', [limit, last_key, fields], load, stamp)
     except ClientError as e:
         logger.error(f"Failed to query user jobs: {str(e)}", exc_info=True)
         return {'items': []}
 
 
+def iter_user_jobs(user_id: str, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every job of a user, newest first, one query page at a time
+    Bypasses the read cache; only the current page (up to 1 MB) is held
+
+    Args:
+        user_id: User identifier
+        fields: Attributes to project (default: full items)
+
+    Raises:
+        ClientError: If a page cannot be read, so a partial stream is never
+            mistaken for the full history
+    """
+    query_params = {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk_prefix)',
+        'ExpressionAttributeValues': {
+            ':pk': f'USER#{user_id}',
+            ':sk_prefix': 'JOB#'
+        },
+        'ScanIndexForward': False,
+        **build_projection(fields)
+    }
+    while True:
+        response = table.query(**query_params)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def make_start_key(
+    user_id: str,
+    position: str,
+    status: Optional[str] = None,
+    company: Optional[str] = None,
+    tag: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Rebuild the ExclusiveStartKey for a job position ("{applied_ts}#{job_id}")
+    Mirrors the index choice of query_user_jobs for the same filters
+    """
+    pk = f'USER#{user_id}'
+    if tag:
+        return {'PK': pk, 'SK': f'TAG#{normalize_tag(tag)}#{position}'}
+
+    key = {'PK': pk, 'SK': f'JOB#{position}'}
+    if company:
+        key.update({'GSI1PK': pk, 'GSI1SK': f'COMPANY#{company}#{position}'})
+    elif status:
+        key.update({'GSI2PK': f'{pk}#STATUS#{status}', 'GSI2SK': position})
+    return key
+
+
 def get_jobs_by_company(user_id: str, company: str, limit: int = 50) -> List[Dict[str, Any]]:
     """
     Get all jobs for a user filtered by company (using GSI1)
@@ -230,262 +655,1745 @@ def get_jobs_by_company(user_id: str, company: str, limit: int = 50) -> List[Dic
         return []
 
 
-def update_job_status(
-    user_id: str,
-    job_id: str,
-    applied_ts: str,
-    new_status: str
-) -> bool:
+def normalize_tag(tag: str) -> str:
     """
-    Update job status
+    Normalize a tag for the tag index (case-insensitive, no '#')
+    """
+    return ' '.join(str(tag).lower().replace('#', ' ').split())
+
+
+def tag_pointer(user_id: str, tag: str, applied_ts: str, job_id: str) -> Dict[str, Any]:
+    """
+    TAG#{tag}#{applied_ts}#{job_id} pointer item for a normalized tag
+    """
+    return {
+        'PK': f'USER#{user_id}',
+        'SK': f'TAG#{tag}#{applied_ts}#{job_id}',
+        'type': 'TAG',
+        'job_id': job_id,
+        'applied_ts': applied_ts
+    }
+
+
+def sync_tag_index(user_id: str, job_id: str, applied_ts: str, old_tags: List[str], new_tags: List[str]) -> None:
+    """
+    Maintain TAG#{tag}#{applied_ts}#{job_id} pointer items for tag filtering
 
     Args:
         user_id: User identifier
         job_id: Job identifier
-        applied_ts: ISO timestamp
-        new_status: New status value
-
-    Returns:
-        True if successful, False otherwise
+        applied_ts: ISO timestamp of the job
+        old_tags: Tags currently indexed for the job
+        new_tags: Tags the job should be indexed under
     """
+    old_set = {normalize_tag(t) for t in old_tags or [] if normalize_tag(t)}
+    new_set = {normalize_tag(t) for t in new_tags or [] if normalize_tag(t)}
+    if old_set == new_set:
+        return
+
     try:
-        table.update_item(
-            Key={
-                'PK': f'USER#{user_id}',
-                'SK': f'JOB#{applied_ts}#{job_id}'
-            },
-            UpdateExpression='SET #status = :status, last_updated_ts = :updated',
-            ExpressionAttributeNames={
-                '#status': 'status'
-            },
-            ExpressionAttributeValues={
-                ':status': new_status,
-                ':updated': datetime.now(timezone.utc).isoformat()
-            }
-        )
-        logger.info(f"Updated job {job_id} status to {new_status}")
-        return True
+        # batch_writer chunks into 25-item requests and retries unprocessed items
+        with table.batch_writer() as batch:
+            for tag in old_set - new_set:
+                batch.delete_item(Key={'PK': f'USER#{user_id}', 'SK': f'TAG#{tag}#{applied_ts}#{job_id}'})
+            for tag in new_set - old_set:
+                batch.put_item(Item=tag_pointer(user_id, tag, applied_ts, job_id))
     except ClientError as e:
-        logger.error(f"Failed to update job status: {str(e)}", exc_info=True)
-        return False
+        logger.error(f"Failed to update tag index for job {job_id}: {str(e)}", exc_info=True)
 
 
-def update_job_resume(
+def normalize_date_bound(value: str) -> str:
+    """
+    Canonical form of a from/to bound for comparison with stored
+    applied_ts values, which are UTC isoformat() strings. Date-only values
+    stay as prefixes; timestamps (any offset or 'Z', naive read as UTC)
+    are converted to UTC
+
+    Raises:
+        ValueError: If the value is not an ISO date or timestamp
+    """
+    parsed = datetime.fromisoformat(value)
+    if len(value) <= 10:
+        return parsed.date().isoformat()
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def query_user_jobs(
     user_id: str,
-    job_id: str,
-    applied_ts: str,
-    resume_url: str
-) -> bool:
+    limit: int = 10,
+    last_key: Optional[Dict[str, Any]] = None,
+    status: Optional[str] = None,
+    company: Optional[str] = None,
+    tag: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
     """
-    Update job with resume URL
+    Get a user's jobs filtered server-side, newest first
+    The most selective filter drives a key-condition query (tag index,
+    then GSI1 for company, then GSI2 for status, then the base table for
+    date ranges); remaining filters are applied to that result set
 
     Args:
         user_id: User identifier
-        job_id: Job identifier
-        applied_ts: ISO timestamp
-        resume_url: S3 URL of resume
+        limit: Maximum number of jobs to evaluate (default: 10)
+        last_key: Pagination token (LastEvaluatedKey from previous response)
+        status: Exact status
+        company: Exact company name
+        tag: Tag (case-insensitive)
+        date_from: Earliest applied_ts (ISO date or timestamp, inclusive)
+        date_to: Latest applied_ts (ISO date or timestamp, inclusive;
+            a date covers the whole UTC day)
+        fields: Attributes to project (default: full items)
 
     Returns:
-        True if successful, False otherwise
+        Dict with 'items' and optional 'last_key' for pagination
     """
+    date_from = normalize_date_bound(date_from) if date_from else None
+    date_to = normalize_date_bound(date_to) if date_to else None
+
+    # Range bounds on "<prefix><applied_ts>..." sort keys; '0' sorts before and
+    # '~' after any timestamp character (key values cannot be empty strings)
+    def ts_range(prefix: str) -> tuple:
+        return f'{prefix}{date_from or "0"}', f'{prefix}{date_to or ""}~'
+
     try:
-        table.update_item(
-            Key={
-                'PK': f'USER#{user_id}',
-                'SK': f'JOB#{applied_ts}#{job_id}'
-            },
-            UpdateExpression='SET resume_url = :resume, last_updated_ts = :updated',
-            ExpressionAttributeValues={
-                ':resume': resume_url,
-                ':updated': datetime.now(timezone.utc).isoformat()
+        query_params: Dict[str, Any] = {
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        expr_attr_names: Dict[str, str] = {}
+        expr_attr_values: Dict[str, Any] = {}
+        filters = []
+
+        # Residual filters need their attributes in the projected result
+        if fields and tag:
+            fields = fields + [f for f in ('company', 'status') if f not in fields]
+
+        if tag:
+            start, end = ts_range(f'TAG#{normalize_tag(tag)}#')
+            query_params['KeyConditionExpression'] = 'PK = :pk AND SK BETWEEN :start AND :end'
+            expr_attr_values.update({':pk': f'USER#{user_id}', ':start': start, ':end': end})
+        elif company:
+            start, end = ts_range(f'COMPANY#{company}#')
+            query_params['IndexName'] = 'GSI1'
+            query_params['KeyConditionExpression'] = 'GSI1PK = :pk AND GSI1SK BETWEEN :start AND :end'
+            expr_attr_values.update({':pk': f'USER#{user_id}', ':start': start, ':end': end})
+        elif status:
+            start, end = ts_range('')
+            query_params['IndexName'] = 'GSI2'
+            query_params['KeyConditionExpression'] = 'GSI2PK = :pk AND GSI2SK BETWEEN :start AND :end'
+            expr_attr_values.update({':pk': f'USER#{user_id}#STATUS#{status}', ':start': start, ':end': end})
+        else:
+            start, end = ts_range('JOB#')
+            query_params['KeyConditionExpression'] = 'PK = :pk AND SK BETWEEN :start AND :end'
+            expr_attr_values.update({':pk': f'USER#{user_id}', ':start': start, ':end': end})
+
+        # Residual filters on the (already narrowed) index result
+        if company and tag:
+            filters.append('company = :company')
+            expr_attr_values[':company'] = company
+        if status and (tag or company):
+            filters.append('#status = :status')
+            expr_attr_names['#status'] = 'status'
+            expr_attr_values[':status'] = status
+
+        if last_key:
+            query_params['ExclusiveStartKey'] = last_key
+
+        if tag:
+            # Filters apply to the jobs, not the tag pointers
+            query_params['ExpressionAttributeValues'] = {k: v for k, v in expr_attr_values.items() if k in (':pk', ':start', ':end')}
+        else:
+            if filters:
+                query_params['FilterExpression'] = ' AND '.join(filters)
+            projection = build_projection(fields)
+            if projection:
+                query_params['ProjectionExpression'] = projection['ProjectionExpression']
+                expr_attr_names.update(projection['ExpressionAttributeNames'])
+            if expr_attr_names:
+                query_params['ExpressionAttributeNames'] = expr_attr_names
+            query_params['ExpressionAttributeValues'] = expr_attr_values
+
+        def load() -> Dict[str, Any]:
+            response = table.query(**query_params)
+            if tag:
+                items = batch_get_jobs(user_id, response.get('Items', []), fields)
+                if company:
+                    items = [item for item in items if item.get('company') == company]
+                if status:
+                    items = [item for item in items if item.get('status') == status]
+            else:
+                items = response.get('Items', [])
+
+            result = {
+                'items': items
             }
-        )
-        logger.info(f"Updated job {job_id} with resume URL")
-        return True
+
+            # Include pagination token if there are more results
+            if 'LastEvaluatedKey' in response:
+                result['last_key'] = response['LastEvaluatedKey']
+
+            return result
+
+        params = [limit, last_key, status, company, tag, date_from, date_to, fields]
+        return cached_read(user_id, 'filtered_jobs', params, load)
     except ClientError as e:
-        logger.error(f"Failed to update resume URL: {str(e)}", exc_info=True)
-        return False
+        logger.error(f"Failed to query filtered user jobs: {str(e)}", exc_info=True)
+        return {'items': []}
 
 
-def update_job(
+def batch_get_jobs(
     user_id: str,
-    job_id: str,
-    applied_ts: str,
-    updates: Dict[str, Any]
-) -> bool:
+    pointers: List[Dict[str, Any]],
+    fields: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
     """
-    Update a job with multiple fields
+    Fetch job items for index pointers (job_id, applied_ts), keeping pointer order
 
     Args:
         user_id: User identifier
-        job_id: Job identifier
-        applied_ts: ISO timestamp
-        updates: Dictionary of fields to update (status, notes, etc.)
+        pointers: Items carrying job_id and applied_ts
+        fields: Attributes to project (default: full items)
 
     Returns:
-        True if successful, False otherwise
+        List of job items in the order of `pointers`
     """
-    try:
-        # Build update expression dynamically
-        update_expr_parts = []
-        expr_attr_names = {}
-        expr_attr_values = {}
-
-        # Always update last_updated_ts
-        update_expr_parts.append('last_updated_ts = :updated')
-        expr_attr_values[':updated'] = datetime.now(timezone.utc).isoformat()
-
-        # Add other fields to update
-        allowed_fields = ['status', 'notes', 'resume_url']
-        for field, value in updates.items():
-            if field in allowed_fields and value is not None:
-                update_expr_parts.append(f'#{field} = :{field}')
-                expr_attr_names[f'#{field}'] = field
-                expr_attr_values[f':{field}'] = value
-
-        if len(update_expr_parts) == 1:
-            logger.warning("No valid fields to update")
-            return False
-
-        update_expr = 'SET ' + ', '.join(update_expr_parts)
-
-        # Perform update
-        update_params = {
-            'Key': {
-                'PK': f'USER#{user_id}',
-                'SK': f'JOB#{applied_ts}#{job_id}'
-            },
-            'UpdateExpression': update_expr,
-            'ExpressionAttributeValues': expr_attr_values
-        }
+    keys = [{'PK': f'USER#{user_id}', 'SK': f'JOB#{p["applied_ts"]}#{p["job_id"]}'} for p in pointers]
 
-        if expr_attr_names:
-            update_params['ExpressionAttributeNames'] = expr_attr_names
+    # Items are matched back to pointers by job_id
+    projection = build_projection(fields + ['job_id'] if fields and 'job_id' not in fields else fields)
+    found = {item['job_id']: item for item in table.batch_get(keys, **projection)}
 
-        table.update_item(**update_params)
-        logger.info(f"Updated job {job_id} with fields: {list(updates.keys())}")
-        return True
-    except ClientError as e:
-        logger.error(f"Failed to update job: {str(e)}", exc_info=True)
-        return False
+    return [found[p['job_id']] for p in pointers if p['job_id'] in found]
 
 
-def delete_job(user_id: str, job_id: str, applied_ts: str) -> bool:
+def update_search_document(user_id: str, job_id: str, applied_ts: str, job: Optional[Dict[str, Any]]) -> bool:
     """
-    Delete a job
+    Add, replace or (job=None) remove one job in the user's search index
+    The chunk and the SEARCHMETA version manifest are written in one
+    transaction guarded by the chunk version, retried on conflict
 
     Args:
         user_id: User identifier
         job_id: Job identifier
-        applied_ts: ISO timestamp
+        applied_ts: ISO timestamp of the job
+        job: Job item (or merged fields) to index, None to remove
 
     Returns:
-        True if successful, False otherwise
+        True if the index was updated, False otherwise
     """
-    try:
-        table.delete_item(
-            Key={
-                'PK': f'USER#{user_id}',
-                'SK': f'JOB#{applied_ts}#{job_id}'
+    chunk_id = chunk_for(job_id)
+    doc_ref = make_doc_ref(applied_ts, job_id)
+    chunk_key = {'PK': f'USER#{user_id}', 'SK': f'SEARCH#{chunk_id}'}
+
+    for attempt in range(3):
+        try:
+            current = table.get_item(Key=chunk_key, ConsistentRead=True).get('Item')
+            version = int(current['version']) if current else 0
+            docs = decode_chunk(current.get('data_gz')) if current else {}
+
+            if job is None:
+                if doc_ref not in docs:
+                    return True
+                docs.pop(doc_ref)
+            else:
+                doc = build_document(job)
+                if docs.get(doc_ref) == doc:
+                    return True
+                docs[doc_ref] = doc
+
+            put = {
+                'Item': {
+                    **chunk_key,
+                    'type': 'SEARCH_CHUNK',
+                    'version': version + 1,
+                    'data_gz': encode_chunk(docs)
+                }
             }
-        )
-        logger.info(f"Deleted job {job_id} for user {user_id}")
-        return True
-    except ClientError as e:
-        logger.error(f"Failed to delete job: {str(e)}", exc_info=True)
-        return False
+            if current:
+                put['ConditionExpression'] = 'version = :v'
+                put['ExpressionAttributeValues'] = {':v': version}
+            else:
+                put['ConditionExpression'] = 'attribute_not_exists(PK)'
+
+            table.transact_write([
+                {'Put': put},
+                {'Update': {
+                    'Key': {'PK': f'USER#{user_id}', 'SK': 'SEARCHMETA'},
+                    'UpdateExpression': 'SET #c = :nv',
+                    'ExpressionAttributeNames': {'#c': f'v{chunk_id}'},
+                    'ExpressionAttributeValues': {':nv': version + 1}
+                }}
+            ])
+
+            # Keep this container's cached index current without a reload
+            cached = search_cache.get(user_id)
+            if cached is not None:
+                search_cache.put(user_id, cached.with_chunks({chunk_id: (version + 1, docs)}))
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'TransactionCanceledException' and attempt < 2:
+                logger.info(f"Search chunk {chunk_id} changed concurrently, retrying")
+                continue
+            logger.error(f"Failed to update search index for job {job_id}: {str(e)}", exc_info=True)
+            return False
+    return False
 
 
-def get_user_job_stats(user_id: str) -> Dict[str, Any]:
+def load_search_index(user_id: str) -> SearchIndex:
     """
-    Get job application statistics for a user
-    Optimized query that only fetches necessary fields for stats calculation
-    
+    Load a user's search index, reusing the warm-container copy
+    One strongly consistent GetItem on SEARCHMETA decides which chunks
+    changed; only those are fetched
+
+    Returns:
+        SearchIndex for the user (empty if none stored)
+    """
+    manifest = table.get_item(
+        Key={'PK': f'USER#{user_id}', 'SK': 'SEARCHMETA'},
+        ConsistentRead=True
+    ).get('Item') or {}
+    versions = {name[1:]: int(value) for name, value in manifest.items() if name.startswith('v') and name[1:].isdigit()}
+
+    index = search_cache.get(user_id) or SearchIndex()
+    cached_versions = index.versions()
+    stale = [chunk_id for chunk_id, version in versions.items() if cached_versions.get(chunk_id) != version]
+
+    if stale:
+        keys = [{'PK': f'USER#{user_id}', 'SK': f'SEARCH#{chunk_id}'} for chunk_id in stale]
+        loaded = {
+            item['SK'][len('SEARCH#'):]: (int(item['version']), decode_chunk(item.get('data_gz')))
+            for item in table.batch_get(keys, ConsistentRead=True)
+        }
+        index = index.with_chunks(loaded)
+        logger.info(f"Loaded {len(loaded)} search chunks for user {user_id}")
+
+    search_cache.put(user_id, index)
+    return index
+
+
+def search_user_jobs(
+    user_id: str,
+    query: str,
+    limit: int = 20,
+    fields: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Full-text search over a user's jobs (title, company, tags, notes)
+    Every query token must match a token prefix
+
+    Returns:
+        Matching job items, best match first
+    """
+    try:
+        index = load_search_index(user_id)
+        ranked = index.search(query, limit)
+        if not ranked:
+            return []
+        return batch_get_jobs(user_id, [parse_doc_ref(doc_ref) for doc_ref, _ in ranked], fields)
+    except ClientError as e:
+        logger.error(f"Failed to search jobs: {str(e)}", exc_info=True)
+        return []
+
+
+def rebuild_search_index(user_id: str) -> int:
+    """
+    Rebuild a user's search index from their job items
+    Writes every chunk and the manifest; used for backfills
+
+    Returns:
+        Number of jobs indexed
+    """
+    chunks: Dict[str, Dict[str, Dict[str, int]]] = {}
+    query_params = {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk_prefix)',
+        'ProjectionExpression': 'job_id, applied_ts, title, company, tags, notes',
+        'ExpressionAttributeValues': {':pk': f'USER#{user_id}', ':sk_prefix': 'JOB#'}
+    }
+    count = 0
+    try:
+        while True:
+            response = table.query(**query_params)
+            for job in response.get('Items', []):
+                chunk = chunks.setdefault(chunk_for(job['job_id']), {})
+                chunk[make_doc_ref(job['applied_ts'], job['job_id'])] = build_document(job)
+                count += 1
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        manifest = {'PK': f'USER#{user_id}', 'SK': 'SEARCHMETA'}
+        previous = table.get_item(Key=manifest, ConsistentRead=True).get('Item') or {}
+        # Previously used chunks that are now empty are rewritten empty
+        for name in previous:
+            if name.startswith('v') and name[1:].isdigit():
+                chunks.setdefault(name[1:], {})
+
+        with table.batch_writer() as batch:
+            for chunk_id, docs in chunks.items():
+                version = int(previous.get(f'v{chunk_id}', 0)) + 1
+                manifest[f'v{chunk_id}'] = version
+                batch.put_item(Item={
+                    'PK': f'USER#{user_id}',
+                    'SK': f'SEARCH#{chunk_id}',
+                    'type': 'SEARCH_CHUNK',
+                    'version': version,
+                    'data_gz': encode_chunk(docs)
+                })
+        table.put_item(Item=manifest)
+        search_cache.invalidate(user_id)
+        return count
+    except ClientError as e:
+        logger.error(f"Failed to rebuild search index for user {user_id}: {str(e)}", exc_info=True)
+        return count
+
+
+def reindex_user_jobs(user_id: str) -> int:
+    """
+    Backfill GSI2 (status) keys, numeric salary bounds, tag pointers, the search index and the page index for a user's existing jobs
+    Safe to re-run; used once for items written before the indexes existed
+
+    Returns:
+        Number of jobs reindexed
+    """
+    count = 0
+    query_params = {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk_prefix)',
+        'ProjectionExpression': 'job_id, applied_ts, #status, tags, GSI2PK, salary_range, currency',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':pk': f'USER#{user_id}', ':sk_prefix': 'JOB#'}
+    }
+    try:
+        while True:
+            response = table.query(**query_params)
+            for job in response.get('Items', []):
+                if not job.get('GSI2PK') and job.get('status'):
+                    update_job_status(user_id, job['job_id'], job['applied_ts'], job['status'])
+                if job.get('salary_range') and 'currency' not in job and salary_fields(job['salary_range']):
+                    update_job(
+                        user_id, job['job_id'], job['applied_ts'], salary_fields(job['salary_range']),
+                        allowed_fields=['salary_min', 'salary_max', 'currency']
+                    )
+                if job.get('tags'):
+                    # Old tags unknown: re-put all pointers (idempotent)
+                    sync_tag_index(user_id, job['job_id'], job['applied_ts'], [], job['tags'])
+                count += 1
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        rebuild_search_index(user_id)
+        rebuild_page_index(user_id)
+    except ClientError as e:
+        logger.error(f"Failed to reindex jobs for user {user_id}: {str(e)}", exc_info=True)
+    return count
+
+
+def page_shard_update(user_id: str, position: str, add: bool = True) -> Dict[str, Any]:
+    """
+    UpdateItem parameters that add a job position to its page shard, or
+    remove it; removal is conditional on the position being present, so
+    the month's count is only decremented once
+    """
+    params: Dict[str, Any] = {
+        'Key': {'PK': f'USER#{user_id}', 'SK': f'PAGE#{page_shard(position)}'},
+        'ExpressionAttributeValues': {':p': {position}}
+    }
+    if add:
+        params['UpdateExpression'] = 'ADD positions :p SET #type = :type'
+        params['ExpressionAttributeNames'] = {'#type': 'type'}
+        params['ExpressionAttributeValues'][':type'] = 'PAGE_SHARD'
+    else:
+        params['UpdateExpression'] = 'DELETE positions :p'
+        params['ConditionExpression'] = 'contains(positions, :pos)'
+        params['ExpressionAttributeValues'][':pos'] = position
+    return params
+
+
+def get_page_start(user_id: str, page: int, limit: int, stamp: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Position of the job a 1-based page of the user's newest-first list
+    starts after. The month is found from the counts on the VERSION item
+    and only that month's shards are read; the result is served from the
+    read cache until the user's next write
+
+    Args:
+        user_id: User identifier
+        page: Page number
+        limit: Page size
+        stamp: The user's version stamp, if already read
+
+    Returns:
+        "{applied_ts}#{job_id}", or None for page 1 or no jobs
+    """
+    try:
+        stamp = stamp or get_user_version(user_id)
+        located = locate_page(stamp['pages'], page, limit)
+        if not located:
+            return None
+        month, index = located
+
+        def load() -> Optional[str]:
+            positions: List[str] = []
+            query_params = {
+                'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk_prefix)',
+                'ProjectionExpression': 'positions',
+                'ExpressionAttributeValues': {':pk': f'USER#{user_id}', ':sk_prefix': f'PAGE#{month}#'}
+            }
+            while True:
+                response = table.query(**query_params)
+                for item in response.get('Items', []):
+                    positions.extend(item.get('positions') or ())
+                if 'LastEvaluatedKey' not in response:
+                    return position_in_month(positions, index)
+                query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        return cached_read(user_id, 'page_start', [page, limit], load, stamp)
+    except ClientError as e:
+        logger.error(f"Failed to get page start: {str(e)}", exc_info=True)
+        return None
+
+
+def rebuild_page_index(user_id: str) -> int:
+    """
+    Rebuild a user's page shards and per-month counts from their job
+    items (keys-only query); empty shards and months are removed
+
+    Returns:
+        Number of jobs indexed
+    """
+    pk = f'USER#{user_id}'
+
+    def sort_keys(prefix: str) -> List[str]:
+        keys = []
+        query_params = {
+            'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk_prefix)',
+            'ProjectionExpression': 'SK',
+            'ExpressionAttributeValues': {':pk': pk, ':sk_prefix': prefix}
+        }
+        while True:
+            response = table.query(**query_params)
+            keys.extend(item['SK'] for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return keys
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    positions: List[str] = []
+    try:
+        positions = [sk[len('JOB#'):] for sk in sort_keys('JOB#')]
+        existing = set(sort_keys('PAGE#'))
+        shards = group_positions(positions)
+        with table.batch_writer() as batch:
+            for shard, members in shards.items():
+                batch.put_item(Item={'PK': pk, 'SK': f'PAGE#{shard}', 'type': 'PAGE_SHARD', 'positions': set(members)})
+            for sk in existing - {f'PAGE#{shard}' for shard in shards}:
+                batch.delete_item(Key={'PK': pk, 'SK': sk})
+            # Single-item index of earlier versions
+            batch.delete_item(Key={'PK': pk, 'SK': 'PAGEINDEX'})
+
+        counts: Dict[str, int] = {}
+        for position in positions:
+            counts[page_month(position)] = counts.get(page_month(position), 0) + 1
+        stale = sorted(set(get_user_version(user_id)['pages']) - set(counts))
+
+        names = {f'#p{i}': f'{PAGE_COUNT_PREFIX}{month}' for i, month in enumerate(sorted(counts))}
+        names.update({f'#r{i}': f'{PAGE_COUNT_PREFIX}{month}' for i, month in enumerate(stale)})
+        expression = 'SET ' + ', '.join(['updated_at = :now'] + [f'#p{i} = :p{i}' for i in range(len(counts))])
+        if stale:
+            expression += ' REMOVE ' + ', '.join(f'#r{i}' for i in range(len(stale)))
+        params = {
+            'Key': {'PK': pk, 'SK': 'VERSION'},
+            'UpdateExpression': expression + ' ADD version :one',
+            'ExpressionAttributeValues': {
+                ':one': 1, ':now': int(time.time() * 1000),
+                **{f':p{i}': counts[month] for i, month in enumerate(sorted(counts))}
+            }
+        }
+        if names:
+            params['ExpressionAttributeNames'] = names
+        table.update_item(**params)
+        read_cache.invalidate(user_id)
+        return len(positions)
+    except ClientError as e:
+        logger.error(f"Failed to rebuild page index for user {user_id}: {str(e)}", exc_info=True)
+        return len(positions)
+
+
+def status_event(
+    user_id: str,
+    job_id: str,
+    applied_ts: str,
+    from_status: Optional[str],
+    to_status: str,
+    ts: str
+) -> Dict[str, Any]:
+    """
+    EVENT#{ts}#{job_id} item of the user's status log
+    """
+    return {
+        'PK': f'USER#{user_id}',
+        'SK': f'EVENT#{ts}#{job_id}',
+        'type': 'STATUS_EVENT',
+        'job_id': job_id,
+        'applied_ts': applied_ts,
+        'from_status': from_status or '',
+        'to_status': to_status,
+        'ts': ts
+    }
+
+
+def funnel_increment(user_id: str, counters: Dict[str, int]) -> Dict[str, Any]:
+    """
+    UpdateItem parameters that add stage counters to the FUNNEL aggregate
+    """
+    names = {f'#n{i}': name for i, name in enumerate(counters)}
+    return {
+        'Key': {'PK': f'USER#{user_id}', 'SK': 'FUNNEL'},
+        'UpdateExpression': 'ADD ' + ', '.join(f'{placeholder} :c{i}' for i, placeholder in enumerate(names)),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': {f':c{i}': counters[name] for i, name in enumerate(names.values())}
+    }
+
+
+def transaction_conflict(error: ClientError, index: int) -> bool:
+    """
+    Whether a cancelled transaction failed the condition of its index-th action
+    """
+    if error.response['Error']['Code'] != 'TransactionCanceledException':
+        return False
+    reasons = error.response.get('CancellationReasons') or []
+    return index < len(reasons) and reasons[index].get('Code') == 'ConditionalCheckFailed'
+
+
+def record_status_change(
+    user_id: str,
+    job_id: str,
+    applied_ts: str,
+    from_status: Optional[str],
+    to_status: str,
+    stage_ts: Dict[str, str],
+    ts: str
+) -> None:
+    """
+    Append a status event to the user's log and update the FUNNEL aggregate
+    No-op if the status did not change
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp of the job
+        from_status: Previous status (None for a new job)
+        to_status: New status
+        stage_ts: The job's first-reached timestamps before this change
+        ts: ISO timestamp of the change
+    """
+    if from_status == to_status:
+        return
+
+    try:
+        table.put_item(Item=status_event(user_id, job_id, applied_ts, from_status, to_status, ts))
+
+        counters = stage_counters(stage_ts, to_status, ts)
+        if not counters:
+            return
+
+        # New jobs are created with stage_ts already set
+        if from_status is not None:
+            table.update_item(
+                Key={'PK': f'USER#{user_id}', 'SK': f'JOB#{applied_ts}#{job_id}'},
+                UpdateExpression='SET stage_ts = :stage_ts',
+                ConditionExpression='attribute_exists(PK)',
+                ExpressionAttributeValues={':stage_ts': {**stage_ts, to_status: ts}}
+            )
+
+        table.update_item(**funnel_increment(user_id, counters))
+    except ClientError as e:
+        logger.error(f"Failed to record status change for job {job_id}: {str(e)}", exc_info=True)
+
+
+def get_funnel(user_id: str) -> Dict[str, Any]:
+    """
+    Get funnel counts, conversion rates and median days between stages
+    Reads the incrementally maintained FUNNEL aggregate (no log replay)
+    """
+    try:
+        def load() -> Dict[str, Any]:
+            aggregate = table.get_item(Key={'PK': f'USER#{user_id}', 'SK': 'FUNNEL'}).get('Item') or {}
+            return summarize_funnel(aggregate)
+
+        return cached_read(user_id, 'funnel', [], load)
+    except ClientError as e:
+        logger.error(f"Failed to get funnel: {str(e)}", exc_info=True)
+        return summarize_funnel({})
+
+
+def rebuild_funnel(user_id: str) -> int:
+    """
+    Recompute the FUNNEL aggregate and each job's stage_ts from the status log
+    Jobs with no events (written before the log existed) are seeded with
+    their current status at applied_ts
+
+    Returns:
+        Number of events replayed
+    """
+    events: List[Dict[str, Any]] = []
+    try:
+        for prefix in ('EVENT#', 'JOB#'):
+            query_params = {
+                'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk_prefix)',
+                'ProjectionExpression': 'job_id, applied_ts, to_status, #status, ts',
+                'ExpressionAttributeNames': {'#status': 'status'},
+                'ExpressionAttributeValues': {':pk': f'USER#{user_id}', ':sk_prefix': prefix}
+            }
+            logged = {event['job_id'] for event in events}
+            while True:
+                response = table.query(**query_params)
+                for item in response.get('Items', []):
+                    if prefix == 'EVENT#':
+                        events.append(item)
+                    elif item['job_id'] not in logged and item.get('status'):
+                        events.append({
+                            'job_id': item['job_id'], 'applied_ts': item['applied_ts'],
+                            'to_status': item['status'], 'ts': item['applied_ts']
+                        })
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        counters, stages = replay_events(events)
+        applied = {event['job_id']: event['applied_ts'] for event in events}
+        for job_id, stage_ts in stages.items():
+            try:
+                table.update_item(
+                    Key={'PK': f'USER#{user_id}', 'SK': f'JOB#{applied[job_id]}#{job_id}'},
+                    UpdateExpression='SET stage_ts = :stage_ts',
+                    ConditionExpression='attribute_exists(PK)',
+                    ExpressionAttributeValues={':stage_ts': stage_ts}
+                )
+            except ClientError as e:
+                # Deleted jobs keep their events but have no item to update
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+        table.put_item(Item={'PK': f'USER#{user_id}', 'SK': 'FUNNEL', 'type': 'FUNNEL', **counters})
+        bump_user_version(user_id)
+        return len(events)
+    except ClientError as e:
+        logger.error(f"Failed to rebuild funnel for user {user_id}: {str(e)}", exc_info=True)
+        return len(events)
+
+
+def update_job_status(
+    user_id: str,
+    job_id: str,
+    applied_ts: str,
+    new_status: str
+) -> bool:
+    """
+    Update job status
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp
+        new_status: New status value
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        now = datetime.now(timezone.utc).isoformat()
+        response = table.update_item(
+            Key={
+                'PK': f'USER#{user_id}',
+                'SK': f'JOB#{applied_ts}#{job_id}'
+            },
+            UpdateExpression='SET #status = :status, GSI2PK = :gsi2pk, GSI2SK = :gsi2sk, last_updated_ts = :updated',
+            ExpressionAttributeNames={
+                '#status': 'status'
+            },
+            ExpressionAttributeValues={
+                ':status': new_status,
+                ':gsi2pk': f'USER#{user_id}#STATUS#{new_status}',
+                ':gsi2sk': f'{applied_ts}#{job_id}',
+                ':updated': now
+            },
+            ReturnValues='ALL_OLD'
+        )
+        old_item = response.get('Attributes', {})
+        record_status_change(user_id, job_id, applied_ts, old_item.get('status'), new_status, old_item.get('stage_ts') or {}, now)
+        bump_user_version(user_id)
+        logger.info(f"Updated job {job_id} status to {new_status}")
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to update job status: {str(e)}", exc_info=True)
+        return False
+
+
+def update_job_resume(
+    user_id: str,
+    job_id: str,
+    applied_ts: str,
+    resume_url: str
+) -> bool:
+    """
+    Update job with resume URL
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp
+        resume_url: S3 URL of resume
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        table.update_item(
+            Key={
+                'PK': f'USER#{user_id}',
+                'SK': f'JOB#{applied_ts}#{job_id}'
+            },
+            UpdateExpression='SET resume_url = :resume, last_updated_ts = :updated',
+            ExpressionAttributeValues={
+                ':resume': resume_url,
+                ':updated': datetime.now(timezone.utc).isoformat()
+            }
+        )
+        bump_user_version(user_id)
+        logger.info(f"Updated job {job_id} with resume URL")
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to update resume URL: {str(e)}", exc_info=True)
+        return False
+
+
+def update_job(
+    user_id: str,
+    job_id: str,
+    applied_ts: str,
+    updates: Dict[str, Any],
+    conditions: Optional[Dict[str, Any]] = None,
+    allowed_fields: Optional[List[str]] = None
+) -> bool:
+    """
+    Update a job with multiple fields
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp
+        updates: Dictionary of fields to update (status, notes, etc.)
+        conditions: Optional field -> expected value map; the update only
+            applies if every field currently holds the expected value
+            (None: the field must be absent)
+        allowed_fields: Fields that may be written (default: USER_UPDATABLE_FIELDS)
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        # Build update expression dynamically
+        update_expr_parts = []
+        expr_attr_names = {}
+        expr_attr_values = {}
+
+        # Always update last_updated_ts
+        update_expr_parts.append('last_updated_ts = :updated')
+        expr_attr_values[':updated'] = datetime.now(timezone.utc).isoformat()
+
+        # Add other fields to update
+        allowed_fields = allowed_fields or USER_UPDATABLE_FIELDS
+        applied = {}
+        for field, value in updates.items():
+            if field in allowed_fields and value is not None:
+                applied[field] = value
+                update_expr_parts.append(f'#{field} = :{field}')
+                expr_attr_names[f'#{field}'] = field
+                expr_attr_values[f':{field}'] = value
+
+        if len(update_expr_parts) == 1:
+            logger.warning("No valid fields to update")
+            return False
+
+        # Keep GSI2 (status index) in sync with status
+        if ':status' in expr_attr_values:
+            update_expr_parts.append('GSI2PK = :gsi2pk, GSI2SK = :gsi2sk')
+            expr_attr_values[':gsi2pk'] = f'USER#{user_id}#STATUS#{expr_attr_values[":status"]}'
+            expr_attr_values[':gsi2sk'] = f'{applied_ts}#{job_id}'
+
+        update_expr = 'SET ' + ', '.join(update_expr_parts)
+
+        # Perform update
+        update_params = {
+            'Key': {
+                'PK': f'USER#{user_id}',
+                'SK': f'JOB#{applied_ts}#{job_id}'
+            },
+            'UpdateExpression': update_expr,
+            'ExpressionAttributeValues': expr_attr_values
+        }
+
+        # Optional optimistic conditions on current attribute values
+        if conditions:
+            condition_parts = ['attribute_exists(PK)']
+            for field, expected in conditions.items():
+                expr_attr_names[f'#c_{field}'] = field
+                if expected is None:
+                    condition_parts.append(f'attribute_not_exists(#c_{field})')
+                    continue
+                expr_attr_values[f':c_{field}'] = expected
+                condition_parts.append(f'#c_{field} = :c_{field}')
+            update_params['ConditionExpression'] = ' AND '.join(condition_parts)
+
+        if expr_attr_names:
+            update_params['ExpressionAttributeNames'] = expr_attr_names
+
+        # The old item is needed to keep the tag and search indexes and the status log in sync
+        tags_updated = 'tags' in applied
+        # A failed enrichment leaves the placeholder as is, so index it now
+        search_updated = any(field in applied for field in SEARCH_FIELDS) or applied.get('enrichment_status') == 'failed'
+        status_updated = 'status' in applied
+        if tags_updated or search_updated or status_updated:
+            update_params['ReturnValues'] = 'ALL_OLD'
+
+        response = table.update_item(**update_params)
+
+        old_item = response.get('Attributes', {})
+        if tags_updated:
+            sync_tag_index(user_id, job_id, applied_ts, old_item.get('tags', []), applied['tags'])
+        if search_updated:
+            update_search_document(user_id, job_id, applied_ts, {**old_item, **applied})
+        if status_updated:
+            record_status_change(
+                user_id, job_id, applied_ts, old_item.get('status'), applied['status'],
+                old_item.get('stage_ts') or {}, expr_attr_values[':updated']
+            )
+        bump_user_version(user_id)
+
+        logger.info(f"Updated job {job_id} with fields: {list(updates.keys())}")
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.info(f"Skipped update of job {job_id}: conditions {conditions} not met")
+            return False
+        logger.error(f"Failed to update job: {str(e)}", exc_info=True)
+        return False
+
+
+def update_job_enrichment(
+    user_id: str,
+    job_id: str,
+    applied_ts: str,
+    enrichment_status: str,
+    fields: Optional[Dict[str, Any]] = None,
+    expected_status: Optional[str] = None,
+    conditions: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Apply a progressive ingest stage result to a job in place
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp
+        enrichment_status: New enrichment stage
+        fields: Scraped/analyzed fields to write (see ENRICHMENT_FIELDS)
+        expected_status: Only apply if the job is currently at this stage
+        conditions: Further expected values, as for update_job
+
+    Returns:
+        True if successful, False otherwise (including a failed condition)
+    """
+    updates = dict(fields or {})
+    updates['enrichment_status'] = enrichment_status
+
+    # Numeric salary bounds follow the free-text range
+    if updates.get('salary_range'):
+        updates.update(salary_fields(updates['salary_range']))
+
+    # Keep GSI1 in sync when the company becomes known
+    if updates.get('company'):
+        updates['GSI1SK'] = f'COMPANY#{updates["company"]}#{applied_ts}#{job_id}'
+
+    conditions = dict(conditions or {})
+    if expected_status:
+        conditions['enrichment_status'] = expected_status
+    return update_job(user_id, job_id, applied_ts, updates, conditions or None, ENRICHMENT_FIELDS)
+
+
+def put_notes_source(user_id: str, job_id: str, applied_ts: str, content: str) -> bool:
+    """
+    Store the posting text needed to generate a deferred notes summary
+    Stored gzip-compressed next to the job and expired via TTL
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp of the job
+        content: Posting text used for the summary
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        expires_at = datetime.now(timezone.utc) + timedelta(days=NOTES_SOURCE_TTL_DAYS)
+        table.put_item(Item={
+            'PK': f'USER#{user_id}',
+            'SK': f'NOTESRC#{job_id}',
+            'type': 'NOTES_SOURCE',
+            'job_id': job_id,
+            'applied_ts': applied_ts,
+            'content_gz': gzip.compress(content[:NOTES_SOURCE_MAX_CHARS].encode('utf-8')),
+            'expires_at': int(expires_at.timestamp())
+        })
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to store notes source: {str(e)}", exc_info=True)
+        return False
+
+
+def get_notes_source(user_id: str, job_id: str) -> Optional[str]:
+    """
+    Get the stored posting text for a deferred notes summary
+
+    Returns:
+        Posting text or None if not found
+    """
+    try:
+        response = table.get_item(
+            Key={
+                'PK': f'USER#{user_id}',
+                'SK': f'NOTESRC#{job_id}'
+            }
+        )
+        item = response.get('Item')
+        if not item:
+            return None
+        return gzip.decompress(item['content_gz']).decode('utf-8')
+    except ClientError as e:
+        logger.error(f"Failed to get notes source: {str(e)}", exc_info=True)
+        return None
+
+
+def delete_notes_source(user_id: str, job_id: str) -> bool:
+    """
+    Delete the stored posting text once notes have been generated
+    """
+    try:
+        table.delete_item(
+            Key={
+                'PK': f'USER#{user_id}',
+                'SK': f'NOTESRC#{job_id}'
+            }
+        )
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to delete notes source: {str(e)}", exc_info=True)
+        return False
+
+
+def get_pending_notes_sources(user_id: Optional[str] = None, limit: int = 25) -> List[Dict[str, Any]]:
+    """
+    List jobs still waiting for a notes summary
+
+    Args:
+        user_id: Restrict to one user (Query); otherwise Scan the table
+        limit: Maximum number of entries to return
+
+    Returns:
+        List of dicts with user_id, job_id and applied_ts
+    """
+    try:
+        projection = 'PK, job_id, applied_ts'
+        if user_id:
+            response = table.query(
+                KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
+                ProjectionExpression=projection,
+                ExpressionAttributeValues={
+                    ':pk': f'USER#{user_id}',
+                    ':sk_prefix': 'NOTESRC#'
+                },
+                Limit=limit
+            )
+            items = response.get('Items', [])
+        else:
+            items = []
+            scan_params = {
+                'FilterExpression': 'begins_with(SK, :sk_prefix)',
+                'ProjectionExpression': projection,
+                'ExpressionAttributeValues': {':sk_prefix': 'NOTESRC#'}
+            }
+            while len(items) < limit:
+                response = table.scan(**scan_params)
+                items.extend(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        return [
+            {
+                'user_id': item['PK'][len('USER#'):],
+                'job_id': item['job_id'],
+                'applied_ts': item['applied_ts']
+            }
+            for item in items[:limit]
+        ]
+    except ClientError as e:
+        logger.error(f"Failed to list pending notes: {str(e)}", exc_info=True)
+        return []
+
+
+def get_idempotency_record(user_id: str, key: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the record stored under an ingest idempotency key (strongly consistent)
+
+    Returns:
+        Record item, or None if absent or past its TTL (TTL deletion lags)
+    """
+    try:
+        item = table.get_item(
+            Key={'PK': f'USER#{user_id}', 'SK': f'IDEMP#{key}'},
+            ConsistentRead=True
+        ).get('Item')
+    except ClientError as e:
+        logger.error(f"Failed to get idempotency record: {str(e)}", exc_info=True)
+        return None
+    if not item or int(item.get('expires_at', 0)) <= int(time.time()):
+        return None
+    return item
+
+
+def claim_idempotency_key(user_id: str, key: str, request_hash: str, owner: str) -> bool:
+    """
+    Mark an idempotency key as in flight for this request (conditional put)
+    Succeeds if no live record exists or the previous holder's lease ran
+    out (e.g. its invocation timed out)
+
+    Args:
+        user_id: User identifier
+        key: Client-supplied Idempotency-Key
+        request_hash: Fingerprint of the request body
+        owner: Token identifying this attempt; only it may complete or
+            release the key
+
+    Returns:
+        True if the caller should process the request, False if another
+        request holds or has completed the key
+    """
+    now = int(time.time())
+    try:
+        table.put_item(
+            Item={
+                'PK': f'USER#{user_id}',
+                'SK': f'IDEMP#{key}',
+                'type': 'IDEMPOTENCY',
+                'state': 'in_progress',
+                'request_hash': request_hash,
+                'owner': owner,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'lease_until': now + IDEMPOTENCY_LEASE_SECONDS,
+                'expires_at': now + IDEMPOTENCY_TTL_HOURS * 3600
+            },
+            ConditionExpression='attribute_not_exists(PK) OR expires_at <= :now OR (#state = :in_progress AND lease_until <= :now)',
+            ExpressionAttributeNames={'#state': 'state'},
+            ExpressionAttributeValues={':now': now, ':in_progress': 'in_progress'}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        # Fail open: a lost key costs a duplicate ingest, not a failed one
+        logger.error(f"Failed to claim idempotency key: {str(e)}", exc_info=True)
+        return True
+
+
+def acquire_idempotency_key(user_id: str, key: str, request_hash: str,
+                            owner: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Claim an idempotency key, or resolve a duplicate request against the
+    stored record. A completed key costs one read; a duplicate of an
+    in-flight request polls for up to IDEMPOTENCY_WAIT_SECONDS
+
+    Args:
+        user_id: User identifier
+        key: Client-supplied Idempotency-Key
+        request_hash: Fingerprint of the request body
+        owner: Token identifying this attempt (see claim_idempotency_key)
+
     Returns:
-        Dictionary containing various job statistics
+        (outcome, record) where outcome is 'claimed', 'completed' (record
+        holds status_code and response_body), 'mismatch' (key reused with a
+        different body) or 'in_progress' (still running after the wait)
+    """
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    record = get_idempotency_record(user_id, key)
+    while True:
+        if record and record.get('request_hash') != request_hash:
+            outcome = 'mismatch'
+            break
+        if record and record.get('state') == 'completed':
+            outcome = 'completed'
+            break
+        # Absent, released by a failed attempt, or abandoned in flight
+        if (not record or int(record.get('lease_until', 0)) <= int(time.time())) \
+                and claim_idempotency_key(user_id, key, request_hash, owner):
+            outcome, record = 'claimed', None
+            break
+        if time.monotonic() >= deadline:
+            outcome = 'in_progress'
+            break
+        time.sleep(IDEMPOTENCY_POLL_SECONDS)
+        record = get_idempotency_record(user_id, key)
+
+    emit_metric('IdempotencyKey', dimensions={'Outcome': outcome})
+    return outcome, record
+
+
+def complete_idempotency_key(user_id: str, key: str, owner: str, status_code: int, response_body: str) -> bool:
+    """
+    Store the response for a claimed idempotency key so duplicates replay it
+    The TTL restarts from completion. Only the lease owner may complete it;
+    a holder whose lease ran out and was taken over writes nothing
+
+    Returns:
+        True if successful, False otherwise
     """
     try:
-        logger.info(f"Getting stats for user_id: {user_id}")
-        
-        # Query with projection to only get fields needed for stats
-        response = table.query(
-            KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
-            ProjectionExpression='job_id, #status, company, #position, applied_ts, created_at',
-            ExpressionAttributeNames={
-                '#status': 'status',
-                '#position': 'position'
+        table.update_item(
+            Key={'PK': f'USER#{user_id}', 'SK': f'IDEMP#{key}'},
+            UpdateExpression='SET #state = :completed, status_code = :code, response_body = :body, expires_at = :exp REMOVE lease_until',
+            ConditionExpression='#owner = :owner AND #state = :in_progress',
+            ExpressionAttributeNames={'#owner': 'owner', '#state': 'state'},
+            ExpressionAttributeValues={
+                ':owner': owner,
+                ':in_progress': 'in_progress',
+                ':completed': 'completed',
+                ':code': status_code,
+                ':body': response_body,
+                ':exp': int(time.time()) + IDEMPOTENCY_TTL_HOURS * 3600
+            }
+        )
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to complete idempotency key: {str(e)}", exc_info=True)
+        return False
+
+
+def release_idempotency_key(user_id: str, key: str, owner: str) -> bool:
+    """
+    Drop an in-flight idempotency key after a failed attempt, so a retry
+    with the same key runs again. Only the lease owner may release it, so
+    a slow attempt cannot drop a key another request has since claimed
+    """
+    try:
+        table.delete_item(
+            Key={'PK': f'USER#{user_id}', 'SK': f'IDEMP#{key}'},
+            ConditionExpression='#owner = :owner AND #state = :in_progress',
+            ExpressionAttributeNames={'#owner': 'owner', '#state': 'state'},
+            ExpressionAttributeValues={':owner': owner, ':in_progress': 'in_progress'}
+        )
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to release idempotency key: {str(e)}", exc_info=True)
+        return False
+
+
+def flight_key(kind: str, key: str) -> Dict[str, str]:
+    """
+    Primary key of the shared single-flight item for a unit of work
+    (not per user, so identical work from different users collapses)
+    """
+    return {'PK': f'FLIGHT#{kind}#{hashlib.sha256(key.encode("utf-8")).hexdigest()}', 'SK': 'FLIGHT'}
+
+
+def get_flight(kind: str, key: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a single-flight item (strongly consistent)
+
+    Returns:
+        Item, or None if absent or past its TTL
+    """
+    try:
+        item = table.get_item(Key=flight_key(kind, key), ConsistentRead=True).get('Item')
+    except ClientError as e:
+        logger.error(f"Failed to get flight {kind}: {str(e)}", exc_info=True)
+        return None
+    if not item or int(item.get('expires_at', 0)) <= int(time.time()):
+        return None
+    return item
+
+
+def claim_flight(kind: str, key: str, owner: str) -> bool:
+    """
+    Take the lease on a unit of work (conditional put)
+    Succeeds if no live item exists or the previous leader's lease ran out
+
+    Returns:
+        True if the caller is now the leader
+    """
+    now = int(time.time())
+    try:
+        table.put_item(
+            Item={
+                **flight_key(kind, key),
+                'type': 'FLIGHT',
+                'state': 'in_progress',
+                'owner': owner,
+                'lease_until': now + FLIGHT_LEASE_SECONDS,
+                'expires_at': now + FLIGHT_LEASE_SECONDS
             },
+            ConditionExpression='attribute_not_exists(PK) OR expires_at <= :now OR (#state = :in_progress AND lease_until <= :now)',
+            ExpressionAttributeNames={'#state': 'state'},
+            ExpressionAttributeValues={':now': now, ':in_progress': 'in_progress'}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            logger.error(f"Failed to claim flight {kind}: {str(e)}", exc_info=True)
+        return False
+
+
+def complete_flight(kind: str, key: str, owner: str, result: Any) -> bool:
+    """
+    Publish the leader's result for followers (gzip JSON, kept for
+    FLIGHT_RESULT_TTL_SECONDS). Results too large for an item are not
+    shared; the lease is released instead
+
+    Returns:
+        True if the result was stored
+    """
+    data_gz = gzip.compress(json.dumps(result).encode('utf-8'))
+    if len(data_gz) > FLIGHT_MAX_RESULT_BYTES:
+        logger.info(f"Flight {kind} result too large to share ({len(data_gz)} bytes)")
+        release_flight(kind, key, owner)
+        return False
+    try:
+        table.put_item(Item={
+            **flight_key(kind, key),
+            'type': 'FLIGHT',
+            'state': 'completed',
+            'owner': owner,
+            'data_gz': data_gz,
+            'expires_at': int(time.time()) + FLIGHT_RESULT_TTL_SECONDS
+        })
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to complete flight {kind}: {str(e)}", exc_info=True)
+        return False
+
+
+def release_flight(kind: str, key: str, owner: str) -> bool:
+    """
+    Give up the lease after a failed or unshareable run, so a follower
+    can take over
+    """
+    try:
+        table.delete_item(
+            Key=flight_key(kind, key),
+            ConditionExpression='#owner = :owner AND #state = :in_progress',
+            ExpressionAttributeNames={'#owner': 'owner', '#state': 'state'},
+            ExpressionAttributeValues={':owner': owner, ':in_progress': 'in_progress'}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            logger.error(f"Failed to release flight {kind}: {str(e)}", exc_info=True)
+        return False
+
+
+def flight_result(record: Dict[str, Any]) -> Any:
+    """
+    Decode the result a leader published on a completed flight item
+    """
+    return json.loads(gzip.decompress(record['data_gz']))
+
+
+def single_flight(
+    kind: str,
+    key: str,
+    work: Callable[[], Any],
+    shareable: Callable[[Any], bool] = lambda result: result is not None
+) -> Any:
+    """
+    Run `work` once across concurrent callers with the same key
+    The first caller takes a short lease and publishes its result;
+    followers poll for it (up to FLIGHT_WAIT_SECONDS) and reuse it, or take
+    over if the lease is released or expires. A follower that runs out of
+    time does the work itself rather than fail
+
+    Args:
+        kind: Kind of work ('scrape', 'analysis'), part of the key and a metric dimension
+        key: Identity of the work (canonical URL, content hash, ...)
+        work: Zero-argument callable returning a JSON-serializable result
+        shareable: Whether a result may be reused by others (failures and
+            fallbacks are not)
+
+    Returns:
+        The leader's or this caller's result
+    """
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + FLIGHT_WAIT_SECONDS
+    record = get_flight(kind, key)
+    while True:
+        if record and record.get('state') == 'completed':
+            emit_metric('SingleFlight', dimensions={'Kind': kind, 'Outcome': 'follower'})
+            return flight_result(record)
+        if (not record or int(record.get('lease_until', 0)) <= int(time.time())) and claim_flight(kind, key, owner):
+            break
+        if time.monotonic() >= deadline:
+            emit_metric('SingleFlight', dimensions={'Kind': kind, 'Outcome': 'timeout'})
+            return work()
+        time.sleep(FLIGHT_POLL_SECONDS)
+        record = get_flight(kind, key)
+
+    emit_metric('SingleFlight', dimensions={'Kind': kind, 'Outcome': 'leader'})
+    try:
+        result = work()
+    except Exception:
+        release_flight(kind, key, owner)
+        raise
+    if shareable(result):
+        complete_flight(kind, key, owner, result)
+    else:
+        release_flight(kind, key, owner)
+    return result
+
+
+def take_bucket_token(key: Dict[str, str], rate: float, capacity: float) -> Tuple[bool, int]:
+    """
+    Take one token from a token bucket item
+    Refills from the stored level and timestamp, then writes the new level
+    conditioned on the timestamp read, retrying with jitter on conflict.
+    A refused request only costs the read
+
+    Args:
+        key: Primary key of the bucket item
+        rate: Refill rate in tokens per second
+        capacity: Bucket size (burst)
+
+    Returns:
+        (admitted, retry_after seconds; 0 when admitted)
+    """
+    for attempt in range(BUCKET_MAX_ATTEMPTS):
+        now_ms = int(time.time() * 1000)
+        try:
+            current = table.get_item(Key=key, ConsistentRead=True).get('Item')
+            if current:
+                tokens = refill(float(current['tokens']), int(current['updated_at']), now_ms, rate, capacity)
+            else:
+                tokens = capacity
+            if tokens < 1:
+                return False, retry_after(tokens, rate)
+
+            put_params: Dict[str, Any] = {
+                'Item': {
+                    **key,
+                    'type': 'TOKEN_BUCKET',
+                    'tokens': round(tokens - 1, 3),
+                    'updated_at': now_ms,
+                    'expires_at': now_ms // 1000 + full_after(tokens - 1, rate, capacity)
+                }
+            }
+            if current:
+                put_params['ConditionExpression'] = 'updated_at = :prev'
+                put_params['ExpressionAttributeValues'] = {':prev': int(current['updated_at'])}
+            else:
+                put_params['ConditionExpression'] = 'attribute_not_exists(PK)'
+
+            table.put_item(**put_params)
+            return True, 0
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+                continue
+            # Fail open: a DynamoDB hiccup should not block ingest
+            logger.error(f"Failed to take bucket token: {str(e)}", exc_info=True)
+            return True, 0
+    # Still contended after every attempt: the bucket is hot, ask to back off
+    return False, 1
+
+
+def refund_bucket_token(key: Dict[str, str]) -> None:
+    """
+    Return a token to a bucket item (the next take clamps to capacity)
+    """
+    try:
+        table.update_item(
+            Key=key,
+            UpdateExpression='ADD tokens :one',
+            ConditionExpression='attribute_exists(PK)',
+            ExpressionAttributeValues={':one': 1}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            logger.error(f"Failed to refund bucket token: {str(e)}", exc_info=True)
+
+
+def admit_ingest(user_id: str) -> Tuple[bool, int, Optional[str]]:
+    """
+    Admission control in front of process_job: take a token from the
+    user's bucket, then from the global bucket (the user's token is
+    returned if the global bucket refuses)
+
+    Returns:
+        (admitted, retry_after seconds, refusing scope 'user' or 'global')
+    """
+    if not ADMISSION_ENABLED:
+        return True, 0, None
+
+    local = ADMISSION_BACKEND == 'local'
+    take = local_buckets.take if local else take_bucket_token
+    refund = local_buckets.refund if local else refund_bucket_token
+    user_key = {'PK': f'USER#{user_id}', 'SK': 'BUCKET#ingest'}
+    global_key = {'PK': 'BUCKET#ingest', 'SK': 'GLOBAL'}
+
+    admitted, wait = take(user_key, USER_INGEST_RATE, USER_INGEST_BURST)
+    if not admitted:
+        emit_metric('AdmissionRejected', dimensions={'Scope': 'user'})
+        return False, wait, 'user'
+
+    admitted, wait = take(global_key, GLOBAL_INGEST_RATE, GLOBAL_INGEST_BURST)
+    if not admitted:
+        refund(user_key)
+        emit_metric('AdmissionRejected', dimensions={'Scope': 'global'})
+        return False, wait, 'global'
+
+    return True, 0, None
+
+
+def record_llm_usage(user_id: str, domain: str, usage_summary: Dict[str, Any]) -> bool:
+    """
+    Add one ingest's LLM usage to the daily roll-ups
+    Writes USAGE#{date} under the user, plus USER#/DOMAIN# entries under
+    the global USAGE#{date} partition for cross-user reports
+
+    Args:
+        user_id: User identifier
+        domain: Job posting domain (e.g. linkedin.com)
+        usage_summary: Output of usage.summarize_usage()
+
+    Returns:
+        True if all roll-ups were updated, False otherwise
+    """
+    day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    update_expr = 'ADD ' + ', '.join(f'{field} :{field}' for field in USAGE_COUNTERS)
+    expr_attr_values = {f':{field}': int(usage_summary.get(field, 0)) for field in USAGE_COUNTERS}
+
+    keys = [
+        {'PK': f'USER#{user_id}', 'SK': f'USAGE#{day}'},
+        {'PK': f'USAGE#{day}', 'SK': f'USER#{user_id}'},
+        {'PK': f'USAGE#{day}', 'SK': f'DOMAIN#{domain or "unknown"}'}
+    ]
+    try:
+        for key in keys:
+            table.update_item(
+                Key=key,
+                UpdateExpression=update_expr,
+                ExpressionAttributeValues=expr_attr_values
+            )
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to record LLM usage: {str(e)}", exc_info=True)
+        return False
+
+
+def get_user_usage(user_id: str, start_day: Optional[str] = None, end_day: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Get a user's daily LLM usage roll-ups
+
+    Args:
+        user_id: User identifier
+        start_day: First day (YYYY-MM-DD, inclusive, optional)
+        end_day: Last day (YYYY-MM-DD, inclusive, optional)
+
+    Returns:
+        List of {'day', counters...} sorted by day
+    """
+    try:
+        start_sk = f'USAGE#{start_day}' if start_day else 'USAGE#'
+        end_sk = f'USAGE#{end_day}' if end_day else 'USAGE#~'
+        response = table.query(
+            KeyConditionExpression='PK = :pk AND SK BETWEEN :start AND :end',
             ExpressionAttributeValues={
                 ':pk': f'USER#{user_id}',
-                ':sk_prefix': 'JOB#'
+                ':start': start_sk,
+                ':end': end_sk
             }
         )
-        
-        logger.info(f"Query response: {response}")
-        logger.info(f"Items count: {len(response.get('Items', []))}")
-        
-        jobs = response.get('Items', [])
-        
-        if not jobs:
+        return [
+            {'day': item['SK'][len('USAGE#'):], **{field: int(item.get(field, 0)) for field in USAGE_COUNTERS}}
+            for item in response.get('Items', [])
+        ]
+    except ClientError as e:
+        logger.error(f"Failed to get user usage: {str(e)}", exc_info=True)
+        return []
+
+
+def get_daily_usage_report(day: str) -> List[Dict[str, Any]]:
+    """
+    Get all per-user and per-domain roll-ups for one day
+
+    Returns:
+        List of {'kind': 'USER'|'DOMAIN', 'key', counters...}
+    """
+    rows = []
+    try:
+        query_params = {
+            'KeyConditionExpression': 'PK = :pk',
+            'ExpressionAttributeValues': {':pk': f'USAGE#{day}'}
+        }
+        while True:
+            response = table.query(**query_params)
+            for item in response.get('Items', []):
+                kind, _, key = item['SK'].partition('#')
+                rows.append({'kind': kind, 'key': key, **{field: int(item.get(field, 0)) for field in USAGE_COUNTERS}})
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return rows
+    except ClientError as e:
+        logger.error(f"Failed to get usage report: {str(e)}", exc_info=True)
+        return rows
+
+
+def remove_page_position(user_id: str, position: str) -> None:
+    """
+    Take a deleted job out of its page shard and the month's count, and
+    advance the version stamp, in one transaction
+    """
+    read_cache.invalidate(user_id)
+    try:
+        table.transact_write([
+            {'Update': page_shard_update(user_id, position, add=False)},
+            {'Update': version_bump(user_id, {page_month(position): -1})}
+        ])
+    except ClientError as e:
+        if transaction_conflict(e, 0):
+            # Not indexed (e.g. written before the page shards): stamp only
+            bump_user_version(user_id)
+            return
+        logger.error(f"Failed to remove {position} from the page index: {str(e)}", exc_info=True)
+
+
+def delete_job(user_id: str, job_id: str, applied_ts: str) -> bool:
+    """
+    Delete a job
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        response = table.delete_item(
+            Key={
+                'PK': f'USER#{user_id}',
+                'SK': f'JOB#{applied_ts}#{job_id}'
+            },
+            ReturnValues='ALL_OLD'
+        )
+        old_item = response.get('Attributes', {})
+        if old_item.get('tags'):
+            sync_tag_index(user_id, job_id, applied_ts, old_item['tags'], [])
+        if old_item:
+            update_search_document(user_id, job_id, applied_ts, None)
+            remove_page_position(user_id, make_doc_ref(applied_ts, job_id))
+        logger.info(f"Deleted job {job_id} for user {user_id}")
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to delete job: {str(e)}", exc_info=True)
+        return False
+
+
+def get_user_job_stats(user_id: str) -> Dict[str, Any]:
+    """
+    Get job application statistics for a user
+    Reads every page of the user's jobs, projected to the fields the
+    statistics need; served from the warm-container read cache until the
+    user's next write
+    
+    Returns:
+        Dictionary containing various job statistics
+    """
+    try:
+        def load() -> Dict[str, Any]:
+            logger.info(f"Getting stats for user_id: {user_id}")
+
+            jobs = list(iter_user_jobs(user_id, STATS_FIELDS))
+            logger.info(f"Items count: {len(jobs)}")
+
+            if not jobs:
+                return {
+                    'total_jobs': 0,
+                    'status_breakdown': {},
+                    'company_breakdown': {},
+                    'recent_activity': [],
+                    'application_trends': {},
+                    'salary_distribution': {}
+                }
+
+            # Calculate statistics
+            total_jobs = len(jobs)
+            status_breakdown = {}
+            company_breakdown = {}
+            recent_activity = []
+
+            # Process each job
+            for job in jobs:
+                # Status breakdown
+                status = job.get('status', 'Unknown')
+                status_breakdown[status] = status_breakdown.get(status, 0) + 1
+
+                # Company breakdown
+                company = job.get('company', 'Unknown')
+                company_breakdown[company] = company_breakdown.get(company, 0) + 1
+
+                # Recent activity (last 10 jobs by applied_ts)
+                recent_activity.append({
+                    'job_id': job.get('job_id'),
+                    'company': company,
+                    'position': job.get('position', 'Unknown'),
+                    'status': status,
+                    'applied_ts': job.get('applied_ts'),
+                    'created_at': job.get('created_at')
+                })
+
+            # Sort recent activity by applied_ts (most recent first)
+            recent_activity.sort(key=lambda x: x.get('applied_ts', ''), reverse=True)
+            recent_activity = recent_activity[:10]
+
+            # Calculate application trends (jobs per month)
+            application_trends = {}
+            for job in jobs:
+                applied_ts = job.get('applied_ts', '')
+                if applied_ts:
+                    # Extract year-month from timestamp
+                    try:
+                        # Assuming applied_ts is in format "2025-10-12T15:41:37.926992+00:00"
+                        year_month = applied_ts[:7]  # "2025-10"
+                        application_trends[year_month] = application_trends.get(year_month, 0) + 1
+                    except:
+                        continue
+
             return {
-                'total_jobs': 0,
-                'status_breakdown': {},
-                'company_breakdown': {},
-                'recent_activity': [],
-                'application_trends': {}
+                'total_jobs': total_jobs,
+                'status_breakdown': status_breakdown,
+                'company_breakdown': company_breakdown,
+                'recent_activity': recent_activity,
+                'application_trends': application_trends,
+                # Percentiles and histogram of annualized salary, per currency
+                'salary_distribution': salary_distribution(jobs)
             }
-        
-        # Calculate statistics
-        total_jobs = len(jobs)
-        status_breakdown = {}
-        company_breakdown = {}
-        recent_activity = []
-        
-        # Process each job
-        for job in jobs:
-            # Status breakdown
-            status = job.get('status', 'Unknown')
-            status_breakdown[status] = status_breakdown.get(status, 0) + 1
-            
-            # Company breakdown
-            company = job.get('company', 'Unknown')
-            company_breakdown[company] = company_breakdown.get(company, 0) + 1
-            
-            # Recent activity (last 10 jobs by applied_ts)
-            recent_activity.append({
-                'job_id': job.get('job_id'),
-                'company': company,
-                'position': job.get('position', 'Unknown'),
-                'status': status,
-                'applied_ts': job.get('applied_ts'),
-                'created_at': job.get('created_at')
-            })
-        
-        # Sort recent activity by applied_ts (most recent first)
-        recent_activity.sort(key=lambda x: x.get('applied_ts', ''), reverse=True)
-        recent_activity = recent_activity[:10]
-        
-        # Calculate application trends (jobs per month)
-        application_trends = {}
-        for job in jobs:
-            applied_ts = job.get('applied_ts', '')
-            if applied_ts:
-                # Extract year-month from timestamp
-                try:
-                    # Assuming applied_ts is in format "2025-10-12T15:41:37.926992+00:00"
-                    year_month = applied_ts[:7]  # "2025-10"
-                    application_trends[year_month] = application_trends.get(year_month, 0) + 1
-                except:
-                    continue
-        
-        return {
-            'total_jobs': total_jobs,
-            'status_breakdown': status_breakdown,
-            'company_breakdown': company_breakdown,
-            'recent_activity': recent_activity,
-            'application_trends': application_trends
-        }
-        
+
+        return cached_read(user_id, 'stats', [], load)
+
     except ClientError as e:
         logger.error(f"Failed to get job stats: {str(e)}", exc_info=True)
         return {
@@ -493,5 +2401,169 @@ def get_user_job_stats(user_id: str) -> Dict[str, Any]:
             'status_breakdown': {},
             'company_breakdown': {},
             'recent_activity': [],
-            'application_trends': {}
-        }
\ No newline at end of file
+            'application_trends': {},
+            'salary_distribution': {}
+        }
+
+
+def scan_job_page(
+    segment: int,
+    total_segments: int,
+    start_key: Optional[Dict[str, Any]] = None,
+    stale_version: Optional[str] = None,
+    limit: int = 100
+) -> Dict[str, Any]:
+    """
+    Read one page of one segment of a parallel Scan over all job items
+
+    Args:
+        segment: Segment number (0-based)
+        total_segments: TotalSegments of the scan
+        start_key: LastEvaluatedKey of the previous page
+        stale_version: Only return jobs whose analysis_version differs
+        limit: Items evaluated per page (before filtering)
+
+    Returns:
+        Dict with 'items' and 'last_key' (None at the end of the segment)
+
+    Raises:
+        ClientError: If the page cannot be read
+    """
+    # Placeholders throughout: 'location' and 'source' are reserved words
+    projection = build_projection(BACKFILL_SCAN_FIELDS)
+    params: Dict[str, Any] = {
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'Limit': limit,
+        'FilterExpression': '#type = :job',
+        'ProjectionExpression': projection['ProjectionExpression'],
+        'ExpressionAttributeNames': {'#type': 'type', **projection['ExpressionAttributeNames']},
+        'ExpressionAttributeValues': {':job': 'JOB'}
+    }
+    if stale_version:
+        params['FilterExpression'] += ' AND (attribute_not_exists(analysis_version) OR analysis_version <> :v)'
+        params['ExpressionAttributeValues'][':v'] = stale_version
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+
+    response = table.scan(**params)
+    return {'items': response.get('Items', []), 'last_key': response.get('LastEvaluatedKey')}
+
+
+def backfill_segment_key(run_id: str, segment: int) -> Dict[str, str]:
+    return {'PK': f'BACKFILL#{run_id}', 'SK': f'SEGMENT#{segment:04d}'}
+
+
+def claim_backfill_segment(run_id: str, segment: int, owner: str) -> Optional[Dict[str, Any]]:
+    """
+    Lease one segment of a backfill run, so no two workers scan it at once
+    Succeeds for a new segment, an expired lease, or the current owner
+
+    Returns:
+        The segment checkpoint (last_key, counters, done), or None if
+        another worker holds it
+    """
+    now = int(time.time())
+    try:
+        response = table.update_item(
+            Key=backfill_segment_key(run_id, segment),
+            UpdateExpression='SET #type = :type, #owner = :owner, lease_until = :lease',
+            ConditionExpression='attribute_not_exists(PK) OR lease_until <= :now OR #owner = :owner',
+            ExpressionAttributeNames={'#type': 'type', '#owner': 'owner'},
+            ExpressionAttributeValues={
+                ':type': 'BACKFILL_SEGMENT', ':owner': owner, ':lease': now + BACKFILL_LEASE_SECONDS, ':now': now
+            },
+            ReturnValues='ALL_NEW'
+        )
+        return response['Attributes']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            logger.error(f"Failed to claim backfill segment {segment}: {str(e)}", exc_info=True)
+        return None
+
+
+def renew_backfill_lease(run_id: str, segment: int, owner: str) -> bool:
+    """
+    Extend a segment's lease while a page is still being worked on
+
+    Returns:
+        False if the lease was lost (stop working on the segment)
+    """
+    try:
+        table.update_item(
+            Key=backfill_segment_key(run_id, segment),
+            UpdateExpression='SET lease_until = :lease',
+            ConditionExpression='#owner = :owner',
+            ExpressionAttributeNames={'#owner': 'owner'},
+            ExpressionAttributeValues={':owner': owner, ':lease': int(time.time()) + BACKFILL_LEASE_SECONDS}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            logger.error(f"Failed to renew the lease on backfill segment {segment}: {str(e)}", exc_info=True)
+        return False
+
+
+def save_backfill_checkpoint(
+    run_id: str,
+    segment: int,
+    owner: str,
+    last_key: Optional[Dict[str, Any]],
+    counters: Dict[str, int]
+) -> bool:
+    """
+    Record a segment's progress after a page is fully processed and renew
+    the lease; the segment is done when last_key is None
+
+    Returns:
+        False if the lease was lost (stop working on the segment)
+    """
+    now = int(time.time())
+    names = {'#owner': 'owner'}
+    values: Dict[str, Any] = {
+        ':owner': owner,
+        ':lease': now + BACKFILL_LEASE_SECONDS,
+        ':last_key': json.dumps(last_key) if last_key else '',
+        ':done': last_key is None,
+        ':updated': now
+    }
+    parts = ['lease_until = :lease', 'last_key = :last_key', 'done = :done', 'updated_at = :updated']
+    for i, (name, value) in enumerate(counters.items()):
+        names[f'#n{i}'] = name
+        values[f':n{i}'] = value
+        parts.append(f'#n{i} = :n{i}')
+    try:
+        table.update_item(
+            Key=backfill_segment_key(run_id, segment),
+            UpdateExpression='SET ' + ', '.join(parts),
+            ConditionExpression='#owner = :owner',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            logger.error(f"Failed to save backfill checkpoint for segment {segment}: {str(e)}", exc_info=True)
+        return False
+
+
+def get_backfill_checkpoints(run_id: str) -> List[Dict[str, Any]]:
+    """
+    Get every segment checkpoint of a backfill run
+    """
+    items: List[Dict[str, Any]] = []
+    query_params = {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk_prefix)',
+        'ExpressionAttributeValues': {':pk': f'BACKFILL#{run_id}', ':sk_prefix': 'SEGMENT#'},
+        'ConsistentRead': True
+    }
+    try:
+        while True:
+            response = table.query(**query_params)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    except ClientError as e:
+        logger.error(f"Failed to get backfill checkpoints: {str(e)}", exc_info=True)
+        return items
@@ -0,0 +1,326 @@
+"""
+Low-level DynamoDB access for JobTrackr
+A Table-like wrapper over the botocore client with a schema-aware
+attribute marshaller, replacing boto3's resource layer and its
+TypeSerializer/TypeDeserializer
+
+Numbers come back as int, or float when fractional and the float reads
+back as the same number (Decimal otherwise, so no precision is lost),
+binary as bytes, and the known job attributes skip the generic type
+dispatch. Every call reports its consumed capacity to capacity.py when a
+request is being metered.
+"""
+
+import os
+import time
+import random
+import logging
+from decimal import Decimal
+from typing import Dict, Any, List
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from capacity import capacity_enabled, record_call
+
+logger = logging.getLogger(__name__)
+
+# Client tuning
+DYNAMODB_MAX_POOL_CONNECTIONS = int(os.getenv('DYNAMODB_MAX_POOL_CONNECTIONS', '16'))
+DYNAMODB_CONNECT_TIMEOUT = float(os.getenv('DYNAMODB_CONNECT_TIMEOUT', '1'))
+DYNAMODB_READ_TIMEOUT = float(os.getenv('DYNAMODB_READ_TIMEOUT', '3'))
+DYNAMODB_MAX_ATTEMPTS = int(os.getenv('DYNAMODB_MAX_ATTEMPTS', '4'))
+
+BATCH_WRITE_SIZE = 25
+# Retries of unprocessed batch keys/items: capped exponential backoff
+# with full jitter, then the call fails
+BATCH_MAX_ATTEMPTS = int(os.getenv('DYNAMODB_BATCH_MAX_ATTEMPTS', '8'))
+BATCH_BACKOFF_BASE = 0.05
+BATCH_BACKOFF_MAX = 2.0
+
+# Attributes of job, index and bookkeeping items with a fixed type
+STRING_ATTRIBUTES = frozenset([
+    'PK', 'SK', 'GSI1PK', 'GSI1SK', 'GSI2PK', 'GSI2SK', 'type', 'user_id', 'job_id',
+    'applied_ts', 'last_updated_ts', 'company', 'title', 'location', 'status', 'job_url',
+    'salary_range', 'employment_type', 'source', 'notes', 'notes_status', 'resume_url',
+    'enrichment_status', 'enrichment_error', 'created_at', 'position', 'currency', 'state',
+    'request_hash', 'response_body', 'owner', 'analysis_version', 'last_key', 'content_hash'
+])
+NUMBER_ATTRIBUTES = frozenset([
+    'version', 'total', 'updated_at', 'expires_at', 'salary_min', 'salary_max', 'lease_until', 'status_code',
+    'tokens'
+])
+
+
+def client_config() -> Config:
+    """
+    botocore config for the DynamoDB client: warm connection pool with
+    keep-alive, short timeouts for an API behind API Gateway, and the
+    standard retry mode (adaptive backoff on throttling)
+    """
+    return Config(
+        max_pool_connections=DYNAMODB_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=DYNAMODB_CONNECT_TIMEOUT,
+        read_timeout=DYNAMODB_READ_TIMEOUT,
+        retries={'max_attempts': DYNAMODB_MAX_ATTEMPTS, 'mode': 'standard'}
+    )
+
+
+def _number(text: str) -> Any:
+    if '.' not in text and 'e' not in text and 'E' not in text:
+        return int(text)
+    value = Decimal(text)
+    if value == value.to_integral_value():
+        return int(value)
+    as_float = float(value)
+    return as_float if Decimal(repr(as_float)) == value else value
+
+
+def _backoff(operation: str, attempt: int, pending: int) -> None:
+    """
+    Sleep before retrying unprocessed batch entries
+
+    Raises:
+        ClientError: Once BATCH_MAX_ATTEMPTS retries are used up, so
+            callers handle it like any other failed call
+    """
+    if attempt >= BATCH_MAX_ATTEMPTS:
+        raise ClientError({'Error': {
+            'Code': 'UnprocessedItems',
+            'Message': f"{pending} entries still unprocessed after {attempt} retries"
+        }}, operation)
+    time.sleep(random.uniform(0, min(BATCH_BACKOFF_MAX, BATCH_BACKOFF_BASE * 2 ** attempt)))
+
+
+def serialize_value(value: Any) -> Dict[str, Any]:
+    """
+    Convert a Python value to a DynamoDB AttributeValue
+    """
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, dict):
+        return {'M': {k: serialize_value(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [serialize_value(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        if not value:
+            # DynamoDB has no empty set; leave the attribute out (or REMOVE it)
+            raise ValueError("DynamoDB sets cannot be empty")
+        if all(isinstance(v, str) for v in value):
+            return {'SS': sorted(value)}
+        if all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in value):
+            return {'NS': [str(v) for v in value]}
+        return {'BS': [bytes(v) for v in value]}
+    raise TypeError(f"Unsupported DynamoDB type: {type(value).__name__}")
+
+
+def deserialize_value(av: Dict[str, Any]) -> Any:
+    """
+    Convert a DynamoDB AttributeValue to a Python value
+    """
+    (kind, value), = av.items()
+    if kind == 'S':
+        return value
+    if kind == 'N':
+        return _number(value)
+    if kind == 'M':
+        return {k: deserialize_value(v) for k, v in value.items()}
+    if kind == 'L':
+        return [deserialize_value(v) for v in value]
+    if kind == 'BOOL':
+        return value
+    if kind == 'NULL':
+        return None
+    if kind == 'B':
+        return value
+    if kind == 'SS':
+        return set(value)
+    if kind == 'NS':
+        return {_number(v) for v in value}
+    if kind == 'BS':
+        return set(value)
+    raise TypeError(f"Unsupported DynamoDB type: {kind}")
+
+
+def serialize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a Python dict to a DynamoDB item
+    """
+    return {k: {'S': v} if k in STRING_ATTRIBUTES and isinstance(v, str) else serialize_value(v) for k, v in item.items()}
+
+
+def deserialize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a DynamoDB item to a Python dict
+    Known attributes read their value directly; the rest use the generic path
+    """
+    result = {}
+    for name, av in item.items():
+        if name in STRING_ATTRIBUTES and 'S' in av:
+            result[name] = av['S']
+        elif name in NUMBER_ATTRIBUTES and 'N' in av:
+            result[name] = _number(av['N'])
+        else:
+            result[name] = deserialize_value(av)
+    return result
+
+
+class FastTable:
+    """
+    Subset of the boto3 Table API used by db.py, on the low-level client
+    Accepts and returns plain Python values like the resource layer
+    """
+
+    def __init__(self, client: Any, table_name: str):
+        self.client = client
+        self.name = table_name
+
+    def _request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        request = dict(params, TableName=self.name)
+        for field in ('Key', 'Item', 'ExclusiveStartKey'):
+            if field in request:
+                request[field] = serialize_item(request[field])
+        if 'ExpressionAttributeValues' in request:
+            request['ExpressionAttributeValues'] = serialize_item(request['ExpressionAttributeValues'])
+        return request
+
+    def _response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        for field in ('Item', 'Attributes', 'LastEvaluatedKey'):
+            if field in response:
+                response[field] = deserialize_item(response[field])
+        if 'Items' in response:
+            response['Items'] = [deserialize_item(item) for item in response['Items']]
+        return response
+
+    def _call(self, operation: str, method: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+        request = self._request(params)
+        metered = capacity_enabled()
+        if metered:
+            request['ReturnConsumedCapacity'] = 'TOTAL'
+        response = method(**request)
+        if metered:
+            record_call(operation, request, response)
+        return self._response(response)
+
+    def get_item(self, **params: Any) -> Dict[str, Any]:
+        return self._call('GetItem', self.client.get_item, params)
+
+    def put_item(self, **params: Any) -> Dict[str, Any]:
+        return self._call('PutItem', self.client.put_item, params)
+
+    def update_item(self, **params: Any) -> Dict[str, Any]:
+        return self._call('UpdateItem', self.client.update_item, params)
+
+    def delete_item(self, **params: Any) -> Dict[str, Any]:
+        return self._call('DeleteItem', self.client.delete_item, params)
+
+    def query(self, **params: Any) -> Dict[str, Any]:
+        return self._call('Query', self.client.query, params)
+
+    def scan(self, **params: Any) -> Dict[str, Any]:
+        return self._call('Scan', self.client.scan, params)
+
+    def transact_write(self, actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        TransactWriteItems on this table
+
+        Args:
+            actions: Up to 100 {'Put'|'Update'|'Delete'|'ConditionCheck': params}
+                entries, params in plain Python values without TableName
+
+        Raises:
+            ClientError: TransactionCanceledException if any condition fails
+        """
+        request = {'TransactItems': [
+            {action: self._request(params) for action, params in entry.items()}
+            for entry in actions
+        ]}
+        metered = capacity_enabled()
+        if metered:
+            request['ReturnConsumedCapacity'] = 'TOTAL'
+        response = self.client.transact_write_items(**request)
+        if metered:
+            record_call('TransactWriteItems', request, response)
+        return response
+
+    def batch_get(self, keys: List[Dict[str, Any]], **params: Any) -> List[Dict[str, Any]]:
+        """
+        BatchGetItem for any number of keys (100 per request), retrying
+        unprocessed keys with backoff
+
+        Args:
+            keys: Primary keys to fetch
+            params: Extra KeysAndAttributes (ProjectionExpression, ConsistentRead, ...)
+
+        Returns:
+            Found items, in no particular order
+        """
+        items = []
+        metered = capacity_enabled()
+        extra = {'ReturnConsumedCapacity': 'TOTAL'} if metered else {}
+        for i in range(0, len(keys), 100):
+            request = {self.name: {'Keys': [serialize_item(k) for k in keys[i:i + 100]], **params}}
+            attempt = 0
+            while True:
+                response = self.client.batch_get_item(RequestItems=request, **extra)
+                if metered:
+                    record_call('BatchGetItem', {'RequestItems': request}, response)
+                items.extend(deserialize_item(item) for item in response.get('Responses', {}).get(self.name, []))
+                request = response.get('UnprocessedKeys')
+                if not request:
+                    break
+                _backoff('BatchGetItem', attempt, len(request[self.name]['Keys']))
+                attempt += 1
+        return items
+
+    def batch_writer(self) -> 'BatchWriter':
+        return BatchWriter(self)
+
+
+class BatchWriter:
+    """Buffer puts and deletes into 25-item BatchWriteItem calls, retrying unprocessed items with backoff"""
+
+    def __init__(self, table: FastTable):
+        self.table = table
+        self._pending: List[Dict[str, Any]] = []
+
+    def put_item(self, Item: Dict[str, Any]) -> None:
+        self._add({'PutRequest': {'Item': serialize_item(Item)}})
+
+    def delete_item(self, Key: Dict[str, Any]) -> None:
+        self._add({'DeleteRequest': {'Key': serialize_item(Key)}})
+
+    def _add(self, request: Dict[str, Any]) -> None:
+        self._pending.append(request)
+        if len(self._pending) >= BATCH_WRITE_SIZE:
+            self._flush(self._pending[:BATCH_WRITE_SIZE])
+            self._pending = self._pending[BATCH_WRITE_SIZE:]
+
+    def _flush(self, requests: List[Dict[str, Any]]) -> None:
+        attempt = 0
+        metered = capacity_enabled()
+        extra = {'ReturnConsumedCapacity': 'TOTAL'} if metered else {}
+        while requests:
+            request = {self.table.name: requests}
+            response = self.table.client.batch_write_item(RequestItems=request, **extra)
+            if metered:
+                record_call('BatchWriteItem', {'RequestItems': request}, response)
+            requests = response.get('UnprocessedItems', {}).get(self.table.name, [])
+            if requests:
+                _backoff('BatchWriteItem', attempt, len(requests))
+                attempt += 1
+
+    def __enter__(self) -> 'BatchWriter':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        while self._pending:
+            self._flush(self._pending[:BATCH_WRITE_SIZE])
+            self._pending = self._pending[BATCH_WRITE_SIZE:]
@@ -0,0 +1,126 @@
+"""
+Application funnel analytics for JobTrackr
+Pure functions; the event log and the FUNNEL aggregate are stored by db.py
+
+Each job records when it first reached each status (`stage_ts` on the
+job item). The first time a job reaches a stage, the aggregate gains one
+`reached#{stage}` and one `lag#{from}#{to}#{days}` count, where `from`
+is the latest earlier funnel stage the job reached. Medians are read
+from those per-day histograms, so the log is only replayed on rebuild.
+"""
+
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# Stages in funnel order; 'Rejected' ends a job at any stage
+FUNNEL_STAGES = ['Captured', 'Applied', 'Interview', 'Offer']
+TERMINAL_STAGES = ['Rejected']
+
+
+def days_between(start_ts: str, end_ts: str) -> int:
+    """
+    Whole days between two ISO timestamps (never negative)
+    """
+    delta = datetime.fromisoformat(end_ts) - datetime.fromisoformat(start_ts)
+    return max(int(delta.total_seconds() // 86400), 0)
+
+
+def previous_stage(stage_ts: Dict[str, str], status: str) -> Optional[str]:
+    """
+    Latest funnel stage before `status` that the job has reached
+    """
+    order = FUNNEL_STAGES.index(status) if status in FUNNEL_STAGES else len(FUNNEL_STAGES)
+    for stage in reversed(FUNNEL_STAGES[:order]):
+        if stage in stage_ts:
+            return stage
+    return None
+
+
+def stage_counters(stage_ts: Dict[str, str], status: str, now: str) -> Dict[str, int]:
+    """
+    Aggregate counters to add when a job moves to `status`
+
+    Args:
+        stage_ts: The job's first-reached timestamps before this change
+        status: New status
+        now: Timestamp of the change
+
+    Returns:
+        {counter attribute: increment}; empty if the stage was reached before
+    """
+    if status in stage_ts:
+        return {}
+    counters = {f'reached#{status}': 1}
+    prev = previous_stage(stage_ts, status)
+    if prev:
+        counters[f'lag#{prev}#{status}#{days_between(stage_ts[prev], now)}'] = 1
+    return counters
+
+
+def replay_events(events: List[Dict[str, Any]]) -> Tuple[Dict[str, int], Dict[str, Dict[str, str]]]:
+    """
+    Recompute the aggregate from status events
+
+    Args:
+        events: Event items (job_id, to_status, ts) in any order
+
+    Returns:
+        (counters, {job_id: stage_ts})
+    """
+    counters: Dict[str, int] = {}
+    stages: Dict[str, Dict[str, str]] = {}
+    for event in sorted(events, key=lambda e: e['ts']):
+        stage_ts = stages.setdefault(event['job_id'], {})
+        for name, value in stage_counters(stage_ts, event['to_status'], event['ts']).items():
+            counters[name] = counters.get(name, 0) + value
+        stage_ts.setdefault(event['to_status'], event['ts'])
+    return counters, stages
+
+
+def histogram_median(histogram: Dict[int, int]) -> Optional[float]:
+    """
+    Median of a {value: count} histogram
+    """
+    total = sum(histogram.values())
+    if not total:
+        return None
+    values = sorted(histogram)
+    lower, upper = (total - 1) // 2, total // 2
+    seen, low_value = 0, None
+    for value in values:
+        seen += histogram[value]
+        if low_value is None and seen > lower:
+            low_value = value
+        if seen > upper:
+            return (low_value + value) / 2
+    return float(values[-1])
+
+
+def summarize_funnel(aggregate: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn the stored aggregate into funnel counts, conversion rates and
+    median days between stages
+    """
+    reached = {stage: int(aggregate.get(f'reached#{stage}', 0)) for stage in FUNNEL_STAGES + TERMINAL_STAGES}
+
+    funnel = []
+    for i, stage in enumerate(FUNNEL_STAGES):
+        prev_count = reached[FUNNEL_STAGES[i - 1]] if i else None
+        funnel.append({
+            'stage': stage,
+            'reached': reached[stage],
+            'conversion': round(reached[stage] / prev_count, 4) if prev_count else None
+        })
+
+    lags: Dict[str, Dict[int, int]] = {}
+    for name, count in aggregate.items():
+        if name.startswith('lag#'):
+            _, from_stage, to_stage, days = name.split('#')
+            lags.setdefault(f'{from_stage}->{to_stage}', {})[int(days)] = int(count)
+
+    return {
+        'funnel': funnel,
+        'rejected': reached['Rejected'],
+        'median_days': {pair: histogram_median(histogram) for pair, histogram in sorted(lags.items())},
+        'samples': {pair: sum(histogram.values()) for pair, histogram in sorted(lags.items())}
+    }
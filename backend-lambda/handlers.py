@@ -2,23 +2,53 @@
 Request handlers for the JobTrackr Lambda API
 """
 
-import json
+import io
+import uuid
+import base64
 import logging
 from datetime import datetime, timezone
 from typing import Dict, Any
-from utils import create_response, create_error_response, create_success_response, parse_request_body, validate_url_input, sanitize_request_data
-from processor import process_job
-from db import get_user_jobs, delete_job, update_job, get_user_job_stats
+from utils import (
+    create_response, create_error_response, create_success_response, create_replayed_response, parse_request_body,
+    validate_url_input, sanitize_request_data, get_header, is_valid_idempotency_key, fingerprint_request
+)
+from processor import process_job, enrich_job, retry_enrichment, ensure_job_notes, process_pending_notes
+from db import (
+    get_user_jobs, query_user_jobs, get_job, delete_job, update_job, get_user_job_stats, get_user_usage, search_user_jobs, get_funnel,
+    resolve_job_fields, strip_internal_keys, get_user_version, get_page_start, make_start_key, normalize_date_bound,
+    acquire_idempotency_key, complete_idempotency_key, release_idempotency_key, admit_ingest
+)
+from export import EXPORT_FORMATS, export_jobs
+from bulk_import import import_jobs
+from pagination import (
+    make_scope, encode_cursor, decode_cursor, position_from_key, page_total, total_pages, require_secret
+)
+import warmup
 
 logger = logging.getLogger(__name__)
 
+# List cursors are signed; refuse to start without a key
+require_secret()
+
+
+def rate_limited_response(retry_after: int, scope: str) -> Dict[str, Any]:
+    """
+    429 for a request refused by admission control
+    """
+    return create_error_response(429, "Too many ingest requests, please retry later", "RATE_LIMITED",
+                                 {"scope": scope, "retry_after": retry_after},
+                                 headers={"Retry-After": str(retry_after)})
+
 
 def handle_job_ingest(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handle job ingest POST requests
     Expects url in request body, user_id from Cognito
-    Optional: resume_url
+    Optional: resume_url, Idempotency-Key header (a retry with the same
+    key replays the first response instead of ingesting again)
     """
+    idempotency_key = None
+    owner = uuid.uuid4().hex
     try:
         # Extract user_id from Cognito authorizer context
         user_id = None
@@ -55,22 +85,216 @@ def handle_job_ingest(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Use the validated/sanitized URL
         url = validation_result["url"]
 
-        # Extract optional resume_url
+        # Extract optional resume_url and page title
         resume_url = sanitized_body.get('resume_url')
+        title = (sanitized_body.get('title') or '').strip()[:300] or None
+
+        # Absorb client retries: replay the stored response for a known key
+        key = get_header(event, 'Idempotency-Key')
+        if key is not None:
+            if not is_valid_idempotency_key(key):
+                return create_error_response(400, "Idempotency-Key must be 1-255 letters, digits, '-', '_', '.' or ':'",
+                                             "INVALID_IDEMPOTENCY_KEY")
+            request_hash = fingerprint_request({'url': url, 'resume_url': resume_url, 'title': title})
+            outcome, record = acquire_idempotency_key(user_id, key, request_hash, owner)
+            if outcome == 'completed':
+                return create_replayed_response(int(record['status_code']), record['response_body'])
+            elif outcome == 'mismatch':
+                return create_error_response(422, "Idempotency-Key was already used with a different request",
+                                             "IDEMPOTENCY_KEY_REUSED")
+            elif outcome == 'in_progress':
+                return create_error_response(409, "A request with this Idempotency-Key is still in progress",
+                                             "IDEMPOTENCY_IN_PROGRESS")
+            idempotency_key = key
+
+        # Admission control: refuse fast instead of queueing on provider limits
+        admitted, retry_after, scope = admit_ingest(user_id)
+        if not admitted:
+            if idempotency_key:
+                release_idempotency_key(user_id, idempotency_key, owner)
+            return rate_limited_response(retry_after, scope)
 
         # Process the job
-        processing_result = process_job(url, user_id, resume_url)
+        processing_result = process_job(url, user_id, resume_url, title, context)
 
         if processing_result.get("status") == "completed":
-            return create_success_response({
+            response = create_success_response({
                 "message": "Job URL processed successfully",
-                "status": "completed"
+                "status": "completed",
+                "job_id": processing_result["job_id"],
+                "applied_ts": processing_result["applied_ts"]
             })
+        elif processing_result.get("status") == "captured":
+            response = create_success_response({
+                "message": "Job URL captured, analysis in progress",
+                "status": "captured",
+                "job_id": processing_result["job_id"],
+                "applied_ts": processing_result["applied_ts"]
+            }, status_code=202)
         else:
-            return create_error_response(500, "Job processing failed", "PROCESSING_FAILED")
+            # The captured item is kept so enrichment can be retried
+            details = {k: processing_result[k] for k in ("job_id", "applied_ts", "step") if k in processing_result}
+            response = create_error_response(500, "Job processing failed", "PROCESSING_FAILED", details or None)
+
+        if idempotency_key:
+            # Settled outcomes replay; a server error frees the key so the retry runs again
+            if response['statusCode'] < 500:
+                complete_idempotency_key(user_id, idempotency_key, owner, response['statusCode'], response['body'])
+            else:
+                release_idempotency_key(user_id, idempotency_key, owner)
+        return response
 
     except Exception as e:
         logger.error(f"Error processing job ingest: {str(e)}", exc_info=True)
+        if idempotency_key:
+            release_idempotency_key(user_id, idempotency_key, owner)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
+def handle_retry_enrichment(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle POST request to retry a failed enrichment
+    Path: /api/jobs/{job_id}/enrich?applied_ts={timestamp}
+    """
+    try:
+        # Extract user_id from Cognito authorizer context
+        user_id = None
+        request_context = event.get('requestContext', {})
+        authorizer = request_context.get('authorizer', {})
+
+        # Get user_id from Cognito claims
+        if 'claims' in authorizer:
+            user_id = authorizer['claims'].get('sub')
+
+        if not user_id:
+            return create_error_response(401, "Unauthorized - No user ID found", "UNAUTHORIZED")
+
+        # Extract job_id from path (/api/jobs/{job_id}/enrich)
+        path = event.get('path', '')
+        job_id = path.rstrip('/').split('/')[-2]
+
+        if not job_id:
+            return create_error_response(400, "Job ID is required", "MISSING_JOB_ID")
+
+        # Extract applied_ts from query parameters
+        params = event.get('queryStringParameters') or {}
+        applied_ts = params.get('applied_ts')
+
+        if not applied_ts:
+            return create_error_response(400, "applied_ts query parameter is required", "MISSING_APPLIED_TS")
+
+        admitted, retry_after, scope = admit_ingest(user_id)
+        if not admitted:
+            return rate_limited_response(retry_after, scope)
+
+        result = retry_enrichment(user_id, job_id, applied_ts)
+
+        if result.get("status") == "completed":
+            return create_success_response({
+                "message": "Job enriched successfully",
+                "status": "completed",
+                "job_id": job_id
+            })
+        elif result.get("status") == "not_found":
+            return create_error_response(404, "Job not found", "JOB_NOT_FOUND")
+        elif result.get("status") == "conflict":
+            return create_error_response(409, "Job enrichment has not failed", "NOT_RETRYABLE",
+                                         {"enrichment_status": result.get("enrichment_status")})
+        else:
+            return create_error_response(500, "Job processing failed", "PROCESSING_FAILED", {"step": result.get("step")})
+
+    except Exception as e:
+        logger.error(f"Error retrying enrichment: {str(e)}", exc_info=True)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
+def handle_export_jobs(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle POST request to export all of the user's jobs
+    Path: /api/jobs/export?format=ndjson|csv
+    Streams the full history into a gzip file and returns a download URL
+    """
+    try:
+        # Extract user_id from Cognito authorizer context
+        user_id = None
+        request_context = event.get('requestContext', {})
+        authorizer = request_context.get('authorizer', {})
+
+        # Get user_id from Cognito claims
+        if 'claims' in authorizer:
+            user_id = authorizer['claims'].get('sub')
+
+        if not user_id:
+            return create_error_response(401, "Unauthorized - No user ID found", "UNAUTHORIZED")
+
+        params = event.get('queryStringParameters') or {}
+        body = parse_request_body(event) or {}
+        fmt = (params.get('format') or body.get('format') or 'ndjson').lower()
+
+        if fmt not in EXPORT_FORMATS:
+            return create_error_response(400, f"format must be one of: {', '.join(EXPORT_FORMATS)}", "INVALID_PARAMETER")
+
+        export = export_jobs(user_id, fmt, context=context)
+
+        return create_success_response({"export": export}, 201)
+
+    except TimeoutError as e:
+        logger.error(f"Export timed out: {str(e)}")
+        return create_error_response(504, "Export did not finish in time", "EXPORT_TIMEOUT")
+    except Exception as e:
+        logger.error(f"Error exporting jobs: {str(e)}", exc_info=True)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
+def handle_import_jobs(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle POST request to bulk import jobs from a CSV export
+    Path: /api/jobs/import?enrich=true&start_row=0
+    Body: CSV text (header row first), or JSON {"csv": "...", "enrich": bool, "start_row": int}
+    """
+    try:
+        # Extract user_id from Cognito authorizer context
+        user_id = None
+        request_context = event.get('requestContext', {})
+        authorizer = request_context.get('authorizer', {})
+
+        # Get user_id from Cognito claims
+        if 'claims' in authorizer:
+            user_id = authorizer['claims'].get('sub')
+
+        if not user_id:
+            return create_error_response(401, "Unauthorized - No user ID found", "UNAUTHORIZED")
+
+        params = event.get('queryStringParameters') or {}
+        raw = event.get('body') or ''
+        if event.get('isBase64Encoded'):
+            raw = base64.b64decode(raw).decode('utf-8')
+        raw = raw.lstrip('\ufeff')
+
+        body = parse_request_body(event) if raw.lstrip().startswith('{') else None
+        if isinstance(body, dict):
+            csv_text = body.get('csv') or ''
+            params = {**params, **{k: str(v) for k, v in body.items() if k in ('enrich', 'start_row')}}
+        else:
+            csv_text = raw
+
+        if not csv_text.strip():
+            return create_error_response(400, "CSV content is required", "MISSING_CSV")
+
+        enrich = params.get('enrich', 'false').lower() == 'true'
+        start_row = int(params.get('start_row', 0))
+
+        # Quoted fields may contain line breaks, so the reader gets the raw text
+        summary = import_jobs(user_id, io.StringIO(csv_text, newline=''), enrich=enrich, start_row=start_row,
+                              context=context)
+
+        return create_success_response({"import": summary}, 201)
+
+    except ValueError as e:
+        logger.error(f"Invalid import: {str(e)}")
+        return create_error_response(400, str(e), "INVALID_CSV")
+    except Exception as e:
+        logger.error(f"Error importing jobs: {str(e)}", exc_info=True)
         return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
 
 
@@ -79,7 +303,11 @@ def handle_get_jobs(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Handle GET request to retrieve user's jobs with pagination
     Query parameters:
         - limit (optional, default: 10, max: 50)
-        - last_key (optional, base64 encoded pagination token)
+        - last_key (optional, signed cursor from a previous next_page_token)
+        - page (optional, 1-based page to jump to; unfiltered lists only)
+        - status, company, tag (optional, exact match; tag is case-insensitive)
+        - from, to (optional, ISO date or timestamp bounds on applied_ts)
+        - fields (optional, 'summary' (default), 'all' or comma-separated field names)
     User ID is extracted from Cognito authorizer
     """
     try:
@@ -105,31 +333,63 @@ def handle_get_jobs(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if limit < 1:
             limit = 10
 
-        # Get pagination token (optional)
-        last_key = None
+        # Optional server-side filters
+        filters = {
+            'status': params.get('status'),
+            'company': params.get('company'),
+            'tag': params.get('tag'),
+            'date_from': params.get('from'),
+            'date_to': params.get('to')
+        }
+        for bound in ('date_from', 'date_to'):
+            if filters[bound]:
+                filters[bound] = normalize_date_bound(filters[bound])
+        filtered = any(filters.values())
+        scope = make_scope(**filters)
+
+        # Projected attributes (slim list representation by default)
+        fields = resolve_job_fields(params.get('fields'))
+
+        # Start position: signed cursor, or a page jump via the page index
+        # (page jumps and totals are only available for the unfiltered list;
+        # the version stamp read for the cache carries the per-month counts)
+        page = int(params['page']) if params.get('page') else None
+        if page is not None and (page < 1 or filtered):
+            raise ValueError("page must be >= 1 and cannot be combined with filters")
+
+        stamp = None if filtered else get_user_version(user_id)
+        position = None
         if params.get('last_key'):
-            try:
-                import base64
-                last_key_json = base64.b64decode(params['last_key']).decode('utf-8')
-                last_key = json.loads(last_key_json)
-            except Exception as e:
-                logger.warning(f"Failed to decode pagination token: {str(e)}")
-                # Continue without pagination token
+            position = decode_cursor(user_id, params['last_key'], scope)
+        elif page:
+            position = get_page_start(user_id, page, limit, stamp)
+
+        last_key = None
+        if position:
+            last_key = make_start_key(user_id, position, filters['status'], filters['company'], filters['tag'])
 
         # Query database
-        result = get_user_jobs(user_id, limit, last_key)
+        if filtered:
+            result = query_user_jobs(user_id, limit, last_key, fields=fields, **filters)
+        else:
+            result = get_user_jobs(user_id, limit, last_key, fields, stamp)
 
         # Prepare response
         response_data = {
-            "jobs": result.get('items', []),
+            "jobs": [strip_internal_keys(item) for item in result.get('items', [])],
             "count": len(result.get('items', []))
         }
 
         # Add pagination token if available
         if 'last_key' in result:
-            import base64
-            last_key_json = json.dumps(result['last_key'])
-            response_data['next_page_token'] = base64.b64encode(last_key_json.encode()).decode('utf-8')
+            response_data['next_page_token'] = encode_cursor(user_id, position_from_key(result['last_key']), scope)
+
+        if stamp is not None:
+            total = page_total(stamp['pages'])
+            response_data['total'] = total
+            response_data['total_pages'] = total_pages(total, limit)
+            if page:
+                response_data['page'] = page
 
         return create_success_response(response_data)
 
@@ -141,6 +401,100 @@ def handle_get_jobs(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
 
 
+def handle_search_jobs(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle GET request for full-text search over the user's jobs
+    Path: /api/jobs/search?q={query}&limit={n}&fields={projection}
+    Matches title, company, tags and notes; every word is a prefix match
+    """
+    try:
+        # Extract user_id from Cognito authorizer context
+        user_id = None
+        request_context = event.get('requestContext', {})
+        authorizer = request_context.get('authorizer', {})
+
+        # Get user_id from Cognito claims
+        if 'claims' in authorizer:
+            user_id = authorizer['claims'].get('sub')
+
+        if not user_id:
+            return create_error_response(401, "Unauthorized - No user ID found", "UNAUTHORIZED")
+
+        params = event.get('queryStringParameters') or {}
+        query = (params.get('q') or '').strip()[:200]
+
+        if not query:
+            return create_error_response(400, "q query parameter is required", "MISSING_QUERY")
+
+        limit = int(params.get('limit', 20))
+        if limit > 50:
+            limit = 50
+        if limit < 1:
+            limit = 20
+
+        fields = resolve_job_fields(params.get('fields'))
+        jobs = [strip_internal_keys(item) for item in search_user_jobs(user_id, query, limit, fields)]
+
+        return create_success_response({
+            "jobs": jobs,
+            "count": len(jobs),
+            "query": query
+        })
+
+    except ValueError as e:
+        logger.error(f"Invalid parameter value: {str(e)}", exc_info=True)
+        return create_error_response(400, "Invalid parameter value", "INVALID_PARAMETER")
+    except Exception as e:
+        logger.error(f"Error searching jobs: {str(e)}", exc_info=True)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
+def handle_get_job(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle GET request for a single job
+    Path: /api/jobs/{job_id}?applied_ts={timestamp}
+    Generates the notes summary on first view if it is still pending
+    """
+    try:
+        # Extract user_id from Cognito authorizer context
+        user_id = None
+        request_context = event.get('requestContext', {})
+        authorizer = request_context.get('authorizer', {})
+
+        # Get user_id from Cognito claims
+        if 'claims' in authorizer:
+            user_id = authorizer['claims'].get('sub')
+
+        if not user_id:
+            return create_error_response(401, "Unauthorized - No user ID found", "UNAUTHORIZED")
+
+        # Extract job_id from path
+        path = event.get('path', '')
+        job_id = path.split('/')[-1]
+
+        if not job_id:
+            return create_error_response(400, "Job ID is required", "MISSING_JOB_ID")
+
+        # Extract applied_ts from query parameters
+        params = event.get('queryStringParameters') or {}
+        applied_ts = params.get('applied_ts')
+
+        if not applied_ts:
+            return create_error_response(400, "applied_ts query parameter is required", "MISSING_APPLIED_TS")
+
+        job = get_job(user_id, job_id, applied_ts)
+        if not job:
+            return create_error_response(404, "Job not found", "JOB_NOT_FOUND")
+
+        job = ensure_job_notes(job)
+
+        return create_success_response({"job": strip_internal_keys(job)})
+
+    except Exception as e:
+        logger.error(f"Error retrieving job: {str(e)}", exc_info=True)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
 def handle_update_job(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handle PUT request to update a job
@@ -185,6 +539,8 @@ def handle_update_job(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             updates['status'] = body['status']
         if 'notes' in body:
             updates['notes'] = body['notes']
+            # User-written notes replace any pending generated summary
+            updates['notes_status'] = 'ready'
         if 'resume_url' in body:
             updates['resume_url'] = body['resume_url']
 
@@ -290,6 +646,114 @@ def handle_get_stats(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
 
 
+def handle_get_funnel(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle GET request for application funnel analytics
+    Path: /api/analytics/funnel
+    Returns stage counts, conversion rates and median days between stages
+    """
+    try:
+        # Extract user_id from Cognito authorizer context
+        user_id = None
+        request_context = event.get('requestContext', {})
+        authorizer = request_context.get('authorizer', {})
+
+        # Get user_id from Cognito claims
+        if 'claims' in authorizer:
+            user_id = authorizer['claims'].get('sub')
+
+        if not user_id:
+            return create_error_response(401, "Unauthorized - No user ID found", "UNAUTHORIZED")
+
+        return create_success_response(get_funnel(user_id))
+
+    except Exception as e:
+        logger.error(f"Error retrieving funnel: {str(e)}", exc_info=True)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
+def handle_get_usage(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle GET request for the user's daily LLM token and cost usage
+    Path: /api/usage?from=YYYY-MM-DD&to=YYYY-MM-DD
+    """
+    try:
+        # Extract user_id from Cognito authorizer context
+        user_id = None
+        request_context = event.get('requestContext', {})
+        authorizer = request_context.get('authorizer', {})
+
+        # Get user_id from Cognito claims
+        if 'claims' in authorizer:
+            user_id = authorizer['claims'].get('sub')
+
+        if not user_id:
+            return create_error_response(401, "Unauthorized - No user ID found", "UNAUTHORIZED")
+
+        params = event.get('queryStringParameters') or {}
+        start_day = params.get('from')
+        end_day = params.get('to')
+        for day in (start_day, end_day):
+            if day:
+                datetime.strptime(day, '%Y-%m-%d')
+
+        days = get_user_usage(user_id, start_day, end_day)
+
+        totals = {}
+        for day in days:
+            for field, value in day.items():
+                if field != 'day':
+                    totals[field] = totals.get(field, 0) + value
+
+        return create_success_response({
+            "days": days,
+            "totals": totals,
+            "cost_usd": round(totals.get('cost_micros', 0) / 1e6, 6)
+        })
+
+    except ValueError as e:
+        logger.error(f"Invalid parameter value: {str(e)}", exc_info=True)
+        return create_error_response(400, "Invalid date, expected YYYY-MM-DD", "INVALID_PARAMETER")
+    except Exception as e:
+        logger.error(f"Error retrieving usage: {str(e)}", exc_info=True)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
+def handle_pending_notes_task(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle scheduled background pass over jobs with pending notes
+    Event: { "task": "process_pending_notes", "user_id": "...", "limit": 25 }
+    """
+    try:
+        result = process_pending_notes(event.get('user_id'), int(event.get('limit', 25)))
+        return create_success_response(result)
+    except Exception as e:
+        logger.error(f"Error processing pending notes: {str(e)}", exc_info=True)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
+def handle_warmup(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle warmup pings (scheduled or before shifting traffic)
+    Event: { "task": "warmup" }; primes the container on its first ping
+    """
+    timings = {} if warmup.primed else warmup.prime()
+    return create_success_response({"warmed": True, "primed": bool(timings), "timings": timings})
+
+
+def handle_enrich_job_task(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle async enrichment dispatched by process_job (INGEST_MODE=async)
+    Event: { "task": "enrich_job", "user_id": "...", "job_id": "...", "applied_ts": "...", "url": "..." }
+    """
+    try:
+        result = enrich_job(event['user_id'], event['job_id'], event['applied_ts'], event['url'])
+        return create_success_response({"status": result.get("status"), "job_id": event['job_id']})
+    except Exception as e:
+        logger.error(f"Error in async enrichment: {str(e)}", exc_info=True)
+        return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
 def handle_cors_preflight(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handle CORS preflight OPTIONS requests
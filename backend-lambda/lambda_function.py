@@ -5,21 +5,46 @@ Entry point for all API requests
 
 import logging
 from typing import Dict, Any
-from handlers import handle_job_ingest, handle_get_jobs, handle_update_job, handle_delete_job, handle_get_stats, handle_cors_preflight
+from handlers import (
+    handle_job_ingest, handle_retry_enrichment, handle_export_jobs, handle_import_jobs, handle_get_jobs, handle_search_jobs, handle_get_job, handle_update_job,
+    handle_delete_job, handle_get_stats, handle_get_usage, handle_get_funnel, handle_pending_notes_task, handle_enrich_job_task,
+    handle_cors_preflight, handle_warmup
+)
 from router import get_route_handler, handle_not_found
 from utils import create_error_response
+from warmup import init_priming
+from profiling import profile_reason, profile_invocation
+from capacity import capacity_scope
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Prime clients at init, or register SnapStart hooks (see warmup.py)
+init_priming()
+
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     AWS Lambda handler for job ingest API
-    Entry point for all API requests
+    Entry point for all API requests; profiles the invocation when asked
+    (see profiling.py)
+    """
+    reason = profile_reason(event)
+    if reason:
+        return profile_invocation(dispatch, event, context, reason, get_route_handler(event))
+    return dispatch(event, context)
+
+
+def dispatch(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Route an event to its handler
     """
     try:
+        # Warmup pings skip logging and routing
+        if event.get('task') == 'warmup':
+            return handle_warmup(event, context)
+
         # Debug logging
         logger.info(f"Received event: {event}")
         logger.info(f"HTTP Method: {event.get('httpMethod')}")
@@ -29,22 +54,49 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         handler_name = get_route_handler(event)
         logger.info(f"Selected handler: {handler_name}")
 
-        # Route to appropriate handler
-        if handler_name == 'job_ingest':
-            return handle_job_ingest(event, context)
-        elif handler_name == 'get_jobs':
-            return handle_get_jobs(event, context)
-        elif handler_name == 'get_stats':
-            return handle_get_stats(event, context)
-        elif handler_name == 'update_job':
-            return handle_update_job(event, context)
-        elif handler_name == 'delete_job':
-            return handle_delete_job(event, context)
-        elif handler_name == 'cors_preflight':
-            return handle_cors_preflight(event, context)
-        else:  # not_found
-            return handle_not_found(event, context)
+        # Meter DynamoDB I/O per route and user (see capacity.py)
+        claims = ((event.get('requestContext') or {}).get('authorizer') or {}).get('claims') or {}
+        with capacity_scope(handler_name, claims.get('sub') or event.get('user_id')):
+            return call_handler(handler_name, event, context)
 
     except Exception as e:
         logger.error(f"Unexpected error in lambda_handler: {str(e)}", exc_info=True)
         return create_error_response(500, "Internal server error", "INTERNAL_ERROR")
+
+
+def call_handler(handler_name: str, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Call the handler for a route name
+    """
+    if handler_name == 'job_ingest':
+        return handle_job_ingest(event, context)
+    elif handler_name == 'retry_enrichment':
+        return handle_retry_enrichment(event, context)
+    elif handler_name == 'import_jobs':
+        return handle_import_jobs(event, context)
+    elif handler_name == 'export_jobs':
+        return handle_export_jobs(event, context)
+    elif handler_name == 'get_jobs':
+        return handle_get_jobs(event, context)
+    elif handler_name == 'search_jobs':
+        return handle_search_jobs(event, context)
+    elif handler_name == 'get_job':
+        return handle_get_job(event, context)
+    elif handler_name == 'get_stats':
+        return handle_get_stats(event, context)
+    elif handler_name == 'get_usage':
+        return handle_get_usage(event, context)
+    elif handler_name == 'get_funnel':
+        return handle_get_funnel(event, context)
+    elif handler_name == 'update_job':
+        return handle_update_job(event, context)
+    elif handler_name == 'delete_job':
+        return handle_delete_job(event, context)
+    elif handler_name == 'pending_notes':
+        return handle_pending_notes_task(event, context)
+    elif handler_name == 'enrich_job':
+        return handle_enrich_job_task(event, context)
+    elif handler_name == 'cors_preflight':
+        return handle_cors_preflight(event, context)
+    else:  # not_found
+        return handle_not_found(event, context)
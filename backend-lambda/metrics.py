@@ -0,0 +1,122 @@
+"""
+Lightweight metrics for the JobTrackr Lambda API
+Emits CloudWatch Embedded Metric Format (EMF) log lines and keeps
+in-process counters that can be inspected locally
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'JobTrackr')
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+# In-process totals, keyed by (metric name, sorted dimension items)
+_counters: Dict[tuple, float] = {}
+
+
+def emit_metric(
+    name: str,
+    value: float = 1,
+    unit: str = 'Count',
+    dimensions: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Record a metric value
+
+    Args:
+        name: Metric name
+        value: Metric value (default: 1)
+        unit: CloudWatch unit (Count, Milliseconds, Bytes, ...)
+        dimensions: Optional metric dimensions
+    """
+    dimensions = dimensions or {}
+    key = (name, tuple(sorted(dimensions.items())))
+    _counters[key] = _counters.get(key, 0) + value
+
+    if not METRICS_ENABLED:
+        return
+
+    # EMF payload picked up by CloudWatch Logs from Lambda stdout
+    payload: Dict[str, Any] = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [list(dimensions.keys())],
+                'Metrics': [{'Name': name, 'Unit': unit}]
+            }]
+        },
+        name: value,
+        **dimensions
+    }
+    print(json.dumps(payload))
+
+
+def emit_metrics(
+    values: Dict[str, Tuple[float, str]],
+    dimensions: Optional[Dict[str, str]] = None,
+    properties: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Record several metrics sharing one dimension set in a single EMF line
+
+    Args:
+        values: Metric name -> (value, CloudWatch unit)
+        dimensions: Optional metric dimensions
+        properties: Extra fields logged with the metrics but not used as
+            dimensions (searchable in Logs Insights, e.g. a user id)
+    """
+    dimensions = dimensions or {}
+    for name, (value, _) in values.items():
+        key = (name, tuple(sorted(dimensions.items())))
+        _counters[key] = _counters.get(key, 0) + value
+
+    if not METRICS_ENABLED or not values:
+        return
+
+    payload: Dict[str, Any] = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [list(dimensions.keys())],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in values.items()]
+            }]
+        },
+        **{name: value for name, (value, _) in values.items()},
+        **dimensions,
+        **(properties or {})
+    }
+    print(json.dumps(payload))
+
+
+def get_metric(name: str, dimensions: Optional[Dict[str, str]] = None) -> float:
+    """
+    Return the in-process total for a metric and dimension set
+    """
+    key = (name, tuple(sorted((dimensions or {}).items())))
+    return _counters.get(key, 0)
+
+
+def get_metrics() -> Dict[str, float]:
+    """
+    Return all in-process totals as 'name|dim=value,...' -> total
+    """
+    result = {}
+    for (name, dims), total in _counters.items():
+        label = ','.join(f"{k}={v}" for k, v in dims)
+        result[f"{name}|{label}" if label else name] = total
+    return result
+
+
+def reset_metrics() -> None:
+    """
+    Clear in-process totals
+    """
+    _counters.clear()
@@ -0,0 +1,207 @@
+"""
+Pagination helpers for JobTrackr list endpoints
+Pure functions; the page index item is persisted by db.py
+
+Cursors carry only the position of the last returned job
+("{applied_ts}#{job_id}") and are HMAC-signed together with the user and
+the filter scope, so clients cannot see the table's key layout or reuse
+a cursor for another user or query. db.py rebuilds the index-specific
+ExclusiveStartKey from the position.
+
+The page index gives totals and page jumps without reading the jobs:
+the user's VERSION item keeps a job count per month of applied_ts, and
+each month's positions live in PAGE_SHARDS string-set items keyed by the
+first character of the job id, so a write adds or deletes one set
+member instead of rewriting a list, and no item grows past the month's
+share. A page jump reads only the shards of the month it lands in.
+"""
+
+import os
+import hmac
+import base64
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PAGINATION_SECRET = os.getenv('PAGINATION_SECRET', '')
+CURSOR_SIG_BYTES = 12
+
+# Job ids are hex digests, so shards split a month 16 ways; at ~50 bytes
+# per position a month holds well over 100k jobs before any shard nears
+# DynamoDB's 400 KB item limit
+PAGE_SHARDS = '0123456789abcdef'
+PAGE_COUNT_PREFIX = 'p'
+
+MIN_SECRET_LENGTH = 32  # as enforced by the PaginationSecret template parameter
+
+
+def require_secret() -> None:
+    """
+    Fail at startup, not on the first multi-page list, when cursors cannot
+    be signed. Called when the API handlers load (Lambda and asgi.py)
+
+    Raises:
+        RuntimeError: If PAGINATION_SECRET is unset or too short
+    """
+    if len(PAGINATION_SECRET) < MIN_SECRET_LENGTH:
+        raise RuntimeError(
+            f"PAGINATION_SECRET must be set to at least {MIN_SECRET_LENGTH} characters to sign pagination cursors"
+        )
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(user_id: str, scope: str, position: str) -> bytes:
+    # Refuse rather than fall back to a guessable key
+    if not PAGINATION_SECRET:
+        raise RuntimeError("PAGINATION_SECRET is not set")
+    message = f'{user_id}\n{scope}\n{position}'.encode('utf-8')
+    return hmac.new(PAGINATION_SECRET.encode('utf-8'), message, hashlib.sha256).digest()[:CURSOR_SIG_BYTES]
+
+
+def make_scope(**filters: Any) -> str:
+    """
+    Canonical string for the filters a cursor is valid for
+    """
+    return '&'.join(f'{name}={value}' for name, value in sorted(filters.items()) if value)
+
+
+def encode_cursor(user_id: str, position: str, scope: str = '') -> str:
+    """
+    Encode a job position as an opaque signed cursor
+
+    Args:
+        user_id: User the cursor is issued to
+        position: "{applied_ts}#{job_id}" of the last returned job
+        scope: Filter scope from make_scope()
+
+    Returns:
+        URL-safe cursor string
+
+    Raises:
+        RuntimeError: If PAGINATION_SECRET is not set
+    """
+    return f'{_b64encode(position.encode("utf-8"))}.{_b64encode(_sign(user_id, scope, position))}'
+
+
+def decode_cursor(user_id: str, cursor: str, scope: str = '') -> str:
+    """
+    Verify a cursor and return its job position
+
+    Raises:
+        ValueError: If the cursor is malformed, tampered with, or was
+            issued for another user or filter scope
+        RuntimeError: If PAGINATION_SECRET is not set
+    """
+    try:
+        payload, _, signature = cursor.partition('.')
+        position = _b64decode(payload).decode('utf-8')
+        valid = hmac.compare_digest(_b64decode(signature), _sign(user_id, scope, position))
+    except (ValueError, UnicodeDecodeError):
+        valid = False
+    if not valid or '#' not in position:
+        raise ValueError("Invalid pagination token")
+    return position
+
+
+def position_from_key(key: dict) -> str:
+    """
+    Extract "{applied_ts}#{job_id}" from a LastEvaluatedKey
+    Every job sort key (JOB#, TAG#..., GSI1/GSI2) ends with applied_ts#job_id
+    """
+    return '#'.join(key['SK'].split('#')[-2:])
+
+
+def page_month(position: str) -> str:
+    """
+    Month ("YYYY-MM") a position is counted under
+    """
+    return position[:7]
+
+
+def page_shard(position: str) -> str:
+    """
+    Shard of a position: its month and the first character of the job id
+    """
+    return f"{page_month(position)}#{position.rpartition('#')[2][:1]}"
+
+
+def page_counts(item: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Per-month job counts stored on a VERSION item ("pYYYY-MM" attributes)
+    """
+    return {
+        name[len(PAGE_COUNT_PREFIX):]: int(value) for name, value in item.items()
+        if name.startswith(PAGE_COUNT_PREFIX) and name[len(PAGE_COUNT_PREFIX):][:4].isdigit()
+    }
+
+
+def page_total(counts: Dict[str, int]) -> int:
+    """
+    Total job count from the per-month counts
+    """
+    return sum(count for count in counts.values() if count > 0)
+
+
+def group_positions(positions: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Split positions into their shards
+    """
+    shards: Dict[str, List[str]] = {}
+    for position in positions:
+        shards.setdefault(page_shard(position), []).append(position)
+    return shards
+
+
+def locate_page(counts: Dict[str, int], page: int, limit: int) -> Optional[Tuple[str, int]]:
+    """
+    Find the job a 1-based page of a newest-first listing starts after
+
+    Args:
+        counts: Job count per month
+        page: Page number
+        limit: Page size
+
+    Returns:
+        (month, index of the job within the month counting from its
+        newest), or None for page 1 or no jobs. Pages past the end start
+        after the oldest job and come back empty
+    """
+    total = page_total(counts)
+    if page <= 1 or not total:
+        return None
+    index = min((page - 1) * limit, total) - 1
+    for month in sorted(counts, reverse=True):
+        if counts[month] <= 0:
+            continue
+        if index < counts[month]:
+            return month, index
+        index -= counts[month]
+    return None
+
+
+def position_in_month(positions: Iterable[str], index: int) -> Optional[str]:
+    """
+    The index-th newest of a month's positions (clamped to the oldest,
+    in case the count ran ahead of the shards)
+    """
+    ordered = sorted(positions)
+    if not ordered:
+        return None
+    return ordered[max(len(ordered) - 1 - index, 0)]
+
+
+def total_pages(total: int, limit: int) -> int:
+    """
+    Number of pages for a total count (at least 1)
+    """
+    return max((total + limit - 1) // limit, 1)
@@ -2,88 +2,411 @@
 Main job processing orchestrator
 """
 
+import os
+import json
+import time
+import uuid
+import asyncio
 import logging
-from datetime import datetime, timezone
-from typing import Dict, Any, Optional
-from scraper import scrape_with_firecrawl, extract_job_content
-from analyzer import analyze_with_bedrock
-from db import create_job_item, put_job
+import hashlib
+import threading
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+from urllib.parse import urlparse
+import boto3
+from botocore.exceptions import ClientError
+from scraper import scrape_with_firecrawl, scrape_with_firecrawl_async, extract_job_content
+from analyzer import analyze_with_bedrock, analyze_with_bedrock_async, generate_notes, is_valid_analysis, analysis_version
+from db import (
+    create_job_item, put_job, get_job, update_job, update_job_enrichment,
+    put_notes_source, get_notes_source, delete_notes_source, get_pending_notes_sources, record_llm_usage,
+    single_flight, get_flight, claim_flight, complete_flight, release_flight, flight_result,
+    FLIGHT_WAIT_SECONDS, FLIGHT_POLL_SECONDS
+)
+from metrics import emit_metric
+from archive import archive_posting, get_archived_posting
+from usage import summarize_usage
+from utils import canonicalize_url
 
 logger = logging.getLogger(__name__)
 
+# 'eager' generates the notes summary during ingest, 'deferred' extracts
+# only the structured fields and generates notes on first view or in a
+# background pass
+NOTES_MODE = os.getenv('NOTES_MODE', 'eager')
 
-def process_job(url: str, user_id: str, resume_url: Optional[str] = None) -> Dict[str, Any]:
+# 'sync' enriches the captured item before responding, 'async' responds
+# right after the placeholder write and enriches in a separate invocation
+INGEST_MODE = os.getenv('INGEST_MODE', 'sync')
+
+# 'sync' runs the pipeline with blocking clients, 'async' runs
+# process_job_async / enrich_job_async to overlap independent I/O
+INGEST_PIPELINE = os.getenv('INGEST_PIPELINE', 'sync')
+
+lambda_client = boto3.client('lambda', region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-2')) if INGEST_MODE == 'async' else None
+
+# Per-thread event loops for the sync wrappers (see run_async)
+thread_state = threading.local()
+
+
+def process_job(
+    url: str,
+    user_id: str,
+    resume_url: Optional[str] = None,
+    title: Optional[str] = None,
+    context: Any = None
+) -> Dict[str, Any]:
     """
     Process job URL with web scraping, analysis, and DynamoDB storage
+    A placeholder item is stored first and enriched in place stage by stage
 
     Args:
         url: Job posting URL
         user_id: User identifier
         resume_url: Optional S3 URL of resume
+        title: Optional page title sent by the client for the placeholder
+        context: Lambda context (used to dispatch async enrichment)
 
     Returns:
         Processing result with job_id if successful
     """
+    if INGEST_PIPELINE == 'async':
+        return run_async(process_job_async(url, user_id, resume_url, title, context))
+
     try:
         logger.info(f"Starting processing for URL: {url}, user: {user_id}")
 
-        # Step 1: Web scraping with Firecrawl
-        scraped_data = scrape_with_firecrawl(url)
-        if not scraped_data:
+        # Step 1: Store a minimal "Captured" item so the URL is never lost
+        job_item = create_job_item(
+            user_id=user_id,
+            job_url=url,
+            analyzed_data={'title': title} if title else {},
+            resume_url=resume_url,
+            status="Captured",
+            enrichment_status="captured"
+        )
+        if not put_job(job_item):
             return {
                 "status": "failed",
-                "error": "Failed to scrape content",
-                "step": "scraping"
+                "error": "Failed to store job in database",
+                "step": "storage"
             }
 
-        # Step 2: Extract job content
-        job_content = extract_job_content(scraped_data)
-        if not job_content:
+        job_id = job_item["job_id"]
+        applied_ts = job_item["applied_ts"]
+
+        # Step 2: Enrich in the background or inline
+        if INGEST_MODE == 'async' and dispatch_enrichment(user_id, job_id, applied_ts, url, context):
             return {
-                "status": "failed",
-                "error": "Failed to extract job content",
-                "step": "extraction"
+                "status": "captured",
+                "job_id": job_id,
+                "applied_ts": applied_ts
             }
 
+        return enrich_job(user_id, job_id, applied_ts, url)
+
+    except Exception as e:
+        logger.error(f"Error in processing: {str(e)}", exc_info=True)
+        return {
+            "status": "failed",
+            "error": str(e),
+            "step": "processing"
+        }
+
+
+def enrich_job(user_id: str, job_id: str, applied_ts: str, url: str) -> Dict[str, Any]:
+    """
+    Scrape and analyze a captured job, applying each stage with a
+    conditional update so concurrent or stale runs cannot clobber it
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp of the job
+        url: Job posting URL
+
+    Returns:
+        Processing result with job_id; status is 'completed' or 'failed'
+    """
+    if INGEST_PIPELINE == 'async':
+        return run_async(enrich_job_async(user_id, job_id, applied_ts, url))
+
+    base_result = {"job_id": job_id, "applied_ts": applied_ts}
+    # Stage this run last wrote; failures only overwrite that stage, so a
+    # job another run moved on (or this run completed) is left alone
+    stage = 'captured'
+
+    def fail(step: str, error: str) -> Dict[str, Any]:
+        if stage:
+            update_job_enrichment(user_id, job_id, applied_ts, 'failed', {'enrichment_error': step}, expected_status=stage)
+        return {**base_result, "status": "failed", "error": error, "step": step}
+
+    try:
+        # Steps 1-2: Scrape with Firecrawl and extract the job content,
+        # once across concurrent ingests of the same posting
+        job_content = single_flight('scrape', canonicalize_url(url), lambda: scrape_job(url))
+        if not job_content:
+            return fail("scraping", "Failed to scrape content")
+
+        scraped_fields = {'title': job_content["title"]} if job_content.get("title") else {}
+        # Keep the posting text so later passes need not scrape it again
+        digest = archive_posting(job_content)
+        if digest:
+            scraped_fields['content_hash'] = digest
+        if not update_job_enrichment(user_id, job_id, applied_ts, 'scraped', scraped_fields, expected_status='captured'):
+            return {**base_result, "status": "failed", "error": "Job is not awaiting enrichment", "step": "scraping"}
+        stage = 'scraped'
+
         # Step 3: Analyze content with Bedrock
-        analyzed_data = analyze_with_bedrock(job_content)
+        defer_notes = NOTES_MODE == 'deferred'
+        usage_records: List[Dict[str, Any]] = []
+        analyzed_data = analyze_job_content(job_content, include_notes=not defer_notes, usage=usage_records)
+
+        # Tokens are billed even when the analysis is unusable
+        usage_summary = summarize_usage(usage_records)
+        if usage_summary:
+            record_llm_usage(user_id, get_url_domain(url), usage_summary)
+
         if not analyzed_data:
-            return {
-                "status": "failed",
-                "error": "Failed to analyze content",
-                "step": "analysis"
-            }
+            return fail("analysis", "Failed to analyze content")
+
+        # Step 4: Apply analysis to the stored item
+        analysis_fields = build_analysis_fields(analyzed_data, defer_notes, usage_summary)
+
+        if not update_job_enrichment(user_id, job_id, applied_ts, 'analyzed', analysis_fields, expected_status='scraped'):
+            return {**base_result, "status": "failed", "error": "Failed to store analysis", "step": "storage"}
+        stage = None
+
+        # Promote to Applied unless the user already moved it on
+        update_job(user_id, job_id, applied_ts, {'status': 'Applied'}, conditions={'status': 'Captured'})
+
+        # Keep the posting text around for the deferred summary
+        if defer_notes:
+            put_notes_source(user_id, job_id, applied_ts, job_content["content"])
+
+        logger.info(f"Job processing completed for: {url}, job_id: {job_id}")
+        return completed_result(base_result, analysis_fields)
+
+    except Exception as e:
+        logger.error(f"Error enriching job {job_id}: {str(e)}", exc_info=True)
+        return fail("processing", str(e))
+
+
+def build_analysis_fields(
+    analyzed_data: Dict[str, Any],
+    defer_notes: bool,
+    usage_summary: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Fields written to the job item once analysis succeeds
+    """
+    analysis_fields = {
+        field: analyzed_data.get(field)
+        for field in ['company', 'title', 'location', 'salary_range', 'employment_type', 'source', 'tags', 'notes']
+        if analyzed_data.get(field)
+    }
+    analysis_fields['analysis_version'] = analysis_version()
+    if defer_notes:
+        analysis_fields['notes_status'] = 'pending'
+    if usage_summary:
+        analysis_fields['llm_usage'] = usage_summary
+    return analysis_fields
+
+
+def completed_result(base_result: Dict[str, Any], analysis_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Processing result for a fully enriched job
+    """
+    return {
+        **base_result,
+        "status": "completed",
+        "company": analysis_fields.get("company", "Unknown"),
+        "title": analysis_fields.get("title", "Unknown"),
+        "location": analysis_fields.get("location", "Unknown")
+    }
+
+
+def scrape_job(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Scrape a posting and extract its job content
+    """
+    scraped_data = scrape_with_firecrawl(url)
+    if not scraped_data:
+        return None
+    return extract_job_content(scraped_data)
+
+
+def analyze_job_content(
+    job_content: Dict[str, Any],
+    include_notes: bool,
+    usage: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Analyze job content once across concurrent ingests of identical content
+    Only the leader's LLM calls are appended to `usage`; followers reuse its
+    result at no token cost. Fallback analyses are not shared
+    """
+    return single_flight(
+        'analysis',
+        analysis_flight_key(job_content, include_notes),
+        lambda: analyze_with_bedrock(job_content, include_notes=include_notes, usage=usage),
+        shareable=is_shareable_analysis
+    )
+
+
+def analysis_flight_key(job_content: Dict[str, Any], include_notes: bool) -> str:
+    """
+    Single-flight key of an analysis: prompt variant and content hash
+    """
+    content_hash = hashlib.sha256(job_content.get("content", "").encode('utf-8')).hexdigest()
+    return f"{'notes' if include_notes else 'fields'}#{content_hash}"
+
+
+def is_shareable_analysis(result: Optional[Dict[str, Any]]) -> bool:
+    return bool(result) and is_valid_analysis(result)
+
+
+def run_async(coro: Any) -> Any:
+    """
+    Run a coroutine to completion from synchronous code (the Lambda entry
+    point) on this thread's event loop. The loop is kept across warm
+    invocations so the async clients' pooled connections are reused
+    """
+    loop = getattr(thread_state, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        thread_state.loop = loop
+    return loop.run_until_complete(coro)
+
+
+async def single_flight_async(
+    kind: str,
+    key: str,
+    work: Callable[[], Awaitable[Any]],
+    shareable: Callable[[Any], bool] = lambda result: result is not None
+) -> Any:
+    """
+    single_flight() for a coroutine function. Each lease call (a single
+    DynamoDB request) runs in a worker thread; the polling and the work
+    itself stay on the caller's loop, so a follower never holds a thread
+    """
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + FLIGHT_WAIT_SECONDS
+    record = await asyncio.to_thread(get_flight, kind, key)
+    while True:
+        if record and record.get('state') == 'completed':
+            emit_metric('SingleFlight', dimensions={'Kind': kind, 'Outcome': 'follower'})
+            return flight_result(record)
+        if (not record or int(record.get('lease_until', 0)) <= int(time.time())) \
+                and await asyncio.to_thread(claim_flight, kind, key, owner):
+            break
+        if time.monotonic() >= deadline:
+            emit_metric('SingleFlight', dimensions={'Kind': kind, 'Outcome': 'timeout'})
+            return await work()
+        await asyncio.sleep(FLIGHT_POLL_SECONDS)
+        record = await asyncio.to_thread(get_flight, kind, key)
+
+    emit_metric('SingleFlight', dimensions={'Kind': kind, 'Outcome': 'leader'})
+    try:
+        result = await work()
+    except Exception:
+        await asyncio.to_thread(release_flight, kind, key, owner)
+        raise
+    if shareable(result):
+        await asyncio.to_thread(complete_flight, kind, key, owner, result)
+    else:
+        await asyncio.to_thread(release_flight, kind, key, owner)
+    return result
+
+
+async def scrape_job_async(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Async scrape + extract, once across concurrent ingests of the same posting
+    """
+    async def work() -> Optional[Dict[str, Any]]:
+        scraped_data = await scrape_with_firecrawl_async(url)
+        return extract_job_content(scraped_data) if scraped_data else None
+
+    return await single_flight_async('scrape', canonicalize_url(url), work)
+
+
+async def analyze_job_content_async(
+    job_content: Dict[str, Any],
+    include_notes: bool,
+    usage: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Async analyze_job_content()
+    """
+    return await single_flight_async(
+        'analysis',
+        analysis_flight_key(job_content, include_notes),
+        lambda: analyze_with_bedrock_async(job_content, include_notes=include_notes, usage=usage),
+        shareable=is_shareable_analysis
+    )
+
+
+async def process_job_async(
+    url: str,
+    user_id: str,
+    resume_url: Optional[str] = None,
+    title: Optional[str] = None,
+    context: Any = None
+) -> Dict[str, Any]:
+    """
+    Async process_job(): same stages and result, but the scrape starts
+    alongside the placeholder write (one transaction with its derived items).
+    DynamoDB calls run in worker threads since boto3 has no async client
+
+    Args:
+        url: Job posting URL
+        user_id: User identifier
+        resume_url: Optional S3 URL of resume
+        title: Optional page title sent by the client for the placeholder
+        context: Lambda context (used to dispatch async enrichment)
+
+    Returns:
+        Processing result with job_id if successful
+    """
+    scrape = None
+    try:
+        logger.info(f"Starting async processing for URL: {url}, user: {user_id}")
 
-        # Step 4: Create DynamoDB item
         job_item = create_job_item(
             user_id=user_id,
             job_url=url,
-            analyzed_data=analyzed_data,
+            analyzed_data={'title': title} if title else {},
             resume_url=resume_url,
-            status="Applied"
+            status="Captured",
+            enrichment_status="captured"
         )
+        # Enrichment dispatched to another invocation scrapes there instead
+        if INGEST_MODE != 'async':
+            scrape = asyncio.create_task(scrape_job_async(url))
 
-        # Step 5: Store in DynamoDB
-        success = put_job(job_item)
-        if not success:
+        if not await asyncio.to_thread(put_job, job_item):
+            if scrape:
+                scrape.cancel()
             return {
                 "status": "failed",
                 "error": "Failed to store job in database",
                 "step": "storage"
             }
 
-        result = {
-            "status": "completed",
-            "job_id": job_item["job_id"],
-            "company": job_item["company"],
-            "title": job_item["title"],
-            "location": job_item["location"]
-        }
+        job_id = job_item["job_id"]
+        applied_ts = job_item["applied_ts"]
+
+        if INGEST_MODE == 'async' and await asyncio.to_thread(dispatch_enrichment, user_id, job_id, applied_ts, url, context):
+            return {
+                "status": "captured",
+                "job_id": job_id,
+                "applied_ts": applied_ts
+            }
 
-        logger.info(f"Job processing completed for: {url}, job_id: {job_item['job_id']}")
-        return result
+        return await enrich_job_async(user_id, job_id, applied_ts, url, scrape)
 
     except Exception as e:
+        if scrape:
+            scrape.cancel()
         logger.error(f"Error in processing: {str(e)}", exc_info=True)
         return {
             "status": "failed",
@@ -92,3 +415,239 @@ def process_job(url: str, user_id: str, resume_url: Optional[str] = None) -> Dic
         }
 
 
+async def enrich_job_async(
+    user_id: str,
+    job_id: str,
+    applied_ts: str,
+    url: str,
+    scrape: Optional['asyncio.Task'] = None
+) -> Dict[str, Any]:
+    """
+    Async enrich_job(): the 'scraped' update runs alongside the LLM call,
+    and the usage roll-up, status promotion and notes source writes run
+    alongside each other. Stage updates stay conditional, so the result is
+    discarded if the job left 'captured' meanwhile
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp of the job
+        url: Job posting URL
+        scrape: Scrape task already started by process_job_async
+
+    Returns:
+        Processing result with job_id; status is 'completed' or 'failed'
+    """
+    base_result = {"job_id": job_id, "applied_ts": applied_ts}
+    # As in enrich_job, failures only overwrite the stage this run last wrote
+    stage = 'captured'
+
+    async def fail(step: str, error: str, fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if stage:
+            await asyncio.to_thread(update_job_enrichment, user_id, job_id, applied_ts, 'failed',
+                                    {**(fields or {}), 'enrichment_error': step}, expected_status=stage)
+        return {**base_result, "status": "failed", "error": error, "step": step}
+
+    try:
+        job_content = await (scrape or scrape_job_async(url))
+        if not job_content:
+            return await fail("scraping", "Failed to scrape content")
+
+        scraped_fields = {'title': job_content["title"]} if job_content.get("title") else {}
+        defer_notes = NOTES_MODE == 'deferred'
+        usage_records: List[Dict[str, Any]] = []
+        # The posting is archived alongside the LLM call; its hash is
+        # recorded with the analysis (or the failure)
+        scraped, analyzed_data, digest = await asyncio.gather(
+            asyncio.to_thread(update_job_enrichment, user_id, job_id, applied_ts, 'scraped', scraped_fields,
+                              expected_status='captured'),
+            analyze_job_content_async(job_content, not defer_notes, usage_records),
+            asyncio.to_thread(archive_posting, job_content)
+        )
+        archive_fields = {'content_hash': digest} if digest else {}
+        if scraped:
+            stage = 'scraped'
+
+        # Tokens are billed even when the analysis is unusable
+        usage_summary = summarize_usage(usage_records)
+        record_usage = asyncio.to_thread(record_llm_usage, user_id, get_url_domain(url), usage_summary) if usage_summary else None
+
+        if not scraped or not analyzed_data:
+            if record_usage:
+                await record_usage
+            if not scraped:
+                return {**base_result, "status": "failed", "error": "Job is not awaiting enrichment", "step": "scraping"}
+            return await fail("analysis", "Failed to analyze content", archive_fields)
+
+        analysis_fields = {**build_analysis_fields(analyzed_data, defer_notes, usage_summary), **archive_fields}
+        stored, *_ = await asyncio.gather(
+            asyncio.to_thread(update_job_enrichment, user_id, job_id, applied_ts, 'analyzed', analysis_fields,
+                              expected_status='scraped'),
+            *([record_usage] if record_usage else [])
+        )
+        if not stored:
+            return {**base_result, "status": "failed", "error": "Failed to store analysis", "step": "storage"}
+        stage = None
+
+        follow_ups = [asyncio.to_thread(update_job, user_id, job_id, applied_ts, {'status': 'Applied'}, conditions={'status': 'Captured'})]
+        if defer_notes:
+            follow_ups.append(asyncio.to_thread(put_notes_source, user_id, job_id, applied_ts, job_content["content"]))
+        await asyncio.gather(*follow_ups)
+
+        logger.info(f"Job processing completed for: {url}, job_id: {job_id}")
+        return completed_result(base_result, analysis_fields)
+
+    except Exception as e:
+        logger.error(f"Error enriching job {job_id}: {str(e)}", exc_info=True)
+        return await fail("processing", str(e))
+
+
+def retry_enrichment(user_id: str, job_id: str, applied_ts: str) -> Dict[str, Any]:
+    """
+    Re-run enrichment for a job whose earlier enrichment failed
+
+    Returns:
+        Processing result; status 'not_found' or 'conflict' if the job
+        does not exist or is not in the failed state
+    """
+    job = get_job(user_id, job_id, applied_ts)
+    if not job:
+        return {"status": "not_found", "job_id": job_id}
+
+    # Reset failed -> captured; only one concurrent retry can win this
+    if not update_job_enrichment(user_id, job_id, applied_ts, 'captured', expected_status='failed'):
+        return {"status": "conflict", "job_id": job_id, "enrichment_status": job.get('enrichment_status')}
+
+    return enrich_job(user_id, job_id, applied_ts, job['job_url'])
+
+
+def dispatch_enrichment(user_id: str, job_id: str, applied_ts: str, url: str, context: Any) -> bool:
+    """
+    Asynchronously invoke this function to enrich a captured job
+
+    Returns:
+        True if the async invocation was accepted
+    """
+    function_name = getattr(context, 'function_name', None) or os.getenv('AWS_LAMBDA_FUNCTION_NAME')
+    if not function_name:
+        logger.warning("No function name available, enriching inline")
+        return False
+
+    try:
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps({
+                'task': 'enrich_job',
+                'user_id': user_id,
+                'job_id': job_id,
+                'applied_ts': applied_ts,
+                'url': url
+            }).encode('utf-8')
+        )
+        logger.info(f"Dispatched async enrichment for job {job_id}")
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to dispatch enrichment: {str(e)}", exc_info=True)
+        return False
+
+
+def generate_job_notes(user_id: str, job_id: str, applied_ts: str) -> Optional[str]:
+    """
+    Generate the deferred notes summary for a job and write it back
+
+    Args:
+        user_id: User identifier
+        job_id: Job identifier
+        applied_ts: ISO timestamp of the job
+
+    Returns:
+        Generated notes, or None if nothing was generated
+    """
+    try:
+        content = get_notes_source(user_id, job_id)
+        if not content:
+            # Fall back to the archived posting (e.g. the source item was lost)
+            job = get_job(user_id, job_id, applied_ts)
+            archived = get_archived_posting(job.get('content_hash')) if job else None
+            content = archived['content'] if archived else None
+        if not content:
+            logger.warning(f"No notes source stored for job {job_id}")
+            return None
+
+        usage_records: List[Dict[str, Any]] = []
+        notes = generate_notes(content, usage_records)
+
+        usage_summary = summarize_usage(usage_records)
+        if usage_summary:
+            job = get_job(user_id, job_id, applied_ts)
+            record_llm_usage(user_id, get_url_domain(job.get('job_url', '')) if job else None, usage_summary)
+
+        if not notes:
+            return None
+
+        # Only write if notes are still pending (user edits take precedence)
+        written = update_job(
+            user_id, job_id, applied_ts,
+            {'notes': notes, 'notes_status': 'ready'},
+            conditions={'notes_status': 'pending'}
+        )
+        if not written:
+            # Drop the source once the job no longer needs it
+            job = get_job(user_id, job_id, applied_ts)
+            if not job or job.get('notes_status') != 'pending':
+                delete_notes_source(user_id, job_id)
+            return None
+
+        delete_notes_source(user_id, job_id)
+
+        logger.info(f"Generated deferred notes for job {job_id}")
+        return notes
+
+    except Exception as e:
+        logger.error(f"Error generating notes for job {job_id}: {str(e)}", exc_info=True)
+        return None
+
+
+def ensure_job_notes(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lazily fill in pending notes on a job item (used on detail view)
+    """
+    if job.get('notes_status') != 'pending':
+        return job
+
+    notes = generate_job_notes(job['user_id'], job['job_id'], job['applied_ts'])
+    if notes:
+        return {**job, 'notes': notes, 'notes_status': 'ready'}
+    return job
+
+
+def process_pending_notes(user_id: Optional[str] = None, limit: int = 25) -> Dict[str, int]:
+    """
+    Background pass that generates notes for jobs still pending
+
+    Args:
+        user_id: Restrict to one user (default: all users)
+        limit: Maximum number of jobs to process
+
+    Returns:
+        Counts of generated and skipped jobs
+    """
+    generated = 0
+    skipped = 0
+    for entry in get_pending_notes_sources(user_id, limit):
+        if generate_job_notes(entry['user_id'], entry['job_id'], entry['applied_ts']):
+            generated += 1
+        else:
+            skipped += 1
+
+    logger.info(f"Pending notes pass: {generated} generated, {skipped} skipped")
+    return {'generated': generated, 'skipped': skipped}
+
+
+def get_url_domain(url: str) -> str:
+    """
+    Return the bare domain of a job URL for usage roll-ups
+    """
+    domain = urlparse(url or '').netloc.lower()
+    return domain[4:] if domain.startswith('www.') else domain
@@ -0,0 +1,314 @@
+"""
+On-demand profiling of individual invocations
+Runs a chosen invocation under cProfile (or a low-overhead stack sampler)
+with tracemalloc, then writes the raw profile and a top-functions summary
+to a sink: a local directory, or S3 (the local sink uses the same key
+layout and stands in for S3 in tests and local runs)
+
+An invocation is profiled when any of these holds:
+- PROFILE_ENABLED=true (every invocation)
+- a PROFILE_SAMPLE_PERCENT random draw
+- an X-Profile header carrying a token signed with PROFILE_SECRET
+
+Otherwise the check is a few attribute reads and nothing is started.
+
+Usage:
+    python profiling.py sign [--ttl 900]
+"""
+
+import os
+import sys
+import io
+import hmac
+import json
+import time
+import random
+import uuid
+import pstats
+import hashlib
+import logging
+import argparse
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'false').lower() == 'true'
+PROFILE_SAMPLE_PERCENT = float(os.getenv('PROFILE_SAMPLE_PERCENT', '0'))
+PROFILE_SECRET = os.getenv('PROFILE_SECRET', '')
+PROFILER = os.getenv('PROFILER', 'cprofile')  # 'cprofile' or 'sampling'
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '5'))
+PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', '25'))
+PROFILE_SINK = os.getenv('PROFILE_SINK', 'local')  # 'local' or 's3'
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/profiles')
+PROFILE_S3_BUCKET = os.getenv('PROFILE_S3_BUCKET', '')
+PROFILE_S3_PREFIX = os.getenv('PROFILE_S3_PREFIX', 'profiles/')
+
+PROFILE_HEADER = 'x-profile'
+
+# tracemalloc and the profiler hooks are process-wide, so concurrent
+# invocations (threaded local server, warmup fan-out) profile one at a time
+profile_lock = threading.Lock()
+
+
+def sign_profile_token(secret: str, ttl_seconds: int = 900) -> str:
+    """
+    Create an X-Profile header value valid for ttl_seconds
+    """
+    expires = str(int(time.time()) + ttl_seconds)
+    signature = hmac.new(secret.encode('utf-8'), expires.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(secret: str, token: str) -> bool:
+    """
+    Check an X-Profile header value: unexpired and signed with secret
+    """
+    expires, _, signature = (token or '').partition('.')
+    if not secret or not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode('utf-8'), expires.encode('utf-8'), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def profile_reason(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Why this invocation should be profiled ('env', 'sample' or 'header'),
+    or None for a normal invocation
+    """
+    if PROFILE_ENABLED:
+        return 'env'
+    if PROFILE_SAMPLE_PERCENT > 0 and random.random() * 100 < PROFILE_SAMPLE_PERCENT:
+        return 'sample'
+    if PROFILE_SECRET:
+        for name, value in (event.get('headers') or {}).items():
+            if name.lower() == PROFILE_HEADER:
+                return 'header' if verify_profile_token(PROFILE_SECRET, value) else None
+    return None
+
+
+class StackSampler:
+    """
+    Sampling profiler: a background thread records the target thread's
+    stack every interval. Overhead does not grow with call count, unlike
+    cProfile. Output is collapsed stacks (one 'a;b;c count' line each),
+    ready for flamegraph tools
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.samples: Counter = Counter()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return '\n'.join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Functions by share of samples on the stack (inclusive) and at the top (self)
+        """
+        inclusive: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for name in set(frames):
+                inclusive[name] += count
+        total = sum(self.samples.values()) or 1
+        return [
+            {'function': name, 'inclusive_pct': round(100 * count / total, 1), 'self_pct': round(100 * own[name] / total, 1)}
+            for name, count in inclusive.most_common(limit)
+        ]
+
+
+def cprofile_top(profiler: cProfile.Profile, limit: int) -> List[Dict[str, Any]]:
+    """
+    Top functions of a cProfile run by cumulative time
+    """
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}:{name}",
+            'calls': calls,
+            'total_ms': round(total * 1000, 2),
+            'cumulative_ms': round(cumulative * 1000, 2)
+        })
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:limit]
+
+
+class LocalSink:
+    """
+    Write profile artifacts under a local directory (S3 key layout)
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR):
+        self.directory = directory
+
+    def write(self, key: str, data: bytes) -> str:
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+
+class S3Sink:
+    """
+    Write profile artifacts to S3 (needs s3:PutObject on the bucket)
+    """
+
+    def __init__(self, bucket: str = PROFILE_S3_BUCKET, prefix: str = PROFILE_S3_PREFIX):
+        import boto3
+        self.client = boto3.client('s3')
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def write(self, key: str, data: bytes) -> str:
+        self.client.put_object(Bucket=self.bucket, Key=f"{self.prefix}{key}", Body=data)
+        return f"s3://{self.bucket}/{self.prefix}{key}"
+
+
+def get_sink() -> Any:
+    return S3Sink() if PROFILE_SINK == 's3' else LocalSink()
+
+
+def profile_invocation(
+    handler: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+    event: Dict[str, Any],
+    context: Any,
+    reason: str,
+    route: str
+) -> Dict[str, Any]:
+    """
+    Run one invocation under the profiler and tracemalloc and write the
+    raw profile plus a JSON summary to the sink. Sink failures are logged
+    and never fail the request. If another invocation is being profiled,
+    this one runs unprofiled rather than wait or corrupt both profiles
+
+    Args:
+        handler: The undecorated handler
+        event: Lambda event
+        context: Lambda context
+        reason: Why it is profiled (recorded in the summary)
+        route: Route name, used in the artifact keys
+
+    Returns:
+        The handler's response
+    """
+    if not profile_lock.acquire(blocking=False):
+        logger.info(f"Profiler busy, running {route} unprofiled")
+        return handler(event, context)
+    try:
+        return run_profiled(handler, event, context, reason, route)
+    finally:
+        profile_lock.release()
+
+
+def run_profiled(
+    handler: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+    event: Dict[str, Any],
+    context: Any,
+    reason: str,
+    route: str
+) -> Dict[str, Any]:
+    """
+    profile_invocation() body; the caller holds profile_lock
+    """
+    sampler = StackSampler() if PROFILER == 'sampling' else None
+    profiler = None if sampler else cProfile.Profile()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if sampler:
+        sampler.start()
+    else:
+        profiler.enable()
+    try:
+        return handler(event, context)
+    finally:
+        if sampler:
+            sampler.stop()
+        else:
+            profiler.disable()
+        duration_ms = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        try:
+            request_id = getattr(context, 'aws_request_id', None) or uuid.uuid4().hex[:12]
+            stamp = datetime.now(timezone.utc).strftime('%Y-%m-%d/%H%M%S')
+            base = f"{route}/{stamp}-{request_id}"
+            claims = ((event.get('requestContext') or {}).get('authorizer') or {}).get('claims') or {}
+
+            summary = {
+                'request_id': request_id,
+                'route': route,
+                'path': event.get('path'),
+                'user_id': claims.get('sub'),
+                'reason': reason,
+                'profiler': PROFILER,
+                'duration_ms': round(duration_ms, 1),
+                'peak_memory_bytes': peak,
+                'top': sampler.top(PROFILE_TOP_N) if sampler else cprofile_top(profiler, PROFILE_TOP_N)
+            }
+
+            sink = get_sink()
+            if sampler:
+                summary['profile'] = sink.write(f"{base}.collapsed.txt", sampler.collapsed().encode('utf-8'))
+            else:
+                stats = pstats.Stats(profiler, stream=io.StringIO())
+                path = os.path.join('/tmp', f"{request_id}.prof")
+                stats.dump_stats(path)
+                with open(path, 'rb') as f:
+                    summary['profile'] = sink.write(f"{base}.prof", f.read())
+                os.remove(path)
+            sink.write(f"{base}.json", json.dumps(summary, indent=2).encode('utf-8'))
+
+            logger.info(f"Profiled {route} in {duration_ms:.0f} ms, peak {peak} bytes: {summary['profile']}")
+        except Exception as e:
+            logger.error(f"Failed to write profile: {str(e)}", exc_info=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description='JobTrackr invocation profiling')
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+    sign_parser = subparsers.add_parser('sign', help='Create a signed X-Profile header value')
+    sign_parser.add_argument('--ttl', type=int, default=900, help='Validity in seconds')
+    args = arg_parser.parse_args(argv)
+
+    if not PROFILE_SECRET:
+        print("PROFILE_SECRET is not set", file=sys.stderr)
+        return 1
+    print(sign_profile_token(PROFILE_SECRET, args.ttl))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,12 +13,32 @@ def get_route_handler(event: Dict[str, Any]) -> str:
     method = event.get('httpMethod', '').upper()
     path = event.get('path', '')
 
+    # Non-HTTP background tasks (e.g. EventBridge schedules)
+    if event.get('task') == 'process_pending_notes':
+        return 'pending_notes'
+    if event.get('task') == 'enrich_job':
+        return 'enrich_job'
+
     if method == 'POST' and path == '/api/jobs/ingest':
         return 'job_ingest'
+    elif method == 'POST' and path.rstrip('/') == '/api/jobs/import':
+        return 'import_jobs'
+    elif method == 'POST' and path.rstrip('/') == '/api/jobs/export':
+        return 'export_jobs'
+    elif method == 'POST' and path.startswith('/api/jobs/') and path.rstrip('/').endswith('/enrich'):
+        return 'retry_enrichment'
     elif method == 'GET' and path == '/api/jobs':
         return 'get_jobs'
     elif method == 'GET' and path == '/api/stats':
         return 'get_stats'
+    elif method == 'GET' and path == '/api/usage':
+        return 'get_usage'
+    elif method == 'GET' and path == '/api/analytics/funnel':
+        return 'get_funnel'
+    elif method == 'GET' and path == '/api/jobs/search':
+        return 'search_jobs'
+    elif method == 'GET' and path.startswith('/api/jobs/'):
+        return 'get_job'
     elif method == 'PUT' and path.startswith('/api/jobs/'):
         return 'update_job'
     elif method == 'DELETE' and path.startswith('/api/jobs/'):
@@ -0,0 +1,215 @@
+"""
+Deterministic salary parsing and distribution analytics for JobTrackr
+Turns free-text compensation ("$45-$60/hr", "€70k", "120,000 - 150,000 CAD")
+into annualized numeric bounds stored on the job item
+"""
+
+import os
+import re
+import bisect
+from typing import Dict, Any, List, Optional
+
+# Configuration
+SALARY_HISTOGRAM_BUCKET = int(os.getenv('SALARY_HISTOGRAM_BUCKET', '20000'))
+SALARY_PERCENTILES = [10, 25, 50, 75, 90]
+
+# Annualization factors (2080 working hours, 260 working days)
+PERIOD_FACTORS = {'hour': 2080, 'day': 260, 'week': 52, 'month': 12, 'year': 1}
+PERIOD_PATTERNS = [
+    ('hour', re.compile(r'/\s*h(?:ou)?r\b|\bper\s+hour\b|\ban?\s+hour\b|\bhourly\b|/\s*h\b', re.I)),
+    ('day', re.compile(r'/\s*day\b|\bper\s+day\b|\ba\s+day\b|\bdaily\b', re.I)),
+    ('week', re.compile(r'/\s*w(?:ee)?k\b|\bper\s+week\b|\ba\s+week\b|\bweekly\b', re.I)),
+    ('month', re.compile(r'/\s*mo(?:nth)?\b|\bper\s+month\b|\ba\s+month\b|\bmonthly\b', re.I)),
+    ('year', re.compile(r'/\s*y(?:ea)?r\b|\bper\s+(?:year|annum)\b|\ba\s+year\b|\bannual(?:ly)?\b|\byearly\b|\bp\.?a\.?\b', re.I)),
+]
+# Without a stated period, amounts below this are taken as hourly rates
+HOURLY_THRESHOLD = 300
+
+# Checked in order, so multi-character symbols come first
+CURRENCY_SYMBOLS = [
+    ('CA$', 'CAD'), ('C$', 'CAD'), ('AU$', 'AUD'), ('A$', 'AUD'), ('NZ$', 'NZD'), ('S$', 'SGD'),
+    ('HK$', 'HKD'), ('R$', 'BRL'), ('US$', 'USD'), ('$', 'USD'), ('€', 'EUR'), ('£', 'GBP'),
+    ('¥', 'JPY'), ('₹', 'INR'), ('₩', 'KRW'), ('₪', 'ILS'), ('zł', 'PLN'), ('CHF', 'CHF')
+]
+CURRENCY_CODE_NAMES = 'USD|EUR|GBP|CAD|AUD|NZD|SGD|HKD|INR|JPY|CHF|SEK|NOK|DKK|PLN|BRL|MXN|ZAR|ILS|KRW|CNY'
+CURRENCY_CODES = re.compile(rf'\b({CURRENCY_CODE_NAMES})\b', re.I)
+# A currency symbol or code right before or after an amount
+CURRENCY_MARK = '|'.join(re.escape(symbol) for symbol, _ in CURRENCY_SYMBOLS)
+CURRENCY_BEFORE = re.compile(rf'(?:{CURRENCY_MARK}|\b(?:{CURRENCY_CODE_NAMES}))\s*$', re.I)
+CURRENCY_AFTER = re.compile(rf'\s*(?:{CURRENCY_MARK}|(?:{CURRENCY_CODE_NAMES})\b)', re.I)
+
+# A number with optional thousands separators, decimals and k/m suffix
+AMOUNT_PATTERN = re.compile(
+    r'(\d{1,3}(?:[,\s.]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?)\s*([kKmM])?(?![a-zA-Z])'
+)
+THOUSANDS_PATTERN = re.compile(r'\d{1,3}(?:[,\s.]\d{3})+')
+SUFFIX_FACTORS = {'k': 1_000, 'm': 1_000_000}
+# Between the bounds of a range ("$120k - $150k", "45 to 60 EUR")
+RANGE_PATTERN = re.compile(r'\s*(?:-|–|—|to)\s*', re.I)
+PERCENT_PATTERN = re.compile(r'\s*%')
+UP_TO_PATTERN = re.compile(r'\b(?:up\s+to|max(?:imum)?|as\s+much\s+as)\s*$', re.I)
+
+
+def _to_number(digits: str) -> float:
+    """Parse '120,000', '120.000', '100 000', '45.50' or '1,5'"""
+    if THOUSANDS_PATTERN.fullmatch(digits):
+        return float(re.sub(r'[,\s.]', '', digits))
+    head, sep, tail = digits.rpartition(',' if ',' in digits[-3:] else '.')
+    if sep:
+        whole = re.sub(r'[,\s.]', '', head) or '0'
+        return float(f'{whole}.{tail}')
+    return float(digits)
+
+
+def detect_currency(text: str) -> Optional[str]:
+    """
+    Return the ISO 4217 code for the first currency code or symbol in text
+    """
+    match = CURRENCY_CODES.search(text)
+    if match:
+        return match.group(1).upper()
+    for symbol, code in CURRENCY_SYMBOLS:
+        if symbol in text:
+            return code
+    return None
+
+
+def detect_period(text: str) -> Optional[str]:
+    """
+    Return 'hour', 'day', 'week', 'month' or 'year' if the text states a pay period
+    """
+    for period, pattern in PERIOD_PATTERNS:
+        if pattern.search(text):
+            return period
+    return None
+
+
+def is_money(text: str, match: re.Match) -> bool:
+    """
+    Whether an amount is marked as money: a currency symbol or code right
+    before or after it, or a k/M suffix
+    """
+    return bool(
+        match.group(2)
+        or CURRENCY_BEFORE.search(text[:match.start()])
+        or CURRENCY_AFTER.match(text, match.end())
+    )
+
+
+def in_range(text: str, low: re.Match, high: re.Match) -> bool:
+    """
+    Whether two amounts are joined as a range; a currency symbol or code
+    may open the upper bound ("$120k - $150k")
+    """
+    between = text[low.end():high.start()]
+    return bool(RANGE_PATTERN.fullmatch(between) or RANGE_PATTERN.fullmatch(CURRENCY_BEFORE.sub('', between)))
+
+
+def parse_salary(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse free-text compensation into annualized numeric bounds
+    The bounds are the first amount marked as money (or, if none is, the
+    first amount) and an amount joined to it as a range ("-", "to").
+    Percentages ("15% bonus") are never amounts, and an
+    amount after "up to" is only an upper bound
+
+    Args:
+        text: Compensation as written, e.g. "$45 - $60 per hour", "€70k", "120000 CAD"
+
+    Returns:
+        Dict with salary_min (None for "up to" amounts), salary_max
+        (annual, whole units), currency and period, or None if no amount
+        is found
+    """
+    if not text:
+        return None
+
+    matches = [
+        match for match in AMOUNT_PATTERN.finditer(text)
+        if not PERCENT_PATTERN.match(text, match.end()) and _to_number(match.group(1)) > 0
+    ]
+    if not matches:
+        return None
+    money = [i for i, match in enumerate(matches) if is_money(text, match)]
+    # The marked amount may be either end of a range ("120,000 - 150,000 CAD")
+    i = money[0] if money else 0
+    if i > 0 and in_range(text, matches[i - 1], matches[i]):
+        i -= 1
+    first = matches[i]
+    bounds = [first, matches[i + 1]] if i + 1 < len(matches) and in_range(text, first, matches[i + 1]) else [first]
+
+    amounts = [_to_number(m.group(1)) * SUFFIX_FACTORS.get((m.group(2) or '').lower(), 1) for m in bounds]
+    # A suffix on the upper bound only ("120-150k") applies to the whole range
+    if len(bounds) == 2 and not bounds[0].group(2) and bounds[1].group(2) and amounts[0] < 1000:
+        amounts[0] *= SUFFIX_FACTORS[bounds[1].group(2).lower()]
+
+    low, high = min(amounts), max(amounts)
+    max_only = len(bounds) == 1 and bool(UP_TO_PATTERN.search(CURRENCY_BEFORE.sub('', text[:first.start()])))
+    period = detect_period(text) or ('hour' if high < HOURLY_THRESHOLD else 'year')
+    factor = PERIOD_FACTORS[period]
+
+    return {
+        'salary_min': None if max_only else int(round(low * factor)),
+        'salary_max': int(round(high * factor)),
+        'currency': detect_currency(text) or 'USD',
+        'period': period
+    }
+
+
+def salary_fields(text: Optional[str]) -> Dict[str, Any]:
+    """
+    Numeric salary attributes for a job item (empty if unparseable;
+    no salary_min for "up to" amounts)
+    """
+    parsed = parse_salary(text)
+    if not parsed:
+        return {}
+    return {k: parsed[k] for k in ('salary_min', 'salary_max', 'currency') if parsed[k] is not None}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Linear-interpolated percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def salary_distribution(jobs: List[Dict[str, Any]], bucket_size: int = SALARY_HISTOGRAM_BUCKET) -> Dict[str, Any]:
+    """
+    Salary percentiles and histogram across jobs, per currency
+    Uses each job's range midpoint (jobs with only one bound are left out); one sort per currency, and histogram
+    buckets are counted by bisecting the sorted midpoints
+
+    Returns:
+        {currency: {'count', 'min', 'max', 'percentiles': {'p50': ...},
+        'histogram': [{'from', 'to', 'count'}, ...]}}
+    """
+    midpoints: Dict[str, List[float]] = {}
+    for job in jobs:
+        low, high = job.get('salary_min'), job.get('salary_max')
+        if low is None or high is None:
+            continue
+        midpoints.setdefault(job.get('currency') or 'USD', []).append((float(low) + float(high)) / 2)
+
+    result = {}
+    for currency, values in midpoints.items():
+        values.sort()
+        first_bucket = int(values[0] // bucket_size) * bucket_size
+        edges = list(range(first_bucket, int(values[-1]) + bucket_size + 1, bucket_size))
+        counts = [bisect.bisect_left(values, edges[i + 1]) - bisect.bisect_left(values, edges[i]) for i in range(len(edges) - 1)]
+        result[currency] = {
+            'count': len(values),
+            'min': int(values[0]),
+            'max': int(values[-1]),
+            'percentiles': {f'p{p}': int(round(percentile(values, p))) for p in SALARY_PERCENTILES},
+            'histogram': [
+                {'from': edges[i], 'to': edges[i + 1], 'count': count}
+                for i, count in enumerate(counts) if count
+            ]
+        }
+    return result
@@ -3,17 +3,31 @@ Web scraping functionality using Firecrawl API
 """
 
 import os
+import asyncio
 import logging
+import weakref
 from typing import Dict, Any, Optional
+import httpx
 from firecrawl import FirecrawlApp
 
 logger = logging.getLogger(__name__)
 
+FIRECRAWL_API_URL = os.getenv('FIRECRAWL_API_URL', 'https://api.firecrawl.dev')
+FIRECRAWL_TIMEOUT = float(os.getenv('FIRECRAWL_TIMEOUT', '60'))
+SCRAPE_PARAMS = {
+    'formats': ['html', 'markdown'],
+    'onlyMainContent': True,
+    'extractMetadata': True
+}
+
 # Initialize Firecrawl client outside handler for connection reuse
 api_key = os.getenv('FIRECRAWL_API_KEY')
 firecrawl_client = FirecrawlApp(api_key=api_key) if api_key else None
 logger.info(f"Firecrawl client initialized at module level: {id(firecrawl_client)}")
 
+# Async HTTP clients, one per event loop (connections cannot cross loops)
+async_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+
 
 def scrape_with_firecrawl(url: str) -> Optional[Dict[str, Any]]:
     """
@@ -29,27 +43,66 @@ def scrape_with_firecrawl(url: str) -> Optional[Dict[str, Any]]:
             return None
 
         # Scrape the URL
-        scrape_result = firecrawl_client.scrape_url(
-            url=url,
-            params={
-                'formats': ['html', 'markdown'],
-                'onlyMainContent': True,
-                'extractMetadata': True
-            }
+        scrape_result = firecrawl_client.scrape_url(url=url, params=SCRAPE_PARAMS)
+
+        logger.info(f"Successfully scraped content from: {url}")
+        return to_scraped_content(url, scrape_result)
+
+    except Exception as e:
+        logger.error(f"Firecrawl scraping error: {str(e)}", exc_info=True)
+        return None
+
+
+def to_scraped_content(url: str, scrape_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keep the parts of a Firecrawl scrape result used downstream
+    """
+    return {
+        "url": url,
+        "html": scrape_result.get("html", ""),
+        "markdown": scrape_result.get("markdown", ""),
+        "metadata": scrape_result.get("metadata", {}),
+        "success": scrape_result.get("success", True)
+    }
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Pooled async HTTP client for the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=FIRECRAWL_API_URL,
+            headers={'Authorization': f'Bearer {api_key}'},
+            timeout=FIRECRAWL_TIMEOUT
         )
-        
-        # Extract relevant data
-        scraped_content = {
-            "url": url,
-            "html": scrape_result.get("html", ""),
-            "markdown": scrape_result.get("markdown", ""),
-            "metadata": scrape_result.get("metadata", {}),
-            "success": scrape_result.get("success", True)
-        }
-        
+        async_clients[loop] = client
+    return client
+
+
+async def scrape_with_firecrawl_async(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Scrape job page with the Firecrawl REST API without blocking the event loop
+    Same request and result shape as scrape_with_firecrawl()
+    """
+    try:
+        if not api_key:
+            logger.error("FIRECRAWL_API_KEY not found in environment")
+            return None
+
+        logger.info(f"Scraping URL with Firecrawl (async): {url}")
+        response = await get_async_client().post('/v0/scrape', json={'url': url, **SCRAPE_PARAMS})
+        response.raise_for_status()
+        body = response.json()
+        if not body.get('success'):
+            logger.error(f"Firecrawl scrape failed: {body.get('error')}")
+            return None
+
         logger.info(f"Successfully scraped content from: {url}")
-        return scraped_content
-        
+        return to_scraped_content(url, body.get('data') or {})
+
     except Exception as e:
         logger.error(f"Firecrawl scraping error: {str(e)}", exc_info=True)
         return None
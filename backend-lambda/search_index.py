@@ -0,0 +1,191 @@
+"""
+Per-user full-text search index for JobTrackr
+Pure in-memory structures; persistence lives in db.py
+
+Each job is stored as a document: doc_ref ("{applied_ts}#{job_id}") ->
+{token: weight}. The inverted index is derived from the documents when
+a user's index is loaded, so only the compact forward map is persisted.
+
+A SearchIndex is never modified once built (with_chunks returns a new
+one), so the cache can hand the same object to concurrent request
+threads without copying it.
+"""
+
+import os
+import re
+import json
+import gzip
+import bisect
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+# Configuration
+SEARCH_INDEX_CHUNKS = int(os.getenv('SEARCH_INDEX_CHUNKS', '16'))
+SEARCH_CACHE_USERS = int(os.getenv('SEARCH_CACHE_USERS', '64'))
+
+# Field weights used for ranking
+FIELD_WEIGHTS = {'title': 3, 'company': 3, 'tags': 2, 'notes': 1}
+SEARCH_FIELDS = list(FIELD_WEIGHTS.keys())
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'our', 'the', 'to', 'we', 'with', 'you', 'your', 'will', 'this'
+}
+
+# Keep '+', '#' and '.' inside tokens so "c++", "c#" and "node.js" survive
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Normalize text into search tokens (lower-cased, stopwords removed)
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or '').lower()):
+        token = token.rstrip('.')
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        tokens.append(token)
+    return tokens
+
+
+def build_document(job: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Build the weighted token map for a job item
+    """
+    doc: Dict[str, int] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = job.get(field)
+        if isinstance(value, list):
+            value = ' '.join(str(v) for v in value)
+        for token in tokenize(value or ''):
+            doc[token] = doc.get(token, 0) + weight
+    return doc
+
+
+def make_doc_ref(applied_ts: str, job_id: str) -> str:
+    """
+    Compact document reference; sorts by applied_ts
+    """
+    return f'{applied_ts}#{job_id}'
+
+
+def parse_doc_ref(doc_ref: str) -> Dict[str, str]:
+    """
+    Split a doc_ref back into applied_ts and job_id
+    """
+    applied_ts, _, job_id = doc_ref.rpartition('#')
+    return {'applied_ts': applied_ts, 'job_id': job_id}
+
+
+def chunk_for(job_id: str) -> str:
+    """
+    Stable chunk id for a job
+    """
+    return f'{zlib.crc32(job_id.encode()) % SEARCH_INDEX_CHUNKS:02d}'
+
+
+def encode_chunk(docs: Dict[str, Dict[str, int]]) -> bytes:
+    """
+    Serialize a chunk's documents (compact JSON, gzip)
+    """
+    return gzip.compress(json.dumps(docs, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_chunk(data: Any) -> Dict[str, Dict[str, int]]:
+    """
+    Deserialize a chunk's documents
+    """
+    if not data:
+        return {}
+    return json.loads(gzip.decompress(data).decode('utf-8'))
+
+
+class SearchIndex:
+    """In-memory inverted index over one user's documents"""
+
+    def __init__(self, chunks: Optional[Dict[str, Tuple[int, Dict[str, Dict[str, int]]]]] = None):
+        # chunk id -> (version, {doc_ref: {token: weight}})
+        self.chunks: Dict[str, Tuple[int, Dict[str, Dict[str, int]]]] = dict(chunks or {})
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.postings: Dict[str, Dict[str, int]] = {}
+        for _, docs in self.chunks.values():
+            for doc_ref, doc in docs.items():
+                for token, weight in doc.items():
+                    self.postings.setdefault(token, {})[doc_ref] = weight
+        self.sorted_tokens = sorted(self.postings)
+
+    def versions(self) -> Dict[str, int]:
+        return {chunk_id: version for chunk_id, (version, _) in self.chunks.items()}
+
+    def with_chunks(self, chunks: Dict[str, Tuple[int, Dict[str, Dict[str, int]]]]) -> 'SearchIndex':
+        """
+        New index with the given chunks replaced (this one is unchanged)
+        """
+        return SearchIndex({**self.chunks, **chunks})
+
+    def _prefix_matches(self, prefix: str) -> Dict[str, int]:
+        """Merge postings of every token starting with prefix"""
+        matches: Dict[str, int] = {}
+        start = bisect.bisect_left(self.sorted_tokens, prefix)
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            for doc_ref, weight in self.postings[token].items():
+                # Exact token matches rank above prefix matches
+                score = weight * 2 if token == prefix else weight
+                matches[doc_ref] = max(matches.get(doc_ref, 0), score)
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, int]]:
+        """
+        Return (doc_ref, score) for documents matching every query token
+        as a prefix, best score first and newest first on ties
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        scores: Optional[Dict[str, int]] = None
+        for token in tokens:
+            matches = self._prefix_matches(token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {doc_ref: scores[doc_ref] + score for doc_ref, score in matches.items() if doc_ref in scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return ranked[:limit]
+
+
+class SearchIndexCache:
+    """Size-bounded LRU of per-user SearchIndex objects for warm containers"""
+
+    def __init__(self, max_users: int = SEARCH_CACHE_USERS):
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, SearchIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[SearchIndex]:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+            return index
+
+    def put(self, user_id: str, index: SearchIndex) -> None:
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(user_id, None)
@@ -0,0 +1,152 @@
+"""
+Shared test setup
+The backend modules are flat, so tests import them from the parent
+directory. Settings are fixed before any module reads its configuration,
+and nothing talks to AWS or an LLM provider
+"""
+
+import os
+import sys
+import math
+import threading
+import pytest
+# Imported before any backend module so their boto3 clients can be mocked
+from moto import mock_aws
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('ANTHROPIC_API_KEY', 'test-key')
+os.environ.setdefault('LLM_PROVIDER', 'anthropic')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('PAGINATION_SECRET', 'test-pagination-secret-0123456789abcdef')
+
+
+@pytest.fixture
+def dynamodb(monkeypatch):
+    """
+    In-memory UsersJobs table (moto) with the GSI1/GSI2 layout db.py
+    expects; yields the db module with its warm-container caches cleared
+    """
+    with mock_aws():
+        import db
+        db.client.create_table(
+            TableName=db.TABLE_NAME,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[
+                {'AttributeName': name, 'AttributeType': 'S'}
+                for name in ('PK', 'SK', 'GSI1PK', 'GSI1SK', 'GSI2PK', 'GSI2SK')
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': index,
+                    'KeySchema': [
+                        {'AttributeName': f'{index}PK', 'KeyType': 'HASH'},
+                        {'AttributeName': f'{index}SK', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+                for index in ('GSI1', 'GSI2')
+            ]
+        )
+        monkeypatch.setattr(db, 'read_cache', db.ReadCache())
+        monkeypatch.setattr(db, 'search_cache', db.SearchIndexCache())
+        yield db
+
+
+# DynamoDB's unit sizes: reads in 4 KB steps, writes in 1 KB steps
+READ_UNIT_BYTES = 4096
+WRITE_UNIT_BYTES = 1024
+
+
+def read_units(size, consistent):
+    return max(1, math.ceil(size / READ_UNIT_BYTES)) * (1 if consistent else 0.5)
+
+
+def write_units(size):
+    return max(1, math.ceil(size / WRITE_UNIT_BYTES))
+
+
+@pytest.fixture
+def consumed_capacity(dynamodb):
+    """
+    Replace moto's ConsumedCapacity with DynamoDB's pricing rules, so route
+    budgets can be asserted in units. Reads are sized on full items even
+    when projected (as DynamoDB charges); updates on the item after the
+    write; deletes and condition checks count one unit per item
+    """
+    from capacity import item_size
+    client = dynamodb.client
+    sizing = threading.local()
+
+    def full_size(key):
+        sizing.active = True
+        try:
+            item = client.get_item(TableName=dynamodb.TABLE_NAME, Key=key, ConsistentRead=True).get('Item')
+        finally:
+            sizing.active = False
+        return item_size(item) if item else 0
+
+    def page_items(operation, params, parsed):
+        items = parsed.get('Items', [])
+        if 'ProjectionExpression' in params:
+            # Projected page: read the same page in full to size it
+            sizing.active = True
+            try:
+                request = {k: v for k, v in params.items() if k not in ('ProjectionExpression', 'ReturnConsumedCapacity')}
+                expressions = ' '.join(v for k, v in request.items() if k.endswith('Expression'))
+                names = {k: v for k, v in request.pop('ExpressionAttributeNames', {}).items() if k in expressions}
+                if names:
+                    request['ExpressionAttributeNames'] = names
+                items = getattr(client, operation.lower())(**request)['Items']
+            finally:
+                sizing.active = False
+        return items
+
+    def stash(params, context, **kwargs):
+        context['capacity_params'] = dict(params)
+
+    def estimate(operation, params, parsed):
+        consistent = params.get('ConsistentRead', False)
+        if operation == 'GetItem':
+            return read_units(full_size(params['Key']) if 'Item' in parsed else 0, consistent)
+        if operation in ('Query', 'Scan'):
+            # Projected items are sized in full, as DynamoDB charges
+            return read_units(sum(item_size(item) for item in page_items(operation, params, parsed)), consistent)
+        if operation == 'BatchGetItem':
+            return sum(read_units(full_size(key), request.get('ConsistentRead', False))
+                       for request in params['RequestItems'].values() for key in request['Keys'])
+        if operation == 'PutItem':
+            return write_units(item_size(params['Item']))
+        if operation == 'UpdateItem':
+            return write_units(full_size(params['Key']))
+        if operation == 'DeleteItem':
+            return 1
+        if operation == 'BatchWriteItem':
+            return sum(write_units(item_size(r['PutRequest']['Item'])) if 'PutRequest' in r else 1
+                       for requests in params['RequestItems'].values() for r in requests)
+        if operation == 'TransactWriteItems':
+            # Transactions cost two units per unit written
+            return sum(2 * (write_units(item_size(t['Put']['Item'])) if 'Put' in t
+                            else write_units(full_size(t['Update']['Key'])) if 'Update' in t else 1)
+                       for t in params['TransactItems'])
+        return 0
+
+    def rewrite(parsed, model, context, **kwargs):
+        params = context.get('capacity_params') or {}
+        if getattr(sizing, 'active', False) or not params.get('ReturnConsumedCapacity'):
+            return
+        if 'Error' in parsed:
+            return
+        units = estimate(model.name, params, parsed)
+        consumed = {'TableName': dynamodb.TABLE_NAME, 'CapacityUnits': units}
+        parsed['ConsumedCapacity'] = [consumed] if model.name.startswith(('Batch', 'Transact')) else consumed
+
+    client.meta.events.register('before-parameter-build.dynamodb.*', stash)
+    client.meta.events.register('after-call.dynamodb.*', rewrite)
+    yield dynamodb
+    client.meta.events.unregister('before-parameter-build.dynamodb.*', stash)
+    client.meta.events.unregister('after-call.dynamodb.*', rewrite)
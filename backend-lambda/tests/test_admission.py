@@ -0,0 +1,70 @@
+"""
+Token-bucket admission control: bucket arithmetic, the in-process
+buckets and admit_ingest against the DynamoDB buckets
+"""
+
+import time
+import pytest
+from botocore.exceptions import ClientError
+from admission import LocalTokenBuckets, refill, retry_after, full_after
+
+USER_KEY = {'PK': 'USER#u1', 'SK': 'BUCKET#ingest'}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+def test_bucket_arithmetic():
+    assert refill(0, 0, 3000, rate=1, capacity=10) == 3
+    assert refill(9, 0, 60_000, rate=1, capacity=10) == 10
+    # A clock step backwards never drains the bucket
+    assert refill(4, 5000, 1000, rate=1, capacity=10) == 4
+    assert retry_after(0.25, rate=0.5) == 2
+    assert retry_after(0.99, rate=100) == 1
+    assert full_after(7, rate=2, capacity=10) == 2
+
+
+def test_local_buckets_refuse_past_the_burst_and_refill(clock):
+    buckets = LocalTokenBuckets()
+    assert [buckets.take(USER_KEY, 1, 3)[0] for _ in range(3)] == [True] * 3
+    assert buckets.take(USER_KEY, 1, 3) == (False, 1)
+
+    buckets.refund(USER_KEY)
+    assert buckets.take(USER_KEY, 1, 3) == (True, 0)
+
+    clock[0] += 2
+    assert [buckets.take(USER_KEY, 1, 3)[0] for _ in range(3)] == [True, True, False]
+
+
+def test_admit_ingest_refuses_the_user_first(dynamodb, clock, monkeypatch):
+    monkeypatch.setattr(dynamodb, 'USER_INGEST_BURST', 2)
+    assert dynamodb.admit_ingest('u1')[0]
+    assert dynamodb.admit_ingest('u1')[0]
+
+    admitted, wait, scope = dynamodb.admit_ingest('u1')
+    assert (admitted, scope) == (False, 'user')
+    assert wait >= 1
+    # Another user is unaffected
+    assert dynamodb.admit_ingest('u2') == (True, 0, None)
+
+
+def test_admit_ingest_refunds_the_user_when_global_refuses(dynamodb, clock, monkeypatch):
+    monkeypatch.setattr(dynamodb, 'USER_INGEST_BURST', 5)
+    monkeypatch.setattr(dynamodb, 'GLOBAL_INGEST_BURST', 1)
+    assert dynamodb.admit_ingest('u1')[0]
+
+    assert dynamodb.admit_ingest('u2')[2] == 'global'
+    bucket = dynamodb.table.get_item(Key={'PK': 'USER#u2', 'SK': 'BUCKET#ingest'})['Item']
+    assert float(bucket['tokens']) == 5
+
+
+def test_admit_ingest_fails_open_on_dynamodb_errors(dynamodb, monkeypatch):
+    def get_item(**kwargs):
+        raise ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'boom'}}, 'GetItem')
+
+    monkeypatch.setattr(dynamodb.table, 'get_item', get_item)
+    assert dynamodb.admit_ingest('u1') == (True, 0, None)
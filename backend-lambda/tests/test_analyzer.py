@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+import analyzer
+from analyzer import MODEL_TIERS, active_tiers, choose_model_tier, get_tier_config, is_valid_analysis
+
+
+@pytest.fixture
+def fast_tier(monkeypatch):
+    monkeypatch.setattr(analyzer, 'FAST_MODEL_ID', 'claude-fast-test')
+    monkeypatch.setattr(analyzer, 'FAST_BEDROCK_MODEL_ID', 'us.anthropic.claude-fast-test-v1:0')
+
+
+def test_fast_tier_is_opt_in():
+    assert active_tiers() == ['standard', 'strong']
+    assert choose_model_tier('Senior engineer, Acme, remote. Python and AWS.') == 'standard'
+
+
+def test_each_tier_runs_a_different_model(fast_tier):
+    models = [get_tier_config(tier)[0] for tier in MODEL_TIERS]
+    assert len(set(models)) == len(MODEL_TIERS)
+    assert get_tier_config('fast') == ('claude-fast-test', analyzer.FAST_MAX_TOKENS)
+
+
+def test_bedrock_tiers(monkeypatch, fast_tier):
+    monkeypatch.setattr(analyzer, 'LLM_PROVIDER', 'bedrock')
+    assert get_tier_config('fast')[0] == 'us.anthropic.claude-fast-test-v1:0'
+    assert get_tier_config('strong')[0] == analyzer.STRONG_BEDROCK_MODEL_ID
+
+
+def test_short_clean_postings_start_on_the_fast_tier(fast_tier):
+    assert choose_model_tier('Senior engineer, Acme, remote. Python and AWS.') == 'fast'
+    assert choose_model_tier('x' * (analyzer.ROUTING_SHORT_CONTENT_CHARS + 1)) == 'standard'
+    assert choose_model_tier('<div><span>{}</span></div>' * 20) == 'standard'
+
+
+def test_unknown_required_fields_are_invalid():
+    assert is_valid_analysis({'title': 'Engineer', 'company': 'Acme', 'location': 'Remote'})
+    assert not is_valid_analysis({'title': 'Engineer', 'company': 'Unknown', 'location': 'Remote'})
+    assert not is_valid_analysis({'title': 'Engineer', 'company': 'Acme'})
+
+
+def fake_llm(responses, calls):
+    def call(prompt, model_id=None, max_tokens=None, usage=None):
+        calls.append(model_id)
+        return responses.pop(0)
+    return call
+
+
+INVALID = '{"title": "Engineer", "company": "Unknown", "location": "Remote"}'
+VALID = '{"title": "Engineer", "company": "Acme", "location": "Remote"}'
+
+
+def test_sync_and_async_drivers_escalate_alike(monkeypatch, fast_tier):
+    content = {'content': 'Senior engineer, Acme, remote. Python and AWS.'}
+    sync_calls, async_calls = [], []
+    monkeypatch.setattr(analyzer, 'call_llm', fake_llm([None, INVALID, VALID], sync_calls))
+
+    async def call_llm_async(*args, **kwargs):
+        return fake_llm(async_responses, async_calls)(*args, **kwargs)
+
+    async_responses = [None, INVALID, VALID]
+    monkeypatch.setattr(analyzer, 'call_llm_async', call_llm_async)
+
+    result = analyzer.analyze_with_bedrock(content, include_notes=False)
+    assert result['company'] == 'Acme'
+    assert sync_calls == [get_tier_config(tier)[0] for tier in MODEL_TIERS]
+    assert asyncio.run(analyzer.analyze_with_bedrock_async(content, include_notes=False)) == result
+    assert async_calls == sync_calls
+
+
+def test_no_response_from_any_tier_is_none(monkeypatch, fast_tier):
+    monkeypatch.setattr(analyzer, 'call_llm', fake_llm([None] * len(MODEL_TIERS), []))
+    assert analyzer.analyze_with_bedrock({'content': 'Senior engineer'}) is None
+    assert analyzer.analyze_with_bedrock({'content': ''}) is None
@@ -0,0 +1,93 @@
+"""
+archive.py: content hashing, the local sink, codecs and cached reads
+"""
+
+import gzip
+import os
+
+import pytest
+
+import archive
+from archive import LocalArchiveSink, archive_posting, get_archived_posting
+
+POSTING = {'content': 'Senior engineer at Acme, remote', 'title': 'Engineer', 'description': 'Build things',
+           'url': 'https://boards.example.com/jobs/1', 'scraped_at': '2026-03-01T10:00:00+00:00'}
+
+
+@pytest.fixture
+def sink(tmp_path, monkeypatch):
+    local = LocalArchiveSink(str(tmp_path))
+    monkeypatch.setattr(archive, 'get_sink', lambda: local)
+    archive._load.cache_clear()
+    yield local
+    archive._load.cache_clear()
+
+
+def stored_files(sink):
+    return [name for _, _, names in os.walk(sink.directory) for name in names]
+
+
+def test_hash_ignores_url_and_scrape_time(sink):
+    digest = archive_posting(POSTING)
+    # Another user's scrape of the same posting shares the object
+    again = {**POSTING, 'url': 'https://www.boards.example.com/jobs/1?ref=x', 'scraped_at': '2026-04-01T00:00:00+00:00'}
+    assert archive_posting(again) == digest
+    assert len(stored_files(sink)) == 1
+
+    assert archive_posting({**POSTING, 'content': 'Staff engineer at Acme'}) != digest
+    assert len(stored_files(sink)) == 2
+
+
+def test_local_sink_round_trip(sink):
+    digest = archive_posting(POSTING)
+    assert os.path.exists(os.path.join(sink.directory, digest[:2], digest))
+    assert get_archived_posting(digest) == {field: POSTING[field] for field in archive.ARCHIVE_FIELDS}
+    assert archive_posting({'content': ''}) is None
+
+
+def test_gzip_objects_are_detected(monkeypatch):
+    monkeypatch.setattr(archive, 'ARCHIVE_CODEC', 'gzip')
+    data = archive.compress(b'{"content":"x"}')
+    assert data.startswith(archive.GZIP_MAGIC)
+    assert archive.decompress(data) == b'{"content":"x"}'
+    # Whatever the configured codec, reads follow the data
+    monkeypatch.setattr(archive, 'ARCHIVE_CODEC', 'zstd')
+    assert archive.decompress(gzip.compress(b'abc')) == b'abc'
+    with pytest.raises(ValueError):
+        archive.decompress(b'plain text')
+
+
+def test_zstd_objects_are_detected(monkeypatch):
+    zstandard = pytest.importorskip('zstandard')
+    monkeypatch.setattr(archive, 'ARCHIVE_CODEC', 'zstd')
+    data = archive.compress(b'{"content":"x"}')
+    assert data.startswith(archive.ZSTD_MAGIC)
+    assert archive.decompress(data) == b'{"content":"x"}'
+    assert archive.decompress(zstandard.ZstdCompressor().compress(b'abc')) == b'abc'
+
+
+def test_zstd_objects_need_zstandard(monkeypatch):
+    monkeypatch.setattr(archive, 'zstandard', None)
+    with pytest.raises(ValueError, match='zstandard'):
+        archive.decompress(archive.ZSTD_MAGIC + b'\x00' * 8)
+
+
+def test_misses_are_not_cached(sink):
+    digest = archive.hashlib.sha256(archive.archive_document(POSTING)).hexdigest()
+    assert get_archived_posting(digest) is None
+    assert archive_posting(POSTING) == digest
+    assert get_archived_posting(digest)['content'] == POSTING['content']
+    assert get_archived_posting(None) is None
+
+
+def test_archive_failures_never_raise(sink, monkeypatch):
+    def fail(*args):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(sink, 'write', fail)
+    assert archive_posting(POSTING) is None
+    monkeypatch.setattr(sink, 'exists', fail)
+    assert archive_posting(POSTING) is None
+
+    monkeypatch.setattr(sink, 'read', lambda key: b'not an archive')
+    assert get_archived_posting('ab' * 32) is None
@@ -0,0 +1,98 @@
+"""
+backfill.py: segment leases, usage accounting and the version a run stamps
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import analyzer
+import backfill
+from batch_analyzer import AnthropicBatchBackend, LocalBatchBackend, batch_analysis_version
+
+JOB = {'user_id': 'u', 'job_id': 'j1', 'applied_ts': 't', 'job_url': 'https://www.boards.example.com/jobs/1',
+       'enrichment_status': 'analyzed', 'company': 'Old'}
+ANALYSIS = {'title': 'Engineer', 'company': 'Acme', 'location': 'Remote'}
+
+
+def new_cost():
+    return {'cost_micros': 0, 'lock': threading.Lock()}
+
+
+def test_lease_renewal_needs_the_owner(dynamodb):
+    assert dynamodb.claim_backfill_segment('run', 0, 'owner-a') is not None
+    assert dynamodb.renew_backfill_lease('run', 0, 'owner-a')
+    assert not dynamodb.renew_backfill_lease('run', 0, 'owner-b')
+
+
+def test_heartbeat_flags_a_lost_lease(monkeypatch):
+    renewals = []
+    monkeypatch.setattr(backfill, 'BACKFILL_HEARTBEAT_SECONDS', 0.01)
+    monkeypatch.setattr(backfill, 'renew_backfill_lease', lambda *args: renewals.append(args) or len(renewals) < 3)
+    with backfill.lease_heartbeat('run', 0, 'owner') as lost:
+        assert lost.wait(5)
+    assert len(renewals) == 3
+
+
+def test_segment_stops_without_a_checkpoint_once_the_lease_is_lost(monkeypatch):
+    monkeypatch.setattr(backfill, 'BACKFILL_HEARTBEAT_SECONDS', 0.01)
+    monkeypatch.setattr(backfill, 'claim_backfill_segment', lambda *args: {})
+    monkeypatch.setattr(backfill, 'renew_backfill_lease', lambda *args: False)
+    monkeypatch.setattr(backfill, 'scan_job_page', lambda *args: {'items': [JOB] * 4, 'last_key': {'PK': 'x'}})
+    saved, started = [], []
+
+    def slow_reanalysis(job, *args):
+        started.append(job)
+        time.sleep(0.2)
+        return 'unchanged'
+
+    monkeypatch.setattr(backfill, 'reanalyze_job', slow_reanalysis)
+    monkeypatch.setattr(backfill, 'save_backfill_checkpoint', lambda *args: saved.append(args) or True)
+    options = {'batch': False, 'rescrape': False, 'dry_run': False, 'page_size': 4, 'cost': new_cost()}
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        processed = backfill.run_segment('run', 0, 1, 'owner', 'v2', pool, options)
+
+    assert saved == []
+    # The job in flight finished; the rest were left to the next owner
+    assert len(started) == 1
+    assert processed['unchanged'] == 1
+
+
+def test_reanalysis_records_usage(monkeypatch):
+    def analyze(job_content, include_notes, usage):
+        usage.append({'model_id': 'claude-haiku-4-5', 'input_tokens': 1000, 'output_tokens': 100,
+                      'cache_read_tokens': 0, 'cache_write_tokens': 0})
+        return ANALYSIS if job_content['content'] else None
+
+    calls, writes = [], []
+    monkeypatch.setattr(backfill, 'analyze_job_content', analyze)
+    monkeypatch.setattr(backfill, 'record_llm_usage', lambda *args: calls.append(args) or True)
+    monkeypatch.setattr(backfill, 'update_job_enrichment', lambda *args, **kwargs: writes.append(args) or True)
+    monkeypatch.setattr(backfill, 'archive_posting', lambda job_content: None)
+
+    cost = new_cost()
+    monkeypatch.setattr(backfill, 'load_content', lambda job, rescrape: {'content': 'Engineer at Acme'})
+    assert backfill.reanalyze_job(JOB, 'v2', False, False, cost) == 'updated'
+    monkeypatch.setattr(backfill, 'load_content', lambda job, rescrape: {'content': ''})
+    assert backfill.reanalyze_job(JOB, 'v2', False, False, cost) == 'failed'
+
+    # Failed analyses are billed too
+    assert [(user_id, domain) for user_id, domain, _ in calls] == [('u', 'boards.example.com')] * 2
+    assert cost['cost_micros'] == 2 * calls[0][2]['cost_micros'] == 2 * 1500
+    assert writes[0][4]['llm_usage'] == calls[0][2]
+
+
+def test_batch_runs_stamp_the_batch_backend_version(monkeypatch):
+    local = LocalBatchBackend()
+    assert backfill.run_version() == analyzer.analysis_version()
+    assert backfill.run_version(local) == batch_analysis_version(local) != analyzer.analysis_version()
+
+    # Without tiered routing, a batch on the on-demand provider and model
+    # produces what an on-demand run would, so the versions agree
+    monkeypatch.setattr(analyzer, 'MODEL_ROUTING', 'off')
+    analyzer.analysis_version.cache_clear()
+    try:
+        assert backfill.run_version(AnthropicBatchBackend(client=object())) == analyzer.analysis_version()
+    finally:
+        monkeypatch.undo()
+        analyzer.analysis_version.cache_clear()
@@ -0,0 +1,229 @@
+import io
+import json
+
+import pytest
+
+import backfill
+import batch_analyzer
+from batch_analyzer import (
+    BATCH_REQUEST_OVERHEAD_BYTES, BedrockBatchBackend, LocalBatchBackend, PAD_RECORD_PREFIX,
+    analyze_in_batch, chunk_prompts, wait_for_batch
+)
+from usage import estimate_cost_micros
+
+ANALYSIS = json.dumps({'title': 'Engineer', 'company': 'Acme', 'location': 'Remote', 'tags': ['Python']})
+
+
+def posting(text='Senior engineer at Acme, remote'):
+    return {'content': text, 'title': 'Engineer'}
+
+
+def test_local_backend_round_trip():
+    backend = LocalBatchBackend(responder=lambda prompt: ANALYSIS)
+    analyses = analyze_in_batch({'a': posting(), 'b': posting()}, backend, poll_interval=0)
+    assert set(analyses) == {'a', 'b'}
+    assert analyses['a']['company'] == 'Acme'
+
+
+def test_fields_only_prompts_leave_out_notes():
+    prompts = []
+    backend = LocalBatchBackend(responder=lambda prompt: prompts.append(prompt) or ANALYSIS)
+    analyze_in_batch({'a': posting()}, backend, poll_interval=0, include_notes=False)
+    assert '"notes":' not in prompts[0]
+
+
+def test_failed_requests_and_empty_content():
+    backend = LocalBatchBackend(responder=lambda prompt: None)
+    analyses = analyze_in_batch({'a': posting(), 'empty': posting('')}, backend, poll_interval=0)
+    assert analyses == {'a': None}
+
+
+def test_contents_are_split_at_the_backend_limit():
+    backend = LocalBatchBackend(responder=lambda prompt: ANALYSIS, max_records=2)
+    contents = {f'job-{n}': posting() for n in range(5)}
+    analyses = analyze_in_batch(contents, backend, poll_interval=0)
+    assert len(backend.batches) == 3
+    assert set(analyses) == set(contents)
+
+
+def test_chunk_prompts_keeps_order():
+    chunks = chunk_prompts({str(n): 'x' for n in range(5)}, 2)
+    assert [list(chunk) for chunk in chunks] == [['0', '1'], ['2', '3'], ['4']]
+
+
+def test_chunk_prompts_splits_by_bytes():
+    request_bytes = 100 + BATCH_REQUEST_OVERHEAD_BYTES
+    chunks = chunk_prompts({str(n): 'x' * 100 for n in range(5)}, 100, max_bytes=2 * request_bytes)
+    assert [list(chunk) for chunk in chunks] == [['0', '1'], ['2', '3'], ['4']]
+
+
+def test_contents_are_split_at_the_backend_byte_limit():
+    backend = LocalBatchBackend(responder=lambda prompt: ANALYSIS, max_bytes=1)
+    analyses = analyze_in_batch({'a': posting(), 'b': posting()}, backend, poll_interval=0)
+    assert len(backend.batches) == 2
+    assert set(analyses) == {'a', 'b'}
+
+
+def test_usage_is_collected_per_request():
+    responses = iter([ANALYSIS, 'not json', None])
+    backend = LocalBatchBackend(responder=lambda prompt: next(responses),
+                                usage={'input_tokens': 1000, 'output_tokens': 200})
+    usage = {}
+    analyses = analyze_in_batch({c: posting() for c in 'abc'}, backend, poll_interval=0, usage=usage)
+
+    assert analyses['a']['company'] == 'Acme' and analyses['c'] is None
+    # The unparseable answer was still billed; the failed request was not
+    assert set(usage) == {'a', 'b'}
+    assert usage['a'] == [{'model_id': 'local', 'input_tokens': 1000, 'output_tokens': 200,
+                           'cache_read_tokens': 0, 'cache_write_tokens': 0, 'batch': True}]
+
+
+def test_batch_usage_is_priced_at_half_rate():
+    record = {'model_id': 'claude-sonnet-4-5', 'input_tokens': 1000, 'output_tokens': 1000}
+    assert estimate_cost_micros({**record, 'batch': True}) * 2 == estimate_cost_micros(record)
+
+
+def test_local_backend_rejects_oversized_batches():
+    with pytest.raises(ValueError):
+        LocalBatchBackend(max_records=1).submit({'a': 'x', 'b': 'y'})
+
+
+class FakeBody(io.BytesIO):
+    def iter_lines(self):
+        return iter(self.read().splitlines())
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key):
+        return {'Body': FakeBody(self.objects[Key])}
+
+
+class FakeBedrock:
+    def __init__(self, s3):
+        self.s3 = s3
+        self.jobs = {}
+
+    def create_model_invocation_job(self, jobName, roleArn, modelId, inputDataConfig, outputDataConfig):
+        arn = f'arn:aws:bedrock:us-east-1:123:model-invocation-job/{jobName}'
+        self.jobs[arn] = {'inputDataConfig': inputDataConfig, 'outputDataConfig': outputDataConfig}
+        return {'jobArn': arn}
+
+    def get_model_invocation_job(self, jobIdentifier):
+        return {**self.jobs[jobIdentifier], 'status': 'Completed'}
+
+    def complete(self, arn, text, usage=None):
+        """Write the output file the way Bedrock does"""
+        job = self.jobs[arn]
+        input_key = job['inputDataConfig']['s3InputDataConfig']['s3Uri'].split('/', 3)[3]
+        output_prefix = job['outputDataConfig']['s3OutputDataConfig']['s3Uri'].split('/', 3)[3]
+        lines = []
+        for line in self.s3.objects[input_key].decode('utf-8').splitlines():
+            record = json.loads(line)
+            model_output = {'content': [{'text': text}], 'usage': usage or {}}
+            lines.append(json.dumps({'recordId': record['recordId'], 'modelOutput': model_output}))
+        output_key = f"{output_prefix}{arn.split('/')[-1]}/{input_key.split('/')[-1]}.out"
+        self.s3.objects[output_key] = '\n'.join(lines).encode('utf-8')
+
+
+@pytest.fixture
+def bedrock_backend():
+    backend = BedrockBatchBackend(bucket='batch-bucket', role_arn='arn:aws:iam::123:role/batch')
+    backend.s3 = FakeS3()
+    backend.bedrock = FakeBedrock(backend.s3)
+    return backend
+
+
+def test_bedrock_pads_small_jobs_to_the_minimum(bedrock_backend, monkeypatch):
+    monkeypatch.setattr(batch_analyzer, 'BEDROCK_BATCH_MIN_RECORDS', 10)
+    arn = bedrock_backend.submit({'a': 'prompt a', 'b': 'prompt b'})
+
+    (body,) = bedrock_backend.s3.objects.values()
+    records = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+    assert len(records) == 10
+    padding = [r for r in records if r['recordId'].startswith(PAD_RECORD_PREFIX)]
+    assert len(padding) == 8
+    assert all(r['modelInput']['max_tokens'] == 1 for r in padding)
+
+    bedrock_backend.bedrock.complete(arn, ANALYSIS, usage={'input_tokens': 900, 'output_tokens': 150})
+    results = bedrock_backend.results(arn)
+    assert set(results) == {'a', 'b'}
+    text, usage = results['a']
+    assert text == ANALYSIS
+    assert usage['model_id'] == bedrock_backend.model_id
+    assert (usage['input_tokens'], usage['output_tokens'], usage['batch']) == (900, 150, True)
+
+
+def test_bedrock_large_jobs_are_split(bedrock_backend, monkeypatch):
+    monkeypatch.setattr(batch_analyzer, 'BEDROCK_BATCH_MIN_RECORDS', 1)
+    monkeypatch.setattr(bedrock_backend, 'max_records', 2)
+    with pytest.raises(ValueError):
+        bedrock_backend.submit({'a': 'x', 'b': 'y', 'c': 'z'})
+
+    submitted = []
+    original_submit = bedrock_backend.submit
+
+    def submit(prompts):
+        arn = original_submit(prompts)
+        bedrock_backend.bedrock.complete(arn, ANALYSIS)
+        submitted.append(arn)
+        return arn
+
+    monkeypatch.setattr(bedrock_backend, 'submit', submit)
+    analyses = analyze_in_batch({c: posting() for c in 'abc'}, bedrock_backend, poll_interval=0)
+    assert len(submitted) == 2
+    assert set(analyses) == {'a', 'b', 'c'}
+
+
+class PendingBackend(LocalBatchBackend):
+    """A batch that never finishes"""
+
+    def is_done(self, batch_id):
+        return False
+
+
+def test_abandoned_batches_are_cancelled():
+    backend = PendingBackend()
+    batch_id = backend.submit({'a': 'prompt'})
+    assert not wait_for_batch(batch_id, backend, poll_interval=0, timeout=0)
+    assert backend.cancelled == [batch_id]
+
+    batch_id = backend.submit({'a': 'prompt'})
+    assert not wait_for_batch(batch_id, backend, poll_interval=0, timeout=3600, should_stop=lambda: True)
+    assert backend.cancelled[-1] == batch_id
+
+
+def test_backfill_batch_page(monkeypatch):
+    responses = iter([ANALYSIS, 'not json'])
+    monkeypatch.setattr(batch_analyzer, 'get_batch_backend',
+                        lambda name=None: LocalBatchBackend(responder=lambda prompt: next(responses),
+                                                            usage={'input_tokens': 2000, 'output_tokens': 300}))
+    monkeypatch.setattr(backfill, 'load_content', lambda job, rescrape: posting() if job['job_id'] != 'none' else None)
+    writes, usage = [], []
+    monkeypatch.setattr(backfill, 'update_job_enrichment',
+                        lambda *args, **kwargs: writes.append(args) or True)
+    monkeypatch.setattr(backfill, 'record_llm_usage', lambda *args: usage.append(args) or True)
+
+    jobs = [
+        {'user_id': 'u', 'job_id': 'ok', 'applied_ts': 't', 'enrichment_status': 'analyzed', 'company': 'Old'},
+        {'user_id': 'u', 'job_id': 'bad', 'applied_ts': 't', 'enrichment_status': 'analyzed'},
+        {'user_id': 'u', 'job_id': 'none', 'applied_ts': 't', 'enrichment_status': 'analyzed'},
+        {'user_id': 'u', 'job_id': 'busy', 'applied_ts': 't', 'enrichment_status': 'captured'},
+    ]
+    options = {'rescrape': False, 'dry_run': False, 'cost': {'cost_micros': 0, 'lock': backfill.threading.Lock()}}
+    with backfill.ThreadPoolExecutor(max_workers=2) as pool:
+        outcomes = backfill.reanalyze_page_in_batch(jobs, 'v2', pool, options)
+
+    assert outcomes == ['updated', 'failed', 'no_content', 'skipped']
+    assert len(writes) == 1
+    assert writes[0][4]['company'] == 'Acme'
+    assert writes[0][4]['analysis_version'] == 'v2'
+    assert writes[0][4]['llm_usage']['input_tokens'] == 2000
+    # Both answered requests were billed, the unparseable one included
+    assert sorted(call[0] for call in usage) == ['u', 'u']
+    assert options['cost']['cost_micros'] == sum(call[2]['cost_micros'] for call in usage) > 0
@@ -0,0 +1,112 @@
+"""
+Route I/O budgets (capacity.ROUTE_IO_BUDGETS) for a realistic user:
+every route is metered end to end with DynamoDB-priced units
+"""
+
+import json
+import random
+import pytest
+from capacity import capacity_scope, assert_within_budget
+
+USER_ID = 'u1'
+# A heavy job search: the 2,500-job history the route budgets are sized
+# for (get_stats reads it in three query pages), most from job boards
+JOB_COUNT = 2500
+STATUSES = ['Captured', 'Applied', 'Applied', 'Interview', 'Rejected', 'Offer']
+TAGS = ['python', 'aws', 'react', 'typescript', 'kubernetes', 'remote', 'go', 'sql', 'terraform', 'ml']
+
+
+def analyzed(rng, i):
+    company = f'Company {i % 120}'
+    return {
+        'title': rng.choice(['Senior Software Engineer', 'Backend Engineer', 'Platform Engineer', 'Data Engineer']),
+        'company': company,
+        'location': rng.choice(['Remote', 'New York, NY', 'Toronto, ON', 'Berlin, Germany']),
+        'salary_range': f'${rng.randint(90, 160)},000 - ${rng.randint(161, 240)},000 per year',
+        'employment_type': 'Full-time',
+        'source': rng.choice(['LinkedIn', 'Indeed', 'Greenhouse', 'Company Website']),
+        'tags': rng.sample(TAGS, 2),
+        'notes': (f'{company} is hiring for a team that owns its services end to end. The role involves '
+                  'designing APIs, running production systems and mentoring. Benefits include equity, '
+                  'a learning budget and flexible hours; the process has four interview rounds.')
+    }
+
+
+@pytest.fixture
+def seeded(consumed_capacity):
+    db = consumed_capacity
+    rng = random.Random(7)
+    items = []
+    for i in range(JOB_COUNT):
+        month, day = 1 + i * 12 // JOB_COUNT, 1 + i % 28
+        items.append(db.create_job_item(
+            USER_ID, f'https://boards.example.com/jobs/{i}', analyzed(rng, i), status=rng.choice(STATUSES),
+            applied_ts=f'2025-{month:02d}-{day:02d}T{i % 24:02d}:00:00+00:00'
+        ))
+    assert len(db.put_imported_jobs(items)[0]) == JOB_COUNT
+    db.finish_job_import(USER_ID, {})
+    return db, items
+
+
+def request(method, path, params=None, body=None):
+    return {
+        'httpMethod': method,
+        'path': path,
+        'queryStringParameters': params,
+        'body': json.dumps(body) if body is not None else None,
+        'requestContext': {'authorizer': {'claims': {'sub': USER_ID}}}
+    }
+
+
+def metered(event):
+    from router import get_route_handler
+    from lambda_function import call_handler
+    route = get_route_handler(event)
+    with capacity_scope(route, USER_ID) as meter:
+        response = call_handler(route, event, None)
+    assert response['statusCode'] < 300, response['body']
+    return meter
+
+
+def within_budget(event):
+    meter = metered(event)
+    assert_within_budget(meter)
+    return meter
+
+
+def test_read_routes_stay_within_budget(seeded):
+    db, items = seeded
+    job = items[JOB_COUNT // 2]
+
+    stats = within_budget(request('GET', '/api/stats'))
+    # Full items are charged although the query is projected
+    assert stats.read_units > JOB_COUNT * 0.8 / 4 * 0.5
+    # Cached until the next write: only the version stamp is read
+    assert within_budget(request('GET', '/api/stats')).operations == {'GetItem': 1}
+
+    within_budget(request('GET', '/api/jobs'))
+    within_budget(request('GET', '/api/jobs', {'page': '7', 'limit': '20'}))
+    within_budget(request('GET', '/api/jobs', {'status': 'Applied'}))
+    within_budget(request('GET', '/api/jobs', {'tag': 'python'}))
+    within_budget(request('GET', '/api/jobs/search', {'q': 'platform python'}))
+    within_budget(request('GET', f"/api/jobs/{job['job_id']}", {'applied_ts': job['applied_ts']}))
+    within_budget(request('GET', '/api/analytics/funnel'))
+    within_budget(request('GET', '/api/usage'))
+
+
+def test_write_routes_stay_within_budget(seeded, monkeypatch):
+    import processor
+    db, items = seeded
+    job = items[JOB_COUNT // 2]
+    key = {'applied_ts': job['applied_ts']}
+
+    within_budget(request('PUT', f"/api/jobs/{job['job_id']}", key, {'status': 'Interview', 'tags': ['python', 'go']}))
+    within_budget(request('DELETE', f"/api/jobs/{job['job_id']}", key))
+
+    posting = {'content': 'Backend Engineer at Acme. Remote. Python, AWS.', 'title': 'Backend Engineer', 'description': ''}
+    monkeypatch.setattr(processor, 'scrape_job', lambda url: posting)
+    monkeypatch.setattr(processor, 'archive_posting', lambda job_content: None)
+    monkeypatch.setattr(processor, 'analyze_with_bedrock', lambda *args, **kwargs: analyzed(random.Random(1), 0))
+    ingest = within_budget(request('POST', '/api/jobs/ingest', body={'url': 'https://boards.example.com/jobs/new'}))
+    assert ingest.write_units > 0
+
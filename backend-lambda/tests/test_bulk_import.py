@@ -0,0 +1,111 @@
+"""
+bulk_import.py: row parsing and re-runnable imports
+"""
+
+import io
+import csv
+import json
+from botocore.exceptions import ClientError
+from capacity import capacity_scope
+from bulk_import import map_columns, parse_date, parse_row, import_jobs
+
+HEADER = ['Company', 'Job Title', 'Status', 'Date Applied', 'Link', 'Tags', 'Notes']
+COLUMNS = map_columns(HEADER)
+
+
+def row(company='Acme', title='Engineer', status='Applied', date='2026-03-01', link='', tags='', notes=''):
+    return [company, title, status, date, link, tags, notes]
+
+
+def test_map_columns_uses_header_aliases():
+    assert map_columns(['Employer', 'Position', 'Position', 'Unknown', 'URL']) == {0: 'company', 1: 'title', 4: 'job_url'}
+
+
+def test_parse_date_formats():
+    assert parse_date('2026-03-01') == '2026-03-01T00:00:00+00:00'
+    assert parse_date('03/01/2026') == '2026-03-01T00:00:00+00:00'
+    assert parse_date('Mar 1, 2026') == '2026-03-01T00:00:00+00:00'
+    assert parse_date('2026-03-01T09:30:00-05:00') == '2026-03-01T14:30:00+00:00'
+    assert parse_date('last week') is None
+
+
+def test_parse_row_maps_fields():
+    fields, error = parse_row(row(status='Phone screen', tags='python; aws,,go', notes='Referred\x07 by Sam'), COLUMNS)
+    assert error is None
+    assert fields['status'] == 'Interview'
+    assert fields['tags'] == ['python', 'aws', 'go']
+    assert fields['notes'] == 'Referred by Sam'
+    assert fields['applied_ts'] == '2026-03-01T00:00:00+00:00'
+    # Unknown wording counts as Applied
+    assert parse_row(row(status='???'), COLUMNS)[0]['status'] == 'Applied'
+
+
+def test_parse_row_rejects_unusable_rows():
+    assert parse_row(['', '', '', '', '', '', ''], COLUMNS) == (None, None)
+    assert parse_row(row(title=''), COLUMNS)[1] == 'needs a URL, or both company and title'
+    assert parse_row(row(date='someday'), COLUMNS)[1] == 'unrecognized date: someday'
+    assert parse_row(row(link='ftp://example.com/job'), COLUMNS)[1].startswith('invalid URL')
+    # Short rows are padded with blanks
+    assert parse_row(['Acme', 'Engineer'], COLUMNS)[0]['status'] == 'Applied'
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([HEADER] + rows)
+    return io.StringIO(buffer.getvalue(), newline='')
+
+
+def test_overlapping_rerun_skips_stored_jobs(dynamodb):
+    rows = [row(company=f'Company {i}', date=f'2026-03-{i + 1:02d}') for i in range(4)]
+    first = import_jobs('u1', csv_lines(rows[:3]))
+    assert (first['imported'], first['duplicates']) == (3, 0)
+
+    rerun = import_jobs('u1', csv_lines(rows), start_row=1)
+    assert (rerun['imported'], rerun['duplicates']) == (1, 2)
+    funnel = {stage['stage']: stage['reached'] for stage in dynamodb.get_funnel('u1')['funnel']}
+    assert funnel['Applied'] == 4
+
+
+def test_jobs_are_written_in_batches(dynamodb):
+    items = [dynamodb.create_job_item('u1', '', {'company': 'Acme', 'title': f'Role {i}', 'tags': ['python']},
+                                      applied_ts=f'2026-03-{i + 1:02d}') for i in range(30)]
+    with capacity_scope('bulk_import') as meter:
+        written, existing = dynamodb.put_imported_jobs(items)
+    assert (len(written), existing) == (30, 0)
+    # 30 jobs with a tag pointer and a status event each: 90 items, 25 per call
+    assert meter.operations == {'BatchGetItem': 2, 'BatchWriteItem': 5}
+
+    written, existing = dynamodb.put_imported_jobs(items[25:] + [dynamodb.create_job_item(
+        'u1', '', {'company': 'Acme', 'title': 'Role 30'}, applied_ts='2026-03-31')])
+    assert (len(written), existing) == (1, 5)
+
+
+def test_jobs_of_a_failed_batch_are_removed(dynamodb, monkeypatch):
+    class FailingWriter:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            raise ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'boom'}}, 'BatchWriteItem')
+
+        def put_item(self, Item):
+            pass
+
+    items = [dynamodb.create_job_item('u1', '', {'company': 'Acme', 'title': f'Role {i}'}, applied_ts=f'2026-03-0{i + 1}')
+             for i in range(2)]
+    monkeypatch.setattr(dynamodb.table, 'batch_writer', FailingWriter)
+    assert dynamodb.put_imported_jobs(items) == ([], 0)
+    assert dynamodb.get_job('u1', items[0]['job_id'], items[0]['applied_ts']) is None
+
+
+def test_import_handler_keeps_multiline_cells(dynamodb):
+    import handlers
+    body = 'Company,Job Title,Date Applied,Notes\r\nAcme,Engineer,2026-03-01,"Line one\nline two"\r\n'
+    response = handlers.handle_import_jobs({
+        'body': body,
+        'requestContext': {'authorizer': {'claims': {'sub': 'u1'}}}
+    }, None)
+    assert response['statusCode'] == 201
+    summary = json.loads(response['body'])['import']
+    assert (summary['imported'], summary['invalid']) == (1, 0)
+    assert [job['notes'] for job in dynamodb.iter_user_jobs('u1')] == ['Line one\nline two']
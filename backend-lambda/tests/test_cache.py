@@ -0,0 +1,80 @@
+"""
+cache.py and the search index cache: versioning, bounds, isolation and
+concurrent use from request threads
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from cache import ReadCache, estimate_size
+from search_index import SearchIndex, SearchIndexCache
+
+
+def test_entries_are_tied_to_the_version():
+    cache = ReadCache()
+    cache.put('u1', 'jobs', 3, {'items': [1]})
+    assert cache.get('u1', 'jobs', 3) == {'items': [1]}
+    assert cache.get('u1', 'jobs', 4) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_values_are_copied_in_and_out():
+    cache = ReadCache()
+    value = {'items': [{'job_id': 'a'}]}
+    cache.put('u1', 'jobs', 1, value)
+    value['items'].append({'job_id': 'b'})
+    cache.get('u1', 'jobs', 1)['items'].clear()
+    assert cache.get('u1', 'jobs', 1) == {'items': [{'job_id': 'a'}]}
+
+
+def test_eviction_by_entries_and_bytes():
+    cache = ReadCache(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.put('u1', key, 1, key)
+    assert cache.get('u1', 'a', 1) is None and cache.get('u1', 'c', 1) == 'c'
+
+    value = 'x' * 100
+    cache = ReadCache(max_bytes=2 * estimate_size(value))
+    for key in ('a', 'b', 'c'):
+        cache.put('u1', key, 1, value)
+    assert cache.stats()['entries'] == 2 and cache.stats()['bytes'] <= cache.max_bytes
+
+    cache.put('u1', 'huge', 1, 'x' * 1000)
+    assert cache.get('u1', 'huge', 1) is None
+
+
+def test_invalidate_drops_only_that_user():
+    cache = ReadCache()
+    cache.put('u1', 'jobs', 1, 1)
+    cache.put('u2', 'jobs', 1, 2)
+    cache.invalidate('u1')
+    assert cache.get('u1', 'jobs', 1) is None and cache.get('u2', 'jobs', 1) == 2
+    assert cache.stats()['bytes'] == estimate_size(2)
+
+
+def test_concurrent_use_keeps_the_accounting_consistent():
+    cache = ReadCache(max_entries=50)
+
+    def work(n):
+        for i in range(300):
+            user = f'u{(n + i) % 7}'
+            cache.put(user, i % 60, 1, {'n': i})
+            cache.get(user, (i + 1) % 60, 1)
+            if i % 25 == 0:
+                cache.invalidate(user)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(work, range(32)))
+    stats = cache.stats()
+    assert stats['entries'] <= 50
+    assert stats['bytes'] == sum(entry[1] for entry in cache._entries.values())
+
+
+def test_search_index_cache_is_bounded_lru():
+    cache = SearchIndexCache(max_users=2)
+    first, second, third = SearchIndex(), SearchIndex(), SearchIndex()
+    cache.put('u1', first)
+    cache.put('u2', second)
+    assert cache.get('u1') is first
+    cache.put('u3', third)
+    assert cache.get('u2') is None and cache.get('u1') is first
+    cache.invalidate('u1')
+    assert cache.get('u1') is None
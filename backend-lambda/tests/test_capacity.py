@@ -0,0 +1,75 @@
+"""
+capacity.py: item sizing, per-call recording and budget checks
+"""
+
+import threading
+import contextvars
+import pytest
+from capacity import (
+    attribute_size, item_size, consumed_units, record_call, check_budget, assert_within_budget,
+    capacity_scope, current_meter
+)
+
+
+def test_item_size_follows_dynamodb_rules():
+    assert attribute_size({'S': 'héllo'}) == 6
+    assert attribute_size({'N': '12345'}) == 4
+    assert attribute_size({'N': '-1.5'}) == 2
+    assert attribute_size({'BOOL': True}) == 1
+    assert attribute_size({'SS': ['ab', 'c']}) == 3
+    assert attribute_size({'L': [{'S': 'ab'}, {'NULL': True}]}) == 3 + 3 + 2
+    assert attribute_size({'M': {'k': {'S': 'v'}}}) == 3 + 1 + 1 + 1
+    assert item_size({'PK': {'S': 'USER#1'}, 'n': {'N': '7'}}) == 2 + 6 + 1 + 2
+
+
+def test_consumed_units_accepts_entries_and_lists():
+    assert consumed_units(None) == 0
+    assert consumed_units({'CapacityUnits': 1.5}) == 1.5
+    assert consumed_units([{'CapacityUnits': 1}, {'CapacityUnits': 2.5}]) == 3.5
+
+
+def test_record_call_attributes_reads_and_writes():
+    item = {'PK': {'S': 'USER#1'}, 'SK': {'S': 'JOB#1'}}
+    with capacity_scope('get_job') as meter:
+        record_call('GetItem', {}, {'Item': item, 'ConsumedCapacity': {'CapacityUnits': 0.5}})
+        record_call('BatchGetItem', {}, {'Responses': {'T': [item, item]}, 'ConsumedCapacity': [{'CapacityUnits': 1}]})
+        record_call('PutItem', {'Item': item}, {'ConsumedCapacity': {'CapacityUnits': 1}})
+        record_call('BatchWriteItem', {'RequestItems': {'T': [{'PutRequest': {'Item': item}}, {'DeleteRequest': {'Key': item}}]}},
+                    {'ConsumedCapacity': [{'CapacityUnits': 2}]})
+        record_call('TransactWriteItems', {'TransactItems': [{'Put': {'Item': item}}, {'Update': {'Key': item}}]},
+                    {'ConsumedCapacity': [{'CapacityUnits': 4}]})
+
+    totals = meter.to_dict()
+    assert totals['calls'] == 5
+    assert (totals['read_units'], totals['write_units']) == (1.5, 7.0)
+    assert (totals['items_read'], totals['bytes_read']) == (3, 3 * item_size(item))
+    assert (totals['items_written'], totals['bytes_written']) == (5, 3 * item_size(item))
+    assert totals['operations']['BatchWriteItem'] == 1
+
+
+def test_calls_outside_a_scope_are_not_recorded():
+    assert current_meter.get() is None
+    record_call('GetItem', {}, {'ConsumedCapacity': {'CapacityUnits': 1}})
+
+
+def test_worker_threads_need_the_callers_context():
+    with capacity_scope('search_jobs') as meter:
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(record_call, 'Query', {}, {'Items': []}))
+        worker.start()
+        worker.join()
+    assert meter.operations == {'Query': 1}
+
+
+def test_budgets_list_every_exceeded_limit():
+    budgets = {'get_jobs': {'calls': 1, 'read_units': 1, 'write_units': 0}}
+    with capacity_scope('get_jobs') as meter:
+        record_call('Query', {}, {'ConsumedCapacity': {'CapacityUnits': 2}})
+    assert check_budget(meter, budgets) == ['get_jobs: read_units 2.0 > 1']
+    assert_within_budget(meter, {'other': {'calls': 0}})
+
+    with capacity_scope('get_jobs') as meter:
+        for _ in range(2):
+            record_call('Query', {}, {'ConsumedCapacity': {'CapacityUnits': 2}})
+    with pytest.raises(AssertionError, match='calls 2 > 1; get_jobs: read_units 4.0 > 1'):
+        assert_within_budget(meter, budgets)
@@ -0,0 +1,184 @@
+"""
+db.py against an in-memory table: job writes, their derived items and
+the filtered list queries
+"""
+
+import pytest
+
+from capacity import capacity_scope
+from pagination import make_scope, encode_cursor, decode_cursor, position_from_key
+
+
+def test_put_job_writes_derived_items_in_one_transaction(dynamodb):
+    item = dynamodb.create_job_item(
+        'u1', 'https://example.com/jobs/1', {'company': 'Acme', 'title': 'Engineer', 'tags': ['Python', 'remote']},
+        status='Captured', enrichment_status='captured'
+    )
+    with capacity_scope('job_ingest') as meter:
+        assert dynamodb.put_job(item)
+
+    assert meter.operations == {'TransactWriteItems': 1}
+
+    pk = {':pk': 'USER#u1'}
+    sks = [i['SK'] for i in dynamodb.table.query(
+        KeyConditionExpression='PK = :pk', ExpressionAttributeValues=pk
+    )['Items']]
+    assert f"JOB#{item['applied_ts']}#{item['job_id']}" in sks
+    assert f"TAG#python#{item['applied_ts']}#{item['job_id']}" in sks
+    assert f"TAG#remote#{item['applied_ts']}#{item['job_id']}" in sks
+    assert f"EVENT#{item['applied_ts']}#{item['job_id']}" in sks
+    funnel = {stage['stage']: stage['reached'] for stage in dynamodb.get_funnel('u1')['funnel']}
+    assert funnel['Captured'] == 1
+    assert dynamodb.get_user_version('u1')['version'] == 1
+
+
+def test_put_job_rejects_an_existing_job(dynamodb):
+    item = dynamodb.create_job_item('u1', 'https://example.com/jobs/1', {}, enrichment_status='captured')
+    assert dynamodb.put_job(item)
+    assert not dynamodb.put_job(item)
+    assert dynamodb.get_user_version('u1')['version'] == 1
+
+
+def test_failed_enrichment_is_conditional_and_indexes_the_placeholder(dynamodb):
+    item = dynamodb.create_job_item('u1', 'https://example.com/jobs/1', {'title': 'Platform Engineer'},
+                                    enrichment_status='captured')
+    dynamodb.put_job(item)
+    job = (item['user_id'], item['job_id'], item['applied_ts'])
+
+    # Another run already moved the job on: a stale failure is discarded
+    assert not dynamodb.update_job_enrichment(*job, 'failed', {'enrichment_error': 'scraping'}, expected_status='scraped')
+    assert dynamodb.get_job(*job)['enrichment_status'] == 'captured'
+
+    assert dynamodb.update_job_enrichment(*job, 'failed', {'enrichment_error': 'scraping'}, expected_status='captured')
+    assert [j['job_id'] for j in dynamodb.search_user_jobs('u1', 'platform')] == [item['job_id']]
+
+
+def put_jobs(db, user_id, timestamps):
+    items = [db.create_job_item(user_id, f'https://example.com/jobs/{i}', {}, applied_ts=ts) for i, ts in enumerate(timestamps)]
+    for item in items:
+        assert db.put_job(item)
+    return sorted(db.make_doc_ref(item['applied_ts'], item['job_id']) for item in items)
+
+
+def test_page_jumps_read_one_month_of_shards(dynamodb):
+    timestamps = [f'2026-{month:02d}-{day:02d}T10:00:00+00:00' for month in (1, 2, 3) for day in range(1, 6)]
+    positions = put_jobs(dynamodb, 'u1', timestamps)
+    newest_first = positions[::-1]
+
+    stamp = dynamodb.get_user_version('u1')
+    assert stamp['pages'] == {'2026-01': 5, '2026-02': 5, '2026-03': 5}
+    assert dynamodb.get_page_start('u1', 1, 4) is None
+    for page in (2, 3, 4):
+        assert dynamodb.get_page_start('u1', page, 4) == newest_first[(page - 1) * 4 - 1]
+    # Past the end: start after the oldest job
+    assert dynamodb.get_page_start('u1', 9, 4) == positions[0]
+
+    with capacity_scope('get_jobs') as meter:
+        dynamodb.get_page_start('u1', 3, 4, dynamodb.get_user_version('u1'))
+    assert meter.operations == {'GetItem': 1, 'Query': 1}
+
+
+def test_delete_and_rebuild_keep_counts_exact(dynamodb):
+    positions = put_jobs(dynamodb, 'u1', ['2026-01-01T00:00:00+00:00', '2026-02-01T00:00:00+00:00'])
+    applied_ts, job_id = positions[0].rsplit('#', 1)
+    assert dynamodb.delete_job('u1', job_id, applied_ts)
+    assert dynamodb.delete_job('u1', job_id, applied_ts)
+    assert dynamodb.get_user_version('u1')['pages'] == {'2026-01': 0, '2026-02': 1}
+
+    assert dynamodb.rebuild_page_index('u1') == 1
+    assert dynamodb.get_user_version('u1')['pages'] == {'2026-02': 1}
+    assert dynamodb.get_page_start('u1', 2, 1) == positions[1]
+
+
+def test_stats_read_every_page(dynamodb, monkeypatch):
+    for i in range(5):
+        item = dynamodb.create_job_item('u1', f'https://example.com/jobs/{i}',
+                                        {'company': 'Acme', 'salary_range': f'${100 + i * 10}k'})
+        dynamodb.put_job(item)
+
+    query = dynamodb.table.query
+    monkeypatch.setattr(dynamodb.table, 'query', lambda **params: query(**params, Limit=2))
+    stats = dynamodb.get_user_job_stats('u1')
+    assert stats['total_jobs'] == 5
+    assert stats['salary_distribution']['USD']['count'] == 5
+
+
+def seed_filter_jobs(db):
+    """Five jobs around 2025-03-01 (UTC) with mixed companies, statuses and tags"""
+    jobs = {
+        'j1': ('2025-03-01T10:00:00+00:00', 'Acme', 'Applied', ['Python']),
+        'j2': ('2025-03-01T12:00:00+00:00', 'Acme', 'Interview', ['Python', 'Remote']),
+        'j3': ('2025-03-01T14:00:00+00:00', 'Globex', 'Applied', ['python']),
+        'j4': ('2025-03-02T09:00:00+00:00', 'Acme', 'Applied', ['Go']),
+        'j5': ('2025-02-28T23:00:00+00:00', 'Globex', 'Interview', []),
+    }
+    labels = {}
+    for label, (applied_ts, company, status, tags) in jobs.items():
+        item = db.create_job_item('u1', f'https://example.com/jobs/{label}', {'company': company, 'tags': tags},
+                                  status=status, applied_ts=applied_ts)
+        assert db.put_job(item)
+        labels[item['job_id']] = label
+    return labels
+
+
+def filtered(db, labels, limit=50, **filters):
+    result = db.query_user_jobs('u1', limit, **filters)
+    return [labels[item['job_id']] for item in result['items']], result.get('last_key')
+
+
+def test_filters_use_their_index_newest_first(dynamodb):
+    labels = seed_filter_jobs(dynamodb)
+    assert filtered(dynamodb, labels, tag='PYTHON')[0] == ['j3', 'j2', 'j1']
+    assert filtered(dynamodb, labels, company='Acme')[0] == ['j4', 'j2', 'j1']
+    assert filtered(dynamodb, labels, status='Applied')[0] == ['j4', 'j3', 'j1']
+    assert filtered(dynamodb, labels, date_from='2025-03-01', date_to='2025-03-01')[0] == ['j3', 'j2', 'j1']
+
+
+def test_residual_filters_narrow_the_index_result(dynamodb):
+    labels = seed_filter_jobs(dynamodb)
+    assert filtered(dynamodb, labels, tag='python', company='Acme')[0] == ['j2', 'j1']
+    assert filtered(dynamodb, labels, tag='python', status='Applied')[0] == ['j3', 'j1']
+    assert filtered(dynamodb, labels, company='Acme', status='Applied')[0] == ['j4', 'j1']
+    assert filtered(dynamodb, labels, status='Interview', date_from='2025-03-01')[0] == ['j2']
+    assert filtered(dynamodb, labels, fields=['title'], tag='remote', company='Acme', status='Interview')[0] == ['j2']
+
+
+def test_date_bounds_are_compared_in_utc(dynamodb):
+    labels = seed_filter_jobs(dynamodb)
+    assert dynamodb.normalize_date_bound('2025-03-01T08:00:00-05:00') == '2025-03-01T13:00:00+00:00'
+    assert dynamodb.normalize_date_bound('2025-03-01T12:00:00Z') == '2025-03-01T12:00:00+00:00'
+    assert dynamodb.normalize_date_bound('2025-03-01T12:00:00') == '2025-03-01T12:00:00+00:00'
+    assert dynamodb.normalize_date_bound('2025-03-01') == '2025-03-01'
+
+    # 08:00 at -05:00 is 13:00 UTC, so the 12:00 UTC job is in range
+    assert filtered(dynamodb, labels, date_from='2025-03-01', date_to='2025-03-01T08:00:00-05:00')[0] == ['j2', 'j1']
+    assert filtered(dynamodb, labels, date_from='2025-03-01T12:00:00Z')[0] == ['j4', 'j3', 'j2']
+    assert filtered(dynamodb, labels, tag='python', date_to='2025-03-01T06:00:00-05:00')[0] == ['j1']
+    assert filtered(dynamodb, labels, date_to='2025-02-28T19:00:00-05:00')[0] == ['j5']
+
+
+def test_cursors_resume_within_their_filter_scope(dynamodb):
+    labels = seed_filter_jobs(dynamodb)
+    for filters in ({'status': 'Applied'}, {'tag': 'python'}, {'company': 'Acme'}):
+        first, last_key = filtered(dynamodb, labels, limit=2, **filters)
+        scope = make_scope(**filters)
+        cursor = encode_cursor('u1', position_from_key(last_key), scope)
+        position = decode_cursor('u1', cursor, scope)
+        rest, _ = filtered(dynamodb, labels, last_key=dynamodb.make_start_key('u1', position, **filters), **filters)
+
+        assert first + rest == filtered(dynamodb, labels, **filters)[0]
+        assert len(first) == 2 and rest
+        with pytest.raises(ValueError):
+            decode_cursor('u1', cursor, make_scope(status='Interview'))
+
+
+
+def test_backfill_scan_pages_stale_jobs(dynamodb):
+    item = dynamodb.create_job_item('u1', 'https://example.com/jobs/1', {'company': 'Acme', 'location': 'Remote'})
+    item.update({'analysis_version': 'v1', 'content_hash': 'ab' * 32})
+    assert dynamodb.put_job(item)
+    page = dynamodb.scan_job_page(0, 1, stale_version='v2')
+    assert [(job['job_id'], job['location']) for job in page['items']] == [(item['job_id'], 'Remote')]
+    # Backfill reads the posting back from the archive by this key
+    assert page['items'][0]['content_hash'] == 'ab' * 32
+    assert dynamodb.scan_job_page(0, 1, stale_version='v1')['items'] == []
@@ -0,0 +1,93 @@
+"""
+dynamo.py: attribute marshalling and batch retries
+"""
+
+from decimal import Decimal
+import pytest
+from botocore.exceptions import ClientError
+import dynamo
+from dynamo import FastTable, serialize_item, deserialize_item, serialize_value, deserialize_value
+
+
+def test_item_round_trip():
+    item = {
+        'PK': 'USER#u1', 'SK': 'JOB#1', 'salary_min': 120000, 'ratio': 0.25, 'remote': True,
+        'tags': ['a', 'b'], 'stage_ts': {'Applied': '2026-01-01'}, 'data_gz': b'\x1f\x8b', 'notes': None,
+        'positions': {'x', 'y'}
+    }
+    assert deserialize_item(serialize_item(item)) == item
+
+
+def test_numbers_keep_their_precision():
+    assert deserialize_value({'N': '42'}) == 42
+    assert deserialize_value({'N': '1.50'}) == 1.5
+    assert deserialize_value({'N': '2E+3'}) == 2000
+    assert deserialize_value({'N': '1e-7'}) == 1e-7
+    # More digits than a float holds: stays exact
+    precise = deserialize_value({'N': '0.12345678901234567890123'})
+    assert precise == Decimal('0.12345678901234567890123')
+    assert serialize_value(precise) == {'N': '0.12345678901234567890123'}
+    assert deserialize_item({'salary_min': {'N': '123456789012345678.5'}})['salary_min'] == Decimal('123456789012345678.5')
+
+
+def test_empty_sets_are_rejected():
+    with pytest.raises(ValueError):
+        serialize_item({'positions': set()})
+
+
+class FlakyClient:
+    """batch_* calls that leave `stuck` entries unprocessed for `rounds` calls"""
+
+    def __init__(self, rounds, stuck=1):
+        self.rounds = rounds
+        self.stuck = stuck
+        self.calls = 0
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self.calls += 1
+        (name, requests), = RequestItems.items()
+        left = requests[:self.stuck] if self.calls <= self.rounds else []
+        return {'UnprocessedItems': {name: left} if left else {}}
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self.calls += 1
+        (name, request), = RequestItems.items()
+        keys = request['Keys']
+        if self.calls <= self.rounds:
+            return {'Responses': {name: keys[self.stuck:]}, 'UnprocessedKeys': {name: {**request, 'Keys': keys[:self.stuck]}}}
+        return {'Responses': {name: keys}, 'UnprocessedKeys': {}}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(dynamo.time, 'sleep', delays.append)
+    return delays
+
+
+def test_unprocessed_items_are_retried_with_capped_backoff(sleeps):
+    client = FlakyClient(rounds=3)
+    with FastTable(client, 'T').batch_writer() as batch:
+        batch.put_item(Item={'PK': 'a', 'SK': 'b'})
+    assert client.calls == 4
+    assert len(sleeps) == 3
+    assert all(0 <= delay <= min(dynamo.BATCH_BACKOFF_MAX, dynamo.BATCH_BACKOFF_BASE * 2 ** i) for i, delay in enumerate(sleeps))
+
+
+def test_batch_writes_give_up_after_max_attempts(sleeps):
+    client = FlakyClient(rounds=100)
+    with pytest.raises(ClientError) as error:
+        with FastTable(client, 'T').batch_writer() as batch:
+            batch.put_item(Item={'PK': 'a', 'SK': 'b'})
+    assert error.value.response['Error']['Code'] == 'UnprocessedItems'
+    assert client.calls == dynamo.BATCH_MAX_ATTEMPTS + 1
+
+
+def test_unprocessed_keys_are_retried(sleeps):
+    client = FlakyClient(rounds=2)
+    items = FastTable(client, 'T').batch_get([{'PK': 'a', 'SK': '1'}, {'PK': 'a', 'SK': '2'}])
+    assert sorted(item['SK'] for item in items) == ['1', '2']
+    assert len(sleeps) == 2
+
+    with pytest.raises(ClientError):
+        FastTable(FlakyClient(rounds=100), 'T').batch_get([{'PK': 'a', 'SK': '1'}])
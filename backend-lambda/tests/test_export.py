@@ -0,0 +1,59 @@
+"""
+export.py: CSV cells and a streamed export through the local sink
+"""
+
+import csv
+import gzip
+import io
+import json
+from decimal import Decimal
+from export import csv_value, export_jobs, LocalExportSink, CSV_FIELDS
+
+
+def test_csv_value_flattens_attributes():
+    assert csv_value(None) == ''
+    assert csv_value('Acme') == 'Acme'
+    assert csv_value(Decimal('120000')) == '120000'
+    assert csv_value(['python', 'aws']) == 'python;aws'
+    assert csv_value({'b', 'a'}) == 'a;b'
+    assert csv_value({'max': Decimal('2'), 'min': 1}) == '{"max": 2, "min": 1}'
+
+
+def test_csv_value_neutralizes_formulas():
+    for value in ('=HYPERLINK("http://x")', '+1+2', '@SUM(A1)', '-2+3', '\tcmd', '\r=1'):
+        assert csv_value(value) == f"'{value}"
+    assert csv_value(['=cmd', 'python']) == "'=cmd;python"
+    # Plain numbers stay numbers
+    assert csv_value('-12.5') == '-12.5'
+    assert csv_value(-3) == '-3'
+    assert csv_value('a=b') == 'a=b'
+
+
+def test_csv_export_round_trips(dynamodb, tmp_path):
+    item = dynamodb.create_job_item('u1', 'https://example.com/jobs/1', {
+        'company': '=Acme', 'title': 'Engineer, "Platform"', 'tags': ['python', 'aws'],
+        'notes': 'Line one\nline two'
+    })
+    assert dynamodb.put_job(item)
+
+    result = export_jobs('u1', 'csv', LocalExportSink(str(tmp_path)))
+    assert result['jobs'] == 1
+    with open(result['location'], 'rb') as f:
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(f.read()).decode('utf-8'), newline='')))
+
+    assert list(rows[0]) == CSV_FIELDS
+    assert rows[0]['company'] == "'=Acme"
+    assert rows[0]['title'] == 'Engineer, "Platform"'
+    assert rows[0]['notes'] == 'Line one\nline two'
+    assert rows[0]['tags'] == 'python;aws'
+
+
+def test_ndjson_export_keeps_public_fields(dynamodb, tmp_path):
+    item = dynamodb.create_job_item('u1', 'https://example.com/jobs/1', {'company': 'Acme'})
+    assert dynamodb.put_job(item)
+
+    result = export_jobs('u1', 'ndjson', LocalExportSink(str(tmp_path)))
+    with open(result['location'], 'rb') as f:
+        jobs = [json.loads(line) for line in gzip.decompress(f.read()).splitlines()]
+    assert [job['job_id'] for job in jobs] == [item['job_id']]
+    assert 'PK' not in jobs[0]
@@ -0,0 +1,60 @@
+"""
+funnel.py: stage counters, log replay and the summary
+"""
+
+from funnel import days_between, previous_stage, stage_counters, replay_events, histogram_median, summarize_funnel
+
+
+def test_days_between_is_whole_and_never_negative():
+    assert days_between('2026-01-01T00:00:00+00:00', '2026-01-03T12:00:00+00:00') == 2
+    assert days_between('2026-01-03T00:00:00+00:00', '2026-01-01T00:00:00+00:00') == 0
+
+
+def test_previous_stage_skips_unreached_stages():
+    stage_ts = {'Captured': '2026-01-01T00:00:00+00:00'}
+    assert previous_stage(stage_ts, 'Interview') == 'Captured'
+    assert previous_stage(stage_ts, 'Rejected') == 'Captured'
+    assert previous_stage({}, 'Applied') is None
+
+
+def test_stage_counters_count_each_stage_once():
+    stage_ts = {'Captured': '2026-01-01T00:00:00+00:00', 'Applied': '2026-01-02T00:00:00+00:00'}
+    assert stage_counters(stage_ts, 'Interview', '2026-01-09T00:00:00+00:00') == {
+        'reached#Interview': 1, 'lag#Applied#Interview#7': 1
+    }
+    assert stage_counters(stage_ts, 'Applied', '2026-01-09T00:00:00+00:00') == {}
+    assert stage_counters({}, 'Captured', '2026-01-01T00:00:00+00:00') == {'reached#Captured': 1}
+
+
+def test_replay_matches_incremental_counters():
+    events = [
+        {'job_id': 'a', 'to_status': 'Applied', 'ts': '2026-01-03T00:00:00+00:00'},
+        {'job_id': 'a', 'to_status': 'Captured', 'ts': '2026-01-01T00:00:00+00:00'},
+        {'job_id': 'a', 'to_status': 'Captured', 'ts': '2026-01-04T00:00:00+00:00'},
+        {'job_id': 'b', 'to_status': 'Rejected', 'ts': '2026-01-02T00:00:00+00:00'},
+    ]
+    counters, stages = replay_events(events)
+    assert counters == {
+        'reached#Captured': 1, 'reached#Applied': 1, 'lag#Captured#Applied#2': 1, 'reached#Rejected': 1
+    }
+    assert stages['a'] == {'Captured': '2026-01-01T00:00:00+00:00', 'Applied': '2026-01-03T00:00:00+00:00'}
+
+
+def test_histogram_median():
+    assert histogram_median({}) is None
+    assert histogram_median({3: 1}) == 3
+    assert histogram_median({1: 1, 5: 1}) == 3
+    assert histogram_median({1: 2, 9: 1}) == 1
+
+
+def test_summary_conversion_and_medians():
+    summary = summarize_funnel({
+        'reached#Captured': 10, 'reached#Applied': 5, 'reached#Rejected': 2,
+        'lag#Captured#Applied#1': 3, 'lag#Captured#Applied#4': 2
+    })
+    funnel = {stage['stage']: stage for stage in summary['funnel']}
+    assert funnel['Applied']['reached'] == 5 and funnel['Applied']['conversion'] == 0.5
+    assert funnel['Interview']['reached'] == 0
+    assert summary['rejected'] == 2
+    assert summary['median_days'] == {'Captured->Applied': 1}
+    assert summary['samples'] == {'Captured->Applied': 5}
@@ -0,0 +1,54 @@
+"""
+Ingest idempotency keys: lease ownership and which responses replay
+"""
+
+import json
+import pytest
+
+
+def ingest_event(key):
+    return {
+        'requestContext': {'authorizer': {'claims': {'sub': 'u1'}}},
+        'headers': {'Idempotency-Key': key},
+        'body': json.dumps({'url': 'https://example.com/jobs/1'})
+    }
+
+
+@pytest.fixture
+def handlers(dynamodb, monkeypatch):
+    import handlers
+    monkeypatch.setattr(handlers, 'admit_ingest', lambda user_id: (True, 0, None))
+    return handlers
+
+
+def test_only_the_owner_releases_or_completes_a_key(dynamodb):
+    assert dynamodb.acquire_idempotency_key('u1', 'k1', 'hash', 'first')[0] == 'claimed'
+
+    assert not dynamodb.release_idempotency_key('u1', 'k1', 'second')
+    assert not dynamodb.complete_idempotency_key('u1', 'k1', 'second', 200, '{}')
+    assert dynamodb.get_idempotency_record('u1', 'k1')['state'] == 'in_progress'
+
+    assert dynamodb.release_idempotency_key('u1', 'k1', 'first')
+    assert dynamodb.get_idempotency_record('u1', 'k1') is None
+
+
+def test_server_errors_free_the_key(dynamodb, handlers, monkeypatch):
+    calls = []
+
+    def process_job(url, user_id, resume_url, title, context):
+        calls.append(url)
+        if len(calls) == 1:
+            return {'status': 'failed', 'job_id': 'j1', 'applied_ts': '2026-01-01T00:00:00+00:00', 'step': 'analyze'}
+        return {'status': 'captured', 'job_id': 'j2', 'applied_ts': '2026-01-01T00:00:01+00:00'}
+
+    monkeypatch.setattr(handlers, 'process_job', process_job)
+
+    assert handlers.handle_job_ingest(ingest_event('k1'), None)['statusCode'] == 500
+    assert dynamodb.get_idempotency_record('u1', 'k1') is None
+
+    assert handlers.handle_job_ingest(ingest_event('k1'), None)['statusCode'] == 202
+    replayed = handlers.handle_job_ingest(ingest_event('k1'), None)
+    assert replayed['statusCode'] == 202
+    assert replayed['headers']['Idempotent-Replayed'] == 'true'
+    assert json.loads(replayed['body'])['job_id'] == 'j2'
+    assert len(calls) == 2
@@ -0,0 +1,88 @@
+"""
+pagination.py: signed cursors and page index arithmetic
+"""
+
+import pytest
+import pagination
+from pagination import (
+    make_scope, encode_cursor, decode_cursor, position_from_key, page_shard, page_counts, group_positions,
+    locate_page, position_in_month, total_pages
+)
+
+
+def test_cursor_round_trip_is_bound_to_user_and_scope():
+    scope = make_scope(status='Applied', company=None)
+    cursor = encode_cursor('u1', '2026-01-01T00:00:00+00:00#abc', scope)
+    assert decode_cursor('u1', cursor, scope) == '2026-01-01T00:00:00+00:00#abc'
+    with pytest.raises(ValueError):
+        decode_cursor('u2', cursor, scope)
+    with pytest.raises(ValueError):
+        decode_cursor('u1', cursor, '')
+
+
+def test_tampered_cursor_is_rejected():
+    payload, signature = encode_cursor('u1', '2026-01-01#abc').split('.')
+    forged = pagination._b64encode(b'2026-12-31#abc')
+    with pytest.raises(ValueError):
+        decode_cursor('u1', f'{forged}.{signature}')
+    with pytest.raises(ValueError):
+        decode_cursor('u1', 'not-a-cursor')
+
+
+def test_cursors_are_refused_without_a_secret(monkeypatch):
+    monkeypatch.setattr(pagination, 'PAGINATION_SECRET', '')
+    with pytest.raises(RuntimeError):
+        encode_cursor('u1', '2026-01-01#abc')
+
+
+def test_startup_check_requires_a_long_secret(monkeypatch):
+    pagination.require_secret()
+    for secret in ('', 'change-me'):
+        monkeypatch.setattr(pagination, 'PAGINATION_SECRET', secret)
+        with pytest.raises(RuntimeError, match='PAGINATION_SECRET'):
+            pagination.require_secret()
+
+
+def test_scope_ignores_empty_filters():
+    assert make_scope(tag='x', status=None, company='') == 'tag=x'
+
+
+def test_position_from_key_works_for_every_index():
+    assert position_from_key({'SK': 'JOB#2026-01-01T00:00:00+00:00#abc'}) == '2026-01-01T00:00:00+00:00#abc'
+    assert position_from_key({'SK': 'TAG#python#2026-01-01#abc'}) == '2026-01-01#abc'
+
+
+def test_shards_split_months_by_job_id():
+    assert page_shard('2026-03-04T00:00:00+00:00#f00d') == '2026-03#f'
+    assert group_positions(['2026-03-01#a1', '2026-03-02#a2', '2026-04-01#b1']) == {
+        '2026-03#a': ['2026-03-01#a1', '2026-03-02#a2'], '2026-04#b': ['2026-04-01#b1']
+    }
+
+
+def test_page_counts_read_only_month_attributes():
+    item = {'PK': 'USER#u1', 'SK': 'VERSION', 'version': 7, 'updated_at': 1, 'p2026-01': 3}
+    assert page_counts(item) == {'2026-01': 3}
+
+
+def test_locate_page_walks_months_newest_first():
+    counts = {'2026-01': 5, '2026-02': 0, '2026-03': 3}
+    assert locate_page(counts, 1, 4) is None
+    # Page 2 of 4 starts after the 4th newest job: the newest of January
+    assert locate_page(counts, 2, 4) == ('2026-01', 0)
+    assert locate_page(counts, 2, 2) == ('2026-03', 1)
+    # Past the end: the oldest job
+    assert locate_page(counts, 10, 4) == ('2026-01', 4)
+    assert locate_page({}, 2, 4) is None
+
+
+def test_position_in_month_clamps_to_the_oldest():
+    positions = ['2026-01-03#c', '2026-01-01#a', '2026-01-02#b']
+    assert position_in_month(positions, 0) == '2026-01-03#c'
+    assert position_in_month(positions, 2) == '2026-01-01#a'
+    assert position_in_month(positions, 5) == '2026-01-01#a'
+    assert position_in_month([], 0) is None
+
+
+def test_total_pages():
+    assert total_pages(0, 10) == 1
+    assert total_pages(21, 10) == 3
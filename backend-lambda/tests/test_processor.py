@@ -0,0 +1,44 @@
+"""
+processor.single_flight_async: one run across concurrent coroutines
+"""
+
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def processor(dynamodb, monkeypatch):
+    import processor
+    monkeypatch.setattr(processor, 'FLIGHT_POLL_SECONDS', 0.01)
+    return processor
+
+
+def test_followers_await_the_leaders_result(processor):
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.1)
+        return {'title': 'Engineer'}
+
+    async def main():
+        return await asyncio.gather(*(processor.single_flight_async('scrape', 'key', work) for _ in range(3)))
+
+    assert asyncio.run(main()) == [{'title': 'Engineer'}] * 3
+    assert len(runs) == 1
+
+
+def test_a_failed_leader_releases_the_lease(processor, dynamodb):
+    async def work():
+        raise RuntimeError('scrape failed')
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(processor.single_flight_async('scrape', 'key', work))
+    assert dynamodb.get_flight('scrape', 'key') is None
+
+    async def retry():
+        return None
+
+    # Unshareable results are not published either
+    assert asyncio.run(processor.single_flight_async('scrape', 'key', retry)) is None
+    assert dynamodb.get_flight('scrape', 'key') is None
@@ -0,0 +1,53 @@
+"""
+profiling.profile_invocation: artifacts and one profile at a time
+"""
+
+import os
+import json
+import threading
+import pytest
+import profiling
+
+
+@pytest.fixture
+def sink_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'get_sink', lambda: profiling.LocalSink(str(tmp_path)))
+    return tmp_path
+
+
+def written(directory):
+    return sorted(name for _, _, names in os.walk(directory) for name in names)
+
+
+def test_profiled_invocation_writes_profile_and_summary(sink_dir):
+    response = profiling.profile_invocation(lambda event, context: {'statusCode': 200}, {'path': '/api/jobs'},
+                                            None, 'env', 'get_jobs')
+    assert response == {'statusCode': 200}
+    assert [name.split('.', 1)[1] for name in written(sink_dir)] == ['json', 'prof']
+    summary = json.loads(next(sink_dir.rglob('*.json')).read_text())
+    assert (summary['route'], summary['reason']) == ('get_jobs', 'env')
+    assert summary['peak_memory_bytes'] > 0
+    assert not profiling.profile_lock.locked()
+
+
+def test_concurrent_invocation_runs_unprofiled(sink_dir):
+    inside = threading.Event()
+    release = threading.Event()
+
+    def slow(event, context):
+        inside.set()
+        release.wait(5)
+        return {'statusCode': 200}
+
+    worker = threading.Thread(target=profiling.profile_invocation, args=(slow, {}, None, 'env', 'first'))
+    worker.start()
+    inside.wait(5)
+    try:
+        response = profiling.profile_invocation(lambda event, context: {'statusCode': 201}, {}, None, 'env', 'second')
+    finally:
+        release.set()
+        worker.join()
+
+    assert response == {'statusCode': 201}
+    assert not any('second' in str(path) for path in sink_dir.rglob('*'))
+    assert any('first' in str(path) for path in sink_dir.rglob('*'))
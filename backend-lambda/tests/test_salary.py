@@ -0,0 +1,69 @@
+"""
+salary.py: compensation parsing and distribution
+"""
+
+import pytest
+from salary import parse_salary, salary_fields, salary_distribution, percentile
+
+
+@pytest.mark.parametrize('text, low, high, currency, period', [
+    ('$45 - $60 per hour', 45 * 2080, 60 * 2080, 'USD', 'hour'),
+    ('€70k', 70_000, 70_000, 'EUR', 'year'),
+    ('120,000 - 150,000 CAD', 120_000, 150_000, 'CAD', 'year'),
+    ('120-150k', 120_000, 150_000, 'USD', 'year'),
+    ('$120K–$150K plus equity', 120_000, 150_000, 'USD', 'year'),
+    ('CA$90,000 - CA$100,000', 90_000, 100_000, 'CAD', 'year'),
+    ('USD 90,000 to 110,000 per year', 90_000, 110_000, 'USD', 'year'),
+    ('100 000 €', 100_000, 100_000, 'EUR', 'year'),
+    ('45-60 per hour', 45 * 2080, 60 * 2080, 'USD', 'hour'),
+    ('$25/hr', 25 * 2080, 25 * 2080, 'USD', 'hour'),
+    ('£4,000 per month', 48_000, 48_000, 'GBP', 'month'),
+    ('120000', 120_000, 120_000, 'USD', 'year'),
+])
+def test_parse_salary(text, low, high, currency, period):
+    assert parse_salary(text) == {'salary_min': low, 'salary_max': high, 'currency': currency, 'period': period}
+
+
+def test_percentages_are_not_amounts():
+    assert parse_salary('15% bonus') is None
+    assert parse_salary('£50,000 + 10% bonus')['salary_min'] == 50_000
+
+
+def test_amounts_marked_as_money_win_over_other_numbers():
+    parsed = parse_salary('3 days onsite, $150k base')
+    assert (parsed['salary_min'], parsed['salary_max']) == (150_000, 150_000)
+
+
+def test_up_to_is_an_upper_bound_only():
+    parsed = parse_salary('Up to $200,000 with 15% bonus')
+    assert (parsed['salary_min'], parsed['salary_max']) == (None, 200_000)
+    assert salary_fields('up to 80k') == {'salary_max': 80_000, 'currency': 'USD'}
+    # A full range after "up to" still has both bounds
+    assert parse_salary('up to $90k - $100k')['salary_min'] == 90_000
+
+
+def test_unparseable_text():
+    assert parse_salary('Competitive') is None
+    assert parse_salary(None) is None
+    assert salary_fields('DOE') == {}
+
+
+def test_distribution_per_currency():
+    jobs = [
+        {'salary_min': 100_000, 'salary_max': 120_000, 'currency': 'USD'},
+        {'salary_min': 140_000, 'salary_max': 160_000, 'currency': 'USD'},
+        {'salary_min': 60_000, 'salary_max': 60_000, 'currency': 'EUR'},
+        {'salary_max': 200_000, 'currency': 'USD'},
+        {'status': 'Applied'}
+    ]
+    result = salary_distribution(jobs, bucket_size=20_000)
+    assert result['USD']['count'] == 2
+    assert (result['USD']['min'], result['USD']['max']) == (110_000, 150_000)
+    assert result['USD']['percentiles']['p50'] == 130_000
+    assert result['USD']['histogram'] == [{'from': 100_000, 'to': 120_000, 'count': 1}, {'from': 140_000, 'to': 160_000, 'count': 1}]
+    assert result['EUR']['count'] == 1
+
+
+def test_percentile_interpolates():
+    assert percentile([10, 20, 30, 40], 50) == 25
+    assert percentile([], 50) == 0
@@ -0,0 +1,61 @@
+"""
+search_index.py: tokenizing, ranking and chunk encoding
+"""
+
+from search_index import (
+    SearchIndex, tokenize, build_document, make_doc_ref, parse_doc_ref, chunk_for, encode_chunk, decode_chunk
+)
+
+
+def index_of(*jobs):
+    docs = {make_doc_ref(job['applied_ts'], job['job_id']): build_document(job) for job in jobs}
+    return SearchIndex({'00': (1, docs)})
+
+
+def test_tokenize_keeps_language_names_and_drops_stopwords():
+    assert tokenize('Senior C++ and C# engineer, Node.js for the team.') == [
+        'senior', 'c++', 'c#', 'engineer', 'node.js', 'team'
+    ]
+
+
+def test_build_document_weights_fields():
+    doc = build_document({'title': 'Python Engineer', 'company': 'Acme', 'tags': ['python'], 'notes': 'python'})
+    assert doc == {'python': 3 + 2 + 1, 'engineer': 3, 'acme': 3}
+
+
+def test_doc_ref_round_trip():
+    ref = make_doc_ref('2026-01-02T03:04:05+00:00', 'abc123')
+    assert parse_doc_ref(ref) == {'applied_ts': '2026-01-02T03:04:05+00:00', 'job_id': 'abc123'}
+    assert chunk_for('abc123') == chunk_for('abc123')
+
+
+def test_chunk_round_trip():
+    docs = {'ref': {'python': 3}}
+    assert decode_chunk(encode_chunk(docs)) == docs
+    assert decode_chunk(None) == {}
+
+
+def test_search_requires_every_token_and_ranks_exact_matches_first():
+    index = index_of(
+        {'applied_ts': '2026-01-01', 'job_id': 'a', 'title': 'Python Engineer'},
+        {'applied_ts': '2026-01-02', 'job_id': 'b', 'title': 'Pythonista Engineer'},
+        {'applied_ts': '2026-01-03', 'job_id': 'c', 'title': 'Java Engineer'}
+    )
+    assert [ref for ref, _ in index.search('python eng')] == ['2026-01-01#a', '2026-01-02#b']
+    assert index.search('python golang') == []
+    assert index.search('the') == []
+
+
+def test_search_breaks_ties_newest_first():
+    index = index_of(
+        {'applied_ts': '2026-01-01', 'job_id': 'a', 'company': 'Acme'},
+        {'applied_ts': '2026-02-01', 'job_id': 'b', 'company': 'Acme'}
+    )
+    assert [ref for ref, _ in index.search('acme')] == ['2026-02-01#b', '2026-01-01#a']
+
+
+def test_with_chunks_leaves_the_original_index_unchanged():
+    index = index_of({'applied_ts': '2026-01-01', 'job_id': 'a', 'title': 'Python Engineer'})
+    updated = index.with_chunks({'00': (2, {'2026-01-01#a': build_document({'title': 'Rust Engineer'})})})
+    assert updated.search('python') == [] and updated.versions() == {'00': 2}
+    assert index.search('python') and index.versions() == {'00': 1}
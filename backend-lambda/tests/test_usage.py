@@ -0,0 +1,77 @@
+"""
+usage.py pricing and summaries, and the db.py daily roll-ups
+"""
+
+from datetime import datetime, timezone
+
+import usage
+from usage import estimate_cost_micros, get_model_pricing, summarize_usage
+
+
+def record(model_id, **tokens):
+    return {'model_id': model_id, 'input_tokens': 0, 'output_tokens': 0,
+            'cache_read_tokens': 0, 'cache_write_tokens': 0, **tokens}
+
+
+def test_pricing_matches_anthropic_and_bedrock_ids_by_substring():
+    assert get_model_pricing('claude-haiku-4-5-20251001') == usage.MODEL_PRICING['haiku-4-5']
+    assert get_model_pricing('us.anthropic.claude-haiku-4-5-20251001-v1:0') == usage.MODEL_PRICING['haiku-4-5']
+    assert get_model_pricing('us.anthropic.claude-sonnet-4-5-20250929-v1:0') == usage.MODEL_PRICING['sonnet-4-5']
+    assert get_model_pricing('some-new-model') == usage.DEFAULT_PRICING
+    assert get_model_pricing(None) == usage.DEFAULT_PRICING
+
+
+def test_cost_is_micro_dollars_per_token_kind():
+    # USD per million tokens == micro-dollars per token
+    assert estimate_cost_micros(record('claude-haiku-4-5', input_tokens=1000, output_tokens=200)) == 1000 + 1000
+    assert estimate_cost_micros(record('claude-sonnet-4-5', cache_read_tokens=10000)) == 3000
+    assert estimate_cost_micros(record('claude-sonnet-4-5', cache_write_tokens=1000)) == 3750
+    assert estimate_cost_micros({'model_id': 'claude-opus-4-1'}) == 0
+
+
+def test_summary_totals_models_calls_and_cost():
+    records = [
+        record('claude-haiku-4-5', input_tokens=1000, output_tokens=200),
+        record('claude-sonnet-4-5', input_tokens=2000, output_tokens=100, cache_read_tokens=500),
+        record('claude-haiku-4-5', input_tokens=500),
+    ]
+    summary = summarize_usage(records)
+
+    assert summary['input_tokens'] == 3500
+    assert summary['output_tokens'] == 300
+    assert summary['cache_read_tokens'] == 500
+    assert summary['cache_write_tokens'] == 0
+    assert summary['model_ids'] == ['claude-haiku-4-5', 'claude-sonnet-4-5']
+    assert summary['calls'] == 3
+    assert summary['cost_micros'] == sum(estimate_cost_micros(r) for r in records)
+    assert summarize_usage([]) is None
+
+
+def test_usage_rolls_up_per_user_and_domain(dynamodb):
+    day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    first = summarize_usage([record('claude-haiku-4-5', input_tokens=1000, output_tokens=200)])
+    second = summarize_usage([record('claude-haiku-4-5', input_tokens=500, cache_read_tokens=300)])
+
+    assert dynamodb.record_llm_usage('user-1', 'linkedin.com', first)
+    assert dynamodb.record_llm_usage('user-1', 'linkedin.com', second)
+    assert dynamodb.record_llm_usage('user-2', '', first)
+
+    keys = [
+        {'PK': 'USER#user-1', 'SK': f'USAGE#{day}'},
+        {'PK': f'USAGE#{day}', 'SK': 'USER#user-1'},
+        {'PK': f'USAGE#{day}', 'SK': 'DOMAIN#linkedin.com'},
+    ]
+    for key in keys:
+        item = dynamodb.table.get_item(Key=key)['Item']
+        assert int(item['input_tokens']) == 1500
+        assert int(item['cache_read_tokens']) == 300
+        assert int(item['calls']) == 2
+        assert int(item['cost_micros']) == first['cost_micros'] + second['cost_micros']
+
+    assert dynamodb.get_user_usage('user-1')[0]['day'] == day
+
+    rows = {(row['kind'], row['key']): row for row in dynamodb.get_daily_usage_report(day)}
+    assert set(rows) == {('USER', 'user-1'), ('USER', 'user-2'), ('DOMAIN', 'linkedin.com'), ('DOMAIN', 'unknown')}
+    assert rows[('USER', 'user-2')]['input_tokens'] == 1000
+    assert rows[('DOMAIN', 'linkedin.com')]['calls'] == 2
+    assert dynamodb.get_daily_usage_report('1999-01-01') == []
@@ -0,0 +1,26 @@
+"""
+utils.canonicalize_url: which query parameters survive
+"""
+
+from utils import canonicalize_url
+
+
+def test_clear_trackers_are_stripped_everywhere():
+    url = 'https://www.Example.com/careers/123/?utm_source=x&gclid=1&fbclid=2&mc_eid=3&_hsenc=4&id=9#apply'
+    assert canonicalize_url(url) == 'https://example.com/careers/123?id=9'
+
+
+def test_generic_names_are_kept_on_unknown_sites():
+    url = 'https://example.com/jobs?source=feed&ref=2&from=home&sk=a&tk=b&eid=7&origin=ca'
+    assert canonicalize_url(url) == 'https://example.com/jobs?eid=7&from=home&origin=ca&ref=2&sk=a&source=feed&tk=b'
+
+
+def test_board_rules_apply_to_their_hosts():
+    assert canonicalize_url('https://www.linkedin.com/jobs/view/42/?refId=abc&trackingId=def&eid=1') == \
+        'https://linkedin.com/jobs/view/42'
+    assert canonicalize_url('https://uk.indeed.com/viewjob?jk=abc&from=serp&tk=1&vjs=3') == \
+        'https://uk.indeed.com/viewjob?jk=abc'
+    assert canonicalize_url('https://boards.greenhouse.io/acme/jobs/1?gh_jid=1&gh_src=li') == \
+        'https://boards.greenhouse.io/acme/jobs/1?gh_jid=1'
+    # Suffix match on a domain boundary only
+    assert canonicalize_url('https://notindeed.com/job?from=a') == 'https://notindeed.com/job?from=a'
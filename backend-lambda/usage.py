@@ -0,0 +1,132 @@
+"""
+LLM token and cost accounting for JobTrackr
+Summarizes per-call usage records and reports daily roll-ups
+
+Usage:
+    python usage.py report --date 2025-10-12 [--top 20]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (input, output, cache read, cache write)
+# Matched by substring so Anthropic and Bedrock model ids share entries
+MODEL_PRICING = {
+    '3-5-haiku': (0.80, 4.00, 0.08, 1.00),
+    'haiku-4-5': (1.00, 5.00, 0.10, 1.25),
+    'sonnet-4-5': (3.00, 15.00, 0.30, 3.75),
+    'opus-4-1': (15.00, 75.00, 1.50, 18.75),
+}
+DEFAULT_PRICING = tuple(float(p) for p in os.getenv('DEFAULT_MODEL_PRICING', '1,5,0.1,1.25').split(','))
+# Batch API requests (records flagged 'batch') are billed at half price
+BATCH_PRICE_FACTOR = 0.5
+
+USAGE_FIELDS = ['input_tokens', 'output_tokens', 'cache_read_tokens', 'cache_write_tokens']
+
+
+def get_model_pricing(model_id: str) -> tuple:
+    """
+    Return (input, output, cache read, cache write) USD per million tokens
+    """
+    for key, pricing in MODEL_PRICING.items():
+        if key in (model_id or ''):
+            return pricing
+    return DEFAULT_PRICING
+
+
+def estimate_cost_micros(record: Dict[str, Any]) -> int:
+    """
+    Estimate the cost of one usage record in micro-dollars (USD * 1e6)
+    Integers keep DynamoDB counters exact without Decimal arithmetic
+    """
+    input_price, output_price, cache_read_price, cache_write_price = get_model_pricing(record.get('model_id', ''))
+    # Price is USD per 1M tokens, so tokens * price == micro-dollars
+    cost = (
+        record.get('input_tokens', 0) * input_price
+        + record.get('output_tokens', 0) * output_price
+        + record.get('cache_read_tokens', 0) * cache_read_price
+        + record.get('cache_write_tokens', 0) * cache_write_price
+    )
+    if record.get('batch'):
+        cost *= BATCH_PRICE_FACTOR
+    return int(round(cost))
+
+
+def summarize_usage(records: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Sum usage records from one ingest into the shape stored on the job item
+
+    Returns:
+        Totals with model_ids, call count and cost_micros, or None if empty
+    """
+    if not records:
+        return None
+
+    summary: Dict[str, Any] = {field: 0 for field in USAGE_FIELDS}
+    model_ids = []
+    cost_micros = 0
+    for record in records:
+        for field in USAGE_FIELDS:
+            summary[field] += record.get(field, 0)
+        if record.get('model_id') and record['model_id'] not in model_ids:
+            model_ids.append(record['model_id'])
+        cost_micros += estimate_cost_micros(record)
+
+    summary['model_ids'] = model_ids
+    summary['calls'] = len(records)
+    summary['cost_micros'] = cost_micros
+    return summary
+
+
+def format_report(rows: List[Dict[str, Any]], top: int = 20) -> str:
+    """
+    Format daily roll-up rows (from db.get_daily_usage_report) as a table
+    """
+    lines = []
+    for kind in ('USER', 'DOMAIN'):
+        kind_rows = [r for r in rows if r['kind'] == kind]
+        kind_rows.sort(key=lambda r: r.get('cost_micros', 0), reverse=True)
+        lines.append(f"Top {kind.lower()}s by cost")
+        lines.append(f"{'key':<40} {'calls':>7} {'input':>10} {'output':>10} {'cached':>10} {'cost $':>10}")
+        for row in kind_rows[:top]:
+            lines.append(
+                f"{row['key'][:40]:<40} {int(row.get('calls', 0)):>7} {int(row.get('input_tokens', 0)):>10} "
+                f"{int(row.get('output_tokens', 0)):>10} {int(row.get('cache_read_tokens', 0)):>10} "
+                f"{int(row.get('cost_micros', 0)) / 1e6:>10.4f}"
+            )
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    CLI entry point for usage reports
+    """
+    arg_parser = argparse.ArgumentParser(description='JobTrackr LLM usage report')
+    sub = arg_parser.add_subparsers(dest='command', required=True)
+    report = sub.add_parser('report', help='Daily usage by user and domain')
+    report.add_argument('--date', default=datetime.now(timezone.utc).strftime('%Y-%m-%d'))
+    report.add_argument('--top', type=int, default=20)
+    report.add_argument('--json', action='store_true', help='Print raw rows as JSON')
+    args = arg_parser.parse_args(argv)
+
+    from db import get_daily_usage_report
+
+    rows = get_daily_usage_report(args.date)
+    if args.json:
+        print(json.dumps(rows, default=int, indent=2))
+    else:
+        print(f"LLM usage for {args.date}\n")
+        print(format_report(rows, args.top))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
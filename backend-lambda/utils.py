@@ -4,10 +4,26 @@ Utility functions for the JobTrackr Lambda API
 
 import json
 import re
+import hashlib
 from datetime import datetime
-from urllib.parse import urlparse
+from decimal import Decimal
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 from typing import Dict, Any, Optional
 
+IDEMPOTENCY_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_.:\-]{1,255}$')
+# Query parameters that track the visitor rather than select the posting, on
+# any site. Generic names (source, ref, from, ...) select content on some
+# boards, so they are only stripped where SITE_TRACKING_PARAMS lists them
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|gclid|fbclid|mc_\w+|_hs\w+)$', re.I)
+# Per-board tracking parameters (lower-case), matched on the host's domain suffix
+SITE_TRACKING_PARAMS = {
+    'linkedin.com': {'refid', 'trk', 'trkinfo', 'trackingid', 'lipi', 'ebp', 'eid', 'alid'},
+    'indeed.com': {'from', 'tk', 'vjs', 'alid', 'sk'},
+    'glassdoor.com': {'src', 'guid', 'pos', 'ao'},
+    'greenhouse.io': {'gh_src', 'source'},
+    'lever.co': {'lever-source', 'lever-origin', 'source'},
+}
+
 
 def parse_request_body(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
@@ -29,10 +45,47 @@ def parse_request_body(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
 
 
-def create_response(status_code: int, data: Dict[str, Any], cors_headers: bool = True) -> Dict[str, Any]:
+def json_default(value: Any) -> Any:
     """
-    Create standardized Lambda response with consistent structure
-    All responses include timestamp and request_id for traceability
+    JSON encoder fallback for DynamoDB types (sets, and Decimal from boto3's resource layer)
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """
+    Case-insensitive request header lookup (API Gateway keeps client casing)
+    """
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def is_valid_idempotency_key(key: str) -> bool:
+    """
+    Idempotency keys are 1-255 characters of letters, digits, '-', '_', '.' or ':'
+    (UUIDs and ULIDs both fit)
+    """
+    return bool(IDEMPOTENCY_KEY_PATTERN.match(key or ''))
+
+
+def fingerprint_request(data: Dict[str, Any]) -> str:
+    """
+    Stable hash of request fields, used to detect an idempotency key
+    reused with a different body
+    """
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def response_headers(cors_headers: bool = True) -> Dict[str, str]:
+    """
+    Headers sent with every API response
     """
     headers = {
         'Content-Type': 'application/json'
@@ -41,10 +94,23 @@ def create_response(status_code: int, data: Dict[str, Any], cors_headers: bool =
     if cors_headers:
         headers.update({
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+            'Access-Control-Allow-Headers': 'Content-Type,Authorization,Idempotency-Key,X-Profile',
+            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+            'Access-Control-Expose-Headers': 'Retry-After,Idempotent-Replayed'
         })
+    return headers
+
 
+def create_response(
+    status_code: int,
+    data: Dict[str, Any],
+    cors_headers: bool = True,
+    headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Create standardized Lambda response with consistent structure
+    All responses include timestamp and request_id for traceability
+    """
     # Standardize response structure
     response_body = {
         'statusCode': status_code,
@@ -58,14 +124,32 @@ def create_response(status_code: int, data: Dict[str, Any], cors_headers: bool =
 
     return {
         'statusCode': status_code,
-        'headers': headers,
-        'body': json.dumps(response_body)
+        'headers': {**response_headers(cors_headers), **(headers or {})},
+        'body': json.dumps(response_body, default=json_default)
     }
 
 
-def create_error_response(status_code: int, error_message: str, error_code: Optional[str] = None, details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def create_replayed_response(status_code: int, body: str) -> Dict[str, Any]:
+    """
+    Return a stored response verbatim for a repeated idempotent request
+    """
+    return {
+        'statusCode': status_code,
+        'headers': {**response_headers(), 'Idempotent-Replayed': 'true'},
+        'body': body
+    }
+
+
+def create_error_response(
+    status_code: int,
+    error_message: str,
+    error_code: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
     """
     Create standardized error response
+    Extra headers (e.g. Retry-After) are added to the standard ones
     """
     error_data = {
         'success': False,
@@ -78,7 +162,7 @@ def create_error_response(status_code: int, error_message: str, error_code: Opti
     if details:
         error_data['error']['details'] = details
 
-    return create_response(status_code, error_data)
+    return create_response(status_code, error_data, headers=headers)
 
 
 def create_success_response(data: Dict[str, Any], status_code: int = 200) -> Dict[str, Any]:
@@ -215,6 +299,34 @@ def validate_url_input(url: str) -> Dict[str, Any]:
     return {"valid": True, "url": url}
 
 
+def site_tracking_params(host: str) -> frozenset:
+    """
+    Tracking parameters specific to a job board host (empty for others)
+    """
+    params = set()
+    for domain, names in SITE_TRACKING_PARAMS.items():
+        if host == domain or host.endswith(f'.{domain}'):
+            params |= names
+    return frozenset(params)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a job URL so the same posting shared with different tracking
+    parameters maps to one key: lower-cased scheme and host, no 'www.',
+    fragment, tracking parameters (global and per-board) or trailing
+    slash, sorted query
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    site_params = site_tracking_params(host)
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                   if not TRACKING_PARAMS.match(k) and k.lower() not in site_params)
+    return urlunparse((parsed.scheme.lower(), host, parsed.path.rstrip('/') or '/', '', urlencode(query), ''))
+
+
 def sanitize_request_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Sanitize request data by removing potentially harmful content
@@ -225,7 +337,7 @@ def sanitize_request_data(data: Dict[str, Any]) -> Dict[str, Any]:
     sanitized = {}
     for key, value in data.items():
         # Only allow specific known fields
-        if key not in ['url', 'resume_url']:
+        if key not in ['url', 'resume_url', 'title']:
             continue
 
         if isinstance(value, str):
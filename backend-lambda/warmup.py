@@ -0,0 +1,133 @@
+"""
+Priming for the module-level clients
+Loads botocore service models, opens pooled connections and renders the
+analysis prompt scaffolding so the first real request does not pay for
+them. Runs on a 'warmup' event, at init (PRIME_ON_INIT) or at ASGI startup
+
+Safe with Lambda SnapStart: before the snapshot only models and prompts
+are loaded; after restore every pool is dropped (connections from before
+the snapshot are dead) and reopened.
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Any
+import db
+import analyzer
+import processor
+from analyzer import get_format_instructions, create_analysis_prompt, create_notes_prompt
+from metrics import emit_metric
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PRIME_ON_INIT = os.getenv('PRIME_ON_INIT', 'false').lower() == 'true'
+
+DYNAMODB_OPERATIONS = [
+    'GetItem', 'PutItem', 'UpdateItem', 'DeleteItem', 'Query', 'Scan',
+    'BatchGetItem', 'BatchWriteItem', 'TransactWriteItems'
+]
+
+primed = False
+
+
+def load_models() -> None:
+    """
+    Force botocore to load the operation models and shapes used per request
+    and render the static parts of the prompts
+    """
+    for operation in DYNAMODB_OPERATIONS:
+        db.client.meta.service_model.operation_model(operation).input_shape
+    if processor.lambda_client:
+        processor.lambda_client.meta.service_model.operation_model('Invoke').input_shape
+
+    for active_parser in (analyzer.parser, analyzer.fields_parser):
+        get_format_instructions(active_parser)
+    create_analysis_prompt('', analyzer.parser, include_notes=True)
+    create_analysis_prompt('', analyzer.fields_parser, include_notes=False)
+    create_notes_prompt('')
+
+
+def open_connections() -> None:
+    """
+    Resolve credentials and open pooled connections (TLS included) to
+    DynamoDB and the LLM provider
+    """
+    db.table.get_item(Key={'PK': 'WARMUP', 'SK': 'WARMUP'}, ProjectionExpression='PK')
+    analyzer.open_connections()
+
+
+def reset_connections() -> None:
+    """
+    Drop every pooled connection; clients reconnect on next use
+    """
+    db.client.close()
+    if processor.lambda_client:
+        processor.lambda_client.close()
+    analyzer.reset_clients()
+
+
+def prime(connect: bool = True) -> Dict[str, Any]:
+    """
+    Prime the container
+
+    Args:
+        connect: Also open connections (False before a snapshot)
+
+    Returns:
+        Milliseconds spent per step
+    """
+    global primed
+    timings: Dict[str, Any] = {}
+    steps = [('models', load_models)] + ([('connections', open_connections)] if connect else [])
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            # Priming is best effort; the first request does the work instead
+            logger.warning(f"Priming step '{name}' failed: {str(e)}")
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        emit_metric('PrimeDuration', timings[name], 'Milliseconds', {'Step': name})
+
+    primed = primed or connect
+    logger.info(f"Primed container: {timings}")
+    return timings
+
+
+def before_snapshot() -> None:
+    prime(connect=False)
+
+
+def after_restore() -> None:
+    reset_connections()
+    prime(connect=True)
+
+
+def init_priming() -> None:
+    """
+    Called once at module init: register the SnapStart hooks when the
+    container is being initialized for a snapshot, otherwise prime now if
+    PRIME_ON_INIT is set
+    """
+    if os.getenv('AWS_LAMBDA_INITIALIZATION_TYPE') == 'snap-start':
+        register_snapshot_hooks()
+    elif PRIME_ON_INIT:
+        prime()
+
+
+def register_snapshot_hooks() -> bool:
+    """
+    Register the SnapStart runtime hooks (Python 3.12+ managed runtime)
+
+    Returns:
+        True if registered, False outside a SnapStart-capable runtime
+    """
+    try:
+        from snapshot_restore_py import register_before_snapshot, register_after_restore
+    except ImportError:
+        return False
+    register_before_snapshot(before_snapshot)
+    register_after_restore(after_restore)
+    return True
@@ -162,18 +162,22 @@ async function sendUrlToBackend(url, title = '') {
 
     console.log('Sending to backend:', BACKEND_URL);
 
-    // Send request to backend
-    const response = await fetch(`${BACKEND_URL}/api/jobs/ingest`, {
+    // Send request to backend; a network error is retried once with the
+    // same Idempotency-Key so the backend replays instead of re-ingesting
+    const idempotencyKey = crypto.randomUUID();
+    const send = () => fetch(`${BACKEND_URL}/api/jobs/ingest`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
-        'Authorization': idToken
+        'Authorization': idToken,
+        'Idempotency-Key': idempotencyKey
       },
       body: JSON.stringify({
         url,
         title
       })
     });
+    const response = await send().catch(send);
 
     const data = await response.json();
 
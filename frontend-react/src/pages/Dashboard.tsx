@@ -44,12 +44,21 @@ function Dashboard() {
       setLoading(true);
       setError(null);
       const lastKey = pageTokens[pageIndex];
-      const response = await api.getJobs(10, lastKey);
+      // Jump straight to pages we have no cursor for
+      const response = await api.getJobs(10, lastKey, undefined, lastKey ? undefined : pageIndex + 1);
       setJobs(response.jobs);
       setCurrentPage(pageIndex);
 
-      // If there's a next page token and we haven't stored it yet
-      if (response.next_page_token && !pageTokens[pageIndex + 1]) {
+      if (response.total_pages) {
+        // Server knows the total; remember the cursor for the next page
+        setTotalPages(response.total_pages);
+        setPageTokens(prev => {
+          const tokens = [...prev];
+          tokens[pageIndex + 1] = response.next_page_token;
+          return tokens;
+        });
+      } else if (response.next_page_token && !pageTokens[pageIndex + 1]) {
+        // If there's a next page token and we haven't stored it yet
         setPageTokens(prev => [...prev, response.next_page_token]);
         setTotalPages(pageIndex + 2);
       } else if (!response.next_page_token) {
@@ -117,12 +126,22 @@ function Dashboard() {
     }
   };
 
-  const handleEditJob = (job: JobApplication) => {
-    setEditingJob(job);
+  const handleEditJob = async (job: JobApplication) => {
+    // The list uses the slim summary projection, so load notes before editing
+    let fullJob = job;
+    try {
+      fullJob = await api.getJob(job.job_id, job.applied_ts);
+    } catch (err) {
+      console.error('Failed to load job details:', err);
+      alert('Failed to load job details. Please try again.');
+      return;
+    }
+
+    setEditingJob(fullJob);
     setEditForm({
-      status: job.status,
-      notes: job.notes || '',
-      resume_url: job.resume_url || ''
+      status: fullJob.status,
+      notes: fullJob.notes || '',
+      resume_url: fullJob.resume_url || ''
     });
     setShowEditModal(true);
   };
@@ -37,8 +37,13 @@ function JobDetail() {
       setError(null);
       // For now, we'll get all jobs and find the specific one
       // In a real app, you'd have a GET /api/jobs/{id} endpoint
-      const response = await api.getJobs(100); // Get more jobs to find the specific one
-      const foundJob = response.jobs.find(j => j.job_id === jobId);
+      const response = await api.getJobs(100, undefined, 'all'); // Get more jobs to find the specific one
+      let foundJob = response.jobs.find(j => j.job_id === jobId);
+
+      // Notes summary is generated on first view when it is still pending
+      if (foundJob && foundJob.notes_status === 'pending') {
+        foundJob = await api.getJob(foundJob.job_id, foundJob.applied_ts);
+      }
       
       if (foundJob) {
         setJob(foundJob);
@@ -10,6 +10,9 @@ export interface JobApplication {
   status: string;
   applied_ts: string;
   salary_range?: string;
+  salary_min?: number;
+  salary_max?: number;
+  currency?: string;
   job_url: string;
   user_id: string;
   last_updated_ts: string;
@@ -17,12 +20,30 @@ export interface JobApplication {
   employment_type?: string;
   tags?: string[];
   notes?: string;
+  notes_status?: 'pending' | 'ready';
   resume_url?: string;
-  type: string;
-  PK: string;
-  SK: string;
-  GSI1PK: string;
-  GSI1SK: string;
+  enrichment_status?: 'captured' | 'scraped' | 'analyzed' | 'failed';
+  type?: string;
+}
+
+export interface JobExport {
+  format: 'ndjson' | 'csv';
+  jobs: number;
+  bytes: number;
+  location: string;
+  url: string;
+  expires_at: string | null;
+}
+
+export interface JobImportSummary {
+  imported: number;
+  duplicates: number;
+  invalid: number;
+  queued: number;
+  not_enriched: number;
+  columns: Record<string, string>;
+  errors: string[];
+  next_row?: number;
 }
 
 export interface IngestJobRequest {
@@ -46,6 +67,9 @@ export interface GetJobsResponse {
   jobs: JobApplication[];
   count: number;
   next_page_token?: string;
+  total?: number;
+  total_pages?: number;
+  page?: number;
 }
 
 export interface JobStats {
@@ -61,6 +85,13 @@ export interface JobStats {
     created_at: string;
   }>;
   application_trends: Record<string, number>;
+  salary_distribution?: Record<string, {
+    count: number;
+    min: number;
+    max: number;
+    percentiles: Record<string, number>;
+    histogram: Array<{ from: number; to: number; count: number }>;
+  }>;
 }
 
 class ApiService {
@@ -92,14 +123,19 @@ class ApiService {
 
   /**
    * Ingest a job URL for processing
+   * A network error is retried once with the same Idempotency-Key, so the
+   * server replays the first result instead of ingesting twice
    */
   async ingestJob(request: IngestJobRequest): Promise<IngestJobResponse> {
     try {
-      const response = await fetch(`${API_URL}/api/jobs/ingest`, {
+      const headers = new Headers(this.getAuthHeader());
+      headers.set('Idempotency-Key', crypto.randomUUID());
+      const send = () => fetch(`${API_URL}/api/jobs/ingest`, {
         method: 'POST',
-        headers: this.getAuthHeader(),
+        headers,
         body: JSON.stringify(request)
       });
+      const response = await send().catch(send);
 
       if (!response.ok) {
         if (response.status === 401) {
@@ -119,14 +155,22 @@ class ApiService {
 
   /**
    * Fetch all job applications for the authenticated user
+   * `fields` selects the projection: 'summary' (server default), 'all' or a comma-separated list
+   * `page` jumps straight to a 1-based page instead of following `lastKey`
    */
-  async getJobs(limit: number = 10, lastKey?: string): Promise<GetJobsResponse> {
+  async getJobs(limit: number = 10, lastKey?: string, fields?: string, page?: number): Promise<GetJobsResponse> {
     try {
       const params = new URLSearchParams();
       params.append('limit', limit.toString());
       if (lastKey) {
         params.append('last_key', lastKey);
       }
+      if (fields) {
+        params.append('fields', fields);
+      }
+      if (page) {
+        params.append('page', page.toString());
+      }
 
       const response = await fetch(`${API_URL}/api/jobs?${params.toString()}`, {
         method: 'GET',
@@ -145,7 +189,10 @@ class ApiService {
       return {
         jobs: data.jobs || [],
         count: data.count || 0,
-        next_page_token: data.next_page_token
+        next_page_token: data.next_page_token,
+        total: data.total,
+        total_pages: data.total_pages,
+        page: data.page
       };
     } catch (error) {
       console.error('Error fetching jobs:', error);
@@ -153,6 +200,32 @@ class ApiService {
     }
   }
 
+  /**
+   * Fetch a single job application (generates pending notes on the server)
+   */
+  async getJob(jobId: string, appliedTs: string): Promise<JobApplication> {
+    try {
+      const response = await fetch(`${API_URL}/api/jobs/${jobId}?applied_ts=${encodeURIComponent(appliedTs)}`, {
+        method: 'GET',
+        headers: this.getAuthHeader()
+      });
+
+      if (!response.ok) {
+        if (response.status === 401) {
+          this.handleAuthError();
+          throw new Error('Authentication expired. Please login again.');
+        }
+        throw new Error(`Failed to fetch job: ${response.status}`);
+      }
+
+      const data = await response.json();
+      return data.job;
+    } catch (error) {
+      console.error('Error fetching job:', error);
+      throw error;
+    }
+  }
+
   /**
    * Update a job application
    */
@@ -200,6 +273,61 @@ class ApiService {
     }
   }
 
+  /**
+   * Import job applications from CSV text (header row first)
+   */
+  async importJobs(csv: string, enrich: boolean = false, startRow: number = 0): Promise<JobImportSummary> {
+    try {
+      const headers = new Headers(this.getAuthHeader());
+      headers.set('Content-Type', 'text/csv');
+      const response = await fetch(`${API_URL}/api/jobs/import?enrich=${enrich}&start_row=${startRow}`, {
+        method: 'POST',
+        headers,
+        body: csv
+      });
+
+      if (!response.ok) {
+        if (response.status === 401) {
+          this.handleAuthError();
+          throw new Error('Authentication expired. Please login again.');
+        }
+        throw new Error(`Failed to import jobs: ${response.status}`);
+      }
+
+      const data = await response.json();
+      return data.import;
+    } catch (error) {
+      console.error('Error importing jobs:', error);
+      throw error;
+    }
+  }
+
+  /**
+   * Export all job applications as a gzip file; returns its download URL
+   */
+  async exportJobs(format: 'ndjson' | 'csv' = 'csv'): Promise<JobExport> {
+    try {
+      const response = await fetch(`${API_URL}/api/jobs/export?format=${format}`, {
+        method: 'POST',
+        headers: this.getAuthHeader()
+      });
+
+      if (!response.ok) {
+        if (response.status === 401) {
+          this.handleAuthError();
+          throw new Error('Authentication expired. Please login again.');
+        }
+        throw new Error(`Failed to export jobs: ${response.status}`);
+      }
+
+      const data = await response.json();
+      return data.export;
+    } catch (error) {
+      console.error('Error exporting jobs:', error);
+      throw error;
+    }
+  }
+
   /**
    * Get job application statistics
    */